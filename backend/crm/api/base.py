@@ -1,18 +1,78 @@
 import abc
 import aiohttp
 import asyncio
-from typing import Dict, Any, Optional
+import time
+from typing import AsyncIterator, Dict, Any, Iterable, Optional
 import logging
+from django.conf import settings
+from .decoding import STREAM_CHUNK_SIZE, get_json_loads, iter_json_chunks
+from .http_cache import ResponseCache, http_cache_enabled
+
+try:
+    from aiohttp.compression_utils import HAS_BROTLI
+except ImportError:
+    HAS_BROTLI = False
 
 logger = logging.getLogger(__name__)
 
+# Сжатие ответов: отчёты и каталоги в JSON сжимаются в 5-10 раз.
+# br - только если установлен brotli/brotlicffi, иначе aiohttp не распакует ответ
+ACCEPT_ENCODING = 'gzip, deflate, br' if HAS_BROTLI else 'gzip, deflate'
+
+
+def resolve_base_url(marketplace_code: str, default: str, base_url: Optional[str] = None) -> str:
+    """
+    Хост API маркетплейса.
+
+    Порядок: явно переданный base_url (api_base_url из учетных данных
+    маркетплейса), затем MARKETPLACE_API_BASE_URLS из настроек, затем
+    боевой хост. Переопределение нужно для локального mock-сервера и прокси.
+    """
+    overrides = getattr(settings, 'MARKETPLACE_API_BASE_URLS', {})
+    return (base_url or overrides.get(marketplace_code) or default).rstrip('/')
+
+
+class RateLimiter:
+    """
+    Ограничение частоты запросов: не больше requests запросов за period
+    секунд, запросы равномерно разносятся во времени. Один ограничитель
+    на клиент - параллельные задачи одного клиента делят его лимит.
+    """
+
+    def __init__(self, requests: int, period: float = 60.0):
+        self.interval = period / requests
+        self._next_slot = 0.0
+
+    async def wait(self):
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
 class BaseAPIClient(abc.ABC):
     """Базовый клиент для работы с API маркетплейсов"""
 
+    # Повторы при ограничении частоты (429), временных ошибках сервера и обрыве соединения
+    MAX_RETRIES = 3
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+    RETRY_BACKOFF = 1.0  # сек, удваивается с каждой попыткой
+    MAX_RETRY_DELAY = 60
+
     def __init__(self, api_key, base_url):
         self.api_key = api_key
         self.base_url = base_url
         self.session: Optional[aiohttp.ClientSession] = None
+        # callable(method, endpoint, duration, status, retry=False, error=None),
+        # вызывается после каждой попытки запроса (см. parsers/metrics.py)
+        self.request_observer = None
+        # Разбор JSON: orjson, если установлен (MARKETPLACE_JSON_DECODER)
+        self.json_loads = get_json_loads()
+        # Кэш ответов для условных запросов (api/http_cache.py), MARKETPLACE_HTTP_CACHE_ENABLED
+        self.response_cache = ResponseCache() if http_cache_enabled() else None
+        # Ограничение частоты запросов по лимитам API (RateLimiter), None - без ограничения
+        self.rate_limiter: Optional[RateLimiter] = None
     
     @abc.abstractmethod
     async def get_headers(self) -> Dict[str, str]:
@@ -26,22 +86,201 @@ class BaseAPIClient(abc.ABC):
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         if self.session:
             await self.session.close()
-    
-    async def make_request(self, method: str, endpoint: str, **kwargs) -> Dict[str, Any]:
-        """Универсальный метод для выполнения запросов"""
+
+    def _observe(self, method, endpoint, started, status, retry=False, error=None):
+        if self.request_observer is not None:
+            self.request_observer(method, endpoint, time.perf_counter() - started, status, retry=retry, error=error)
+
+    def _retry_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Пауза перед повтором: Retry-After, если сервер его прислал, иначе экспоненциальная"""
         try:
-            url = f"{self.base_url}{endpoint}"
-            headers = await self.get_headers()
-
-            async with self.session.request(
-                method=method,
-                url=url,
-                headers=headers,
-                **kwargs
-            ) as response:
-                response.raise_for_status()
-                return await response.json()
-        
-        except Exception as e:
-            logger.error(f"API request error: {str(e)}")
-            raise
\ No newline at end of file
+            delay = float(retry_after)
+        except (TypeError, ValueError):
+            delay = self.RETRY_BACKOFF * 2 ** attempt
+        return min(max(delay, 0), self.MAX_RETRY_DELAY)
+    
+    async def _retry_status(self, attempt: int, method: str, endpoint: str, started: float, response) -> bool:
+        """Ждёт перед повтором, если статус ответа временный и попытки не кончились"""
+        if response.status not in self.RETRY_STATUSES or attempt >= self.MAX_RETRIES:
+            return False
+        delay = self._retry_delay(attempt, response.headers.get('Retry-After'))
+        self._observe(method, endpoint, started, response.status, retry=True)
+        logger.warning(
+            f"API {endpoint}: HTTP {response.status}, повтор {attempt + 1}/{self.MAX_RETRIES} "
+            f"через {delay:.1f} с"
+        )
+        await asyncio.sleep(delay)
+        return True
+
+    async def _retry_connection_error(self, attempt: int, method: str, endpoint: str, started: float,
+                                      error: Exception) -> bool:
+        """Ждёт перед повтором после обрыва соединения; False - попытки кончились"""
+        if attempt < self.MAX_RETRIES:
+            self._observe(method, endpoint, started, None, retry=True)
+            logger.warning(f"API {endpoint}: {str(error)}, повтор {attempt + 1}/{self.MAX_RETRIES}")
+            await asyncio.sleep(self._retry_delay(attempt))
+            return True
+        self._observe(method, endpoint, started, None, error=str(error))
+        logger.error(f"API request error: {str(error)}")
+        return False
+
+    def decode_json(self, body: bytes) -> Any:
+        """Тело ответа как JSON; пустое тело - None (как response.json() aiohttp)"""
+        if not body or body.isspace():
+            return None
+        return self.json_loads(body)
+
+    async def _request_headers(self) -> Dict[str, str]:
+        return {'Accept-Encoding': ACCEPT_ENCODING, **await self.get_headers()}
+
+    def _cache_lookup(self, cache: bool, method: str, url: str, headers: Dict[str, str], kwargs):
+        """Ключ и запись кэша для условного запроса и заголовки с валидаторами записи"""
+        if not cache or self.response_cache is None:
+            return None, None, headers
+        cache_key = self.response_cache.key(method, url, kwargs.get('params'), kwargs.get('json'), headers)
+        cached = self.response_cache.get(cache_key)
+        if cached is not None:
+            headers = {**headers, **cached.validators()}
+        return cache_key, cached, headers
+
+    async def _cached_chunks(self, cached) -> AsyncIterator[bytes]:
+        for chunk in self.response_cache.iter_body(cached, STREAM_CHUNK_SIZE):
+            yield chunk
+
+    @staticmethod
+    async def _tee_chunks(response, writer) -> AsyncIterator[bytes]:
+        """Куски тела ответа; с writer - попутно пишутся в кэш"""
+        async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+            if writer is not None:
+                writer.write(chunk)
+            yield chunk
+
+    async def make_request(self, method: str, endpoint: str, cache: bool = False,
+                           accept_statuses: Iterable[int] = (), **kwargs) -> Dict[str, Any]:
+        """
+        Универсальный метод для выполнения запросов.
+
+        cache=True - условный запрос: ответ с ETag/Last-Modified сохраняется
+        на диск, повторный запрос с теми же параметрами отправляется с
+        If-None-Match/If-Modified-Since, и при 304 ответ берётся из кэша.
+
+        accept_statuses - статусы ошибок, тело которых возвращается вместо
+        исключения (например, 409 WB со списком отклонённых товаров).
+        """
+        url = f"{self.base_url}{endpoint}"
+        headers = await self._request_headers()
+        cache_key, cached, headers = self._cache_lookup(cache, method, url, headers, kwargs)
+
+        for attempt in range(self.MAX_RETRIES + 1):
+            if self.rate_limiter is not None:
+                await self.rate_limiter.wait()
+            started = time.perf_counter()
+            try:
+                async with self.session.request(
+                    method=method,
+                    url=url,
+                    headers=headers,
+                    **kwargs
+                ) as response:
+                    if await self._retry_status(attempt, method, endpoint, started, response):
+                        continue
+
+                    if response.status == 304 and cached is not None:
+                        data = self.decode_json(self.response_cache.read_body(cached))
+                        self._observe(method, endpoint, started, response.status)
+                        return data
+
+                    if response.status not in accept_statuses:
+                        response.raise_for_status()
+                    body = await response.read()
+                    data = self.decode_json(body)
+                    if cache_key is not None and response.status < 400:
+                        self.response_cache.store(
+                            cache_key, body,
+                            etag=response.headers.get('ETag', ''),
+                            last_modified=response.headers.get('Last-Modified', ''),
+                            url=url,
+                        )
+                    self._observe(method, endpoint, started, response.status)
+                    return data
+
+            except aiohttp.ClientConnectionError as e:
+                if await self._retry_connection_error(attempt, method, endpoint, started, e):
+                    continue
+                raise
+
+            except Exception as e:
+                self._observe(method, endpoint, started, getattr(e, 'status', None), error=str(e))
+                logger.error(f"API request error: {str(e)}")
+                raise
+
+    async def stream_array(self, method: str, endpoint: str, cache: bool = False,
+                           **kwargs) -> AsyncIterator[Any]:
+        """
+        Элементы ответа-массива по мере загрузки тела (см. api/decoding.py).
+
+        Повторы - как в make_request, но только пока не отдан первый
+        элемент: после этого обрыв соединения пробрасывается вызывающему.
+
+        cache=True - условный запрос, как в make_request: тело ответа
+        попутно пишется в кэш, а при 304 элементы читаются из кэша.
+        Ответ, оборвавшийся на середине, в кэш не попадает.
+        """
+        url = f"{self.base_url}{endpoint}"
+        headers = await self._request_headers()
+        cache_key, cached, headers = self._cache_lookup(cache, method, url, headers, kwargs)
+
+        for attempt in range(self.MAX_RETRIES + 1):
+            if self.rate_limiter is not None:
+                await self.rate_limiter.wait()
+            started = time.perf_counter()
+            streamed = False
+            writer = None
+            try:
+                async with self.session.request(
+                    method=method,
+                    url=url,
+                    headers=headers,
+                    **kwargs
+                ) as response:
+                    if await self._retry_status(attempt, method, endpoint, started, response):
+                        continue
+
+                    if response.status == 304 and cached is not None:
+                        chunks = self._cached_chunks(cached)
+                    else:
+                        response.raise_for_status()
+                        if cache_key is not None:
+                            writer = self.response_cache.writer(
+                                cache_key,
+                                etag=response.headers.get('ETag', ''),
+                                last_modified=response.headers.get('Last-Modified', ''),
+                                url=url,
+                            )
+                        chunks = self._tee_chunks(response, writer)
+
+                    async for item in iter_json_chunks(chunks):
+                        streamed = True
+                        yield item
+                    if writer is not None:
+                        writer.commit()
+                        writer = None
+                    self._observe(method, endpoint, started, response.status)
+                    return
+
+            except aiohttp.ClientConnectionError as e:
+                if not streamed and await self._retry_connection_error(attempt, method, endpoint, started, e):
+                    continue
+                if streamed:
+                    self._observe(method, endpoint, started, None, error=str(e))
+                    logger.error(f"API request error: {str(e)}")
+                raise
+
+            except Exception as e:
+                self._observe(method, endpoint, started, getattr(e, 'status', None), error=str(e))
+                logger.error(f"API request error: {str(e)}")
+                raise
+
+            finally:
+                if writer is not None:
+                    writer.discard()
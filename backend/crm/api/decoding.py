@@ -0,0 +1,117 @@
+# api/decoding.py
+"""
+Разбор JSON ответов API маркетплейсов.
+
+get_json_loads() выбирает функцию разбора по настройке
+MARKETPLACE_JSON_DECODER: auto - orjson, если он установлен (на ответах в
+десятки МБ в разы быстрее стандартного json), иначе json; можно указать
+json, orjson или путь к своей функции loads(bytes).
+
+iter_json_array() разбирает ответ-массив потоково: элементы отдаются по
+мере загрузки тела, и целиком ответ в памяти не держится. Потоковый
+разбор идёт стандартным json (у orjson нет инкрементального режима).
+"""
+import codecs
+import json
+import re
+from typing import Any, AsyncIterable, AsyncIterator, Callable, List
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def get_json_loads(name: str = None) -> Callable[[bytes], Any]:
+    name = name or getattr(settings, 'MARKETPLACE_JSON_DECODER', 'auto')
+    if name == 'auto':
+        return orjson.loads if orjson is not None else json.loads
+    if name == 'orjson':
+        if orjson is None:
+            raise ImproperlyConfigured("MARKETPLACE_JSON_DECODER='orjson', но orjson не установлен")
+        return orjson.loads
+    if name == 'json':
+        return json.loads
+    return import_string(name)
+
+
+class JSONArrayParser:
+    """
+    Инкрементальный разбор JSON-массива верхнего уровня.
+
+    feed() принимает очередной кусок тела и возвращает элементы, которые
+    в нём завершились; незавершённый элемент ждёт следующего куска.
+    """
+
+    def __init__(self):
+        self._text = codecs.getincrementaldecoder('utf-8')()
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        # start - ждём '[', value - элемент или ']', next - ',' или ']', end - массив закрыт
+        self._state = 'start'
+        self._count = 0
+
+    def feed(self, data: bytes, final: bool = False) -> List[Any]:
+        buffer = self._buffer[self._pos:] + self._text.decode(data, final)
+        pos, size = 0, len(buffer)
+        items = []
+        while True:
+            pos = WHITESPACE.match(buffer, pos).end()
+            if pos >= size:
+                break
+            char = buffer[pos]
+            if self._state == 'start':
+                if char != '[':
+                    raise ValueError("Ответ API не является JSON-массивом")
+                self._state, pos = 'value', pos + 1
+            elif self._state == 'end':
+                raise ValueError("Лишние данные после JSON-массива")
+            elif char == ']' and (self._state == 'next' or self._count == 0):
+                self._state, pos = 'end', pos + 1
+            elif self._state == 'next':
+                if char != ',':
+                    raise ValueError(f"Ожидалась ',' в позиции {pos} JSON-массива")
+                self._state, pos = 'value', pos + 1
+            else:
+                try:
+                    item, end = self._decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if final:
+                        raise
+                    break  # элемент загружен не целиком
+                if not final and not isinstance(item, (dict, list, str)):
+                    # Число или литерал может продолжиться в следующем куске ("1.5" из "1.5e3"):
+                    # принимаем его, только когда за ним уже пришёл разделитель
+                    after = WHITESPACE.match(buffer, end).end()
+                    if after >= size or buffer[after] not in ',]':
+                        break
+                items.append(item)
+                self._count += 1
+                self._state, pos = 'next', end
+        self._buffer, self._pos = buffer, pos
+        if final and self._state != 'end':
+            raise ValueError("Ответ API оборван: JSON-массив не закрыт")
+        return items
+
+
+async def iter_json_array(content, chunk_size: int = STREAM_CHUNK_SIZE) -> AsyncIterator[Any]:
+    """Элементы JSON-массива из потока тела ответа aiohttp (response.content)"""
+    async for item in iter_json_chunks(content.iter_chunked(chunk_size)):
+        yield item
+
+
+async def iter_json_chunks(chunks: AsyncIterable[bytes]) -> AsyncIterator[Any]:
+    """Элементы JSON-массива из последовательности кусков тела"""
+    parser = JSONArrayParser()
+    async for chunk in chunks:
+        for item in parser.feed(chunk):
+            yield item
+    for item in parser.feed(b'', final=True):
+        yield item
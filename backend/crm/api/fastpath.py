@@ -0,0 +1,398 @@
+# api/fastpath.py
+"""
+Быстрый путь для списочных эндпоинтов.
+
+Вместо построения моделей и обхода ModelSerializer поле за полем страница
+читается через values(), а сериализатор один раз на запрос компилируется
+в план: колонка values() -> функция представления. Вложенные списки
+(many=True) догружаются одним запросом на связь. Вывод совпадает с обычным
+выводом сериализатора; всё, что нельзя выразить через колонки
+(SerializerMethodField, source='*', свойства и методы модели без явного
+вычисления, переопределённый to_representation), приводит к
+FastPathUnsupported, и представление работает по обычному пути.
+"""
+import logging
+from collections import defaultdict
+from operator import itemgetter
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, FieldError
+from rest_framework import serializers
+from rest_framework.fields import empty
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+logger = logging.getLogger(__name__)
+
+
+class FastPathUnsupported(Exception):
+    """Сериализатор нельзя выразить через values()"""
+
+
+_SKIP = object()
+
+TEXT_TYPES = {'CharField', 'TextField', 'EmailField', 'SlugField', 'URLField'}
+INTEGER_TYPES = {
+    'AutoField', 'BigAutoField', 'SmallAutoField', 'IntegerField', 'BigIntegerField',
+    'SmallIntegerField', 'PositiveIntegerField', 'PositiveBigIntegerField',
+    'PositiveSmallIntegerField',
+}
+TEXT_FIELDS = (serializers.CharField, serializers.EmailField, serializers.SlugField, serializers.URLField)
+
+
+def _missing_value(field):
+    """Что выводит DRF, когда атрибута нет (Field.get_attribute)"""
+    if field.default is not empty:
+        default = field.get_default()
+        return None if default is None else field.to_representation(default)
+    if field.allow_null:
+        return None
+    if not field.required:
+        return _SKIP
+    raise FastPathUnsupported(f"Поле {field.field_name} без значения и без default")
+
+
+def _file_converter(field, storage):
+    """Путь к файлу -> то же, что FileField.to_representation для FieldFile"""
+    if not getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL):
+        return lambda path: path or None
+    request = field.context.get('request', None)
+
+    def convert(path):
+        if not path:
+            return None
+        url = storage.url(path)
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
+    return convert
+
+
+def _converter(field, model_field):
+    """Функция представления для значения колонки; None - значение выводится как есть"""
+    if isinstance(field, serializers.FileField):
+        if model_field is None or not hasattr(model_field, 'storage'):
+            raise FastPathUnsupported(f"Поле {field.field_name}: файл без storage")
+        return _file_converter(field, model_field.storage)
+    if type(field) is serializers.ReadOnlyField:
+        return None
+    if isinstance(field, PrimaryKeyRelatedField):
+        return field.pk_field.to_representation if field.pk_field is not None else None
+
+    internal_type = model_field.get_internal_type() if model_field is not None else None
+    if type(field) in TEXT_FIELDS and internal_type in TEXT_TYPES:
+        return None
+    if type(field) is serializers.IntegerField and internal_type in INTEGER_TYPES:
+        return None
+    if type(field) is serializers.BooleanField and internal_type == 'BooleanField':
+        return None
+    return field.to_representation
+
+
+def _column_accessor(column, convert, null_hops=(), missing=None):
+    """Аксессор строки values(): None выводится как None, остальное через convert"""
+    get = itemgetter(column)
+    if null_hops:
+        def accessor(row):
+            for hop in null_hops:
+                if row[hop] is None:
+                    return missing
+            value = get(row)
+            return value if value is None or convert is None else convert(value)
+        return accessor
+    if convert is None:
+        return get
+
+    def accessor(row):
+        value = get(row)
+        return None if value is None else convert(value)
+    return accessor
+
+
+class ValuesPlan:
+    """
+    Скомпилированный сериализатор для строк values().
+
+    model - модель строк; None означает, что строки уже являются словарями
+    с ключами, равными source полей (например, собранными вручную).
+    prefix - путь lookup-а от корневой модели для вложенных сериализаторов.
+    annotations - {имя аннотации queryset: output_field} корневой модели.
+    computed - {имя поля: (колонки, функция(row))} для полей корневого
+    сериализатора, которые не являются колонками (свойства модели).
+    """
+
+    def __init__(self, serializer, model=None, prefix='', annotations=None, computed=None):
+        if type(serializer).to_representation is not serializers.Serializer.to_representation:
+            raise FastPathUnsupported(f"{type(serializer).__name__} переопределяет to_representation")
+
+        self.model = model
+        self.prefix = prefix
+        self.columns = []
+        self.accessors = []
+        self.relations = []
+        self._annotations = dict(annotations or {})
+        computed = computed or {}
+
+        for field in serializer._readable_fields:
+            name = field.field_name
+            if name in computed:
+                columns, func = computed[name]
+                self._add_columns(*(prefix + column for column in columns))
+                self.accessors.append((name, self._computed_accessor(field, func)))
+            elif isinstance(field, serializers.ListSerializer):
+                self.accessors.append((name, self._compile_many(field)))
+            elif isinstance(field, serializers.BaseSerializer):
+                self.accessors.append((name, self._compile_nested(field)))
+            else:
+                accessor = self._compile_field(field)
+                if accessor is not None:
+                    self.accessors.append((name, accessor))
+
+    def _add_columns(self, *columns):
+        for column in columns:
+            if column not in self.columns:
+                self.columns.append(column)
+
+    def _computed_accessor(self, field, func):
+        convert = _converter(field, None)
+        if convert is None:
+            return func
+
+        def accessor(row):
+            value = func(row)
+            return None if value is None else convert(value)
+        return accessor
+
+    def _resolve(self, attrs):
+        """
+        source_attrs -> (lookup, поле модели, lookup-и nullable FK по пути).
+        Возвращает None, если атрибута у модели нет вовсе.
+        """
+        current = self.model
+        lookup = []
+        null_hops = []
+        for index, attr in enumerate(attrs):
+            last = index == len(attrs) - 1
+            if attr == 'pk':
+                model_field = current._meta.pk
+            else:
+                try:
+                    model_field = current._meta.get_field(attr)
+                except FieldDoesNotExist:
+                    if hasattr(current, attr):
+                        raise FastPathUnsupported(f"{current.__name__}.{attr} - не колонка")
+                    return None
+            lookup.append(model_field.name)
+            if not last:
+                if not model_field.concrete or not (model_field.many_to_one or model_field.one_to_one):
+                    raise FastPathUnsupported(f"{current.__name__}.{attr} - не прямая связь")
+                if model_field.null:
+                    null_hops.append(self.prefix + '__'.join(lookup))
+                current = model_field.related_model
+            elif not model_field.concrete or model_field.many_to_many:
+                raise FastPathUnsupported(f"{current.__name__}.{attr} - не колонка")
+        return self.prefix + '__'.join(lookup), model_field, null_hops
+
+    def _compile_field(self, field):
+        if isinstance(field, (serializers.SerializerMethodField, serializers.ManyRelatedField)):
+            raise FastPathUnsupported(f"Поле {field.field_name}: {type(field).__name__}")
+        if field.source == '*':
+            raise FastPathUnsupported(f"Поле {field.field_name}: source='*'")
+        if isinstance(field, serializers.RelatedField) and not isinstance(field, PrimaryKeyRelatedField):
+            raise FastPathUnsupported(f"Поле {field.field_name}: {type(field).__name__}")
+
+        attrs = field.source_attrs
+        if self.model is None:
+            if len(attrs) != 1:
+                raise FastPathUnsupported(f"Поле {field.field_name}: вложенный source")
+            convert = None if type(field) is serializers.ReadOnlyField else field.to_representation
+            return _column_accessor(attrs[0], convert)
+
+        if self.prefix == '' and len(attrs) == 1 and attrs[0] in self._annotations:
+            self._add_columns(attrs[0])
+            return _column_accessor(attrs[0], _converter(field, self._annotations[attrs[0]]))
+
+        resolved = self._resolve(attrs)
+        if resolved is None:
+            missing = _missing_value(field)
+            if missing is _SKIP:
+                return None
+            return lambda row: missing
+        column, model_field, null_hops = resolved
+        if model_field.is_relation and not isinstance(field, PrimaryKeyRelatedField):
+            raise FastPathUnsupported(f"Поле {field.field_name}: связь без PrimaryKeyRelatedField")
+
+        self._add_columns(column, *null_hops)
+        missing = _missing_value(field) if null_hops else None
+        return _column_accessor(column, _converter(field, model_field), null_hops, missing)
+
+    def _compile_nested(self, field):
+        """Вложенный сериализатор по прямой связи: колонки с префиксом"""
+        attrs = field.source_attrs
+        if self.model is None:
+            if len(attrs) != 1:
+                raise FastPathUnsupported(f"Поле {field.field_name}: вложенный source")
+            child = ValuesPlan(field, model=None)
+            key = attrs[0]
+            return lambda row: None if row[key] is None else child.represent(row[key])
+
+        resolved = self._resolve(attrs)
+        if resolved is None:
+            raise FastPathUnsupported(f"Поле {field.field_name}: нет связи")
+        lookup, model_field, null_hops = resolved
+        if not model_field.is_relation:
+            raise FastPathUnsupported(f"Поле {field.field_name}: не связь")
+
+        child = ValuesPlan(field, model=model_field.related_model, prefix=lookup + '__')
+        self._add_columns(*child.columns)
+        self.relations.extend(child.relations)
+
+        hops = list(null_hops)
+        if model_field.null:
+            hops.append(lookup)
+        self._add_columns(*hops)
+        if not hops:
+            return child.represent
+
+        def accessor(row):
+            for hop in hops:
+                if row[hop] is None:
+                    return None
+            return child.represent(row)
+        return accessor
+
+    def _compile_many(self, field):
+        """Вложенный список по обратной связи: догружается отдельным запросом"""
+        attrs = field.source_attrs
+        if len(attrs) != 1:
+            raise FastPathUnsupported(f"Поле {field.field_name}: вложенный source")
+
+        if self.model is None:
+            child = ValuesPlan(field.child, model=None)
+            key = attrs[0]
+            return lambda row: [child.represent(item) for item in row[key]]
+
+        try:
+            relation = self.model._meta.get_field(attrs[0])
+        except FieldDoesNotExist:
+            raise FastPathUnsupported(f"Поле {field.field_name}: нет связи")
+        if not relation.one_to_many or not relation.auto_created:
+            raise FastPathUnsupported(f"Поле {field.field_name}: не обратная связь ForeignKey")
+
+        child_model = relation.related_model
+        child = ValuesPlan(field.child, model=child_model)
+        many = ManyRelation(
+            child=child,
+            queryset=child_model._default_manager.all(),
+            fk_lookup=relation.field.name,
+            fk_column=relation.field.attname,
+            parent_column=self.prefix + relation.field.target_field.attname,
+        )
+        self._add_columns(many.parent_column)
+        self.relations.append(many)
+        results = many.results
+        parent_column = many.parent_column
+        return lambda row: results.get(row[parent_column], [])
+
+    def represent(self, row):
+        ret = {}
+        for name, accessor in self.accessors:
+            value = accessor(row)
+            if value is not _SKIP:
+                ret[name] = value
+        return ret
+
+    def load(self, rows):
+        """Догружает вложенные списки для строк"""
+        for relation in self.relations:
+            relation.load(rows)
+
+    def represent_many(self, rows):
+        rows = list(rows)
+        self.load(rows)
+        represent = self.represent
+        return [represent(row) for row in rows]
+
+
+class ManyRelation:
+    """Обратная связь many=True: один запрос на все строки страницы"""
+
+    def __init__(self, child, queryset, fk_lookup, fk_column, parent_column):
+        self.child = child
+        self.queryset = queryset
+        self.fk_lookup = fk_lookup
+        self.fk_column = fk_column
+        self.parent_column = parent_column
+        self.results = {}
+
+    def load(self, rows):
+        self.results.clear()
+        parent_ids = {row[self.parent_column] for row in rows if row[self.parent_column] is not None}
+        if not parent_ids:
+            return
+        columns = list(self.child.columns)
+        if self.fk_column not in columns:
+            columns.append(self.fk_column)
+        child_rows = list(
+            self.queryset.filter(**{f'{self.fk_lookup}__in': parent_ids}).values(*columns)
+        )
+        self.child.load(child_rows)
+        grouped = defaultdict(list)
+        represent = self.child.represent
+        for row in child_rows:
+            grouped[row[self.fk_column]].append(represent(row))
+        self.results.update(grouped)
+
+
+def build_plan(serializer, queryset, computed=None):
+    """План для корневого сериализатора списка по queryset"""
+    annotations = {}
+    for name, annotation in queryset.query.annotations.items():
+        try:
+            annotations[name] = annotation.output_field
+        except FieldError:
+            annotations[name] = None
+    return ValuesPlan(serializer, model=queryset.model, annotations=annotations, computed=computed)
+
+
+class FastPathListMixin:
+    """
+    list() через values() и скомпилированный сериализатор.
+
+    Включается настройкой API_FAST_PATH (по умолчанию включено). Если
+    сериализатор не выражается через колонки, используется обычный list().
+    """
+    fast_path_computed = {}
+
+    def get_fast_path_extra_columns(self):
+        """Колонки, которые нужны пагинации по курсору"""
+        paginator = self.paginator
+        if paginator is None or not getattr(paginator, 'is_cursor_mode', None):
+            return []
+        if not paginator.is_cursor_mode(self.request):
+            return []
+        # Сортировка, по которой курсор строит позицию (с id в конце)
+        return [field.lstrip('-') for field in paginator.get_cursor_ordering()]
+
+    def list(self, request, *args, **kwargs):
+        if not getattr(settings, 'API_FAST_PATH', True):
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        try:
+            plan = build_plan(self.get_serializer(), queryset, computed=self.fast_path_computed)
+        except FastPathUnsupported as e:
+            logger.debug(f"{type(self).__name__}: быстрый путь недоступен ({e})")
+            return super().list(request, *args, **kwargs)
+
+        columns = list(plan.columns)
+        for column in self.get_fast_path_extra_columns():
+            if column not in columns:
+                columns.append(column)
+        rows_queryset = queryset.prefetch_related(None).values(*columns)
+
+        page = self.paginate_queryset(rows_queryset)
+        data = plan.represent_many(page if page is not None else rows_queryset)
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
@@ -0,0 +1,232 @@
+# api/http_cache.py
+"""
+Дисковый кэш ответов API маркетплейсов для условных запросов.
+
+Отчёты и каталоги (остатки, продажи, карточки товаров) между запусками
+часто не меняются. Ответ с ETag или Last-Modified сохраняется на диск, а
+следующий такой же запрос уходит с If-None-Match / If-Modified-Since: если
+данные не изменились, маркетплейс отвечает 304 без тела, и ответ берётся
+из кэша.
+
+Потоковые ответы (BaseAPIClient.stream_array) пишутся в кэш по кускам
+(CacheWriter) и при 304 читаются с диска так же по кускам.
+
+Ключ кэша - метод, URL, параметры, тело запроса и заголовки (в них
+учётные данные: одинаковые запросы разных кабинетов не смешиваются).
+
+    MARKETPLACE_HTTP_CACHE_DIR/<первые 2 символа ключа>/<ключ>.json - ETag, Last-Modified
+    MARKETPLACE_HTTP_CACHE_DIR/<первые 2 символа ключа>/<ключ>.body - тело ответа
+
+Записи, которые не использовались MARKETPLACE_HTTP_CACHE_RETENTION_DAYS
+дней (время изменения .json обновляется при каждом чтении записи),
+удаляются: не чаще раза в PRUNE_INTERVAL секунд на процесс, при записи
+в кэш.
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+PRUNE_INTERVAL = 24 * 3600
+
+
+def http_cache_enabled() -> bool:
+    return getattr(settings, 'MARKETPLACE_HTTP_CACHE_ENABLED', True)
+
+
+def http_cache_root() -> Path:
+    return Path(settings.MARKETPLACE_HTTP_CACHE_DIR)
+
+
+def http_cache_retention_days() -> int:
+    return getattr(settings, 'MARKETPLACE_HTTP_CACHE_RETENTION_DAYS', 7)
+
+
+@dataclass
+class CachedResponse:
+    key: str
+    etag: str = ''
+    last_modified: str = ''
+
+    def validators(self) -> Dict[str, str]:
+        """Заголовки условного запроса"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """Кэш тел ответов по ключу запроса"""
+
+    # Время последней очистки по каталогу кэша (в пределах процесса)
+    _pruned_at: Dict[Path, float] = {}
+
+    def __init__(self, root: Optional[Path] = None):
+        self.root = Path(root) if root else http_cache_root()
+
+    @staticmethod
+    def key(method: str, url: str, params: Any = None, json_body: Any = None,
+            headers: Optional[Dict[str, str]] = None) -> str:
+        if isinstance(params, dict):
+            params = sorted((str(name), str(value)) for name, value in params.items())
+        request = json.dumps(
+            [method.upper(), url, params, json_body, sorted((headers or {}).items())],
+            sort_keys=True, default=str, ensure_ascii=False,
+        )
+        return hashlib.sha256(request.encode()).hexdigest()
+
+    def _path(self, key: str, suffix: str) -> Path:
+        return self.root / key[:2] / f"{key}{suffix}"
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """Запись кэша или None; запись без тела считается отсутствующей"""
+        try:
+            with open(self._path(key, '.json'), encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not self._path(key, '.body').is_file():
+            return None
+        try:
+            # Используемая запись не должна уйти при очистке
+            os.utime(self._path(key, '.json'))
+        except OSError:
+            pass
+        return CachedResponse(key=key, etag=meta.get('etag', ''), last_modified=meta.get('last_modified', ''))
+
+    def read_body(self, entry: CachedResponse) -> bytes:
+        return self._path(entry.key, '.body').read_bytes()
+
+    def iter_body(self, entry: CachedResponse, chunk_size: int) -> Iterator[bytes]:
+        """Тело ответа из кэша кусками по chunk_size байт"""
+        with open(self._path(entry.key, '.body'), 'rb') as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+    def store(self, key: str, body: bytes, etag: str = '', last_modified: str = '', url: str = ''):
+        """Сохраняет ответ целиком"""
+        writer = self.writer(key, etag=etag, last_modified=last_modified, url=url)
+        if writer is not None:
+            writer.write(body)
+            writer.commit()
+
+    def writer(self, key: str, etag: str = '', last_modified: str = '', url: str = '') -> Optional['CacheWriter']:
+        """Запись ответа по кускам; None - ответ без ETag и Last-Modified не кэшируется"""
+        if not etag and not last_modified:
+            return None
+        self.prune_if_due()
+        meta = {'etag': etag, 'last_modified': last_modified, 'url': url}
+        return CacheWriter(self._path(key, '.body'), self._path(key, '.json'), meta)
+
+    def prune(self, max_age: float) -> int:
+        """
+        Удаляет записи, не использованные max_age секунд, и брошенные
+        временные файлы; возвращает число удалённых записей.
+        """
+        if not self.root.is_dir():
+            return 0
+        cutoff = time.time() - max_age
+        removed = 0
+        for directory in self.root.iterdir():
+            if not directory.is_dir():
+                continue
+            for path in directory.iterdir():
+                try:
+                    if path.stat().st_mtime >= cutoff:
+                        continue
+                    if path.suffix == '.json':
+                        # Сначала метаданные: запись без них уже не будет найдена
+                        path.unlink()
+                        self._path(path.stem, '.body').unlink(missing_ok=True)
+                        removed += 1
+                    elif path.suffix == '.tmp' or not self._path(path.stem, '.json').exists():
+                        path.unlink()
+                except OSError:
+                    continue
+        if removed:
+            logger.info(f"Кэш ответов API: удалено {removed} записей")
+        return removed
+
+    def prune_if_due(self):
+        """Очистка по MARKETPLACE_HTTP_CACHE_RETENTION_DAYS, не чаще раза в PRUNE_INTERVAL"""
+        retention_days = http_cache_retention_days()
+        now = time.monotonic()
+        last = self._pruned_at.get(self.root)
+        if retention_days <= 0 or (last is not None and now - last < PRUNE_INTERVAL):
+            return
+        ResponseCache._pruned_at[self.root] = now
+        self.prune(retention_days * 24 * 3600)
+
+
+class CacheWriter:
+    """
+    Тело ответа пишется во временный файл; commit() переносит его на место
+    и затем пишет метаданные - недописанная запись не будет найдена.
+    Ошибки записи на диск только логируются: кэш не должен ронять запрос.
+    """
+
+    def __init__(self, body_path: Path, meta_path: Path, meta: Dict[str, str]):
+        self.body_path = body_path
+        self.meta_path = meta_path
+        self.meta = meta
+        self.tmp_path = body_path.with_name(f"{body_path.name}.{os.getpid()}.{id(self)}.tmp")
+        self.file = None
+        try:
+            body_path.parent.mkdir(parents=True, exist_ok=True)
+            self.file = open(self.tmp_path, 'wb')
+        except OSError as e:
+            self._fail(e)
+
+    def _fail(self, error: OSError):
+        logger.warning(f"Не удалось сохранить ответ {self.meta['url']} в кэш: {str(error)}")
+        self.discard()
+
+    def write(self, chunk: bytes):
+        if self.file is None:
+            return
+        try:
+            self.file.write(chunk)
+        except OSError as e:
+            self._fail(e)
+
+    def commit(self):
+        if self.file is None:
+            return
+        try:
+            self.file.close()
+            self.file = None
+            os.replace(self.tmp_path, self.body_path)
+            meta = {**self.meta, 'stored_at': timezone.now().isoformat()}
+            self._write(self.meta_path, json.dumps(meta, ensure_ascii=False).encode())
+        except OSError as e:
+            self._fail(e)
+
+    def discard(self):
+        """Отменяет запись (ответ оборвался или не разобрался)"""
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        try:
+            os.unlink(self.tmp_path)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _write(path: Path, data: bytes):
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
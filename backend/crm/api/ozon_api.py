@@ -1,14 +1,19 @@
-from .base import BaseAPIClient
-from typing import Dict, Any, List
+from .base import BaseAPIClient, resolve_base_url
+from typing import AsyncIterator, Dict, Any, List
 import datetime
 
 class OzonAPIClient(BaseAPIClient):
     """Клиент для работы с API Ozon"""
 
-    def __init__(self, client_id: str, api_key: str):
-        super().__init__(api_key, "https://api-seller.ozon.ru")
+    BASE_URL = "https://api-seller.ozon.ru"
+    # Максимум отправлений за запрос /v3/posting/fbs/list
+    PAGE_LIMIT = 1000
+    # Максимум товаров за запрос /v3/product/list и /v3/product/info/list
+    PRODUCT_PAGE_LIMIT = 1000
+
+    def __init__(self, client_id: str, api_key: str, base_url: str = None):
+        super().__init__(api_key, resolve_base_url('ozon', self.BASE_URL, base_url))
         self.client_id = client_id
-        print(api_key)
     
     async def get_headers(self) -> Dict[str, str]:
         return {
@@ -18,6 +23,7 @@ class OzonAPIClient(BaseAPIClient):
         }
     
     async def get_orders(self, since: datetime.datetime, to: datetime.datetime = None) -> List[Dict[str, Any]]:
+        """Отправления FBS за период; список отдаётся страницами по PAGE_LIMIT (has_next)"""
         if to is None:
             to = datetime.datetime.now()
         
@@ -26,10 +32,50 @@ class OzonAPIClient(BaseAPIClient):
                 "since": since.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
                 "to": to.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
             },
-            "limit": 1000
+            "limit": self.PAGE_LIMIT,
+            "offset": 0
+        }
+
+        postings = []
+        while True:
+            response = await self.make_request("POST", "/v3/posting/fbs/list", json=payload)
+            result = response.get("result", {})
+            page = result.get("postings", [])
+            postings.extend(page)
+            if not result.get("has_next") or not page:
+                return postings
+            payload["offset"] += len(page)
+
+    async def get_posting(self, posting_number: str) -> Dict[str, Any]:
+        """Одно отправление FBS по номеру (в том же формате, что и в списке)"""
+        payload = {
+            "posting_number": posting_number,
+            "with": {"analytics_data": False, "financial_data": False}
         }
+        response = await self.make_request("POST", "/v3/posting/fbs/get", json=payload)
+        return response.get("result", {})
 
-        print(payload)
+    async def iter_products(self) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Товары продавца с артикулом, штрихкодами и ценой.
 
-        response = await self.make_request("POST", "/v3/posting/fbs/list", json=payload)
-        return response.get("result", {}).get("postings", [])
\ No newline at end of file
+        Список (/v3/product/list) идёт страницами по last_id, для каждой
+        страницы одним запросом догружаются подробности (/v3/product/info/list).
+        Элемент - ответ info/list с флагом archived из списка.
+        """
+        payload = {"filter": {"visibility": "ALL"}, "last_id": "", "limit": self.PRODUCT_PAGE_LIMIT}
+        while True:
+            response = await self.make_request("POST", "/v3/product/list", json=payload, cache=True)
+            result = response.get("result", {})
+            page = result.get("items", [])
+            if page:
+                archived = {item.get("product_id"): item.get("archived", False) for item in page}
+                info = await self.make_request(
+                    "POST", "/v3/product/info/list", json={"product_id": list(archived)}, cache=True
+                )
+                for product in info.get("items", []):
+                    product.setdefault("archived", archived.get(product.get("id"), False))
+                    yield product
+            if len(page) < self.PRODUCT_PAGE_LIMIT or not result.get("last_id"):
+                return
+            payload["last_id"] = result["last_id"]
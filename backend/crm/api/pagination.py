@@ -0,0 +1,153 @@
+# api/pagination.py
+from django.core.paginator import Paginator as DjangoPaginator
+from django.utils.functional import cached_property
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import PageNumberPagination, CursorPagination
+from rest_framework.settings import api_settings
+
+
+class CappedCountPaginator(DjangoPaginator):
+    """
+    Paginator, который считает не больше max_count строк.
+
+    COUNT(*) по большой таблице читает её целиком на каждой странице;
+    COUNT по подзапросу с LIMIT останавливается на max_count. Если строк
+    больше, count равен max_count, а count_capped - True (в ответе API
+    поле count_capped). Страницы дальше max_count / page_size отдают 404 -
+    глубже листают курсором (?pagination=cursor).
+    """
+    max_count = 10_000
+
+    @cached_property
+    def _counted(self):
+        # На одну строку больше предела - чтобы отличить ровно max_count от "больше"
+        return self.object_list.order_by()[:self.max_count + 1].count()
+
+    @cached_property
+    def count(self):
+        return min(self._counted, self.max_count)
+
+    @cached_property
+    def count_capped(self):
+        return self._counted > self.max_count
+
+
+class KeysetCursorPagination(CursorPagination):
+    """Курсорная пагинация для режима keyset внутри постраничной пагинации"""
+
+    def __init__(self, ordering, page_size, page_size_query_param, max_page_size):
+        self.ordering = ordering
+        self.page_size = page_size
+        self.page_size_query_param = page_size_query_param
+        self.max_page_size = max_page_size
+
+    def get_ordering(self, request, queryset, view):
+        """
+        Сортировка курсора - всегда self.ordering.
+
+        CursorPagination берёт сортировку из OrderingFilter представления, если
+        он есть; здесь она фиксирована: по ней строится позиция курсора и
+        список колонок быстрого пути (api/fastpath.py).
+        """
+        return tuple(self.ordering)
+
+
+class CursorOptInPagination(PageNumberPagination):
+    """
+    Постраничная пагинация с опциональным keyset-режимом.
+
+    По умолчанию работает как PageNumberPagination (count + page).
+    Если в запросе передан ?cursor=... или ?pagination=cursor, переключается
+    на курсорную пагинацию по cursor_ordering: без COUNT(*) и OFFSET,
+    поэтому глубина листания не влияет на скорость запроса.
+
+    Позиция курсора строится по первому полю cursor_ordering, поэтому оно
+    должно быть неизменяемым и почти уникальным (created_at, id): иначе
+    строки между страницами пропускаются или повторяются. ?ordering= в
+    курсорном режиме допускается только совпадающий с началом cursor_ordering.
+    """
+    page_size = 25
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    cursor_ordering = ('-created_at', 'id')
+    cursor_query_param = 'cursor'
+    mode_query_param = 'pagination'
+
+    def __init__(self):
+        self._cursor_paginator = None
+
+    def is_cursor_mode(self, request):
+        query_params = request.query_params
+        return (
+            self.cursor_query_param in query_params or
+            query_params.get(self.mode_query_param) == 'cursor'
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_cursor_mode(request):
+            return super().paginate_queryset(queryset, request, view)
+
+        self.check_cursor_ordering(request, view)
+        self._cursor_paginator = KeysetCursorPagination(
+            ordering=self.get_cursor_ordering(),
+            page_size=self.page_size,
+            page_size_query_param=self.page_size_query_param,
+            max_page_size=self.max_page_size,
+        )
+        return self._cursor_paginator.paginate_queryset(queryset, request, view)
+
+    def get_cursor_ordering(self):
+        """Сортировка курсорного режима с id в конце"""
+        ordering = list(self.cursor_ordering)
+        if not any(field.lstrip('-') in ('id', 'pk') for field in ordering):
+            ordering.append('id')
+        return tuple(ordering)
+
+    def check_cursor_ordering(self, request, view=None):
+        """Отклоняет ?ordering= представления с OrderingFilter, если он отличается от сортировки курсора"""
+        backends = getattr(view, 'filter_backends', None) or ()
+        if not any(issubclass(backend, OrderingFilter) for backend in backends):
+            return
+        requested = request.query_params.get(api_settings.ORDERING_PARAM)
+        if requested is None:
+            return
+        requested = tuple(field.strip() for field in requested.split(',') if field.strip())
+        if requested and self.get_cursor_ordering()[:len(requested)] != requested:
+            raise ValidationError({
+                api_settings.ORDERING_PARAM: (
+                    f"В курсорном режиме сортировка фиксирована: {','.join(self.cursor_ordering)}. "
+                    f"Для другой сортировки используйте постраничный режим (?page=)"
+                )
+            })
+
+    def get_paginated_response(self, data):
+        if self._cursor_paginator is not None:
+            return self._cursor_paginator.get_paginated_response(data)
+        response = super().get_paginated_response(data)
+        count_capped = getattr(self.page.paginator, 'count_capped', None)
+        if count_capped is not None:
+            # count_capped - сразу после count, как в схеме ответа
+            response.data = {
+                'count': response.data['count'],
+                'count_capped': count_capped,
+                **{key: value for key, value in response.data.items() if key != 'count'},
+            }
+        return response
+
+    def get_paginated_response_schema(self, schema):
+        if self._cursor_paginator is not None:
+            return self._cursor_paginator.get_paginated_response_schema(schema)
+        response_schema = super().get_paginated_response_schema(schema)
+        if issubclass(self.django_paginator_class, CappedCountPaginator):
+            properties = response_schema['properties']
+            response_schema['properties'] = {
+                'count': properties['count'],
+                'count_capped': {
+                    'type': 'boolean',
+                    'description': 'count ограничен CappedCountPaginator.max_count',
+                },
+                **{key: value for key, value in properties.items() if key != 'count'},
+            }
+        return response_schema
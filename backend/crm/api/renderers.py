@@ -0,0 +1,45 @@
+# api/renderers.py
+from django.conf import settings
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # orjson - необязательная зависимость
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer, который кодирует через orjson, если он установлен.
+
+    Вывод совпадает с JSONRenderer байт в байт: компактные разделители,
+    UTF-8 без экранирования, экранированные \\u2028/\\u2029. Типы, которые
+    orjson кодирует иначе (datetime, Decimal и т.п.), передаются в
+    encoder_class DRF. Отступы (?indent, Browsable API) и всё, что orjson
+    не может закодировать, идут через стандартный JSONRenderer. Как и
+    быстрый путь списков, отключается настройкой API_FAST_PATH.
+
+    Float в экспоненциальной записи orjson форматирует иначе, чем json
+    (1e16 против 1e+16), поэтому рендерер подключается к спискам, где
+    числа с плавающей точкой не выводятся.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (orjson is None or data is None or not self.compact or self.ensure_ascii or
+                not getattr(settings, 'API_FAST_PATH', True)):
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+            )
+        except (TypeError, orjson.JSONEncodeError):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+        return ret
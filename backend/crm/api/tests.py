@@ -0,0 +1,103 @@
+import asyncio
+import json
+from django.test import SimpleTestCase
+from .decoding import JSONArrayParser, iter_json_array
+
+
+def feed_chunks(chunks):
+    """Элементы, которые JSONArrayParser отдаёт после каждого куска, и итог с final"""
+    parser = JSONArrayParser()
+    steps = [parser.feed(chunk) for chunk in chunks]
+    steps.append(parser.feed(b'', final=True))
+    return steps
+
+
+def split_every(body: bytes, size: int):
+    return [body[start:start + size] for start in range(0, len(body), size)]
+
+
+class JSONArrayParserTests(SimpleTestCase):
+    """Разбор JSON-массива по кускам: границы кусков могут попасть куда угодно"""
+
+    def test_whole_body(self):
+        steps = feed_chunks([b'[{"a": 1}, [2], "x", 3, true, null]'])
+        self.assertEqual(steps, [[{'a': 1}, [2], 'x', 3, True, None], []])
+
+    def test_number_split_across_chunks(self):
+        # "12" в конце куска может оказаться началом "12.5e1" - ждём разделителя
+        steps = feed_chunks([b'[12', b'.5e1, 7', b']'])
+        self.assertEqual(steps, [[], [125.0], [7], []])
+
+    def test_number_at_end_of_chunk_is_held_back(self):
+        parser = JSONArrayParser()
+        self.assertEqual(parser.feed(b'[1, 2'), [1])
+        self.assertEqual(parser.feed(b'3'), [])
+        self.assertEqual(parser.feed(b']'), [23])
+        self.assertEqual(parser.feed(b'', final=True), [])
+
+    def test_literal_split_across_chunks(self):
+        steps = feed_chunks([b'[tr', b'ue, nu', b'll]'])
+        self.assertEqual(sum(steps, []), [True, None])
+
+    def test_string_split_across_chunks(self):
+        steps = feed_chunks([b'["ab', b'c", "d\\', b'"e"]'])
+        self.assertEqual(steps, [[], ['abc'], ['d"e'], []])
+
+    def test_multibyte_character_split_across_chunks(self):
+        body = json.dumps([{'name': 'Плащ'}, 'ё'], ensure_ascii=False).encode()
+        # Первый кусок обрывается посреди двухбайтовой буквы
+        cut = body.index('Плащ'.encode()) + 1
+        steps = feed_chunks([body[:cut], body[cut:]])
+        self.assertEqual(sum(steps, []), [{'name': 'Плащ'}, 'ё'])
+
+    def test_byte_by_byte_matches_whole_body(self):
+        items = [{'id': 1, 'price': 1.5e3, 'title': 'Кружка "XL"'}, [], {}, -0.25, False, 'ы' * 3]
+        body = json.dumps(items, ensure_ascii=False).encode()
+        for size in (1, 2, 3, 7):
+            with self.subTest(size=size):
+                self.assertEqual(sum(feed_chunks(split_every(body, size)), []), items)
+
+    def test_empty_array(self):
+        self.assertEqual(feed_chunks([b'[]']), [[], []])
+        self.assertEqual(feed_chunks([b' [', b' \n ', b']\n']), [[], [], [], []])
+
+    def test_truncated_body(self):
+        parser = JSONArrayParser()
+        self.assertEqual(parser.feed(b'[{"a": 1}, {"b"'), [{'a': 1}])
+        with self.assertRaises(ValueError):
+            parser.feed(b'', final=True)
+
+    def test_unclosed_array(self):
+        parser = JSONArrayParser()
+        self.assertEqual(parser.feed(b'[{"a": 1},'), [{'a': 1}])
+        with self.assertRaisesMessage(ValueError, 'не закрыт'):
+            parser.feed(b'', final=True)
+
+    def test_not_an_array(self):
+        with self.assertRaisesMessage(ValueError, 'не является JSON-массивом'):
+            JSONArrayParser().feed(b'{"data": []}')
+
+    def test_data_after_array(self):
+        with self.assertRaisesMessage(ValueError, 'Лишние данные'):
+            JSONArrayParser().feed(b'[1] [2]')
+
+    def test_missing_comma(self):
+        with self.assertRaisesMessage(ValueError, "Ожидалась ','"):
+            JSONArrayParser().feed(b'[{"a": 1} {"b": 2}]')
+
+    def test_iter_json_array(self):
+        class Content:
+            """Тело ответа aiohttp, отдающее куски по 5 байт"""
+
+            def __init__(self, body):
+                self.body = body
+
+            async def iter_chunked(self, size):
+                for chunk in split_every(self.body, 5):
+                    yield chunk
+
+        async def collect(content):
+            return [item async for item in iter_json_array(content)]
+
+        body = json.dumps([{'n': n, 'name': 'товар'} for n in range(20)], ensure_ascii=False).encode()
+        self.assertEqual(asyncio.run(collect(Content(body))), json.loads(body))
@@ -7,8 +7,8 @@ from django.db.models import Sum
 from django.utils import timezone
 from datetime import timedelta
 from order.models import Order
-from rest_framework.pagination import PageNumberPagination
 from stock.models import ProductStock
+from .pagination import CursorOptInPagination
 
 logger = logging.getLogger(__name__)
 
@@ -240,10 +240,12 @@ def get_top_categories(request):
         logger.error(f"Error in get_top_categories: {str(e)}")
         return Response({'error': str(e)}, status=500)
 
-class LowStockPagination(PageNumberPagination):
+class LowStockPagination(CursorOptInPagination):
     page_size = 5
     page_size_query_param = 'page_size'
     max_page_size = 5
+    # available_quantity меняется и часто совпадает - курсор по нему пропускал бы строки
+    cursor_ordering = ('id',)
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
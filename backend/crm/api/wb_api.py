@@ -1,6 +1,6 @@
-from .base import BaseAPIClient
+from .base import BaseAPIClient, RateLimiter, resolve_base_url
 from .wb_config import WB_API_CONFIG, WBApiCategory, WBEnvironment
-from typing import Dict, Any, List, Optional
+from typing import AsyncIterator, Dict, Any, List, Optional
 import datetime
 import logging
 
@@ -9,9 +9,12 @@ logger = logging.getLogger(__name__)
 class WildberriesAPIClient:
     """Универсальный клиент для работы со всеми API Wildberries"""
     
-    def __init__(self, api_key: str, environment: WBEnvironment = WBEnvironment.PRODUCTION):
+    def __init__(self, api_key: str, environment: WBEnvironment = WBEnvironment.PRODUCTION,
+                 base_url: str = None):
         self.api_key = api_key
         self.environment = environment
+        # Переопределённый хост обслуживает все категории API (mock-сервер, прокси)
+        self.base_url_override = base_url
         self.clients: Dict[WBApiCategory, BaseAPIClient] = {}
         self._initialize_clients()
     
@@ -20,14 +23,21 @@ class WildberriesAPIClient:
         for category, config in WB_API_CONFIG.items():
             base_url = self._get_base_url(category, config)
             if base_url:
-                self.clients[category] = WildberriesCategoryClient(
+                client = WildberriesCategoryClient(
                     api_key=self.api_key,
                     base_url=base_url.rstrip('/'),
-                    category=category
+                    category=category,
+                    api_client=self
                 )
+                if config.requests_per_minute:
+                    client.rate_limiter = RateLimiter(config.requests_per_minute)
+                self.clients[category] = client
     
     def _get_base_url(self, category: WBApiCategory, config) -> Optional[str]:
         """Получение базового URL для категории"""
+        override = resolve_base_url('wildberries', '', self.base_url_override)
+        if override:
+            return override
         if self.environment == WBEnvironment.PRODUCTION:
             return config.production
         elif self.environment == WBEnvironment.SANDBOX and config.sandbox:
@@ -54,9 +64,15 @@ class WildberriesAPIClient:
 class WildberriesCategoryClient(BaseAPIClient):
     """Клиент для конкретной категории API Wildberries"""
     
-    def __init__(self, api_key: str, base_url: str, category: WBApiCategory):
+    # Максимум карточек товаров за запрос /content/v2/get/cards/list
+    CARDS_PAGE_LIMIT = 100
+    
+    def __init__(self, api_key: str, base_url: str, category: WBApiCategory,
+                 api_client: Optional[WildberriesAPIClient] = None):
         super().__init__(api_key, base_url)
         self.category = category
+        # Общий клиент WB: через него запросы других категорий уходят на свои хосты
+        self.api_client = api_client
     
     async def get_headers(self) -> Dict[str, str]:
         """Заголовки для Wildberries API"""
@@ -72,20 +88,29 @@ class WildberriesCategoryClient(BaseAPIClient):
         if date_start is None:
             date_start = datetime.datetime.now() - datetime.timedelta(days=7)
         
-        payload = {
-            "flag": 1,
-            "dateFrom": date_start.strftime("%Y-%m-%dT%H:%M:%S"),
-        }
-        
-        payload = {k: v for k, v in payload.items() if v is not None}
-        
         try:
-            response = await self.make_request("GET", "/api/v1/supplier/orders", params=payload)
+            response = await self.make_request("GET", "/api/v1/supplier/orders", params=self._orders_params(date_start))
             return response
         except Exception as e:
             logger.error(f"Error fetching orders from WB: {str(e)}")
             return []
     
+    async def iter_orders(self, date_start: datetime.datetime) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Заказы по мере загрузки ответа (ответ статистики - массив в десятки МБ).
+        
+        В отличие от get_orders, ошибка не превращается в пустой список, а
+        пробрасывается: часть заказов к этому моменту уже отдана.
+        """
+        async for order in self.stream_array("GET", "/api/v1/supplier/orders", params=self._orders_params(date_start)):
+            yield order
+    
+    def _orders_params(self, date_start: datetime.datetime) -> Dict[str, Any]:
+        return {
+            "flag": 1,
+            "dateFrom": date_start.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+    
     async def get_order_details(self, order_id: int) -> Dict[str, Any]:
         """Получение деталей конкретного заказа"""
         try:
@@ -97,28 +122,70 @@ class WildberriesCategoryClient(BaseAPIClient):
         
     async def get_sales_report(self, date_from: datetime.datetime, 
                              date_to: datetime.datetime = None) -> List[Dict[str, Any]]:
-        """Получение отчета о продажах через Analytics API"""
-        if date_to is None:
-            date_to = datetime.datetime.now()
+        """
+        Отчёт о продажах и возвратах (Statistics API), изменённых с date_from.
         
-        params = {
-            "dateFrom": date_from.strftime("%Y-%m-%d"),
-            "dateTo": date_to.strftime("%Y-%m-%d")
-        }
-        
-        analytics_client = self.get_client(WBApiCategory.ANALYTICS)
-        response = await analytics_client.make_request("GET", "/api/v1/sales", params=params)
-        return response
+        Одна страница отчёта (до ~80 тыс. строк); весь отчёт - iter_sales.
+        date_to отсекает продажи по дате продажи.
+        """
+        statistics_client = self.get_client(WBApiCategory.STATISTICS)
+        response = await statistics_client.make_request(
+            "GET", "/api/v1/supplier/sales", params=self._report_params(date_from), cache=True
+        )
+        sales = response or []
+        if date_to is not None:
+            date_to_str = date_to.strftime("%Y-%m-%dT%H:%M:%S")
+            sales = [sale for sale in sales if (sale.get("date") or "") < date_to_str]
+        return sales
     
     async def get_stocks_report(self, date_from: datetime.datetime) -> List[Dict[str, Any]]:
-        """Получение отчета об остатках"""
-        params = {
-            "dateFrom": date_from.strftime("%Y-%m-%d")
-        }
+        """Отчёт об остатках на складах WB (Statistics API), изменённых с date_from; одна страница"""
+        statistics_client = self.get_client(WBApiCategory.STATISTICS)
+        response = await statistics_client.make_request(
+            "GET", "/api/v1/supplier/stocks", params=self._report_params(date_from), cache=True
+        )
+        return response or []
+    
+    async def iter_sales(self, date_from: datetime.datetime) -> AsyncIterator[Dict[str, Any]]:
+        """Все продажи и возвраты, изменённые с date_from, по мере загрузки (см. _iter_report)"""
+        async for sale in self._iter_report("/api/v1/supplier/sales", date_from):
+            yield sale
+    
+    async def iter_stocks(self, date_from: datetime.datetime) -> AsyncIterator[Dict[str, Any]]:
+        """Все остатки, изменённые с date_from, по мере загрузки (см. _iter_report)"""
+        async for stock in self._iter_report("/api/v1/supplier/stocks", date_from):
+            yield stock
+    
+    async def _iter_report(self, endpoint: str, date_from: datetime.datetime) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Отчёт Statistics API целиком: страницы запрашиваются с dateFrom =
+        lastChangeDate последней строки предыдущей, пока страница не пуста.
         
-        analytics_client = self.get_client(WBApiCategory.ANALYTICS)
-        response = await analytics_client.make_request("GET", "/api/v1/stocks", params=params)
-        return response
+        Строки на границе страниц повторяются - их схлопывает загрузка
+        (parsers/reports.py). Страницы запрашиваются условно (cache=True):
+        первая - с начала дня date_from, следующие - с lastChangeDate из
+        данных, так что неизменившийся отчёт отдаётся ответами 304.
+        """
+        statistics_client = self.get_client(WBApiCategory.STATISTICS)
+        cursor = self._report_params(date_from)["dateFrom"]
+        while True:
+            last_change_date = None
+            async for row in statistics_client.stream_array("GET", endpoint, params={"dateFrom": cursor, "flag": 0},
+                                                            cache=True):
+                last_change_date = row.get("lastChangeDate") or last_change_date
+                yield row
+            if not last_change_date or last_change_date == cursor:
+                return
+            cursor = last_change_date
+    
+    def _report_params(self, date_from: datetime.datetime) -> Dict[str, Any]:
+        """
+        Параметры отчёта Statistics API. dateFrom округляется вниз до начала
+        дня: параметры, а с ними и ключ кэша, не меняются в течение дня,
+        и повторный запрос может получить 304. Лишние строки с начала дня
+        отчёт допускает - выборка идёт по lastChangeDate >= dateFrom.
+        """
+        return {"dateFrom": date_from.strftime("%Y-%m-%dT00:00:00"), "flag": 0}
     
     async def update_prices(self, prices_data: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Обновление цен товаров"""
@@ -127,6 +194,54 @@ class WildberriesCategoryClient(BaseAPIClient):
                                                   json=prices_data)
         return response
 
+    async def iter_cards(self) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Карточки товаров продавца (клиент категории CONTENT).
+        
+        Список отдаётся страницами по CARDS_PAGE_LIMIT: следующая страница
+        запрашивается с курсором (updatedAt, nmID) последней карточки.
+        """
+        cursor = {"limit": self.CARDS_PAGE_LIMIT}
+        while True:
+            payload = {"settings": {"cursor": cursor, "filter": {"withPhoto": -1}}}
+            response = await self.make_request("POST", "/content/v2/get/cards/list", json=payload, cache=True)
+            cards = response.get("cards") or []
+            for card in cards:
+                yield card
+            page_cursor = response.get("cursor") or {}
+            if page_cursor.get("total", len(cards)) < self.CARDS_PAGE_LIMIT or not page_cursor.get("nmID"):
+                return
+            cursor = {
+                "limit": self.CARDS_PAGE_LIMIT,
+                "updatedAt": page_cursor.get("updatedAt"),
+                "nmID": page_cursor["nmID"],
+            }
+    
+    async def upload_prices(self, prices: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Загрузка цен и скидок (клиент категории PRICES), до 1000 товаров за запрос.
+        
+        prices - [{"nmID": int, "price": int, "discount": int}]. Возвращает
+        ответ API: {"data": {"id": ID загрузки}, "error": bool, "errorText": str}.
+        """
+        response = await self.make_request("POST", "/api/v2/upload/task", json={"data": prices},
+                                           accept_statuses={208, 400})
+        return response or {}
+    
+    async def update_stocks(self, warehouse_id: str, stocks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Обновление остатков склада продавца (клиент категории MARKETPLACE), до 1000 товаров за запрос.
+        
+        stocks - [{"sku": баркод, "amount": int}]. Возвращает ошибки по
+        товарам из ответа 409: [{"code": ..., "message": ..., "data": [{"sku": ..., "amount": ...}]}];
+        пустой список - все остатки приняты.
+        """
+        response = await self.make_request("PUT", f"/api/v3/stocks/{warehouse_id}", json={"stocks": stocks},
+                                           accept_statuses={409})
+        if isinstance(response, dict):
+            return [response]
+        return response or []
+    
     async def get_daily_stats(self, date_from: datetime.datetime) -> Dict[str, Any]:
         """Получение дневной статистики"""
         params = {
@@ -135,9 +250,14 @@ class WildberriesCategoryClient(BaseAPIClient):
         
         statistics_client = self.get_client(WBApiCategory.STATISTICS)
         response = await statistics_client.make_request("GET", "/api/v1/supplier/sales", 
-                                                      params=params)
+                                                      params=params, cache=True)
         return response
 
     def get_client(self, category: WBApiCategory) -> 'WildberriesCategoryClient':
-        """Вспомогательный метод для получения клиента другой категории"""
-        return self
\ No newline at end of file
+        """Клиент другой категории API (со своим хостом) из общего клиента WB"""
+        if category == self.category:
+            return self
+        if self.api_client is None:
+            raise ValueError(f"Client for category {category} is not available: "
+                             f"{self.category} client was created without WildberriesAPIClient")
+        return self.api_client.get_client(category)
\ No newline at end of file
@@ -24,6 +24,8 @@ class WBApiCategory(Enum):
 class WBEndpointConfig:
     production: str
     sandbox: str = None
+    # Лимит запросов в минуту на один токен; None - клиент запросы не ограничивает
+    requests_per_minute: int = None
 
 # Конфигурация всех эндпоинтов WB
 WB_API_CONFIG = {
@@ -36,14 +38,17 @@ WB_API_CONFIG = {
     ),
     WBApiCategory.PRICES: WBEndpointConfig(
         production="https://discounts-prices-api.wildberries.ru",
-        sandbox="https://discounts-prices-api-sandbox.wildberries.ru"
+        sandbox="https://discounts-prices-api-sandbox.wildberries.ru",
+        requests_per_minute=100  # 10 запросов за 6 секунд
     ),
     WBApiCategory.MARKETPLACE: WBEndpointConfig(
-        production="https://marketplace-api.wildberries.ru"
+        production="https://marketplace-api.wildberries.ru",
+        requests_per_minute=300
     ),
     WBApiCategory.STATISTICS: WBEndpointConfig(
         production="https://statistics-api.wildberries.ru",
-        sandbox="https://statistics-api-sandbox.wildberries.ru"
+        sandbox="https://statistics-api-sandbox.wildberries.ru",
+        requests_per_minute=1  # 1 запрос в минуту на аккаунт продавца
     ),
     WBApiCategory.ADVERT: WBEndpointConfig(
         production="https://advert-api.wildberries.ru",
@@ -1,7 +1,7 @@
 # api/yandex_client.py
 
-from .base import BaseAPIClient
-from typing import Dict, Any, List
+from .base import BaseAPIClient, resolve_base_url
+from typing import AsyncIterator, Dict, Any, List
 import datetime
 import logging
 
@@ -10,8 +10,14 @@ logger = logging.getLogger(__name__)
 class YandexMarketAPIClient(BaseAPIClient):
     """Клиент для работы с API Яндекс.Маркета (v2)"""
     
-    def __init__(self, oauth_token: str, campaign_id: str):
-        super().__init__(oauth_token, "https://api.partner.market.yandex.ru")
+    BASE_URL = "https://api.partner.market.yandex.ru"
+    # Максимальный размер страницы списка заказов
+    PAGE_SIZE = 50
+    # Максимальный размер страницы списка товаров кабинета
+    OFFER_MAPPINGS_LIMIT = 200
+
+    def __init__(self, oauth_token: str, campaign_id: str, base_url: str = None):
+        super().__init__(oauth_token, resolve_base_url('yandex_market', self.BASE_URL, base_url))
         self.campaign_id = campaign_id
     
     async def get_headers(self) -> Dict[str, str]:
@@ -20,8 +26,9 @@ class YandexMarketAPIClient(BaseAPIClient):
             "Content-Type": "application/json"
         }
     
-    async def get_orders(self, from_date: datetime.datetime = None) -> List[Dict[str, Any]]:
-        """Получение списка заказов (GET с query-параметрами)"""
+    async def get_orders(self, from_date: datetime.datetime = None,
+                         to_date: datetime.datetime = None) -> List[Dict[str, Any]]:
+        """Получение списка заказов (GET с query-параметрами); toDate включает весь день"""
         if from_date is None:
             from_date = datetime.datetime.now() - datetime.timedelta(days=2)
         
@@ -29,14 +36,47 @@ class YandexMarketAPIClient(BaseAPIClient):
         
         params = {
             "fromDate": from_date_str,
-            "limit": 1000,
+            "pageSize": self.PAGE_SIZE,
+            "page": 1,
         }
+        if to_date is not None:
+            params["toDate"] = to_date.strftime("%d-%m-%Y")
         
         endpoint = f"/v2/campaigns/{self.campaign_id}/orders"
         
+        orders = []
         try:
-            response = await self.make_request("GET", endpoint, params=params)
-            return response.get("orders", [])
+            while True:
+                response = await self.make_request("GET", endpoint, params=params, cache=True)
+                orders.extend(response.get("orders", []))
+                pager = response.get("pager") or {}
+                if params["page"] >= pager.get("pagesCount", 0):
+                    return orders
+                params["page"] += 1
         except Exception as e:
             logger.error(f"Ошибка получения заказов Яндекс.Маркета: {str(e)}")
-            return []
\ No newline at end of file
+            return orders
+
+    async def get_order(self, order_id) -> Dict[str, Any]:
+        """Один заказ по ID"""
+        endpoint = f"/v2/campaigns/{self.campaign_id}/orders/{order_id}"
+        response = await self.make_request("GET", endpoint)
+        return response.get("order", {})
+
+    async def iter_offer_mappings(self, business_id) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Товары кабинета (бизнеса) с карточками Маркета: {"offer": {...}, "mapping": {...}}.
+
+        Список отдаётся страницами по OFFER_MAPPINGS_LIMIT (nextPageToken).
+        """
+        endpoint = f"/businesses/{business_id}/offer-mappings"
+        params = {"limit": self.OFFER_MAPPINGS_LIMIT}
+        while True:
+            response = await self.make_request("POST", endpoint, params=params, json={}, cache=True)
+            result = response.get("result") or {}
+            for offer_mapping in result.get("offerMappings", []):
+                yield offer_mapping
+            next_page_token = (result.get("paging") or {}).get("nextPageToken")
+            if not next_page_token:
+                return
+            params["page_token"] = next_page_token
@@ -0,0 +1,62 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from rest_framework.test import APIClient
+from benchmarks.runner import format_table, measure
+
+LIST_ENDPOINTS = [
+    ('Заказы', '/api/orders/'),
+    ('Товары', '/api/products/'),
+    ('Остатки', '/api/stocks/'),
+    ('Документы', '/api/documents/?page=1'),
+]
+
+
+class Command(BaseCommand):
+    help = 'Requests per second of list endpoints with and without the fast path (API_FAST_PATH)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200, help='Requests per endpoint and mode')
+        parser.add_argument('--page-size', type=int, default=100, help='page_size for list requests')
+        parser.add_argument('--user', type=str, help='Email of the user to authenticate as (default: first director)')
+
+    def handle(self, *args, **options):
+        user = self._get_user(options.get('user'))
+        client = APIClient()
+        client.force_authenticate(user)
+
+        results = []
+        with override_settings(ALLOWED_HOSTS=['*']):
+            for title, url in LIST_ENDPOINTS:
+                separator = '&' if '?' in url else '?'
+                url = f"{url}{separator}page_size={options['page_size']}"
+
+                bodies = {}
+                for fast in (False, True):
+                    with override_settings(API_FAST_PATH=fast):
+                        response = client.get(url)
+                        if response.status_code != 200:
+                            raise CommandError(f"{url}: HTTP {response.status_code}")
+                        bodies[fast] = response.content
+
+                        def request():
+                            client.get(url)
+
+                        results.append(measure(
+                            f"{title} ({'быстрый путь' if fast else 'стандартный'})",
+                            request,
+                            iterations=options['iterations'],
+                        ))
+
+                if bodies[False] != bodies[True]:
+                    self.stdout.write(self.style.ERROR(f"{url}: ответы быстрого и стандартного пути различаются"))
+
+        self.stdout.write(format_table(results))
+
+    def _get_user(self, email):
+        User = get_user_model()
+        queryset = User.objects.filter(is_active=True)
+        user = queryset.filter(email=email).first() if email else queryset.filter(role=User.Role.DIRECTOR).first()
+        if user is None:
+            raise CommandError('Не найден пользователь для авторизации, укажите --user')
+        return user
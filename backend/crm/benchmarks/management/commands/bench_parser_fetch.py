@@ -0,0 +1,65 @@
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from benchmarks.mock_marketplace import MARKETPLACE_CODES, MockConfig, MockMarketplaceServer
+from benchmarks.runner import format_table, measure
+from benchmarks.seed import get_bench_marketplaces, seeded_size
+from benchmarks.suite import PARSERS
+
+
+class Command(BaseCommand):
+    help = 'Fetch + ingest throughput of the parsers against the local mock marketplace server'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--volume', type=int, default=1000, help='Orders per marketplace')
+        parser.add_argument('--page-size', type=int, default=1000, help='Rows per page')
+        parser.add_argument('--latency-ms', type=float, default=50, help='Response latency')
+        parser.add_argument('--jitter-ms', type=float, default=0, help='Random extra latency')
+        parser.add_argument('--rate-limit', type=float, default=0, help='Share of requests answered with 429')
+        parser.add_argument('--iterations', type=int, default=5, help='Measured runs per marketplace')
+        parser.add_argument('--only', nargs='+', choices=MARKETPLACE_CODES, help='Run only these marketplaces')
+
+    def handle(self, *args, **options):
+        if not seeded_size():
+            raise CommandError('Каталог бенчмарков пуст, выполните run_benchmarks --reseed')
+
+        server = MockMarketplaceServer(MockConfig(
+            volume=options['volume'],
+            page_size=options['page_size'],
+            latency=options['latency_ms'] / 1000,
+            jitter=options['jitter_ms'] / 1000,
+            rate_limit=options['rate_limit'],
+            catalogue_size=seeded_size(),
+        ))
+        base_url = server.start_in_thread()
+        self.stdout.write(f"Mock API маркетплейсов: {base_url}")
+
+        results = []
+        try:
+            base_urls = {code: base_url for code in MARKETPLACE_CODES}
+            with override_settings(MARKETPLACE_API_BASE_URLS=base_urls):
+                marketplaces = get_bench_marketplaces()
+                for code in options.get('only') or MARKETPLACE_CODES:
+                    # Клиент API получает хост при создании парсера
+                    parser = PARSERS[code](marketplace_id=marketplaces[code].pk)
+
+                    def parse(parser=parser):
+                        parser.processed_orders = 0
+                        return async_to_sync(parser.parse_orders)()
+
+                    self.stdout.write(f"{code}...")
+                    results.append(measure(
+                        f"fetch + parse_orders {code}",
+                        parse,
+                        iterations=options['iterations'],
+                        rollback=True,
+                    ))
+        finally:
+            server.stop()
+
+        self.stdout.write(format_table(results))
+        stats = server.stats
+        self.stdout.write(
+            f"Запросов к mock API: {stats['requests']}, ответов 429: {stats['throttled']}, "
+            f"строк отдано: {stats['rows']}"
+        )
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from benchmarks.mock_marketplace import MockConfig, MockMarketplaceServer
+from benchmarks.seed import seeded_size
+
+
+class Command(BaseCommand):
+    help = 'Local mock of the WB, Ozon and Yandex.Market order APIs for offline parser benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--source', choices=['generated', 'recorded'], default='generated',
+                            help='generated: expand fixtures to --volume orders; recorded: serve fixtures as is')
+        parser.add_argument('--fixtures-dir', type=str, help='Directory with recorded responses')
+        parser.add_argument('--volume', type=int, default=10_000, help='Orders per marketplace')
+        parser.add_argument('--page-size', type=int, default=1000, help='Rows per page')
+        parser.add_argument('--latency-ms', type=float, default=50, help='Response latency')
+        parser.add_argument('--jitter-ms', type=float, default=0, help='Random extra latency')
+        parser.add_argument('--rate-limit', type=float, default=0, help='Share of requests answered with 429')
+        parser.add_argument('--retry-after', type=int, default=1, help='Retry-After of 429 responses, seconds')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        config = MockConfig(
+            volume=options['volume'],
+            page_size=options['page_size'],
+            latency=options['latency_ms'] / 1000,
+            jitter=options['jitter_ms'] / 1000,
+            rate_limit=options['rate_limit'],
+            retry_after=options['retry_after'],
+            catalogue_size=seeded_size() or MockConfig.catalogue_size,
+            source=options['source'],
+            seed=options['seed'],
+        )
+        if options.get('fixtures_dir'):
+            config.fixtures_dir = options['fixtures_dir']
+
+        server = MockMarketplaceServer(config)
+        base_url = f"http://{options['host']}:{options['port']}"
+        self.stdout.write(
+            f"Mock API маркетплейсов: {base_url}\n"
+            f"WB_API_BASE_URL={base_url} OZON_API_BASE_URL={base_url} YANDEX_MARKET_API_BASE_URL={base_url}"
+        )
+        server.run(host=options['host'], port=options['port'])
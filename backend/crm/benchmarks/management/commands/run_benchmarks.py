@@ -0,0 +1,59 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from benchmarks.runner import format_table, measure
+from benchmarks.seed import SIZES, clear_catalogue, seed_catalogue, seeded_size
+from benchmarks.suite import GROUPS, BenchmarkError, build_cases
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks of parser ingest, stock import, document completion, dashboard and order list endpoints'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', choices=SIZES.keys(), default='10k', help='Size of the synthetic catalogue')
+        parser.add_argument('--reseed', action='store_true', help='Recreate the synthetic catalogue')
+        parser.add_argument('--clear', action='store_true', help='Remove the synthetic catalogue and exit')
+        parser.add_argument('--iterations', type=int, default=20, help='Measured runs per operation')
+        parser.add_argument('--only', nargs='+', choices=GROUPS.keys(), help='Run only these groups')
+        parser.add_argument('--json', type=str, help='Write results to this JSON file')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            clear_catalogue()
+            self.stdout.write(self.style.SUCCESS('Данные бенчмарков удалены'))
+            return
+
+        size = SIZES[options['size']]
+        existing = seeded_size()
+        if options['reseed'] or existing != size:
+            if existing:
+                self.stdout.write(f"Удаляем каталог бенчмарков ({existing} товаров)")
+                clear_catalogue()
+            self.stdout.write(f"Создаём каталог бенчмарков: {size} товаров и заказов")
+            seed_catalogue(size, log=self.stdout.write)
+
+        results = []
+        with override_settings(ALLOWED_HOSTS=['*']):
+            try:
+                cases = build_cases(size, options.get('only'))
+                for case in cases:
+                    self.stdout.write(f"{case.name}...")
+                    results.append(measure(
+                        case.name,
+                        case.func,
+                        iterations=options['iterations'],
+                        setup=case.setup,
+                        rollback=case.rollback,
+                    ))
+            except BenchmarkError as e:
+                raise CommandError(str(e))
+
+        self.stdout.write(format_table(results))
+
+        if options.get('json'):
+            with open(options['json'], 'w', encoding='utf-8') as f:
+                json.dump(
+                    {'size': options['size'], 'results': [result.as_dict() for result in results]},
+                    f, ensure_ascii=False, indent=2
+                )
+            self.stdout.write(self.style.SUCCESS(f"Результаты сохранены в {options['json']}"))
@@ -0,0 +1,435 @@
+# benchmarks/mock_marketplace.py
+"""
+Локальный mock-сервер API маркетплейсов на aiohttp.
+
+Отдаёт заказы WB (statistics), Ozon (FBS postings) и Яндекс.Маркета,
+отчёты WB о продажах и остатках и
+каталог товаров бенчмарков (карточки WB, товары Ozon, товары Яндекс.Маркета)
+по тем же путям и с той же пагинацией, что и боевые API, и принимает выгрузку цен
+и остатков WB (баркоды с префиксом REJECTED_SKU_PREFIX отклоняются, как
+отклоняет WB неизвестные товары), с настраиваемыми
+объёмом, задержкой и долей ответов 429. Клиенты направляются на сервер
+через MARKETPLACE_API_BASE_URLS (или api_base_url в учетных данных
+маркетплейса), так что fetch и ingest можно мерить без сети.
+"""
+import asyncio
+import logging
+import random
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone as dt_timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from aiohttp import web
+from .payloads import FIXTURES, FIXTURES_DIR, build_orders_response, load_fixture, stamp_orders
+from .seed import external_product_id, product_article
+
+logger = logging.getLogger(__name__)
+
+MARKETPLACE_CODES = ('wildberries', 'ozon', 'yandex_market')
+
+# Максимум строк за запрос в боевых API
+OZON_MAX_LIMIT = 1000
+YANDEX_DEFAULT_PAGE_SIZE = 50
+WB_PUSH_MAX_ITEMS = 1000
+WB_CARDS_MAX_LIMIT = 100
+OZON_PRODUCTS_MAX_LIMIT = 1000
+YANDEX_OFFER_MAPPINGS_MAX_LIMIT = 200
+
+REJECTED_SKU_PREFIX = 'REJECT'
+
+
+@dataclass
+class MockConfig:
+    """Параметры mock-сервера"""
+    volume: int = 10_000               # заказов на маркетплейс (для source='generated')
+    page_size: int = 1000              # строк на страницу
+    latency: float = 0.05              # задержка ответа, сек
+    jitter: float = 0.0                # случайная добавка к задержке, сек
+    rate_limit: float = 0.0            # доля запросов, получающих 429
+    retry_after: int = 1               # Retry-After в ответе 429, сек
+    catalogue_size: int = 10_000       # сколько товаров в каталоге бенчмарков
+    source: str = 'generated'          # generated - размножить фикстуры, recorded - отдать как есть
+    fixtures_dir: Path = FIXTURES_DIR
+    span_hours: int = 12               # заказы датируются последними span_hours часами
+    seed: int = 42
+
+
+def _parse_datetime(value: str) -> Optional[datetime]:
+    """Дата из запроса: ISO (WB, Ozon) или ДД-ММ-ГГГГ (Яндекс)"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        try:
+            parsed = datetime.strptime(value, '%d-%m-%Y')
+        except ValueError:
+            return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=dt_timezone.utc)
+
+
+class MockMarketplaceServer:
+    """Mock API WB, Ozon и Яндекс.Маркета"""
+
+    def __init__(self, config: MockConfig = None):
+        self.config = config or MockConfig()
+        self.rng = random.Random(self.config.seed)
+        self.stats = Counter()
+        self.orders: Dict[str, List[Tuple[datetime, Dict[str, Any]]]] = {
+            code: self._build_orders(code) for code in MARKETPLACE_CODES
+        }
+        self._reports: Dict[str, List[Tuple[datetime, Dict[str, Any]]]] = {}
+        self._loop = None
+        self._runner = None
+        self._thread = None
+
+    def _build_orders(self, code):
+        config = self.config
+        if config.source == 'recorded':
+            orders = load_fixture(FIXTURES[code][0], config.fixtures_dir)
+        else:
+            orders = build_orders_response(code, config.volume, config.catalogue_size, seed=config.seed)
+
+        now = datetime.now(dt_timezone.utc).replace(microsecond=0)
+        moments = stamp_orders(code, orders, now, timedelta(hours=config.span_hours))
+        return list(zip(moments, orders))
+
+    # --- Приложение ---
+
+    def build_app(self) -> web.Application:
+        app = web.Application(middlewares=[self._throttle])
+        app.router.add_get('/api/v1/supplier/orders', self.wildberries_orders)
+        app.router.add_get('/api/v1/supplier/sales', self.wildberries_sales)
+        app.router.add_get('/api/v1/supplier/stocks', self.wildberries_stocks_report)
+        app.router.add_post('/api/v2/upload/task', self.wildberries_prices)
+        app.router.add_put('/api/v3/stocks/{warehouse_id}', self.wildberries_stocks)
+        app.router.add_post('/content/v2/get/cards/list', self.wildberries_cards)
+        app.router.add_post('/v3/posting/fbs/list', self.ozon_postings)
+        app.router.add_post('/v3/product/list', self.ozon_products)
+        app.router.add_post('/v3/product/info/list', self.ozon_product_info)
+        app.router.add_post('/businesses/{business_id}/offer-mappings', self.yandex_offer_mappings)
+        app.router.add_post('/v3/posting/fbs/get', self.ozon_posting)
+        app.router.add_get('/v2/campaigns/{campaign_id}/orders', self.yandex_orders)
+        app.router.add_get('/v2/campaigns/{campaign_id}/orders/{order_id}', self.yandex_order)
+        app.router.add_get('/_mock/stats', self.get_stats)
+        app.router.add_post('/_mock/reset', self.reset_stats)
+        return app
+
+    @web.middleware
+    async def _throttle(self, request, handler):
+        """Задержка и ответы 429 для всех путей, кроме служебных"""
+        if request.path.startswith('/_mock/'):
+            return await handler(request)
+
+        self.stats['requests'] += 1
+        delay = self.config.latency + self.rng.uniform(0, self.config.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if self.config.rate_limit and self.rng.random() < self.config.rate_limit:
+            self.stats['throttled'] += 1
+            return web.json_response(
+                {'code': 429, 'message': 'Too Many Requests'},
+                status=429,
+                headers={'Retry-After': str(self.config.retry_after)},
+            )
+
+        return await handler(request)
+
+    def _since(self, code, since, until=None):
+        return [
+            order for moment, order in self.orders[code]
+            if (since is None or moment >= since) and (until is None or moment <= until)
+        ]
+
+    async def wildberries_orders(self, request):
+        """
+        GET /api/v1/supplier/orders?dateFrom=...&flag=...
+
+        flag=1 - все заказы начиная с dateFrom одним ответом, flag=0 - не более
+        page_size строк с lastChangeDate >= dateFrom (следующая страница
+        запрашивается с dateFrom = lastChangeDate последней строки).
+        """
+        since = _parse_datetime(request.query.get('dateFrom', ''))
+        if since is None:
+            return web.json_response({'title': 'bad request', 'detail': 'dateFrom is required'}, status=400)
+
+        orders = self._since('wildberries', since)
+        if request.query.get('flag') != '1':
+            orders = orders[:self.config.page_size]
+        self.stats['rows'] += len(orders)
+        return web.json_response(orders)
+
+    def _build_report(self, name: str) -> List[Tuple[datetime, Dict[str, Any]]]:
+        """Строки отчёта WB по возрастанию lastChangeDate"""
+        rows = []
+        if name == 'sales':
+            # Продажа на каждый заказ, возврат на каждый десятый
+            for number, (moment, order) in enumerate(sorted(self.orders['wildberries'], key=lambda pair: pair[0])):
+                for prefix in ('S', 'R') if number % 10 == 9 else ('S',):
+                    rows.append((moment, {
+                        **{key: order.get(key) for key in (
+                            'date', 'lastChangeDate', 'warehouseName', 'regionName', 'supplierArticle', 'nmId',
+                            'barcode', 'totalPrice', 'priceWithDisc', 'finishedPrice', 'srid',
+                        )},
+                        'saleID': f"{prefix}{number + 1}",
+                        'forPay': round((order.get('priceWithDisc') or 0) * 0.8, 2),
+                    }))
+        else:
+            start = datetime.now(dt_timezone.utc).replace(microsecond=0) - timedelta(seconds=self.config.catalogue_size)
+            for index in range(self.config.catalogue_size):
+                moment = start + timedelta(seconds=index)
+                rows.append((moment, {
+                    'lastChangeDate': moment.strftime('%Y-%m-%dT%H:%M:%S'),
+                    'warehouseName': 'Коледино',
+                    'supplierArticle': product_article(index),
+                    'nmId': int(external_product_id(index)),
+                    'barcode': self._barcode(index),
+                    'quantity': index % 50,
+                    'inWayToClient': index % 3,
+                    'inWayFromClient': index % 2,
+                    'quantityFull': index % 50 + index % 3,
+                    'Price': 1000 + index % 9000,
+                    'Discount': 30,
+                }))
+        return rows
+
+    async def _report_page(self, request, name: str):
+        """Отчёт statistics с flag=0: не более page_size строк с lastChangeDate >= dateFrom"""
+        since = _parse_datetime(request.query.get('dateFrom', ''))
+        if since is None:
+            return web.json_response({'title': 'bad request', 'detail': 'dateFrom is required'}, status=400)
+        if name not in self._reports:
+            self._reports[name] = self._build_report(name)
+        page = [row for moment, row in self._reports[name] if moment >= since][:self.config.page_size]
+        self.stats['rows'] += len(page)
+        return web.json_response(page)
+
+    async def wildberries_sales(self, request):
+        """GET /api/v1/supplier/sales?dateFrom=...&flag=0"""
+        return await self._report_page(request, 'sales')
+
+    async def wildberries_stocks_report(self, request):
+        """GET /api/v1/supplier/stocks?dateFrom=..."""
+        return await self._report_page(request, 'stocks')
+
+    async def wildberries_prices(self, request):
+        """POST /api/v2/upload/task {"data": [{"nmID", "price", "discount"}]}"""
+        items = (await request.json()).get('data') or []
+        if not items or len(items) > WB_PUSH_MAX_ITEMS:
+            return web.json_response({'data': None, 'error': True, 'errorText': 'Invalid data'}, status=400)
+        self.stats['rows'] += len(items)
+        self.stats['upload_id'] += 1
+        return web.json_response({
+            'data': {'id': self.stats['upload_id'], 'alreadyExists': False}, 'error': False, 'errorText': ''
+        })
+
+    async def wildberries_stocks(self, request):
+        """PUT /api/v3/stocks/{warehouse_id} {"stocks": [{"sku", "amount"}]}; 409 - отклонённые баркоды"""
+        stocks = (await request.json()).get('stocks') or []
+        if not stocks or len(stocks) > WB_PUSH_MAX_ITEMS:
+            return web.json_response({'code': 'IncorrectRequest', 'message': 'Invalid stocks'}, status=400)
+        self.stats['rows'] += len(stocks)
+        rejected = [item for item in stocks if str(item.get('sku', '')).startswith(REJECTED_SKU_PREFIX)]
+        if rejected:
+            return web.json_response(
+                [{'code': 'NotFound', 'message': 'Товар не найден', 'data': rejected}], status=409
+            )
+        return web.Response(status=204)
+
+    # --- Каталог: товар бенчмарков с номером index ---
+
+    def _catalogue_page(self, start: int, limit: int) -> range:
+        start = max(start, 0)
+        return range(start, min(start + limit, self.config.catalogue_size))
+
+    @staticmethod
+    def _barcode(index: int) -> str:
+        return f"46{index:011d}"
+
+    async def wildberries_cards(self, request):
+        """POST /content/v2/get/cards/list; курсор - (updatedAt, nmID) последней карточки"""
+        cursor = ((await request.json()).get('settings') or {}).get('cursor') or {}
+        limit = min(int(cursor.get('limit', WB_CARDS_MAX_LIMIT)), WB_CARDS_MAX_LIMIT)
+        start = int(cursor['nmID']) - int(external_product_id(0)) + 1 if cursor.get('nmID') else 0
+        page = self._catalogue_page(start, limit)
+        self.stats['rows'] += len(page)
+        cards = [
+            {
+                'nmID': int(external_product_id(index)),
+                'vendorCode': product_article(index),
+                'sizes': [{'skus': [self._barcode(index)]}],
+            }
+            for index in page
+        ]
+        return web.json_response({
+            'cards': cards,
+            'cursor': {
+                'updatedAt': '2024-01-01T00:00:00Z',
+                'nmID': cards[-1]['nmID'] if cards else None,
+                'total': len(cards),
+            },
+        })
+
+    async def ozon_products(self, request):
+        """POST /v3/product/list; last_id - номер следующего товара"""
+        payload = await request.json()
+        limit = min(int(payload.get('limit', OZON_PRODUCTS_MAX_LIMIT)), OZON_PRODUCTS_MAX_LIMIT)
+        page = self._catalogue_page(int(payload.get('last_id') or 0), limit)
+        self.stats['rows'] += len(page)
+        return web.json_response({'result': {
+            'items': [
+                {'product_id': index + 1, 'offer_id': product_article(index), 'archived': False}
+                for index in page
+            ],
+            'total': self.config.catalogue_size,
+            'last_id': str(page.stop) if page else '',
+        }})
+
+    async def ozon_product_info(self, request):
+        """POST /v3/product/info/list {"product_id": [...]}"""
+        indexes = [int(product_id) - 1 for product_id in (await request.json()).get('product_id') or []]
+        return web.json_response({'items': [
+            {
+                'id': index + 1,
+                'offer_id': product_article(index),
+                'sources': [{'sku': int(external_product_id(index)), 'source': 'sds'}],
+                'barcodes': [self._barcode(index)],
+                'price': f"{1000 + index % 9000}.00",
+            }
+            for index in indexes if 0 <= index < self.config.catalogue_size
+        ]})
+
+    async def yandex_offer_mappings(self, request):
+        """POST /businesses/{business_id}/offer-mappings?limit=...&page_token=..."""
+        limit = min(int(request.query.get('limit', YANDEX_OFFER_MAPPINGS_MAX_LIMIT)), YANDEX_OFFER_MAPPINGS_MAX_LIMIT)
+        page = self._catalogue_page(int(request.query.get('page_token') or 0), limit)
+        self.stats['rows'] += len(page)
+        next_page = page.stop if page and page.stop < self.config.catalogue_size else None
+        return web.json_response({'status': 'OK', 'result': {
+            'paging': {'nextPageToken': str(next_page)} if next_page else {},
+            'offerMappings': [
+                {
+                    'offer': {
+                        'offerId': product_article(index),
+                        'barcodes': [self._barcode(index)],
+                        'basicPrice': {'value': 1000 + index % 9000, 'currencyId': 'RUR'},
+                        'archived': False,
+                    },
+                    'mapping': {'marketSku': int(external_product_id(index))},
+                }
+                for index in page
+            ],
+        }})
+
+    async def ozon_postings(self, request):
+        """POST /v3/posting/fbs/list: filter.since/filter.to, limit (до 1000), offset"""
+        try:
+            payload = await request.json()
+        except ValueError:
+            return web.json_response({'code': 3, 'message': 'invalid JSON'}, status=400)
+
+        filters = payload.get('filter') or {}
+        orders = self._since('ozon', _parse_datetime(filters.get('since')), _parse_datetime(filters.get('to')))
+        limit = min(int(payload.get('limit') or OZON_MAX_LIMIT), OZON_MAX_LIMIT, self.config.page_size)
+        offset = int(payload.get('offset') or 0)
+
+        page = orders[offset:offset + limit]
+        self.stats['rows'] += len(page)
+        return web.json_response({
+            'result': {
+                'postings': page,
+                'has_next': offset + limit < len(orders),
+            }
+        })
+
+    def _find(self, code, key, value):
+        for _, order in self.orders[code]:
+            if str(order.get(key)) == str(value):
+                return order
+        return None
+
+    async def ozon_posting(self, request):
+        """POST /v3/posting/fbs/get: одно отправление по posting_number (для вебхуков)"""
+        try:
+            payload = await request.json()
+        except ValueError:
+            return web.json_response({'code': 3, 'message': 'invalid JSON'}, status=400)
+
+        posting = self._find('ozon', 'posting_number', payload.get('posting_number'))
+        if posting is None:
+            return web.json_response({'code': 5, 'message': 'Posting not found'}, status=404)
+        self.stats['rows'] += 1
+        return web.json_response({'result': posting})
+
+    async def yandex_order(self, request):
+        """GET /v2/campaigns/{id}/orders/{orderId}: один заказ (для вебхуков)"""
+        order = self._find('yandex_market', 'id', request.match_info['order_id'])
+        if order is None:
+            return web.json_response({'status': 'ERROR', 'errors': [{'code': 'NOT_FOUND'}]}, status=404)
+        self.stats['rows'] += 1
+        return web.json_response({'order': order})
+
+    async def yandex_orders(self, request):
+        """GET /v2/campaigns/{id}/orders?fromDate=ДД-ММ-ГГГГ&page=&pageSize="""
+        orders = self._since('yandex_market', _parse_datetime(request.query.get('fromDate', '')))
+        page_size = min(int(request.query.get('pageSize') or YANDEX_DEFAULT_PAGE_SIZE), self.config.page_size)
+        page_number = max(int(request.query.get('page') or 1), 1)
+        start = (page_number - 1) * page_size
+
+        page = orders[start:start + page_size]
+        self.stats['rows'] += len(page)
+        return web.json_response({
+            'pager': {
+                'total': len(orders),
+                'from': start + 1 if page else 0,
+                'to': start + len(page),
+                'currentPage': page_number,
+                'pagesCount': -(-len(orders) // page_size),
+                'pageSize': page_size,
+            },
+            'orders': page,
+        })
+
+    async def get_stats(self, request):
+        return web.json_response(dict(self.stats))
+
+    async def reset_stats(self, request):
+        self.stats.clear()
+        return web.json_response({})
+
+    # --- Запуск ---
+
+    def run(self, host: str = '127.0.0.1', port: int = 8765):
+        """Запуск в текущем потоке до остановки (Ctrl+C)"""
+        web.run_app(self.build_app(), host=host, port=port, print=logger.info)
+
+    def start_in_thread(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        """Запуск в фоновом потоке; возвращает базовый URL сервера"""
+        self._loop = asyncio.new_event_loop()
+        self._runner = web.AppRunner(self.build_app())
+        started = threading.Event()
+
+        def serve():
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(self._runner.setup())
+            self._loop.run_until_complete(web.TCPSite(self._runner, host, port).start())
+            started.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=serve, name='mock-marketplace', daemon=True)
+        self._thread.start()
+        started.wait()
+        bound_host, bound_port = self._runner.addresses[0][:2]
+        return f"http://{bound_host}:{bound_port}"
+
+    def stop(self):
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
@@ -0,0 +1,104 @@
+# benchmarks/payloads.py
+"""
+Ответы API маркетплейсов для бенчмарков и mock-сервера.
+
+Основа - записанные ответы в benchmarks/fixtures. Для нагрузочных прогонов
+они размножаются до нужного объёма с уникальными внешними ID и артикулами
+из каталога бенчмарков (см. seed.py).
+"""
+import copy
+import json
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List
+from .seed import BENCH_PREFIX, external_product_id, product_article
+
+FIXTURES_DIR = Path(__file__).resolve().parent / 'fixtures'
+
+
+def load_fixture(filename: str, fixtures_dir: Path = FIXTURES_DIR) -> List[Dict[str, Any]]:
+    """Записанный ответ API маркетплейса"""
+    with open(Path(fixtures_dir) / filename, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _expand_wildberries(template, number, index):
+    order = copy.deepcopy(template)
+    order['srid'] = f"{BENCH_PREFIX}wb.{number}"
+    order['gNumber'] = f"{BENCH_PREFIX}{number}"
+    order['sticker'] = str(number)
+    order['supplierArticle'] = product_article(index)
+    order['nmId'] = int(external_product_id(index))
+    return order
+
+
+def _expand_ozon(template, number, index):
+    order = copy.deepcopy(template)
+    order['order_id'] = f"{BENCH_PREFIX}oz.{number}"
+    order['order_number'] = f"{BENCH_PREFIX}{number}"
+    order['posting_number'] = f"{BENCH_PREFIX}{number}-1"
+    for offset, product in enumerate(order['products']):
+        product['offer_id'] = product_article(index + offset)
+        product['sku'] = int(external_product_id(index + offset))
+    return order
+
+
+def _expand_yandex(template, number, index):
+    order = copy.deepcopy(template)
+    order['id'] = f"{BENCH_PREFIX}ym.{number}"
+    for offset, item in enumerate(order['items']):
+        item['id'] = int(external_product_id(index + offset))
+        item['offerId'] = item['shopSku'] = product_article(index + offset)
+    return order
+
+
+def _stamp_wildberries(order, moment: datetime):
+    order['date'] = order['lastChangeDate'] = moment.strftime('%Y-%m-%dT%H:%M:%S')
+
+
+def _stamp_ozon(order, moment: datetime):
+    order['in_process_at'] = moment.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _stamp_yandex(order, moment: datetime):
+    order['creationDate'] = moment.strftime('%d-%m-%Y %H:%M:%S')
+
+
+FIXTURES = {
+    'wildberries': ('wildberries_orders.json', _expand_wildberries, _stamp_wildberries),
+    'ozon': ('ozon_postings.json', _expand_ozon, _stamp_ozon),
+    'yandex_market': ('yandex_orders.json', _expand_yandex, _stamp_yandex),
+}
+
+
+def build_orders_response(code: str, count: int, size: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """
+    Размножает записанные заказы маркетплейса до count штук.
+
+    Внешние ID уникальны, артикулы берутся из каталога бенчмарков, так что
+    парсер проходит полный путь: поиск товаров, карточки, позиции, резервы.
+    """
+    filename, expand, _ = FIXTURES[code]
+    templates = load_fixture(filename)
+    rng = random.Random(seed)
+    return [
+        expand(templates[number % len(templates)], number, rng.randrange(max(size - 3, 1)))
+        for number in range(count)
+    ]
+
+
+def stamp_orders(code: str, orders: List[Dict[str, Any]], until: datetime, span: timedelta) -> List[datetime]:
+    """
+    Равномерно распределяет даты заказов по интервалу (until - span, until].
+
+    Записанные заказы датированы днём записи и не попали бы в окно
+    days_back/hours_back парсеров; даты идут по возрастанию, как в API.
+    Возвращает проставленные даты.
+    """
+    _, _, stamp = FIXTURES[code]
+    total = len(orders)
+    moments = [(until - span * (total - number) / total).replace(microsecond=0) for number in range(total)]
+    for order, moment in zip(orders, moments):
+        stamp(order, moment)
+    return moments
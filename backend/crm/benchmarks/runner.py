@@ -0,0 +1,111 @@
+# benchmarks/runner.py
+import contextlib
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, List, Optional
+from django.db import connection, reset_queries, transaction
+from django.test.utils import CaptureQueriesContext
+
+
+@dataclass
+class BenchmarkResult:
+    """Результат замера одной операции"""
+    name: str
+    iterations: int
+    durations: List[float] = field(default_factory=list)
+    queries: int = 0
+    rows: int = 0
+
+    @property
+    def total(self) -> float:
+        return sum(self.durations)
+
+    @property
+    def ops_per_second(self) -> float:
+        return self.iterations / self.total if self.total else 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.total if self.total else 0.0
+
+    def percentile(self, percent: float) -> float:
+        """Перцентиль длительности в секундах (ближайший ранг)"""
+        if not self.durations:
+            return 0.0
+        ordered = sorted(self.durations)
+        rank = math.ceil(percent / 100 * len(ordered))
+        return ordered[max(0, min(len(ordered), rank) - 1)]
+
+    @property
+    def queries_per_op(self) -> float:
+        return self.queries / self.iterations if self.iterations else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            'name': self.name,
+            'iterations': self.iterations,
+            'ops_per_second': round(self.ops_per_second, 2),
+            'rows_per_second': round(self.rows_per_second, 2),
+            'p50_ms': round(self.percentile(50) * 1000, 3),
+            'p99_ms': round(self.percentile(99) * 1000, 3),
+            'queries_per_op': round(self.queries_per_op, 2),
+        }
+
+
+def measure(
+    name: str,
+    func: Callable[..., int],
+    iterations: int,
+    warmup: int = 1,
+    setup: Optional[Callable[[], Any]] = None,
+    rollback: bool = False,
+) -> BenchmarkResult:
+    """
+    Выполняет func iterations раз и собирает длительности и число запросов.
+
+    func возвращает число обработанных строк (или None), из которого
+    считается пропускная способность в строках в секунду. Если задан setup,
+    он вызывается перед каждым прогоном вне замера, а его результат
+    передаётся в func. С rollback=True прогон вместе с setup выполняется в
+    транзакции, которая откатывается, - операции, меняющие данные, каждый
+    раз стартуют с одного и того же состояния.
+    """
+    def run_once(result=None):
+        # Без отката лишняя транзакция не нужна: вложенные atomic() внутри
+        # операции превратились бы в точки сохранения и исказили число запросов
+        with transaction.atomic() if rollback else contextlib.nullcontext():
+            args = (setup(),) if setup is not None else ()
+            # queries_log ограничен 9000 записей: заполненный журнал дал бы ноль запросов
+            reset_queries()
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                rows = func(*args)
+                duration = time.perf_counter() - started
+            if rollback:
+                transaction.set_rollback(True)
+        if result is not None:
+            result.durations.append(duration)
+            result.queries += len(captured.captured_queries)
+            result.rows += rows or 0
+
+    for _ in range(warmup):
+        run_once()
+
+    result = BenchmarkResult(name=name, iterations=iterations)
+    for _ in range(iterations):
+        run_once(result)
+    return result
+
+
+def format_table(results: List[BenchmarkResult]) -> str:
+    """Таблица результатов для вывода в консоль"""
+    header = f"{'операция':<48}{'оп/с':>10}{'строк/с':>12}{'p50, мс':>10}{'p99, мс':>10}{'запросов':>10}"
+    lines = [header, '-' * len(header)]
+    for result in results:
+        row = result.as_dict()
+        lines.append(
+            f"{row['name']:<48}{row['ops_per_second']:>10}{row['rows_per_second']:>12}"
+            f"{row['p50_ms']:>10}{row['p99_ms']:>10}{row['queries_per_op']:>10}"
+        )
+    return '\n'.join(lines)
@@ -0,0 +1,231 @@
+# benchmarks/seed.py
+"""
+Синтетический каталог для бенчмарков.
+
+Все данные помечены префиксом BENCH_PREFIX (артикулы товаров, внешние ID
+заказов), поэтому их можно пересоздать или удалить, не трогая рабочие данные.
+Генерация детерминирована (random.Random(seed)) - два прогона на одной
+базе сравнимы между собой.
+"""
+import random
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+from category.models import Category
+from marketplace.models import Marketplace, MarketplaceProduct
+from order.models import Order, OrderItem, OrderLine
+from product.models import Country, Product, ProductDirection
+from stock.models import ProductStock, StockReservation
+
+BENCH_PREFIX = 'BENCH-'
+BENCH_USERNAME = 'bench'
+BENCH_USER_EMAIL = 'bench@ecom-pulse.invalid'
+
+SIZES = {
+    '10k': 10_000,
+    '100k': 100_000,
+    '1m': 1_000_000,
+}
+
+CHUNK_SIZE = 5000
+
+MARKETPLACES = [
+    ('wildberries', 'Wildberries'),
+    ('ozon', 'OZON'),
+    ('yandex_market', 'Яндекс.Маркет'),
+]
+
+ORDER_STATUSES = [
+    (Order.Status.DELIVERED, 60),
+    (Order.Status.NEW, 15),
+    (Order.Status.PROCESSING, 10),
+    (Order.Status.SHIPPED, 10),
+    (Order.Status.CANCELLED, 5),
+]
+
+
+def product_article(index: int) -> str:
+    return f"{BENCH_PREFIX}{index:07d}"
+
+
+def external_product_id(index: int) -> str:
+    return str(900_000_000 + index)
+
+
+def get_bench_user():
+    """Пользователь-руководитель, от имени которого идут запросы бенчмарков"""
+    User = get_user_model()
+    user, created = User.objects.get_or_create(
+        username=BENCH_USERNAME,
+        defaults={'email': BENCH_USER_EMAIL, 'role': User.Role.DIRECTOR, 'first_name': 'Бенчмарк'},
+    )
+    if created:
+        user.set_unusable_password()
+        user.save(update_fields=['password'])
+    return user
+
+
+def get_bench_marketplaces():
+    """Маркетплейсы по коду: существующие активные или созданные для бенчмарков"""
+    marketplaces = {}
+    for code, name in MARKETPLACES:
+        marketplace = Marketplace.objects.filter(code=code, status=Marketplace.Status.ACTIVE).first()
+        if marketplace is None:
+            marketplace = Marketplace.objects.create(
+                code=code,
+                name=name,
+                status=Marketplace.Status.ACTIVE,
+                api_key='bench',
+                client_id='bench',
+                campaign_id='1',
+            )
+        marketplaces[code] = marketplace
+    return marketplaces
+
+
+def seeded_size() -> int:
+    """Сколько товаров каталога бенчмарков уже есть в базе"""
+    return Product.objects.filter(article__startswith=BENCH_PREFIX).count()
+
+
+def clear_catalogue():
+    """Удаляет все данные бенчмарков"""
+    with transaction.atomic():
+        orders = Order.objects.filter(external_id__startswith=BENCH_PREFIX)
+        StockReservation.objects.filter(order__in=orders).delete()
+        OrderLine.objects.filter(order__in=orders).delete()
+        OrderItem.objects.filter(order__in=orders).delete()
+        orders.delete()
+
+        products = Product.objects.filter(article__startswith=BENCH_PREFIX)
+        StockReservation.objects.filter(product__in=products).delete()
+        OrderItem.objects.filter(product__product__in=products).delete()
+        MarketplaceProduct.objects.filter(product__in=products).delete()
+        ProductStock.objects.filter(product__in=products).delete()
+        products.delete()
+
+
+def seed_catalogue(size: int, seed: int = 42, log=None):
+    """
+    Создаёт size товаров (с остатками и карточками на маркетплейсах) и size
+    заказов по 1-3 позиции. Заказы распределены по последним 365 дням.
+    """
+    log = log or (lambda message: None)
+    rng = random.Random(seed)
+    now = timezone.now()
+
+    country, _ = Country.objects.get_or_create(code='BENCH', defaults={'name': 'Бенчмарк'})
+    direction, _ = ProductDirection.objects.get_or_create(code='bench', defaults={'name': 'Бенчмарк'})
+    categories = [
+        Category.objects.get_or_create(name=f"Бенчмарк {index}")[0]
+        for index in range(10)
+    ]
+    marketplaces = list(get_bench_marketplaces().values())
+    get_bench_user()
+
+    statuses = [status for status, _ in ORDER_STATUSES]
+    weights = [weight for _, weight in ORDER_STATUSES]
+
+    for start in range(0, size, CHUNK_SIZE):
+        stop = min(size, start + CHUNK_SIZE)
+        with transaction.atomic():
+            products = Product.objects.bulk_create([
+                Product(
+                    article=product_article(index),
+                    name=f"Товар бенчмарка {index}",
+                    country=country,
+                    direction=direction,
+                    category=categories[index % len(categories)],
+                    description='Синтетический товар для бенчмарков',
+                )
+                for index in range(start, stop)
+            ])
+            ProductStock.objects.bulk_create([
+                ProductStock(product=product, available_quantity=rng.randint(0, 500))
+                for product in products
+            ])
+            MarketplaceProduct.objects.bulk_create([
+                MarketplaceProduct(
+                    product=product,
+                    marketplace=marketplaces[index % len(marketplaces)],
+                    external_product_id=external_product_id(index),
+                    external_sku=product.article,
+                    price=Decimal(rng.randint(100, 10_000)),
+                    status='ACTIVE',
+                )
+                for index, product in zip(range(start, stop), products)
+            ])
+        log(f"Товары: {stop}/{size}")
+
+    # Карточки читаются кортежами: на миллионе товаров модели не помещаются в память
+    catalogue = list(
+        MarketplaceProduct.objects.filter(product__article__startswith=BENCH_PREFIX)
+        .order_by('product__article')
+        .values_list('id', 'product_id', 'marketplace_id', 'price', 'product__article', 'product__name')
+    )
+    marketplace_names = {marketplace.pk: marketplace.name for marketplace in marketplaces}
+
+    for start in range(0, size, CHUNK_SIZE):
+        stop = min(size, start + CHUNK_SIZE)
+        with transaction.atomic():
+            orders = []
+            order_products = []
+            for index in range(start, stop):
+                products = rng.sample(catalogue, rng.randint(1, 3))
+                marketplace_id = products[0][2]
+                products = [product for product in products if product[2] == marketplace_id]
+                orders.append(Order(
+                    external_id=f"{BENCH_PREFIX}{index}",
+                    number=f"{BENCH_PREFIX}N{index}",
+                    posting_number=f"{index:09d}-0001",
+                    marketplace_id=marketplace_id,
+                    status=rng.choices(statuses, weights)[0],
+                    order_type='FBO',
+                    created_at_marketplace=now - timedelta(seconds=rng.randint(0, 365 * 24 * 3600)),
+                    total_amount=sum(product[3] for product in products),
+                ))
+                order_products.append(products)
+
+            Order.objects.bulk_create(orders)
+            if any(order.pk is None for order in orders):
+                ids = dict(Order.objects.filter(
+                    external_id__in=[order.external_id for order in orders]
+                ).values_list('external_id', 'id'))
+                for order in orders:
+                    order.pk = ids[order.external_id]
+
+            items = []
+            for order, products in zip(orders, order_products):
+                for mp_id, product_id, marketplace_id, price, article, name in products:
+                    items.append((
+                        OrderItem(order=order, product_id=mp_id, quantity=1, price=price),
+                        product_id, article, name,
+                    ))
+            OrderItem.objects.bulk_create([item for item, *_ in items])
+            if any(item.pk is None for item, *_ in items):
+                ids = {
+                    (order_id, mp_id): item_id
+                    for item_id, order_id, mp_id in OrderItem.objects.filter(
+                        order__in=orders
+                    ).values_list('id', 'order_id', 'product_id')
+                }
+                for item, *_ in items:
+                    item.pk = ids[(item.order_id, item.product_id)]
+
+            OrderLine.objects.bulk_create([
+                OrderLine(
+                    item=item,
+                    order_id=item.order_id,
+                    product_id=product_id,
+                    marketplace_name=marketplace_names[item.order.marketplace_id],
+                    article=article,
+                    name=name,
+                    image='',
+                    quantity=item.quantity,
+                    price=item.price,
+                )
+                for item, product_id, article, name in items
+            ])
+        log(f"Заказы: {stop}/{size}")
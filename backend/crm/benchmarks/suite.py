@@ -0,0 +1,235 @@
+# benchmarks/suite.py
+"""
+Операции, которые замеряет run_benchmarks.
+
+Каждая операция - это BenchmarkCase: имя, функция замера и параметры
+measure(). Операции, меняющие данные (загрузка заказов, импорт остатков,
+проведение документов), выполняются с откатом транзакции, поэтому прогоны
+повторяемы и не портят каталог бенчмарков.
+"""
+import math
+import random
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any, Callable, List, Optional
+from asgiref.sync import async_to_sync
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
+from rest_framework.test import APIClient
+from document.models import Document, DocumentItem
+from order.models import Order
+from parsers.ozon_parser import OzonParser
+from parsers.wb_parser import WildberriesParser
+from parsers.yandex_parser import YandexParser
+from product.models import Product
+from .payloads import build_orders_response
+from .seed import BENCH_PREFIX, get_bench_marketplaces, get_bench_user, product_article
+
+# Размер пачки заказов, которую "возвращает" API маркетплейса за один прогон
+PARSER_BATCH = 1000
+NORMALIZE_BATCH = 10_000
+STOCK_IMPORT_ROWS = 1000
+DOCUMENT_ITEMS = 100
+ORDERS_PAGE_SIZE = 100
+
+
+class BenchmarkError(Exception):
+    """Операцию бенчмарка нельзя выполнить на текущих данных"""
+
+
+@dataclass
+class BenchmarkCase:
+    name: str
+    func: Callable[..., Optional[int]]
+    setup: Optional[Callable[[], Any]] = None
+    rollback: bool = False
+    group: str = ''
+
+
+PARSERS = {
+    'wildberries': WildberriesParser,
+    'ozon': OzonParser,
+    'yandex_market': YandexParser,
+}
+
+
+def parser_cases(size: int) -> List[BenchmarkCase]:
+    """BaseParser.parse_orders на записанных ответах API (без сети)"""
+    cases = []
+    marketplaces = get_bench_marketplaces()
+    for code, parser_class in PARSERS.items():
+        parser = parser_class(marketplace_id=marketplaces[code].pk)
+        raw_orders = build_orders_response(code, PARSER_BATCH, size)
+
+        async def replay(raw_orders=raw_orders, **kwargs):
+            return raw_orders
+
+        def parse(parser=parser, replay=replay):
+            parser.processed_orders = 0
+            parser.fetch_orders = replay
+            return async_to_sync(parser.parse_orders)()
+
+        cases.append(BenchmarkCase(
+            name=f"parse_orders {code} ({PARSER_BATCH} заказов)",
+            func=parse,
+            rollback=True,
+            group='parsers',
+        ))
+    return cases
+
+
+def normalize_cases(size: int) -> List[BenchmarkCase]:
+    """BaseParser.normalize_many без сохранения - пропускная способность нормализации"""
+    cases = []
+    marketplaces = get_bench_marketplaces()
+    for code, parser_class in PARSERS.items():
+        parser = parser_class(marketplace_id=marketplaces[code].pk)
+        raw_orders = build_orders_response(code, NORMALIZE_BATCH, size)
+
+        def normalize(parser=parser, raw_orders=raw_orders):
+            return len(parser.normalize_many(raw_orders))
+
+        cases.append(BenchmarkCase(
+            name=f"normalize_many {code} ({NORMALIZE_BATCH} заказов)",
+            func=normalize,
+            group='normalize',
+        ))
+    return cases
+
+
+def _client() -> APIClient:
+    client = APIClient()
+    client.force_authenticate(get_bench_user())
+    return client
+
+
+def _check(response, url):
+    if response.status_code != 200:
+        raise BenchmarkError(f"{url}: HTTP {response.status_code} {response.content[:200]!r}")
+    return response
+
+
+def stock_import_cases(size: int) -> List[BenchmarkCase]:
+    """ProductStockViewSet.bulk_update: импорт CSV с остатками"""
+    client = _client()
+    url = '/api/stocks/bulk_update/'
+    rng = random.Random(7)
+    rows = min(STOCK_IMPORT_ROWS, size)
+    content = '\n'.join(
+        ['article;available_quantity'] +
+        [f"{product_article(index)};{rng.randint(0, 500)}" for index in rng.sample(range(size), rows)]
+    ).encode('utf-8')
+
+    def import_stocks():
+        upload = SimpleUploadedFile('stocks.csv', content, content_type='text/csv')
+        _check(client.post(url, {'file': upload}, format='multipart'), url)
+        return rows
+
+    return [BenchmarkCase(
+        name=f"Импорт остатков CSV ({rows} строк)",
+        func=import_stocks,
+        rollback=True,
+        group='stocks',
+    )]
+
+
+def document_cases(size: int) -> List[BenchmarkCase]:
+    """Проведение приходного документа"""
+    client = _client()
+    user = get_bench_user()
+    product_ids = list(
+        Product.objects.filter(article__startswith=BENCH_PREFIX)
+        .order_by('article')
+        .values_list('id', flat=True)[:DOCUMENT_ITEMS]
+    )
+    if not product_ids:
+        raise BenchmarkError('Каталог бенчмарков пуст, выполните run_benchmarks --reseed')
+
+    def create_document():
+        document = Document.objects.create(
+            document_type='incoming',
+            partner='Бенчмарк',
+            created_by=user,
+        )
+        DocumentItem.objects.bulk_create([
+            DocumentItem(document=document, product_id=product_id, quantity=10, price=100, total_cost=1000)
+            for product_id in product_ids
+        ])
+        document.update_totals()
+        return document
+
+    def complete(document):
+        url = f'/api/documents/{document.pk}/complete/'
+        _check(client.post(url), url)
+        return len(product_ids)
+
+    return [BenchmarkCase(
+        name=f"Проведение прихода ({len(product_ids)} позиций)",
+        func=complete,
+        setup=create_document,
+        rollback=True,
+        group='documents',
+    )]
+
+
+def _get_case(client, name, url, group, rows_key=None):
+    def request():
+        response = _check(client.get(url), url)
+        if rows_key:
+            return len(response.json()[rows_key])
+        return None
+
+    return BenchmarkCase(name=name, func=request, group=group)
+
+
+DASHBOARD_ENDPOINTS = [
+    ('Дашборд: выручка', '/api/revenue-stats/'),
+    ('Дашборд: график выручки', '/api/revenue-chart/'),
+    ('Дашборд: выручка по дням', '/api/revenue-daily/'),
+    ('Дашборд: статистика дня', '/api/daily-stats/'),
+    ('Дашборд: топ категорий', '/api/top-categories/'),
+    ('Дашборд: мало на складе', '/api/low-stock-products/'),
+]
+
+
+def dashboard_cases(size: int) -> List[BenchmarkCase]:
+    """Эндпоинты api/views.py"""
+    client = _client()
+    return [_get_case(client, name, url, 'dashboard') for name, url in DASHBOARD_ENDPOINTS]
+
+
+def order_list_cases(size: int) -> List[BenchmarkCase]:
+    """OrderListView: первая страница, поиск, фильтры и глубокая страница"""
+    client = _client()
+    marketplace = get_bench_marketplaces()['ozon']
+    date_from = (timezone.now() - timedelta(days=30)).date().isoformat()
+    pages = max(1, math.ceil(Order.objects.count() / ORDERS_PAGE_SIZE))
+    base = f'/api/orders/?page_size={ORDERS_PAGE_SIZE}'
+    variants = [
+        ('Заказы: первая страница', base),
+        ('Заказы: поиск по номеру', f"{base}&search={BENCH_PREFIX}N{size // 2}"),
+        ('Заказы: поиск по артикулу', f"{base}&search={product_article(size // 3)}"),
+        ('Заказы: маркетплейс', f"{base}&marketplace={marketplace.pk}"),
+        ('Заказы: последние 30 дней', f"{base}&date_from={date_from}"),
+        ('Заказы: глубокая страница', f"{base}&page={max(1, pages // 2)}"),
+    ]
+    return [_get_case(client, name, url, 'orders', rows_key='results') for name, url in variants]
+
+
+GROUPS = {
+    'parsers': parser_cases,
+    'normalize': normalize_cases,
+    'stocks': stock_import_cases,
+    'documents': document_cases,
+    'dashboard': dashboard_cases,
+    'orders': order_list_cases,
+}
+
+
+def build_cases(size: int, groups: Optional[List[str]] = None) -> List[BenchmarkCase]:
+    cases = []
+    for group, factory in GROUPS.items():
+        if groups and group not in groups:
+            continue
+        cases.extend(factory(size))
+    return cases
@@ -72,6 +72,11 @@ LOGGING = {
             'level': 'INFO',
             'propagate': False,
         },
+        'monitoring': {
+            'handlers': ['console', 'file'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
 
@@ -82,6 +87,57 @@ MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 if not ENCRYPTION_KEY:
     raise ValueError("ENCRYPTION_KEY не задан")
 
+# Время жизни расшифрованных учётных данных маркетплейсов в памяти процесса, сек
+MARKETPLACE_CREDENTIALS_CACHE_TTL = int(os.getenv('MARKETPLACE_CREDENTIALS_CACHE_TTL', '300'))
+
+# Быстрый путь списков (values() + скомпилированные сериализаторы), см. api/fastpath.py
+API_FAST_PATH = os.getenv('API_FAST_PATH', 'True').lower() == 'true'
+
+# Переопределение хостов API маркетплейсов (локальный mock-сервер, прокси), см. api/base.py
+MARKETPLACE_API_BASE_URLS = {
+    'wildberries': os.getenv('WB_API_BASE_URL', ''),
+    'ozon': os.getenv('OZON_API_BASE_URL', ''),
+    'yandex_market': os.getenv('YANDEX_MARKET_API_BASE_URL', ''),
+}
+
+# Разбор JSON ответов API маркетплейсов (api/decoding.py): auto - orjson, если установлен,
+# иначе json; также json, orjson или путь к своей функции loads(bytes)
+MARKETPLACE_JSON_DECODER = os.getenv('MARKETPLACE_JSON_DECODER', 'auto')
+
+# Кэш отчётов API для условных запросов ETag/Last-Modified (api/http_cache.py)
+MARKETPLACE_HTTP_CACHE_ENABLED = os.getenv('MARKETPLACE_HTTP_CACHE_ENABLED', 'True').lower() == 'true'
+MARKETPLACE_HTTP_CACHE_DIR = os.getenv('MARKETPLACE_HTTP_CACHE_DIR', os.path.join(BASE_DIR, 'http_cache'))
+# Записи кэша, не использованные столько дней, удаляются (раз в сутки при записи в кэш); 0 - не удалять
+MARKETPLACE_HTTP_CACHE_RETENTION_DAYS = int(os.getenv('MARKETPLACE_HTTP_CACHE_RETENTION_DAYS', '7'))
+
+# Архив сырых ответов API маркетплейсов (parsers/archive.py, команда reprocess)
+PARSER_ARCHIVE_ENABLED = os.getenv('PARSER_ARCHIVE_ENABLED', 'True').lower() == 'true'
+PARSER_ARCHIVE_DIR = os.getenv('PARSER_ARCHIVE_DIR', os.path.join(BASE_DIR, 'parser_archive'))
+# Сколько дней хранить архив: старые дни удаляются при первой записи за новый день; 0 - хранить всё
+PARSER_ARCHIVE_RETENTION_DAYS = int(os.getenv('PARSER_ARCHIVE_RETENTION_DAYS', '14'))
+
+# Маркетплейсы с вебхуками (parsers/webhooks.py) планировщик опрашивает только для сверки, раз в N минут
+WEBHOOK_RECONCILE_MINUTES = int(os.getenv('WEBHOOK_RECONCILE_MINUTES', '360'))
+
+# Один узел на маркетплейс (parsers/locks.py): срок аренды без продления, сек; advisory lock
+# PostgreSQL отключается за pgbouncer в режиме транзакций
+PARSER_LEASE_SECONDS = int(os.getenv('PARSER_LEASE_SECONDS', '900'))
+PARSER_ADVISORY_LOCKS = os.getenv('PARSER_ADVISORY_LOCKS', 'True').lower() == 'true'
+
+# Очередь фоновых задач (jobs): выгрузка заказов, синхронизация остатков и большие импорты
+# выполняются воркерами run_worker; при False - сразу, как раньше
+JOBS_ENABLED = os.getenv('JOBS_ENABLED', 'False').lower() == 'true'
+# Файлы остатков длиннее этого числа строк загружаются фоновой задачей
+STOCK_IMPORT_ASYNC_ROWS = int(os.getenv('STOCK_IMPORT_ASYNC_ROWS', '2000'))
+
+# Метрики запросов (monitoring/middleware.py): /metrics, Server-Timing, журнал медленных запросов
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True').lower() == 'true'
+METRICS_SERVER_TIMING = os.getenv('METRICS_SERVER_TIMING', 'True').lower() == 'true'
+METRICS_SLOW_REQUEST_MS = int(os.getenv('METRICS_SLOW_REQUEST_MS', '500'))
+# Если задан, /metrics требует заголовок Authorization: Bearer <токен>;
+# без токена /metrics доступен только при DEBUG или сотруднику (is_staff)
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
 DEBUG = os.getenv('DEBUG', 'False').lower() == 'true'
 
 ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS', '').split(',')
@@ -94,6 +150,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'django_filters',
     'rest_framework',
     'rest_framework_simplejwt',
@@ -108,9 +165,13 @@ INSTALLED_APPS = [
     'document',
     'warehouse',
     'parsers',
+    'benchmarks',
+    'monitoring',
+    'jobs',
 ]
 
 MIDDLEWARE = [
+    'monitoring.middleware.RequestMetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
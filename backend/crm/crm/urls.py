@@ -12,6 +12,9 @@ urlpatterns = [
     path('api/', include('document.urls')),
     path('api/', include('warehouse.urls')),
     path('api/', include('api.urls')),
+    path('api/', include('parsers.urls')),
+    path('api/', include('jobs.urls')),
+    path('', include('monitoring.urls')),
 
 ]
 
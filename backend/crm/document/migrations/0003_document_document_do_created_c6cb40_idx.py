@@ -0,0 +1,20 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('document', '0002_initial'),
+        ('warehouse', '0002_delete_productstock'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='document',
+            index=models.Index(fields=['-created_at', 'id'], name='document_do_created_c6cb40_idx'),
+        ),
+    ]
@@ -61,6 +61,7 @@ class Document(models.Model):
         indexes = [
             models.Index(fields=['document_type', 'status']),
             models.Index(fields=['created_at']),
+            models.Index(fields=['-created_at', 'id']),
             models.Index(fields=['document_number']),
         ]
     
@@ -12,8 +12,34 @@ from .serializers import (
     DocumentItemSerializer
 )
 from users.permissions import IsWarehouseManager, IsManager
+from api.pagination import CursorOptInPagination
+from api.fastpath import FastPathListMixin
+from api.renderers import FastJSONRenderer
+from rest_framework.renderers import BrowsableAPIRenderer
 
-class DocumentViewSet(viewsets.ModelViewSet):
+class DocumentPagination(CursorOptInPagination):
+    """
+    Пагинация документов включается только по запросу клиента
+    (?page, ?page_size, ?cursor или ?pagination=cursor), чтобы старые
+    клиенты продолжали получать полный список.
+    """
+    page_size = 25
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_ordering = ('-created_at', 'id')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        query_params = request.query_params
+        requested = (
+            self.page_query_param in query_params or
+            self.page_size_query_param in query_params or
+            self.is_cursor_mode(request)
+        )
+        if not requested:
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+class DocumentViewSet(FastPathListMixin, viewsets.ModelViewSet):
     queryset = Document.objects.filter(is_deleted=False).select_related(
         'created_by', 'source_warehouse', 'destination_warehouse'
     ).prefetch_related('items', 'items__product', 'history')
@@ -23,6 +49,8 @@ class DocumentViewSet(viewsets.ModelViewSet):
     search_fields = ['document_number', 'partner', 'items__product__article', 'items__product__name']
     ordering_fields = ['created_at', 'updated_at', 'total_cost', 'total_products']
     ordering = ['-created_at']
+    pagination_class = DocumentPagination
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
     
     permission_classes = [AllowAny]
     
@@ -217,7 +245,7 @@ class DocumentViewSet(viewsets.ModelViewSet):
         )
 
     def _process_incoming_document(self, document):
-        from warehouse.models import ProductStock
+        from stock.models import ProductStock
         
         for item in document.items.all():
             try:
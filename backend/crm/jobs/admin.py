@@ -0,0 +1,43 @@
+from django.contrib import admin
+from django.utils import timezone
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['task', 'queue', 'status', 'priority', 'attempts', 'run_at', 'locked_by', 'finished_at']
+    list_filter = ['status', 'queue', 'task']
+    search_fields = ['task', 'unique_key', 'error']
+    date_hierarchy = 'created_at'
+    actions = ['retry_selected', 'cancel_selected']
+
+    def get_readonly_fields(self, request, obj=None):
+        return [field.name for field in self.model._meta.fields]
+
+    @admin.action(description='Повторить выбранные задачи')
+    def retry_selected(self, request, queryset):
+        retried = 0
+        for job in queryset.filter(status__in=[Job.Status.FAILED, Job.Status.CANCELLED]):
+            job.status = Job.Status.PENDING
+            job.attempts = 0
+            job.run_at = timezone.now()
+            try:
+                job.save(update_fields=['status', 'attempts', 'run_at'])
+                retried += 1
+            except Exception:
+                # Такая задача уже ожидает в очереди
+                continue
+        self.message_user(request, f"Повторно поставлено {retried} задач")
+
+    @admin.action(description='Отменить выбранные задачи')
+    def cancel_selected(self, request, queryset):
+        cancelled = queryset.filter(status=Job.Status.PENDING).update(
+            status=Job.Status.CANCELLED, finished_at=timezone.now()
+        )
+        self.message_user(request, f"Отменено {cancelled} задач")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from jobs.queue import registered_tasks
+from jobs.worker import run_workers
+
+
+class Command(BaseCommand):
+    help = 'Воркер очереди фоновых задач (jobs.Job)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1, help='Количество процессов-воркеров')
+        parser.add_argument(
+            '--queue', action='append', dest='queues',
+            help='Обрабатывать только эту очередь (можно указать несколько раз)'
+        )
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Пауза, если очередь пуста, сек')
+        parser.add_argument('--burst', action='store_true', help='Выполнить готовые задачи и выйти')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Задачи: {', '.join(registered_tasks())}")
+        run_workers(
+            options['processes'],
+            queues=options['queues'],
+            poll_interval=options['poll_interval'],
+            burst=options['burst'],
+        )
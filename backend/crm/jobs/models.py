@@ -0,0 +1,70 @@
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """
+    Фоновая задача в очереди PostgreSQL.
+
+    Воркеры (run_worker) забирают задачи через SELECT ... FOR UPDATE SKIP
+    LOCKED в порядке priority (меньше - раньше), run_at, id. Задача с
+    unique_key ставится в очередь один раз: пока такая задача ожидает
+    выполнения, повторная постановка возвращает существующую.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Ожидает'
+        RUNNING = 'running', 'Выполняется'
+        DONE = 'done', 'Выполнена'
+        FAILED = 'failed', 'Ошибка'
+        CANCELLED = 'cancelled', 'Отменена'
+
+    class Priority(models.IntegerChoices):
+        HIGH = 10, 'Высокий'
+        NORMAL = 100, 'Обычный'
+        LOW = 200, 'Низкий'
+
+    queue = models.CharField(max_length=50, default='default', verbose_name='Очередь')
+    task = models.CharField(max_length=100, verbose_name='Задача')
+    kwargs = models.JSONField(default=dict, blank=True, verbose_name='Параметры')
+    priority = models.SmallIntegerField(default=Priority.NORMAL, verbose_name='Приоритет')
+    status = models.CharField(
+        max_length=20, choices=Status.choices, default=Status.PENDING, verbose_name='Статус'
+    )
+    unique_key = models.CharField(max_length=255, null=True, blank=True, verbose_name='Ключ уникальности')
+
+    attempts = models.PositiveIntegerField(default=0, verbose_name='Попыток')
+    max_attempts = models.PositiveIntegerField(default=3, verbose_name='Максимум попыток')
+    run_at = models.DateTimeField(default=timezone.now, verbose_name='Выполнить не раньше')
+    locked_by = models.CharField(max_length=100, blank=True, verbose_name='Воркер')
+    locked_until = models.DateTimeField(null=True, blank=True, verbose_name='Воркер держит до')
+
+    result = models.JSONField(null=True, blank=True, verbose_name='Результат')
+    error = models.TextField(blank=True, verbose_name='Ошибка')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name='Начало выполнения')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='Завершение')
+
+    class Meta:
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['unique_key'],
+                condition=Q(status='pending'),
+                name='job_unique_pending'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['queue', 'priority', 'run_at', 'id'],
+                condition=Q(status='pending'),
+                name='job_pending_idx'
+            ),
+            models.Index(fields=['status', 'locked_until']),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.get_status_display()})"
@@ -0,0 +1,204 @@
+# jobs/queue.py
+"""
+Очередь фоновых задач в PostgreSQL.
+
+Задача - функция, зарегистрированная декоратором @task в модуле tasks.py
+приложения. Постановка в очередь - запись Job; выполнение - воркер
+run_worker, который забирает записи через SELECT ... FOR UPDATE SKIP LOCKED,
+так что воркеров может быть несколько на нескольких узлах.
+
+    @task('stock.import_rows', queue='imports', max_attempts=1)
+    def import_rows(rows): ...
+
+    enqueue('stock.import_rows', {'rows': rows}, priority=Job.Priority.HIGH)
+"""
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# Пауза перед повтором: RETRY_BACKOFF * 2^(попытка - 1), не больше MAX_RETRY_DELAY
+RETRY_BACKOFF = timedelta(seconds=30)
+MAX_RETRY_DELAY = timedelta(hours=1)
+
+
+class JobError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class TaskSpec:
+    name: str
+    func: Callable
+    queue: str = 'default'
+    priority: int = Job.Priority.NORMAL
+    max_attempts: int = 3
+    # Сколько секунд воркер держит задачу; после этого её заберёт другой воркер
+    timeout: int = 1800
+
+
+_tasks: Dict[str, TaskSpec] = {}
+
+
+def task(name: str, queue: str = 'default', priority: int = Job.Priority.NORMAL,
+         max_attempts: int = 3, timeout: int = 1800):
+    """Регистрирует функцию как фоновую задачу; параметры задачи передаются именованными аргументами"""
+    def decorator(func):
+        _tasks[name] = TaskSpec(name, func, queue, priority, max_attempts, timeout)
+        return func
+    return decorator
+
+
+def get_task(name: str) -> TaskSpec:
+    try:
+        return _tasks[name]
+    except KeyError:
+        raise JobError(f"Задача {name} не зарегистрирована")
+
+
+def registered_tasks() -> List[str]:
+    return sorted(_tasks)
+
+
+def build_job(task_name: str, kwargs: Optional[Dict[str, Any]] = None, *, priority: Optional[int] = None,
+              run_at: Optional[datetime] = None, unique_key: Optional[str] = None,
+              queue: Optional[str] = None, max_attempts: Optional[int] = None) -> Job:
+    spec = get_task(task_name)
+    return Job(
+        task=task_name,
+        kwargs=kwargs or {},
+        queue=queue or spec.queue,
+        priority=spec.priority if priority is None else priority,
+        max_attempts=max_attempts or spec.max_attempts,
+        run_at=run_at or timezone.now(),
+        unique_key=unique_key,
+    )
+
+
+def enqueue(task_name: str, kwargs: Optional[Dict[str, Any]] = None, **options) -> Job:
+    """
+    Ставит задачу в очередь.
+
+    Если задана unique_key и задача с этим ключом уже ожидает выполнения,
+    новая не создаётся - возвращается существующая.
+    """
+    job = build_job(task_name, kwargs, **options)
+    if job.unique_key is None:
+        job.save()
+        return job
+
+    enqueue_many([job])
+    if job.pk is None:
+        job = Job.objects.filter(unique_key=job.unique_key, status=Job.Status.PENDING).first() or job
+    return job
+
+
+def enqueue_many(jobs: Iterable[Job]) -> int:
+    """Ставит пачку задач одним запросом, пропуская дубли по unique_key"""
+    jobs = list(jobs)
+    if jobs:
+        Job.objects.bulk_create(jobs, ignore_conflicts=True)
+    return len(jobs)
+
+
+def enqueue_on_commit(task_name: str, kwargs: Optional[Dict[str, Any]] = None, **options):
+    """Ставит задачу после фиксации текущей транзакции (воркер увидит уже сохранённые данные)"""
+    transaction.on_commit(lambda: enqueue(task_name, kwargs, **options))
+
+
+class JobQueue:
+    """Выборка и завершение задач воркером"""
+
+    def __init__(self, queues: Optional[List[str]] = None, worker_id: str = ''):
+        self.queues = queues
+        self.worker_id = worker_id
+
+    def claim(self) -> Optional[Job]:
+        """Забирает одну готовую к выполнению задачу или возвращает None"""
+        now = timezone.now()
+        with transaction.atomic():
+            pending = Job.objects.select_for_update(skip_locked=True).filter(
+                status=Job.Status.PENDING, run_at__lte=now
+            )
+            if self.queues:
+                pending = pending.filter(queue__in=self.queues)
+            job = pending.order_by('priority', 'run_at', 'id').first()
+            if job is None:
+                return None
+
+            timeout = _tasks[job.task].timeout if job.task in _tasks else 1800
+            job.status = Job.Status.RUNNING
+            job.attempts += 1
+            job.locked_by = self.worker_id
+            job.locked_until = now + timedelta(seconds=timeout)
+            job.started_at = now
+            job.save(update_fields=['status', 'attempts', 'locked_by', 'locked_until', 'started_at'])
+        return job
+
+    def complete(self, job: Job, result: Any = None):
+        job.status = Job.Status.DONE
+        job.result = result
+        job.error = ''
+        job.finished_at = timezone.now()
+        job.locked_until = None
+        job.save(update_fields=['status', 'result', 'error', 'finished_at', 'locked_until'])
+
+    def fail(self, job: Job, error: str):
+        """Ошибка выполнения: повтор с экспоненциальной паузой или статус «ошибка»"""
+        now = timezone.now()
+        job.error = error[:5000]
+        job.locked_until = None
+        if job.attempts < job.max_attempts:
+            job.status = Job.Status.PENDING
+            job.run_at = now + min(RETRY_BACKOFF * 2 ** (job.attempts - 1), MAX_RETRY_DELAY)
+        else:
+            job.status = Job.Status.FAILED
+            job.finished_at = now
+        try:
+            with transaction.atomic():
+                job.save(update_fields=['status', 'run_at', 'error', 'finished_at', 'locked_until'])
+        except IntegrityError:
+            # Пока задача выполнялась, в очередь встала такая же - повтор не нужен
+            job.status = Job.Status.CANCELLED
+            job.finished_at = now
+            job.save(update_fields=['status', 'error', 'finished_at', 'locked_until'])
+
+    def requeue_stale(self) -> int:
+        """
+        Возвращает в очередь задачи упавших воркеров (истёк locked_until).
+
+        Попытка уже засчитана при выборке; исчерпавшие попытки задачи
+        помечаются ошибкой. Задачи, дубль которых уже стоит в очереди,
+        отменяются.
+        """
+        now = timezone.now()
+        stale = Job.objects.filter(status=Job.Status.RUNNING, locked_until__lt=now)
+        exhausted = stale.filter(attempts__gte=F('max_attempts')).update(
+            status=Job.Status.FAILED, finished_at=now, locked_until=None,
+            error='Воркер не завершил задачу за отведённое время'
+        )
+        requeued = 0
+        for job in stale.filter(attempts__lt=F('max_attempts')):
+            self.fail(job, 'Воркер не завершил задачу за отведённое время')
+            requeued += 1
+        if exhausted or requeued:
+            logger.warning(f"Задачи упавших воркеров: повтор {requeued}, ошибка {exhausted}")
+        return requeued + exhausted
+
+
+def run_job(job: Job) -> Any:
+    """Выполняет задачу в текущем процессе"""
+    spec = get_task(job.task)
+    return spec.func(**job.kwargs)
+
+
+def jobs_enabled() -> bool:
+    """Включена ли постановка работы в очередь (иначе она выполняется сразу, как раньше)"""
+    return getattr(settings, 'JOBS_ENABLED', False)
@@ -0,0 +1,12 @@
+from rest_framework import serializers
+from .models import Job
+
+
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'queue', 'task', 'status', 'priority', 'attempts', 'max_attempts',
+            'run_at', 'created_at', 'started_at', 'finished_at', 'result', 'error',
+        ]
+        read_only_fields = fields
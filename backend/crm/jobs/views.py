@@ -0,0 +1,26 @@
+from rest_framework import viewsets
+from api.pagination import CursorOptInPagination
+from users.permissions import IsManager
+from .models import Job
+from .serializers import JobSerializer
+
+
+class JobPagination(CursorOptInPagination):
+    page_size = 50
+    cursor_ordering = ('-created_at', 'id')
+
+
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    """Состояние фоновых задач (например, загрузки большого файла остатков)"""
+    queryset = Job.objects.all()
+    serializer_class = JobSerializer
+    permission_classes = [IsManager]
+    pagination_class = JobPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        for param in ('status', 'task', 'queue'):
+            value = self.request.query_params.get(param)
+            if value:
+                queryset = queryset.filter(**{param: value})
+        return queryset
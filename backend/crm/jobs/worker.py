@@ -0,0 +1,104 @@
+# jobs/worker.py
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import time
+import traceback
+from typing import List, Optional
+from django.db import close_old_connections, connections
+from .queue import JobQueue, run_job
+
+logger = logging.getLogger(__name__)
+
+# Как часто воркер проверяет задачи упавших воркеров, сек
+STALE_CHECK_INTERVAL = 60
+
+
+class Worker:
+    """Цикл выполнения задач в одном процессе"""
+
+    def __init__(self, queues: Optional[List[str]] = None, poll_interval: float = 1.0, burst: bool = False):
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.queue = JobQueue(queues, self.worker_id)
+        self.poll_interval = poll_interval
+        self.burst = burst
+        self.stopping = False
+        self.processed = 0
+
+    def stop(self, *args):
+        """Остановка после текущей задачи"""
+        self.stopping = True
+
+    def run(self) -> int:
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        logger.info(f"Воркер {self.worker_id} запущен, очереди: {self.queue.queues or 'все'}")
+
+        last_stale_check = 0.0
+        while not self.stopping:
+            close_old_connections()
+            if time.monotonic() - last_stale_check >= STALE_CHECK_INTERVAL:
+                self.queue.requeue_stale()
+                last_stale_check = time.monotonic()
+
+            job = self.queue.claim()
+            if job is None:
+                if self.burst:
+                    break
+                time.sleep(self.poll_interval)
+                continue
+            self.execute(job)
+
+        logger.info(f"Воркер {self.worker_id} остановлен, выполнено задач: {self.processed}")
+        return self.processed
+
+    def execute(self, job):
+        started = time.perf_counter()
+        try:
+            result = run_job(job)
+        except Exception as e:
+            logger.error(
+                f"Задача {job.task} #{job.pk} (попытка {job.attempts}/{job.max_attempts}): {str(e)}",
+                exc_info=True
+            )
+            self.queue.fail(job, f"{str(e)}\n{traceback.format_exc()}")
+        else:
+            self.queue.complete(job, result if isinstance(result, (dict, list, str, int, float, bool)) else None)
+            logger.info(f"Задача {job.task} #{job.pk} выполнена за {time.perf_counter() - started:.2f} с")
+        self.processed += 1
+
+
+def _run_worker_process(queues, poll_interval, burst):
+    Worker(queues, poll_interval, burst).run()
+
+
+def run_workers(processes: int, queues: Optional[List[str]] = None,
+                poll_interval: float = 1.0, burst: bool = False):
+    """
+    Запускает processes воркеров в отдельных процессах и ждёт их завершения.
+
+    SIGTERM/SIGINT передаются воркерам: каждый завершает текущую задачу.
+    """
+    if processes <= 1:
+        return Worker(queues, poll_interval, burst).run()
+
+    # Соединения с БД не должны наследоваться дочерними процессами
+    connections.close_all()
+    children = [
+        multiprocessing.Process(target=_run_worker_process, args=(queues, poll_interval, burst), daemon=False)
+        for _ in range(processes)
+    ]
+    for child in children:
+        child.start()
+
+    def forward(signum, frame):
+        for child in children:
+            if child.is_alive():
+                os.kill(child.pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+    for child in children:
+        child.join()
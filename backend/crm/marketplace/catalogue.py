@@ -0,0 +1,198 @@
+# marketplace/catalogue.py
+"""
+Выгрузка каталога товаров маркетплейса в MarketplaceProduct.
+
+Список товаров кабинета (карточки WB, товары Ozon, товары Яндекс.Маркета)
+сопоставляется с каталогом по артикулу продавца: сначала Product.article,
+затем MarketplaceProduct.external_sku уже связанных товаров этого
+маркетплейса. Найденные товары записываются пачками одним upsert: новые
+связи создаются, у существующих обновляются внешние ID, штрихкод, цена и
+статус. После выгрузки разбор заказов находит товары готовыми и связи
+не создаёт.
+
+Список карточек WB цен не содержит: новые связи без цены создаются с
+sync_enabled=False, чтобы push_wildberries не выгрузил на WB нулевую цену.
+Выгрузку включают, когда цена товара указана.
+"""
+import logging
+from dataclasses import dataclass
+from decimal import Decimal, InvalidOperation
+from typing import Any, AsyncIterator, Dict, List, Optional
+from asgiref.sync import async_to_sync
+from api.ozon_api import OzonAPIClient
+from api.wb_api import WildberriesAPIClient
+from api.wb_config import WBApiCategory, WBEnvironment
+from api.yandex_market_api import YandexMarketAPIClient
+from product.models import Product
+from .models import Marketplace, MarketplaceProduct
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CatalogueItem:
+    """Товар кабинета маркетплейса"""
+    article: str
+    external_product_id: str
+    barcode: Optional[str] = None
+    price: Optional[Decimal] = None
+    archived: bool = False
+
+
+@dataclass
+class CatalogueSyncResult:
+    fetched: int = 0
+    created: int = 0
+    updated: int = 0
+    unmatched: int = 0
+
+
+def _decimal(value: Any) -> Optional[Decimal]:
+    if value in (None, ''):
+        return None
+    try:
+        return Decimal(str(value))
+    except InvalidOperation:
+        return None
+
+
+async def _wildberries_items(credentials: Dict[str, Any]) -> AsyncIterator[CatalogueItem]:
+    environment = WBEnvironment.SANDBOX if credentials.get('environment') == 'sandbox' else WBEnvironment.PRODUCTION
+    api_client = WildberriesAPIClient(
+        api_key=credentials['api_key'], environment=environment, base_url=credentials.get('api_base_url')
+    )
+    async with api_client:
+        async for card in api_client.get_client(WBApiCategory.CONTENT).iter_cards():
+            barcodes = [sku for size in card.get('sizes') or [] for sku in size.get('skus') or []]
+            yield CatalogueItem(
+                article=card.get('vendorCode') or '',
+                external_product_id=str(card.get('nmID') or ''),
+                barcode=barcodes[0] if barcodes else None,
+            )
+
+
+async def _ozon_items(credentials: Dict[str, Any]) -> AsyncIterator[CatalogueItem]:
+    api_client = OzonAPIClient(
+        client_id=credentials['client_id'], api_key=credentials['api_key'], base_url=credentials.get('api_base_url')
+    )
+    async with api_client:
+        async for product in api_client.iter_products():
+            # В заказах Ozon товар указан SKU (posting.products[].sku), а не product_id
+            sku = product.get('sku') or next(
+                (source.get('sku') for source in product.get('sources') or [] if source.get('sku')), None
+            )
+            barcodes = product.get('barcodes') or []
+            yield CatalogueItem(
+                article=product.get('offer_id') or '',
+                external_product_id=str(sku or product.get('id') or ''),
+                barcode=barcodes[0] if barcodes else None,
+                price=_decimal(product.get('price')),
+                archived=bool(product.get('archived')),
+            )
+
+
+async def _yandex_items(credentials: Dict[str, Any]) -> AsyncIterator[CatalogueItem]:
+    business_id = credentials.get('business_id')
+    if not business_id:
+        raise ValueError("Не указан business_id кабинета Яндекс.Маркета (дополнительные учетные данные)")
+    api_client = YandexMarketAPIClient(
+        oauth_token=credentials['api_key'], campaign_id=credentials['campaign_id'],
+        base_url=credentials.get('api_base_url')
+    )
+    async with api_client:
+        async for offer_mapping in api_client.iter_offer_mappings(business_id):
+            offer = offer_mapping.get('offer') or {}
+            mapping = offer_mapping.get('mapping') or {}
+            barcodes = offer.get('barcodes') or []
+            yield CatalogueItem(
+                article=offer.get('offerId') or '',
+                external_product_id=str(mapping.get('marketSku') or ''),
+                barcode=barcodes[0] if barcodes else None,
+                price=_decimal((offer.get('basicPrice') or {}).get('value')),
+                archived=bool(offer.get('archived')),
+            )
+
+
+CATALOGUE_SOURCES = {
+    'wildberries': _wildberries_items,
+    'ozon': _ozon_items,
+    'yandex_market': _yandex_items,
+}
+
+
+async def _collect(items: AsyncIterator[CatalogueItem]) -> List[CatalogueItem]:
+    return [item async for item in items if item.article]
+
+
+class CatalogueSyncService:
+    """Выгрузка каталога маркетплейса в MarketplaceProduct"""
+
+    # Товаров в одном upsert
+    BATCH_SIZE = 1000
+
+    @staticmethod
+    def sync(marketplace: Marketplace) -> CatalogueSyncResult:
+        source = CATALOGUE_SOURCES.get(marketplace.code)
+        if source is None:
+            raise ValueError(f"Unknown marketplace code: {marketplace.code}")
+
+        items = async_to_sync(_collect)(source(marketplace.get_api_credentials()))
+        result = CatalogueSyncResult(fetched=len(items))
+        for start in range(0, len(items), CatalogueSyncService.BATCH_SIZE):
+            CatalogueSyncService._upsert(marketplace, items[start:start + CatalogueSyncService.BATCH_SIZE], result)
+
+        logger.info(
+            f"Каталог {marketplace.name}: получено {result.fetched}, создано {result.created}, "
+            f"обновлено {result.updated}, не найдено в каталоге {result.unmatched}"
+        )
+        return result
+
+    @staticmethod
+    def _upsert(marketplace: Marketplace, items: List[CatalogueItem], result: CatalogueSyncResult):
+        articles = {item.article for item in items}
+        product_ids = dict(Product.objects.filter(article__in=articles).values_list('article', 'id'))
+        existing = {
+            row['product_id']: row
+            for row in MarketplaceProduct.objects.filter(marketplace=marketplace).filter(
+                product_id__in=product_ids.values()
+            ).values('product_id', 'external_sku', 'barcode', 'price')
+        }
+        # Товары, связанные с маркетплейсом по артикулу, отличному от Product.article
+        for row in MarketplaceProduct.objects.filter(
+            marketplace=marketplace, external_sku__in=articles - product_ids.keys()
+        ).values('product_id', 'external_sku', 'barcode', 'price'):
+            product_ids.setdefault(row['external_sku'], row['product_id'])
+            existing[row['product_id']] = row
+
+        rows = {}
+        for item in items:
+            product_id = product_ids.get(item.article)
+            if product_id is None:
+                result.unmatched += 1
+                continue
+            current = existing.get(product_id) or {}
+            price = item.price if item.price is not None else current.get('price')
+            # Одна связь на товар: при нескольких карточках с одним артикулом остаётся последняя
+            rows[product_id] = MarketplaceProduct(
+                product_id=product_id,
+                marketplace=marketplace,
+                external_product_id=item.external_product_id or None,
+                external_sku=item.article,
+                barcode=item.barcode or current.get('barcode'),
+                price=price if price is not None else 0,
+                status='ARCHIVED' if item.archived else 'ACTIVE',
+                # Действует только для новой связи: sync_enabled нет в update_fields
+                sync_enabled=price is not None,
+            )
+        if not rows:
+            return
+
+        MarketplaceProduct.objects.bulk_create(
+            rows.values(),
+            update_conflicts=True,
+            unique_fields=['product', 'marketplace'],
+            update_fields=['external_product_id', 'external_sku', 'barcode', 'price', 'status', 'updated_at'],
+        )
+        updated = sum(1 for product_id in rows if product_id in existing)
+        result.updated += updated
+        result.created += len(rows) - updated
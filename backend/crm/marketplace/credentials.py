@@ -0,0 +1,70 @@
+# marketplace/credentials.py
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+from django.conf import settings
+from .fields import decryption_stats
+
+logger = logging.getLogger(__name__)
+
+
+class CredentialProvider:
+    """
+    Кэш расшифрованных учётных данных маркетплейсов внутри процесса.
+
+    Ключ кэша - (id маркетплейса, updated_at): после изменения учётных
+    данных в админке строка получает новый updated_at, и следующий вызов
+    расшифровывает их заново. TTL ограничивает время жизни расшифрованных
+    значений в памяти.
+    """
+
+    def __init__(self, ttl: Optional[int] = None):
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._cache: Dict[int, tuple] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def ttl(self) -> int:
+        if self._ttl is not None:
+            return self._ttl
+        return getattr(settings, 'MARKETPLACE_CREDENTIALS_CACHE_TTL', 300)
+
+    def get_credentials(self, marketplace) -> Dict[str, Any]:
+        """Учётные данные маркетплейса, при необходимости расшифрованные заново"""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(marketplace.pk)
+            if cached and cached[0] == marketplace.updated_at and cached[1] > now:
+                self.hits += 1
+                return dict(cached[2])
+
+        credentials = marketplace.build_api_credentials()
+
+        with self._lock:
+            self.misses += 1
+            if marketplace.pk is not None and self.ttl > 0:
+                self._cache[marketplace.pk] = (marketplace.updated_at, now + self.ttl, credentials)
+
+        logger.debug(f"Учётные данные {marketplace.code} расшифрованы заново: {self.stats()}")
+        return dict(credentials)
+
+    def invalidate(self, marketplace_id: Optional[int] = None):
+        """Сбросить кэш одного маркетплейса или весь кэш"""
+        with self._lock:
+            if marketplace_id is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(marketplace_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Попадания в кэш и суммарная стоимость расшифровки"""
+        with self._lock:
+            stats = {'hits': self.hits, 'misses': self.misses, 'cached': len(self._cache)}
+        stats.update(decryption_stats.snapshot())
+        return stats
+
+
+credential_provider = CredentialProvider()
@@ -1,34 +1,108 @@
+import threading
+import time
+from functools import lru_cache
 from django.db import models
+from django.db.models.query_utils import DeferredAttribute
 from django.conf import settings
 from cryptography.fernet import Fernet
 import logging
 
 logger = logging.getLogger(__name__)
 
+ENCRYPTED_PREFIX = "gAAAAAB"
+
+
+@lru_cache(maxsize=4)
+def _fernet_for_key(key: str) -> Fernet:
+    return Fernet(key.encode())
+
+
 def get_fernet():
-    """Получение Fernet-инстанса из настроек"""
-    return Fernet(settings.ENCRYPTION_KEY.encode())
+    """Получение Fernet-инстанса из настроек (создаётся один раз на ключ)"""
+    return _fernet_for_key(settings.ENCRYPTION_KEY)
+
+
+class DecryptionStats:
+    """Счётчики расшифровки: сколько раз и сколько времени ушло"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.seconds = 0.0
+
+    def record(self, duration: float):
+        with self._lock:
+            self.count += 1
+            self.seconds += duration
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                'decrypt_count': self.count,
+                'decrypt_seconds': self.seconds,
+            }
+
+
+decryption_stats = DecryptionStats()
+
+
+class EncryptedValue(str):
+    """Зашифрованное значение из БД, ещё не расшифрованное"""
+
+
+def decrypt_value(value: str) -> str:
+    started = time.perf_counter()
+    try:
+        return get_fernet().decrypt(value.encode('utf-8')).decode('utf-8')
+    except Exception as e:
+        logger.error(f"Ошибка расшифровки: {e} | Значение: {value[:20]}...")
+        return ""
+    finally:
+        duration = time.perf_counter() - started
+        decryption_stats.record(duration)
+        logger.debug(f"Расшифровка поля заняла {duration * 1000:.3f} мс")
+
+
+class DecryptingAttribute(DeferredAttribute):
+    """Расшифровывает значение при первом обращении к атрибуту модели"""
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        value = super().__get__(instance, cls)
+        if isinstance(value, EncryptedValue):
+            value = decrypt_value(value)
+            instance.__dict__[self.field.attname] = value
+        return value
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.field.attname] = value
+
 
 class EncryptedTextField(models.TextField):
-    """Поле для прозрачного шифрования/расшифровки текста"""
-    
+    """
+    Поле для прозрачного шифрования/расшифровки текста.
+
+    При загрузке из БД значение остаётся зашифрованным и расшифровывается
+    только при обращении к атрибуту модели. Запросы values()/values_list()
+    дескриптор не используют и возвращают шифротекст.
+    """
+
+    descriptor_class = DecryptingAttribute
+
     def from_db_value(self, value, expression, connection):
         if value is None or value == "":
             return value
-    
-        if not value.startswith("gAAAAAB"):
+
+        if not value.startswith(ENCRYPTED_PREFIX):
             logger.warning(f"Found unencrypted value in encrypted field. Value starts with: {value[:20]}")
             return value
-        
-        try:
-            fernet = get_fernet()
-            decrypted = fernet.decrypt(value.encode('utf-8'))
-            return decrypted.decode('utf-8')
-        except Exception as e:
-            logger.error(f"Ошибка расшифровки: {e} | Значение: {value[:20]}...")
-            return ""
+
+        return EncryptedValue(value)
 
     def to_python(self, value):
+        if isinstance(value, EncryptedValue):
+            return decrypt_value(value)
         if isinstance(value, str) or value is None:
             return value
         return self.from_db_value(value, None, None)
@@ -36,10 +110,13 @@ class EncryptedTextField(models.TextField):
     def get_prep_value(self, value):
         if value is None:
             return value
+        if isinstance(value, EncryptedValue):
+            # Значение не расшифровывалось - сохраняем как есть
+            return str(value)
         try:
             fernet = get_fernet()
             encrypted = fernet.encrypt(value.encode('utf-8'))
             return encrypted.decode('utf-8')
         except Exception as e:
             logger.error(f"Ошибка шифрования: {e}")
-            return ""
\ No newline at end of file
+            return ""
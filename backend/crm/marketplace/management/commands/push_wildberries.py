@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+from marketplace.models import Marketplace, MarketplaceProduct
+from marketplace.push import WildberriesPushBatcher
+from stock.models import ProductStock
+
+
+class Command(BaseCommand):
+    help = 'Выгрузка цен и остатков всего каталога на Wildberries пачками по 1000 товаров'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--marketplace-id', type=int, help='Маркетплейс (по умолчанию все активные кабинеты WB)')
+        parser.add_argument('--prices', action='store_true', help='Выгрузить только цены')
+        parser.add_argument('--stocks', action='store_true', help='Выгрузить только остатки')
+        parser.add_argument(
+            '--concurrency', type=int, default=WildberriesPushBatcher.CONCURRENCY,
+            help='Одновременных запросов на категорию API'
+        )
+
+    def handle(self, *args, **options):
+        push_prices = options['prices'] or not options['stocks']
+        push_stocks = options['stocks'] or not options['prices']
+
+        marketplaces = Marketplace.objects.filter(code='wildberries')
+        if options['marketplace_id']:
+            marketplaces = marketplaces.filter(pk=options['marketplace_id'])
+            if not marketplaces.exists():
+                raise CommandError(f"Кабинет Wildberries #{options['marketplace_id']} не найден")
+        else:
+            marketplaces = marketplaces.filter(status=Marketplace.Status.ACTIVE)
+
+        for marketplace in marketplaces:
+            batcher = WildberriesPushBatcher(marketplace, concurrency=options['concurrency'])
+            products = MarketplaceProduct.objects.filter(marketplace=marketplace, sync_enabled=True)
+            quantities = {}
+            if push_stocks:
+                stocks = ProductStock.objects.filter(
+                    product__marketplace_products__in=products
+                ).values_list('product_id', 'available_quantity', 'reserved_quantity')
+                # Товары без записи остатков не трогаем, чтобы не обнулить их на WB
+                quantities = {product_id: max(0, available - reserved) for product_id, available, reserved in stocks}
+
+            for marketplace_product in products.iterator(chunk_size=2000):
+                if push_prices:
+                    batcher.add_price(marketplace_product)
+                if push_stocks and marketplace_product.product_id in quantities:
+                    batcher.add_stock(marketplace_product, quantities[marketplace_product.product_id])
+
+            result = batcher.flush()
+            style = self.style.SUCCESS if not result.errors else self.style.WARNING
+            self.stdout.write(style(
+                f"{marketplace.name}: синхронизировано товаров {result.synced}, ошибок {len(result.errors)}, "
+                f"запросов {result.requests}"
+            ))
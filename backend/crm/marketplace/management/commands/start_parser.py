@@ -1,6 +1,12 @@
-from django.core.management.base import BaseCommand
+import datetime
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from marketplace.models import Marketplace
+from parsers.locks import MarketplaceBusy
 from parsers.manager import ParserManager
+from parsers.sharding import plan_shards, run_sharded
 from asgiref.sync import async_to_sync
+from jobs.queue import enqueue
 
 class Command(BaseCommand):
     help = 'Run marketplace parsers to fetch orders'
@@ -16,16 +22,64 @@ class Command(BaseCommand):
             action='store_true',
             help='Run parsers concurrently'
         )
+        parser.add_argument(
+            '--enqueue',
+            action='store_true',
+            help='Enqueue parser jobs for run_worker instead of running them here'
+        )
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=0,
+            help='Run shards (marketplace or marketplace and date window) in N processes'
+        )
+        parser.add_argument(
+            '--date-from',
+            type=datetime.date.fromisoformat,
+            help='Fetch orders created since this date (YYYY-MM-DD), split into windows'
+        )
+        parser.add_argument(
+            '--date-to',
+            type=datetime.date.fromisoformat,
+            help='Fetch orders created before this date (YYYY-MM-DD, exclusive; default: tomorrow)'
+        )
+        parser.add_argument(
+            '--window-days',
+            type=int,
+            default=7,
+            help='Date window length per shard, days (default: 7)'
+        )
 
     def handle(self, *args, **options):
         marketplace_id = options.get('marketplace_id')
         concurrent = options.get('concurrent', False)
         manager = ParserManager()
+
+        if options.get('enqueue'):
+            if marketplace_id:
+                jobs = [enqueue(
+                    'parsers.run_parser', {'marketplace_id': int(marketplace_id)},
+                    unique_key=f'parsers.run_parser:{marketplace_id}'
+                )]
+            else:
+                jobs = manager.enqueue_all_parsers()
+            self.stdout.write(self.style.SUCCESS(
+                f"Enqueued {len(jobs)} parser jobs: {', '.join(str(job.pk) for job in jobs)}"
+            ))
+            return
+
+        if options['processes'] or options['date_from']:
+            self.run_sharded(marketplace_id, options)
+            return
         
         if marketplace_id:
             parser = async_to_sync(manager.get_parser)(marketplace_id)
             if parser:
-                processed = async_to_sync(parser.parse_orders)()
+                try:
+                    processed = async_to_sync(parser.parse_orders)()
+                except MarketplaceBusy as e:
+                    self.stdout.write(self.style.WARNING(f"Skipped: {e}"))
+                    return
                 self.stdout.write(self.style.SUCCESS(f"Processed {processed} orders"))
             else:
                 self.stdout.write(self.style.ERROR("Parser not found"))
@@ -35,10 +89,64 @@ class Command(BaseCommand):
             else:
                 results = async_to_sync(manager.run_all_parsers)()
             
+            for result in results.values():
+                if result.get('skipped'):
+                    self.stdout.write(self.style.WARNING(f"{result.get('name', '')}: skipped, {result['error']}"))
+                if 'run_id' in result:
+                    self.stdout.write(
+                        f"{result.get('name', '')}: {result['status']}, {result.get('processed', 0)} заказов "
+                        f"за {result['duration']:.1f} с, ошибок {result['failed']} (запуск #{result['run_id']})"
+                    )
+
             success_count = sum(1 for r in results.values() if r.get('success'))
             total_processed = sum(r.get('processed', 0) for r in results.values() if r.get('success'))
             
             self.stdout.write(self.style.SUCCESS(
                 f"Completed: {success_count}/{len(results)} parsers, "
                 f"processed {total_processed} orders"
-            ))
\ No newline at end of file
+            ))
+
+    def run_sharded(self, marketplace_id, options):
+        """Выгрузка пулом процессов: шард - маркетплейс или маркетплейс и период"""
+        if options['window_days'] < 1:
+            raise CommandError('--window-days must be positive')
+        if marketplace_id:
+            marketplace_ids = [int(marketplace_id)]
+        else:
+            marketplace_ids = list(
+                Marketplace.objects.filter(status=Marketplace.Status.ACTIVE).values_list('id', flat=True)
+            )
+
+        date_from = date_to = None
+        if options['date_from']:
+            date_to_day = options['date_to'] or timezone.localdate() + datetime.timedelta(days=1)
+            date_from = timezone.make_aware(datetime.datetime.combine(options['date_from'], datetime.time()))
+            date_to = timezone.make_aware(datetime.datetime.combine(date_to_day, datetime.time()))
+            if date_from >= date_to:
+                raise CommandError('--date-from must be before --date-to')
+
+        shards = plan_shards(
+            marketplace_ids, date_from, date_to, datetime.timedelta(days=options['window_days'])
+        )
+        processes = max(1, options['processes'] or 1)
+        self.stdout.write(f"Running {len(shards)} shards in {processes} processes")
+        results = run_sharded(shards, processes, log=self.stdout.write)
+
+        for result in results.values():
+            if result.get('skipped'):
+                self.stdout.write(self.style.WARNING(f"{result['name']}: skipped, {result['error']}"))
+                continue
+            style = self.style.SUCCESS if result['success'] else self.style.ERROR
+            self.stdout.write(style(
+                f"{result['name']}: {result['shards']} shards ({result['shards_failed']} failed), "
+                f"{result['processed']} заказов, ошибок {result['failed']}, "
+                f"запуски {', '.join(f'#{run_id}' for run_id in result['run_ids'])}"
+            ))
+            for error in result['errors']:
+                self.stdout.write(self.style.ERROR(f"  {error}"))
+
+        total_processed = sum(result['processed'] for result in results.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"Completed: {sum(1 for r in results.values() if r['success'])}/{len(results)} marketplaces, "
+            f"processed {total_processed} orders"
+        ))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+from jobs.queue import enqueue
+from marketplace.catalogue import CatalogueSyncService
+from marketplace.models import Marketplace
+
+
+class Command(BaseCommand):
+    help = 'Выгрузка каталога товаров маркетплейсов в MarketplaceProduct (сопоставление по артикулу)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--marketplace-id', type=int, help='Маркетплейс (по умолчанию все активные)')
+        parser.add_argument('--enqueue', action='store_true', help='Поставить выгрузку в очередь run_worker')
+
+    def handle(self, *args, **options):
+        if options['marketplace_id']:
+            marketplaces = Marketplace.objects.filter(pk=options['marketplace_id'])
+            if not marketplaces.exists():
+                raise CommandError(f"Маркетплейс #{options['marketplace_id']} не найден")
+        else:
+            marketplaces = Marketplace.objects.active()
+
+        for marketplace in marketplaces:
+            if options['enqueue']:
+                job = enqueue(
+                    'marketplace.sync_catalogue', {'marketplace_id': marketplace.pk},
+                    unique_key=f'marketplace.sync_catalogue:{marketplace.pk}'
+                )
+                self.stdout.write(self.style.SUCCESS(f"{marketplace.name}: задача #{job.pk} поставлена в очередь"))
+                continue
+
+            try:
+                result = CatalogueSyncService.sync(marketplace)
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f"{marketplace.name}: {str(e)}"))
+                continue
+            self.stdout.write(self.style.SUCCESS(
+                f"{marketplace.name}: получено {result.fetched}, создано {result.created}, "
+                f"обновлено {result.updated}, не найдено в каталоге {result.unmatched}"
+            ))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 14:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0001_initial'),
+        ('product', '0003_product_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='marketplaceproduct',
+            index=models.Index(fields=['marketplace', 'external_sku'], name='marketplace_marketp_94e08c_idx'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from .fields import EncryptedTextField
+from .credentials import credential_provider
 
 class MarketplaceManager(models.Manager):
     """Кастомный менеджер для Marketplace"""
@@ -98,7 +99,11 @@ class Marketplace(models.Model):
         return f"{self.name} ({self.get_environment_display()})"
 
     def get_api_credentials(self) -> dict:
-        """Возвращает все учетные данные в виде словаря"""
+        """Возвращает все учетные данные в виде словаря (через кэш расшифровки)"""
+        return credential_provider.get_credentials(self)
+
+    def build_api_credentials(self) -> dict:
+        """Собирает учетные данные, расшифровывая поля модели"""
         credentials = {
             'api_key': self.api_key,
             'client_id': self.client_id,
@@ -128,6 +133,10 @@ class MarketplaceProduct(models.Model):
         verbose_name_plural = 'Товары на маркетплейсах'
         unique_together = ['product', 'marketplace']
         ordering = ['marketplace', 'product']
+        indexes = [
+            # Поиск товара заказа по артикулу продавца (parsers/base.py)
+            models.Index(fields=['marketplace', 'external_sku']),
+        ]
 
     product = models.ForeignKey(
         'product.Product',
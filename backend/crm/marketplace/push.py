@@ -0,0 +1,173 @@
+# marketplace/push.py
+"""
+Пакетная выгрузка цен и остатков на Wildberries.
+
+Изменения копятся в WildberriesPushBatcher по категориям API (цены -
+PRICES, остатки - MARKETPLACE) и отправляются пачками по максимуму API
+(1000 товаров за запрос). Пачки одной категории уходят параллельно, не
+более CONCURRENCY одновременно, частоту запросов ограничивает
+RateLimiter клиента категории (лимиты - в api/wb_config.py).
+
+Ошибки разбираются по товарам: WB возвращает отклонённые баркоды в ответе
+409 на остатки, отклонённая загрузка цен отклоняет всю пачку. Успешно
+выгруженным товарам проставляется MarketplaceProduct.last_sync, товары с
+ошибкой остаются с прежней датой и попадают в PushResult.errors.
+"""
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, List, Optional
+from asgiref.sync import async_to_sync
+from django.utils import timezone
+from api.wb_api import WildberriesAPIClient
+from api.wb_config import WBApiCategory, WBEnvironment
+from .models import Marketplace, MarketplaceProduct
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PushResult:
+    """Итог выгрузки"""
+    sent: int = 0
+    synced: int = 0
+    requests: int = 0
+    # MarketplaceProduct.id -> текст ошибки
+    errors: Dict[int, str] = field(default_factory=dict)
+
+
+class WildberriesPushBatcher:
+    """Накопление и пакетная отправка цен и остатков одного кабинета WB"""
+
+    # Товаров в одном запросе (максимум API)
+    PRICE_BATCH_SIZE = 1000
+    STOCK_BATCH_SIZE = 1000
+    # Одновременных запросов на категорию API
+    CONCURRENCY = 4
+
+    def __init__(self, marketplace: Marketplace, concurrency: Optional[int] = None):
+        self.marketplace = marketplace
+        credentials = marketplace.get_api_credentials()
+        self.warehouse_id = credentials.get('warehouse_id')
+        self.concurrency = concurrency or self.CONCURRENCY
+        environment = WBEnvironment.PRODUCTION
+        if credentials.get('environment') == 'sandbox':
+            environment = WBEnvironment.SANDBOX
+        self.api_client = WildberriesAPIClient(
+            api_key=credentials['api_key'],
+            environment=environment,
+            base_url=credentials.get('api_base_url')
+        )
+        # MarketplaceProduct.id -> элемент запроса; повторное изменение товара заменяет прежнее
+        self._prices: Dict[int, dict] = {}
+        self._stocks: Dict[int, dict] = {}
+        self._rejected: Dict[int, str] = {}
+
+    def __len__(self):
+        return len(self._prices) + len(self._stocks)
+
+    def add_price(self, marketplace_product: MarketplaceProduct, price: Optional[Decimal] = None,
+                  discount: Optional[int] = None):
+        """Цена товара (по умолчанию MarketplaceProduct.price), рубли"""
+        try:
+            nm_id = int(marketplace_product.external_product_id)
+        except (TypeError, ValueError):
+            self._rejected[marketplace_product.pk] = 'Не указан nmID товара (external_product_id)'
+            return
+        price = marketplace_product.price if price is None else price
+        price = int(Decimal(price or 0).quantize(Decimal('1'), ROUND_HALF_UP))
+        if price <= 0:
+            # Нулевая цена на WB выставила бы товар бесплатно
+            self._prices.pop(marketplace_product.pk, None)
+            self._rejected[marketplace_product.pk] = f'Цена товара должна быть больше нуля (указана {price})'
+            return
+        item = {'nmID': nm_id, 'price': price}
+        if discount is not None:
+            item['discount'] = discount
+        self._prices[marketplace_product.pk] = item
+
+    def add_stock(self, marketplace_product: MarketplaceProduct, quantity: int):
+        """Остаток товара на складе продавца (Marketplace.warehouse_id)"""
+        sku = marketplace_product.barcode or marketplace_product.external_sku
+        if not sku:
+            self._rejected[marketplace_product.pk] = 'Не указан баркод товара'
+            return
+        self._stocks[marketplace_product.pk] = {'sku': sku, 'amount': max(0, int(quantity))}
+
+    def flush(self) -> PushResult:
+        """Отправляет накопленное и проставляет last_sync выгруженным товарам"""
+        result = PushResult(errors=dict(self._rejected))
+        if self._prices or self._stocks:
+            async_to_sync(self._send)(result)
+        synced_ids = (set(self._prices) | set(self._stocks)) - set(result.errors)
+        if synced_ids:
+            MarketplaceProduct.objects.filter(pk__in=synced_ids).update(last_sync=timezone.now())
+        result.synced = len(synced_ids)
+        for marketplace_product_id, error in result.errors.items():
+            logger.warning(f"WB push {self.marketplace.name}: товар #{marketplace_product_id}: {error}")
+
+        self._prices, self._stocks, self._rejected = {}, {}, {}
+        return result
+
+    async def _send(self, result: PushResult):
+        async with self.api_client:
+            await asyncio.gather(
+                self._send_category(WBApiCategory.PRICES, self._prices, self.PRICE_BATCH_SIZE,
+                                    self._send_prices, result),
+                self._send_category(WBApiCategory.MARKETPLACE, self._stocks, self.STOCK_BATCH_SIZE,
+                                    self._send_stocks, result),
+            )
+
+    async def _send_category(self, category: WBApiCategory, items: Dict[int, dict], batch_size: int,
+                             send, result: PushResult):
+        if not items:
+            return
+        client = self.api_client.get_client(category)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        entries = list(items.items())
+
+        async def send_batch(batch):
+            async with semaphore:
+                result.sent += len(batch)
+                result.requests += 1
+                try:
+                    errors = await send(client, batch)
+                except Exception as e:
+                    errors = {marketplace_product_id: str(e) for marketplace_product_id, _ in batch}
+                result.errors.update(errors)
+
+        await asyncio.gather(*(
+            send_batch(entries[start:start + batch_size])
+            for start in range(0, len(entries), batch_size)
+        ))
+
+    async def _send_prices(self, client, batch) -> Dict[int, str]:
+        response = await client.upload_prices([item for _, item in batch])
+        if response.get('error'):
+            error = response.get('errorText') or 'Загрузка цен отклонена'
+            return {marketplace_product_id: error for marketplace_product_id, _ in batch}
+        return {}
+
+    async def _send_stocks(self, client, batch) -> Dict[int, str]:
+        if not self.warehouse_id:
+            return {marketplace_product_id: 'Не указан склад продавца (warehouse_id)'
+                    for marketplace_product_id, _ in batch}
+        rejected = await client.update_stocks(self.warehouse_id, [item for _, item in batch])
+        if not rejected:
+            return {}
+
+        by_sku: Dict[str, List[int]] = {}
+        for marketplace_product_id, item in batch:
+            by_sku.setdefault(item['sku'], []).append(marketplace_product_id)
+        errors = {}
+        for error in rejected:
+            message = error.get('message') or error.get('code') or 'Остаток отклонён'
+            rejected_items = error.get('data') or []
+            if not rejected_items:
+                # Ошибка без списка товаров относится ко всей пачке
+                return {marketplace_product_id: message for marketplace_product_id, _ in batch}
+            for item in rejected_items:
+                for marketplace_product_id in by_sku.get(str(item.get('sku')), ()):
+                    errors[marketplace_product_id] = message
+        return errors
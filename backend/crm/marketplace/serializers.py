@@ -40,8 +40,3 @@ class MarketplaceProductSerializer(serializers.ModelSerializer):
         validated_data.pop('product', None)
         validated_data.pop('marketplace', None)
         return super().update(instance, validated_data)
-    
-    def to_representation(self, instance):
-        data = super().to_representation(instance)
-        data['marketplace'] = instance.marketplace.id
-        return data
\ No newline at end of file
@@ -1,14 +1,28 @@
 # marketplace/services.py
 from django.conf import settings
 from typing import Dict, Any, Optional
-from .models import Marketplace
+from .models import Marketplace, MarketplaceProduct
+from .credentials import credential_provider
 from django.db import transaction
 from stock.models import ProductStock
+from jobs.queue import build_job, enqueue_many, jobs_enabled
+from .push import WildberriesPushBatcher
 import logging
+import threading
 
 
 logger = logging.getLogger(__name__)
 
+
+class _PendingSync(threading.local):
+    """Товары, ожидающие выгрузки остатков после коммита (своё множество у каждого потока)"""
+
+    def __init__(self):
+        self.product_ids = set()
+
+
+_pending_sync = _PendingSync()
+
 class CredentialsService:
     """Сервис для управления учетными данными маркетплейсов"""
     
@@ -20,7 +34,7 @@ class CredentialsService:
                 code=marketplace_code, 
                 status='active'
             )
-            credentials = marketplace.get_api_credentials()
+            credentials = credential_provider.get_credentials(marketplace)
             logger.info(f"Successfully loaded credentials for {marketplace_code}")
             return credentials
         except Marketplace.DoesNotExist:
@@ -36,24 +50,104 @@ class MarketplaceStockService:
     @staticmethod
     def sync_stock_to_marketplaces(product_stock):
         """Синхронизировать остатки товара со всеми маркетплейсами"""
-        product = product_stock.product
-        actual_quantity = product_stock.get_actual_available()
-        
-        for marketplace_product in product.marketplace_products.filter(sync_enabled=True):
-            MarketplaceStockService.update_stock_on_marketplace(
-                marketplace_product, 
-                actual_quantity
-            )
+        MarketplaceStockService.push_stocks([product_stock])
+
+    @staticmethod
+    def push_stocks(product_stocks):
+        """
+        Выгрузить остатки товаров на маркетплейсы.
+
+        На Wildberries остатки уходят пачками - по запросу на 1000 товаров
+        кабинета (marketplace/push.py), на остальные маркетплейсы - по товару.
+        """
+        quantities = {stock.product_id: stock.get_actual_available() for stock in product_stocks}
+        marketplace_products = MarketplaceProduct.objects.filter(
+            product_id__in=quantities, sync_enabled=True
+        ).select_related('marketplace', 'product')
+
+        batchers = {}
+        for marketplace_product in marketplace_products:
+            quantity = quantities[marketplace_product.product_id]
+            if marketplace_product.marketplace.code != 'wildberries':
+                MarketplaceStockService.update_stock_on_marketplace(marketplace_product, quantity)
+                continue
+            batcher = batchers.get(marketplace_product.marketplace_id)
+            if batcher is None:
+                batcher = batchers[marketplace_product.marketplace_id] = WildberriesPushBatcher(
+                    marketplace_product.marketplace
+                )
+            batcher.add_stock(marketplace_product, quantity)
+
+        for batcher in batchers.values():
+            MarketplaceStockService.flush_batcher(batcher)
+
+    @staticmethod
+    def flush_batcher(batcher):
+        """Отправить накопленное; ошибки пишутся в лог, а не бросаются"""
+        try:
+            result = batcher.flush()
+        except Exception as e:
+            logger.error(f"Ошибка выгрузки на {batcher.marketplace.name}: {str(e)}")
+            return None
+        logger.info(
+            f"Выгрузка на {batcher.marketplace.name}: синхронизировано {result.synced} из "
+            f"{result.synced + len(result.errors)}, запросов {result.requests}"
+        )
+        return result
     
+    @staticmethod
+    def sync_changed_stock(product_stock):
+        """Синхронизировать изменившийся остаток после коммита (см. request_sync)"""
+        MarketplaceStockService.request_sync([product_stock.product_id])
+
+    @staticmethod
+    def request_sync(product_ids):
+        """
+        Синхронизировать остатки товаров после коммита текущей транзакции:
+        через очередь задач, если она включена (JOBS_ENABLED), иначе сразу.
+
+        В очереди на товар приходится одна ожидающая задача, а остаток
+        читается при её выполнении - частые изменения одного товара
+        выгружаются один раз.
+
+        Без очереди товары копятся до коммита и выгружаются одним вызовом
+        push_stocks - на Wildberries одной пачкой на кабинет; HTTP-запросы
+        не выполняются внутри транзакции и под блокировками строк остатков.
+        Остатки читаются при выгрузке, поэтому товар из откатившейся
+        транзакции просто выгрузится повторно с тем же значением.
+        """
+        product_ids = set(product_ids)
+        if not product_ids:
+            return
+        if jobs_enabled():
+            transaction.on_commit(lambda: enqueue_many(
+                build_job('marketplace.sync_stock', {'product_id': product_id},
+                          unique_key=f'marketplace.sync_stock:{product_id}')
+                for product_id in product_ids
+            ))
+            return
+
+        _pending_sync.product_ids |= product_ids
+        # Колбэк на каждый вызов: колбэки откатившейся точки сохранения
+        # отбрасываются, а выгружает накопленное первый выполнившийся
+        transaction.on_commit(MarketplaceStockService.push_pending)
+
+    @staticmethod
+    def push_pending():
+        """Выгрузить остатки товаров, накопленных request_sync"""
+        product_ids, _pending_sync.product_ids = _pending_sync.product_ids, set()
+        if product_ids:
+            MarketplaceStockService.push_stocks(
+                ProductStock.objects.select_related('product').filter(product_id__in=product_ids)
+            )
+
     @staticmethod
     def update_stock_on_marketplace(marketplace_product, quantity):
         """Обновить остатки на конкретном маркетплейсе"""
         marketplace = marketplace_product.marketplace.name
         
         try:
-            if marketplace == 'Wildberries':
-                MarketplaceStockService.update_wildberries_stock(marketplace_product, quantity)
-            elif marketplace == 'OZON':
+            if marketplace == 'OZON':
                 MarketplaceStockService.update_ozon_stock(marketplace_product, quantity)
             elif marketplace == 'Яндекс.Маркет':
                 MarketplaceStockService.update_yandex_stock(marketplace_product, quantity)
@@ -63,17 +157,6 @@ class MarketplaceStockService:
         except Exception as e:
             print(f"Ошибка синхронизации с {marketplace}: {e}")
     
-    @staticmethod
-    def update_wildberries_stock(marketplace_product, quantity):
-        """Обновить остатки на Wildberries"""
-        
-        sku = marketplace_product.external_sku or marketplace_product.external_product_id
-        print(f"Wildberries API: Обновлен остаток для {sku} = {quantity}")
-        # Реальный код:
-        # url = "https://suppliers-api.wildberries.ru/api/v2/stocks"
-        # data = [{"sku": sku, "amount": quantity}]
-        # requests.post(url, json=data, headers=headers)
-    
     @staticmethod
     def update_ozon_stock(marketplace_product, quantity):
         """Обновить остатки на OZON"""
@@ -0,0 +1,22 @@
+from dataclasses import asdict
+from jobs.models import Job
+from jobs.queue import task
+from stock.models import ProductStock
+from .catalogue import CatalogueSyncService
+from .models import Marketplace
+from .services import MarketplaceStockService
+
+
+@task('marketplace.sync_stock', queue='stock_sync', priority=Job.Priority.HIGH)
+def sync_stock(product_id):
+    """Выгрузка актуального остатка товара на маркетплейсы"""
+    stock = ProductStock.objects.select_related('product').filter(product_id=product_id).first()
+    if stock is not None:
+        MarketplaceStockService.sync_stock_to_marketplaces(stock)
+
+
+@task('marketplace.sync_catalogue', queue='catalogue', timeout=3600)
+def sync_catalogue(marketplace_id):
+    """Выгрузка каталога товаров маркетплейса в MarketplaceProduct"""
+    marketplace = Marketplace.objects.get(pk=marketplace_id)
+    return asdict(CatalogueSyncService.sync(marketplace))
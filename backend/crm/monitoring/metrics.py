@@ -0,0 +1,183 @@
+# monitoring/metrics.py
+"""
+Метрики процесса в формате Prometheus.
+
+Небольшой реестр счётчиков и гистограмм без внешних зависимостей. Значения
+хранятся в памяти процесса: при нескольких воркерах gunicorn каждый отдаёт
+свои метрики, Prometheus различает их по instance.
+"""
+import math
+import threading
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+# Границы по умолчанию для длительностей, сек
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence, extra: Tuple[str, str] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    type = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> tuple:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(self.samples())
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    """Монотонно растущий счётчик"""
+    type = 'counter'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in values
+        ]
+
+
+class Histogram(Metric):
+    """Распределение значений по корзинам (le) с суммой и количеством"""
+    type = 'histogram'
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._values: Dict[tuple, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [счётчики корзин..., сумма, количество]
+                state = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def get_count(self, **labels) -> int:
+        state = self._values.get(self._key(labels))
+        return state[-1] if state else 0
+
+    def get_sum(self, **labels) -> float:
+        state = self._values.get(self._key(labels))
+        return state[-2] if state else 0.0
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted((key, list(state)) for key, state in self._values.items())
+        lines = []
+        for key, state in values:
+            for bound, count in zip(self.buckets, state):
+                labels = _format_labels(self.labelnames, key, ('le', _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{labels} {state[-1]}")
+        return lines
+
+
+class Registry:
+    """Набор метрик, отдаваемых эндпоинтом /metrics"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: Metric) -> Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Метрика {metric.name} уже зарегистрирована с другим типом или метками")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets=buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return '\n'.join(metric.render() for metric in metrics) + '\n'
+
+
+registry = Registry()
+
+# --- Метрики HTTP-запросов (см. monitoring/middleware.py) ---
+
+REQUEST_LABELS = ('view', 'method')
+
+http_requests = registry.counter(
+    'crm_http_requests_total', 'Запросы по представлению, методу и коду ответа',
+    REQUEST_LABELS + ('status',)
+)
+http_request_duration = registry.histogram(
+    'crm_http_request_duration_seconds', 'Полное время обработки запроса', REQUEST_LABELS
+)
+http_db_queries = registry.histogram(
+    'crm_http_db_queries', 'SQL-запросов на один HTTP-запрос', REQUEST_LABELS,
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+)
+http_db_duration = registry.histogram(
+    'crm_http_db_duration_seconds', 'Время SQL-запросов на один HTTP-запрос', REQUEST_LABELS
+)
+http_render_duration = registry.histogram(
+    'crm_http_render_duration_seconds', 'Время сериализации ответа рендерером (JSON и т.п.)', REQUEST_LABELS
+)
+http_response_size = registry.histogram(
+    'crm_http_response_size_bytes', 'Размер тела ответа', REQUEST_LABELS,
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+)
+http_slow_requests = registry.counter(
+    'crm_http_slow_requests_total', 'Запросы дольше METRICS_SLOW_REQUEST_MS', REQUEST_LABELS
+)
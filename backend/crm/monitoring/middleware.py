@@ -0,0 +1,158 @@
+# monitoring/middleware.py
+import logging
+import re
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+from django.conf import settings
+from django.db import connections
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# Сколько SQL-запросов запроса хранить для журнала медленных запросов
+MAX_SAMPLED_QUERIES = 1000
+SLOW_LOG_FINGERPRINTS = 5
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_LIST = re.compile(r'\((?:\s*(?:%s|\?)\s*,)+\s*(?:%s|\?)\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def fingerprint(sql: str) -> str:
+    """SQL без литералов и длины списков IN: одинаковые запросы с разными параметрами совпадают"""
+    sql = _STRING_LITERAL.sub('?', sql)
+    sql = _NUMBER_LITERAL.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = _PLACEHOLDER_LIST.sub('(...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+class QueryCollector:
+    """execute_wrapper, который считает SQL-запросы и их время"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.samples = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.count += 1
+            self.duration += duration
+            if len(self.samples) < MAX_SAMPLED_QUERIES:
+                self.samples.append((sql, duration))
+
+    def top_fingerprints(self, limit: int = SLOW_LOG_FINGERPRINTS):
+        """Самые дорогие по суммарному времени шаблоны запросов: (шаблон, количество, время)"""
+        grouped = defaultdict(lambda: [0, 0.0])
+        for sql, duration in self.samples:
+            group = grouped[fingerprint(sql)]
+            group[0] += 1
+            group[1] += duration
+        return sorted(
+            ((sql, count, duration) for sql, (count, duration) in grouped.items()),
+            key=lambda item: item[2],
+            reverse=True
+        )[:limit]
+
+
+class RequestMetrics:
+    """Замеры одного запроса"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = QueryCollector()
+        self.render_started = None
+        self.render_db_duration = 0.0
+        self.render_duration = 0.0
+
+    def start_render(self, response):
+        self.render_started = time.perf_counter()
+        db_before = self.queries.duration
+
+        def finish_render(rendered):
+            # Ленивые queryset-ы, вычисленные при рендеринге, относятся ко времени БД
+            self.render_db_duration = self.queries.duration - db_before
+            self.render_duration = time.perf_counter() - self.render_started - self.render_db_duration
+
+        response.add_post_render_callback(finish_render)
+
+
+class RequestMetricsMiddleware:
+    """
+    Метрики производительности по представлениям.
+
+    Для каждого запроса считает число SQL-запросов и их время, время
+    сериализации ответа рендерером, полное время и размер ответа. Пишет их в
+    реестр monitoring.metrics (эндпоинт /metrics) и в заголовок
+    Server-Timing. Запросы дольше METRICS_SLOW_REQUEST_MS попадают в журнал
+    вместе с самыми дорогими шаблонами SQL - так видны N+1.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            return self.get_response(request)
+
+        state = RequestMetrics()
+        request._metrics = state
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(state.queries))
+            response = self.get_response(request)
+
+        self.record(request, response, state)
+        return response
+
+    def process_template_response(self, request, response):
+        state = getattr(request, '_metrics', None)
+        if state is not None:
+            state.start_render(response)
+        return response
+
+    def record(self, request, response, state):
+        total = time.perf_counter() - state.started
+        match = getattr(request, 'resolver_match', None)
+        view = (match.view_name or match._func_path) if match else 'unresolved'
+        if view == 'metrics':
+            return
+
+        labels = {'view': view, 'method': request.method}
+        queries = state.queries
+        metrics.http_requests.inc(status=response.status_code, **labels)
+        metrics.http_request_duration.observe(total, **labels)
+        metrics.http_db_queries.observe(queries.count, **labels)
+        metrics.http_db_duration.observe(queries.duration, **labels)
+        if state.render_started is not None:
+            metrics.http_render_duration.observe(state.render_duration, **labels)
+        if not response.streaming:
+            metrics.http_response_size.observe(len(response.content), **labels)
+
+        if getattr(settings, 'METRICS_SERVER_TIMING', True):
+            app = total - queries.duration - state.render_duration
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={queries.duration * 1000:.1f};desc="{queries.count} queries"',
+                f'render;dur={state.render_duration * 1000:.1f}',
+                f'app;dur={app * 1000:.1f}',
+                f'total;dur={total * 1000:.1f}',
+            ])
+
+        if total * 1000 >= getattr(settings, 'METRICS_SLOW_REQUEST_MS', 500):
+            metrics.http_slow_requests.inc(**labels)
+            logger.warning(
+                "Медленный запрос %s %s (%s): %.0f мс, SQL: %d запросов / %.0f мс, рендеринг %.0f мс\n%s",
+                request.method, request.get_full_path(), view, total * 1000,
+                queries.count, queries.duration * 1000, state.render_duration * 1000,
+                '\n'.join(
+                    f"  {count} x {duration * 1000:.1f} мс: {sql[:500]}"
+                    for sql, count, duration in queries.top_fingerprints()
+                )
+            )
@@ -0,0 +1,27 @@
+# monitoring/views.py
+import hmac
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views.decorators.http import require_GET
+from .metrics import registry
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+@require_GET
+def metrics_view(request):
+    """
+    Метрики процесса в текстовом формате Prometheus.
+
+    С METRICS_TOKEN - только с заголовком Authorization: Bearer <токен>.
+    Без токена метрики (имена представлений, задержки, число SQL-запросов)
+    отдаются только при DEBUG или сотруднику (is_staff) с сессией админки.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token:
+        provided = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+        if not hmac.compare_digest(provided, token):
+            return HttpResponseForbidden()
+    elif not settings.DEBUG and not getattr(request.user, 'is_staff', False):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type=PROMETHEUS_CONTENT_TYPE)
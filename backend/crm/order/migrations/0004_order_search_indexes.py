@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:21
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0001_initial'),
+        ('order', '0003_alter_order_status'),
+        # Расширение pg_trgm включается в миграции поиска товаров
+        ('product', '0003_product_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['created_at_marketplace', 'id'], name='order_order_created_2ee0bc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['marketplace', 'created_at_marketplace'], name='order_order_marketp_052a30_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('number'), name='gin_trgm_ops'), name='order_number_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('posting_number'), name='gin_trgm_ops'), name='order_posting_trgm_idx'),
+        ),
+    ]
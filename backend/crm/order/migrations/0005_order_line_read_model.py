@@ -0,0 +1,65 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_order_lines(apps, schema_editor):
+    """Заполнить витрину строк заказов по уже загруженным позициям"""
+    OrderItem = apps.get_model('order', 'OrderItem')
+    OrderLine = apps.get_model('order', 'OrderLine')
+
+    batch = []
+    for (item_id, order_id, quantity, price, product_id,
+         article, name, image, marketplace_name) in OrderItem.objects.values_list(
+        'id', 'order_id', 'quantity', 'price', 'product__product_id',
+        'product__product__article', 'product__product__name',
+        'product__product__main_img', 'order__marketplace__name'
+    ).iterator(chunk_size=2000):
+        batch.append(OrderLine(
+            item_id=item_id,
+            order_id=order_id,
+            product_id=product_id,
+            marketplace_name=marketplace_name,
+            article=article,
+            name=name,
+            image=image or '',
+            quantity=quantity,
+            price=price,
+        ))
+        if len(batch) >= 2000:
+            OrderLine.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        OrderLine.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0001_initial'),
+        ('order', '0004_order_search_indexes'),
+        ('product', '0003_product_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderLine',
+            fields=[
+                ('item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='line', serialize=False, to='order.orderitem', verbose_name='Позиция заказа')),
+                ('product_id', models.BigIntegerField(db_index=True, verbose_name='ID товара')),
+                ('marketplace_name', models.CharField(max_length=100, verbose_name='Маркетплейс')),
+                ('article', models.CharField(max_length=100, verbose_name='Артикул')),
+                ('name', models.CharField(max_length=70, verbose_name='Имя товара')),
+                ('image', models.CharField(blank=True, default='', max_length=100, verbose_name='Путь к изображению')),
+                ('quantity', models.PositiveIntegerField(default=1, verbose_name='Количество')),
+                ('price', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='Цена продажи')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='order.order', verbose_name='Заказ')),
+            ],
+            options={
+                'verbose_name': 'Строка заказа (витрина)',
+                'verbose_name_plural': 'Строки заказов (витрина)',
+            },
+        ),
+        migrations.RunPython(build_order_lines, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,6 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Upper
 
 class Order(models.Model):
     class Meta:
@@ -8,7 +10,14 @@ class Order(models.Model):
         unique_together = [
             ["external_id", "marketplace"],
         ]
-        indexes = [models.Index(fields=['status', 'created_at']),]
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['created_at_marketplace', 'id']),
+            models.Index(fields=['marketplace', 'created_at_marketplace']),
+            # icontains компилируется в UPPER(col) LIKE UPPER(...), поэтому индекс по UPPER
+            GinIndex(OpClass(Upper('number'), name='gin_trgm_ops'), name='order_number_trgm_idx'),
+            GinIndex(OpClass(Upper('posting_number'), name='gin_trgm_ops'), name='order_posting_trgm_idx'),
+        ]
     
     class Status(models.TextChoices):
         NEW = 'new', 'Новый'
@@ -43,6 +52,13 @@ class Order(models.Model):
         verbose_name="Общая сумма заказа"
     )
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Статус на момент загрузки: по нему post_save определяет смену статуса без лишнего запроса
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+
     def is_fbs(self):
         return self.order_type == 'FBS'
 
@@ -96,4 +112,41 @@ class OrderItem(models.Model):
         null=False,
         blank=False
     )
-    
\ No newline at end of file
+    
+
+class OrderLine(models.Model):
+    """
+    Денормализованная строка заказа для списка заказов.
+
+    Заполняется при загрузке заказов: артикул, название, путь к изображению
+    товара и название маркетплейса копируются из связанных моделей, поэтому
+    список заказов читается без join-ов по товарам и маркетплейсам.
+    """
+    class Meta:
+        app_label = 'order'
+        verbose_name = "Строка заказа (витрина)"
+        verbose_name_plural = "Строки заказов (витрина)"
+
+    item = models.OneToOneField(
+        OrderItem,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="line",
+        verbose_name="Позиция заказа"
+    )
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.CASCADE,
+        related_name="lines",
+        verbose_name="Заказ"
+    )
+    product_id = models.BigIntegerField(db_index=True, verbose_name="ID товара")
+    marketplace_name = models.CharField(max_length=100, verbose_name="Маркетплейс")
+    article = models.CharField(max_length=100, verbose_name="Артикул")
+    name = models.CharField(max_length=70, verbose_name="Имя товара")
+    image = models.CharField(max_length=100, blank=True, default='', verbose_name="Путь к изображению")
+    quantity = models.PositiveIntegerField(default=1, verbose_name="Количество")
+    price = models.DecimalField(max_digits=10, decimal_places=2, default=0, verbose_name="Цена продажи")
+
+    def __str__(self):
+        return f"{self.article} x {self.quantity} ({self.marketplace_name})"
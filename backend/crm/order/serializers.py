@@ -3,6 +3,7 @@
 from rest_framework import serializers
 from .models import Order, OrderItem
 from marketplace.models import Marketplace
+from product.models import Product
 
 class OrderItemSerializer(serializers.ModelSerializer):
     article = serializers.CharField(source='product.product.article')
@@ -27,4 +28,47 @@ class OrderSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'orderNumber', 'departureNumber', 'orderCost', 'orderStatus',
             'marketplace', 'order_date', 'items'
-        ]
\ No newline at end of file
+        ]
+
+
+class StoredImageField(serializers.Field):
+    """Путь к файлу из витрины -> абсолютный URL, как у ImageField"""
+
+    def __init__(self, storage, **kwargs):
+        kwargs['read_only'] = True
+        self.storage = storage
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        url = self.storage.url(value)
+        request = self.context.get('request', None)
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
+
+
+class OrderLineReadSerializer(serializers.Serializer):
+    """Строка заказа из витрины OrderLine (словарь из values())"""
+    id = serializers.IntegerField(source='item_id')
+    article = serializers.CharField()
+    name = serializers.CharField()
+    quantity = serializers.IntegerField()
+    price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    img = StoredImageField(source='image', storage=Product._meta.get_field('main_img').storage)
+
+
+class OrderListReadSerializer(serializers.Serializer):
+    """
+    Заказ для списка: тот же формат, что у OrderSerializer, но данные
+    берутся из словарей values() и витрины OrderLine.
+    """
+    id = serializers.IntegerField()
+    orderNumber = serializers.CharField(source='number')
+    departureNumber = serializers.CharField(source='posting_number')
+    orderCost = serializers.DecimalField(source='total_amount', max_digits=12, decimal_places=2)
+    orderStatus = serializers.CharField(source='status')
+    marketplace = serializers.CharField(source='marketplace_name')
+    order_date = serializers.DateTimeField(source='created_at_marketplace')
+    items = OrderLineReadSerializer(many=True, read_only=True, source='lines')
@@ -1,130 +1,200 @@
 # order/services.py
-from django.db import transaction
-from django.db.models import F
-from stock.models import ProductStock
+import logging
+from dataclasses import dataclass
+from typing import Iterable, Optional, Set
+from stock.models import StockReservation
+from stock.services import ReservationLedgerService
 from marketplace.services import MarketplaceStockService
+from .models import Order, OrderItem, OrderLine
+
+logger = logging.getLogger(__name__)
 
 class StockManagementService:
     """Сервис для управления остатками при работе с заказами"""
-    
+
     @staticmethod
-    def get_marketplace_reserve_field(marketplace_name):
-        """Получить название поля резерва для маркетплейса"""
-        marketplace_map = {
-            'Wildberries': 'reserved_wb',
-            'OZON': 'reserved_ozon', 
-            'Яндекс.Маркет': 'reserved_yandex'
-        }
-        return marketplace_map.get(marketplace_name, 'reserved_wb')
-    
+    def build_reservation_entries(order, kind):
+        """Записи журнала резервов для всех позиций заказа"""
+        return [
+            StockReservation(
+                product_id=item.product.product_id,
+                marketplace_id=order.marketplace_id,
+                order_id=order.pk,
+                kind=kind,
+                quantity=item.quantity
+            )
+            for item in order.items.select_related('product')
+        ]
+
+    @staticmethod
+    def apply_entries(entries):
+        """Применить записи журнала и синхронизировать изменившиеся остатки"""
+        changed_product_ids = ReservationLedgerService.apply(entries)
+        MarketplaceStockService.request_sync(changed_product_ids)
+        return changed_product_ids
+
     @staticmethod
     def process_new_fbs_order(order):
         """Обработать новый FBS заказ - уменьшить доступное количество и добавить в резерв"""
         if not order.is_fbs():
             return
-        
-        with transaction.atomic():
-            for item in order.items.all():
-                product = item.product.product
-                quantity = item.quantity
-                marketplace_name = order.marketplace.name
-                reserve_field = StockManagementService.get_marketplace_reserve_field(marketplace_name)
-                
-                stock, created = ProductStock.objects.get_or_create(
-                    product=product,
-                    defaults={
-                        'available_quantity': 0,
-                        reserve_field: 0
-                    }
-                )
-                
-                if stock.available_quantity < quantity:
-                    raise ValueError(
-                        f"Недостаточно товара {product.article}. "
-                        f"Доступно: {stock.available_quantity}, требуется: {quantity}"
-                    )
-                
-                update_kwargs = {
-                    'available_quantity': F('available_quantity') - quantity,
-                    reserve_field: F(reserve_field) + quantity
-                }
-                ProductStock.objects.filter(product=product).update(**update_kwargs)
-                
-                stock.refresh_from_db()
-                
-                MarketplaceStockService.sync_stock_to_marketplaces(stock)
-    
+
+        StockManagementService.apply_entries(
+            StockManagementService.build_reservation_entries(order, StockReservation.Kind.RESERVE)
+        )
+
     @staticmethod
     def process_delivery_status(order):
         """Обработать переход в статус доставки - убрать из резерва"""
         if not order.is_fbs():
             return
-    
-        with transaction.atomic():
-            for item in order.items.all():
-                product = item.product.product
-                quantity = item.quantity
-                marketplace_name = order.marketplace.name
-                reserve_field = StockManagementService.get_marketplace_reserve_field(marketplace_name)
-                
-                try:
-                    stock = ProductStock.objects.get(product=product)
-                    
-                    # Убираем из резерва (доступное количество уже уменьшено при создании заказа)
-                    update_kwargs = {
-                        reserve_field: F(reserve_field) - quantity
-                    }
-                    ProductStock.objects.filter(product=product).update(**update_kwargs)
-                    
-                    # Обновляем объект в памяти
-                    stock.refresh_from_db()
-                    
-                    # Синхронизируем остатки с маркетплейсами
-                    MarketplaceStockService.sync_stock_to_marketplaces(stock)
-                    
-                except ProductStock.DoesNotExist:
-                    # Если нет записи об остатках, создаем с нулевыми значениями
-                    stock = ProductStock.objects.create(
-                        product=product,
-                        available_quantity=0
-                    )
-                    # Устанавливаем резерв в отрицательное значение (для учета ошибок)
-                    setattr(stock, reserve_field, -quantity)
-                    stock.save()
-    
+
+        # Доступное количество уже уменьшено при создании резерва
+        StockManagementService.apply_entries(
+            StockManagementService.build_reservation_entries(order, StockReservation.Kind.RELEASE)
+        )
+
     @staticmethod
     def cancel_fbs_order(order):
         """Отменить FBS заказ - вернуть доступное количество и убрать из резерва"""
         if not order.is_fbs():
             return
-        
-        with transaction.atomic():
-            for item in order.items.all():
-                product = item.product.product
-                quantity = item.quantity
-                marketplace_name = order.marketplace.name
-                reserve_field = StockManagementService.get_marketplace_reserve_field(marketplace_name)
-                
-                try:
-                    stock = ProductStock.objects.get(product=product)
-                    
-                    # Возвращаем доступное количество и убираем из резерва
-                    update_kwargs = {
-                        'available_quantity': F('available_quantity') + quantity,
-                        reserve_field: F(reserve_field) - quantity
-                    }
-                    ProductStock.objects.filter(product=product).update(**update_kwargs)
-                    
-                    # Обновляем объект в памяти
-                    stock.refresh_from_db()
-                    
-                    # Синхронизируем остатки с маркетплейсами
-                    MarketplaceStockService.sync_stock_to_marketplaces(stock)
-                    
-                except ProductStock.DoesNotExist:
-                    # Если нет записи об остатках, создаем с возвращенным количеством
-                    stock = ProductStock.objects.create(
-                        product=product,
-                        available_quantity=quantity
-                    )
-                    MarketplaceStockService.sync_stock_to_marketplaces(stock)
\ No newline at end of file
+
+        StockManagementService.apply_entries(
+            StockManagementService.build_reservation_entries(order, StockReservation.Kind.CANCEL)
+        )
+
+
+@dataclass
+class OrderTransition:
+    """Смена статуса заказа: old_status = None для только что созданных заказов"""
+    order_id: int
+    old_status: Optional[str]
+    new_status: str
+
+
+class OrderTransitionService:
+    """Пакетное применение смен статусов заказов к остаткам"""
+
+    # Какие записи журнала резервов должны существовать для заказа в данном статусе.
+    # Движок опирается только на целевой статус, поэтому повторная загрузка
+    # тех же заказов ничего не меняет: журнал отбрасывает уже применённые записи.
+    LEDGER_KINDS_BY_STATUS = {
+        Order.Status.NEW: (StockReservation.Kind.RESERVE,),
+        Order.Status.PROCESSING: (StockReservation.Kind.RESERVE,),
+        Order.Status.SHIPPED: (StockReservation.Kind.RESERVE, StockReservation.Kind.RELEASE),
+        Order.Status.DELIVERED: (StockReservation.Kind.RESERVE, StockReservation.Kind.RELEASE),
+        Order.Status.CANCELLED: (StockReservation.Kind.CANCEL,),
+    }
+
+    @staticmethod
+    def apply(transitions: Iterable[OrderTransition]) -> Set[int]:
+        """
+        Применяет пачку смен статусов одним проходом.
+
+        Позиции всех FBS заказов читаются одним запросом. Записи журнала
+        резервов вставляются одним bulk_create, а остатки обновляются одним
+        bulk_update. Возвращает id товаров, у которых изменились остатки.
+        """
+        target_status = {}
+        for transition in transitions:
+            target_status[transition.order_id] = transition.new_status
+        if not target_status:
+            return set()
+
+        items = OrderItem.objects.filter(
+            order_id__in=target_status.keys(),
+            order__order_type='FBS'
+        ).values_list('order_id', 'order__marketplace_id', 'product__product_id', 'quantity')
+
+        entries = []
+        for order_id, marketplace_id, product_id, quantity in items:
+            for kind in OrderTransitionService.LEDGER_KINDS_BY_STATUS.get(target_status[order_id], ()):
+                entries.append(StockReservation(
+                    product_id=product_id,
+                    marketplace_id=marketplace_id,
+                    order_id=order_id,
+                    kind=kind,
+                    quantity=quantity
+                ))
+
+        # Резерв должен применяться раньше снятия для той же позиции
+        kind_order = {
+            StockReservation.Kind.RESERVE: 0,
+            StockReservation.Kind.RELEASE: 1,
+            StockReservation.Kind.CANCEL: 1,
+        }
+        entries.sort(key=lambda entry: kind_order[entry.kind])
+
+        changed = StockManagementService.apply_entries(entries)
+        if changed:
+            logger.info(
+                f"Применено {len(target_status)} смен статусов заказов, "
+                f"изменены остатки {len(changed)} товаров"
+            )
+        return changed
+
+
+class OrderLineService:
+    """Заполнение денормализованных строк заказов (OrderLine)"""
+
+    ITEM_FIELDS = (
+        'id', 'order_id', 'quantity', 'price',
+        'product__product_id', 'product__product__article',
+        'product__product__name', 'product__product__main_img',
+        'order__marketplace__name',
+    )
+
+    @staticmethod
+    def sync_items(item_ids: Iterable[int]) -> int:
+        """Создаёт или обновляет строки для позиций заказов одним upsert-ом"""
+        item_ids = list(item_ids)
+        if not item_ids:
+            return 0
+
+        lines = [
+            OrderLine(
+                item_id=item_id,
+                order_id=order_id,
+                product_id=product_id,
+                marketplace_name=marketplace_name,
+                article=article,
+                name=name,
+                image=image or '',
+                quantity=quantity,
+                price=price,
+            )
+            for (item_id, order_id, quantity, price, product_id,
+                 article, name, image, marketplace_name)
+            in OrderItem.objects.filter(id__in=item_ids).values_list(*OrderLineService.ITEM_FIELDS)
+        ]
+        OrderLine.objects.bulk_create(
+            lines,
+            update_conflicts=True,
+            unique_fields=['item'],
+            update_fields=[
+                'order', 'product_id', 'marketplace_name', 'article',
+                'name', 'image', 'quantity', 'price'
+            ],
+        )
+        return len(lines)
+
+    @staticmethod
+    def sync_product(product) -> int:
+        """Обновляет данные товара во всех его строках заказов"""
+        return OrderLine.objects.filter(product_id=product.pk).exclude(
+            article=product.article,
+            name=product.name,
+            image=product.main_img.name or '',
+        ).update(
+            article=product.article,
+            name=product.name,
+            image=product.main_img.name or '',
+        )
+
+    @staticmethod
+    def sync_marketplace(marketplace) -> int:
+        """Обновляет название маркетплейса в строках его заказов"""
+        return OrderLine.objects.filter(order__marketplace=marketplace).exclude(
+            marketplace_name=marketplace.name
+        ).update(marketplace_name=marketplace.name)
@@ -1,39 +1,62 @@
 # order/signals.py
-from django.db.models.signals import post_save, pre_save
+import logging
+from django.db.models.signals import post_save
 from django.dispatch import receiver
+from marketplace.models import Marketplace
+from product.models import Product
 from .models import Order, OrderItem
-from .services import StockManagementService
+from .services import OrderLineService, OrderTransition, OrderTransitionService
+
+logger = logging.getLogger(__name__)
 
 @receiver(post_save, sender=OrderItem)
 def handle_order_item_creation(sender, instance, created, **kwargs):
     """Обработка создания позиции заказа"""
-    if created and instance.order.is_fbs():
-        print(f"Создана позиция заказа для FBS заказа {instance.order.number}")
-        try:
-            StockManagementService.process_new_fbs_order(instance.order)
-        except ValueError as e:
-            print(f"Ошибка обработки позиции заказа: {e}")
-
-@receiver(pre_save, sender=Order)
-def handle_order_status_change(sender, instance, **kwargs):
-    """Обработка изменения статуса заказа"""
-    if not instance.pk:
+    OrderLineService.sync_items([instance.pk])
+
+    if not created:
+        return
+
+    order = instance.order
+    if order.is_fbs():
+        OrderTransitionService.apply([
+            OrderTransition(order_id=order.pk, old_status=None, new_status=order.status)
+        ])
+
+@receiver(post_save, sender=Order)
+def handle_order_status_change(sender, instance, created, **kwargs):
+    """
+    Обработка изменения статуса заказа.
+
+    Старый статус берётся из значения на момент загрузки (Order.from_db),
+    поэтому дополнительный запрос перед сохранением не нужен. Пакетная
+    загрузка заказов парсерами вызывает OrderTransitionService напрямую.
+    """
+    old_status = getattr(instance, '_loaded_status', None)
+    instance._loaded_status = instance.status
+
+    if created or old_status == instance.status or not instance.is_fbs():
+        return
+
+    logger.info(f"Статус заказа {instance.number} изменился с {old_status} на {instance.status}")
+    OrderTransitionService.apply([
+        OrderTransition(order_id=instance.pk, old_status=old_status, new_status=instance.status)
+    ])
+
+@receiver(post_save, sender=Product)
+def handle_product_change(sender, instance, created, update_fields=None, **kwargs):
+    """Актуализация артикула, названия и изображения в строках заказов"""
+    if created:
+        return
+    if update_fields is not None and not {'article', 'name', 'main_img'} & set(update_fields):
+        return
+    OrderLineService.sync_product(instance)
+
+@receiver(post_save, sender=Marketplace)
+def handle_marketplace_change(sender, instance, created, update_fields=None, **kwargs):
+    """Актуализация названия маркетплейса в строках заказов"""
+    if created:
         return
-    
-    try:
-        old_order = Order.objects.get(pk=instance.pk)
-    except Order.DoesNotExist:
+    if update_fields is not None and 'name' not in update_fields:
         return
-    
-    if old_order.status != instance.status and instance.is_fbs():
-        print(f"Статус заказа {instance.number} изменился с {old_order.status} на {instance.status}")
-        
-        if (old_order.status in [Order.Status.NEW, Order.Status.PROCESSING] and 
-            instance.status == Order.Status.SHIPPED):
-            StockManagementService.process_shipped_status(instance)
-            print(f"Заказ {instance.number} отправлен, резерв уменьшен")
-        
-        elif (old_order.status in [Order.Status.NEW, Order.Status.PROCESSING] and 
-              instance.status == Order.Status.CANCELLED):
-            StockManagementService.cancel_fbs_order(instance)
-            print(f"Заказ {instance.number} отменен, товар возвращен")
\ No newline at end of file
+    OrderLineService.sync_marketplace(instance)
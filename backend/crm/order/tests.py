@@ -1,3 +1,88 @@
 from django.test import TestCase
+from marketplace.models import Marketplace, MarketplaceProduct
+from product.models import Country, Product, ProductDirection
+from stock.models import ProductStock, StockReservation
+from .models import Order, OrderItem
+from .services import OrderTransition, OrderTransitionService
 
-# Create your tests here.
+
+class OrderTransitionServiceTests(TestCase):
+    """Пакетное применение смен статусов FBS заказов к журналу резервов"""
+
+    @classmethod
+    def setUpTestData(cls):
+        country = Country.objects.create(code='TST', name='Тест')
+        direction = ProductDirection.objects.create(code='test', name='Тест')
+        cls.marketplace = Marketplace.objects.create(code='ozon', name='OZON')
+        cls.products = []
+        for index in range(2):
+            product = Product.objects.create(
+                article=f'TRANSITION-{index}', name='Товар', country=country, direction=direction
+            )
+            ProductStock.objects.filter(product=product).update(available_quantity=10)
+            cls.products.append(product)
+        cls.listings = [
+            MarketplaceProduct.objects.create(
+                product=product, marketplace=cls.marketplace, external_product_id=str(product.pk), price=100
+            )
+            for product in cls.products
+        ]
+
+    def create_order(self, number, quantities, order_type='FBS'):
+        """Новый заказ; позиции ставят резерв через сигнал OrderItem"""
+        order = Order.objects.create(
+            external_id=f'transition-{number}', number=str(number), posting_number=str(number),
+            marketplace=self.marketplace, order_type=order_type
+        )
+        for listing, quantity in zip(self.listings, quantities):
+            OrderItem.objects.create(order=order, product=listing, quantity=quantity)
+        return order
+
+    def stock(self, product):
+        stock = ProductStock.objects.get(product=product)
+        return stock.available_quantity, stock.reserved_quantity
+
+    def test_new_order_reserves(self):
+        self.create_order(1, [2, 3])
+        self.assertEqual(self.stock(self.products[0]), (8, 2))
+        self.assertEqual(self.stock(self.products[1]), (7, 3))
+
+    def test_fbo_order_is_ignored(self):
+        order = self.create_order(1, [2, 3], order_type='FBO')
+        OrderTransitionService.apply([OrderTransition(order.pk, None, Order.Status.CANCELLED)])
+        self.assertEqual(self.stock(self.products[0]), (10, 0))
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_batch_of_transitions(self):
+        delivered = self.create_order(1, [2, 3])
+        cancelled = self.create_order(2, [1, 1])
+        transitions = [
+            OrderTransition(delivered.pk, Order.Status.NEW, Order.Status.DELIVERED),
+            OrderTransition(cancelled.pk, Order.Status.NEW, Order.Status.CANCELLED),
+        ]
+        changed = OrderTransitionService.apply(transitions)
+        self.assertEqual(changed, {product.pk for product in self.products})
+        self.assertEqual(self.stock(self.products[0]), (8, 0))
+        self.assertEqual(self.stock(self.products[1]), (7, 0))
+
+        # Повторная загрузка тех же заказов ничего не меняет
+        self.assertEqual(OrderTransitionService.apply(transitions), set())
+        self.assertEqual(self.stock(self.products[0]), (8, 0))
+
+    def test_delivered_without_prior_load_reserves_then_releases(self):
+        order = Order.objects.create(
+            external_id='transition-1', number='1', posting_number='1',
+            marketplace=self.marketplace, status=Order.Status.DELIVERED
+        )
+        # Позиция доставленного заказа: сигнал применяет RESERVE и RELEASE одной пачкой
+        OrderItem.objects.create(order=order, product=self.listings[0], quantity=4)
+        self.assertEqual(self.stock(self.products[0]), (6, 0))
+        kinds = set(StockReservation.objects.filter(order=order).values_list('kind', flat=True))
+        self.assertEqual(kinds, {StockReservation.Kind.RESERVE, StockReservation.Kind.RELEASE})
+
+    def test_status_change_on_save(self):
+        order = self.create_order(1, [2])
+        order = Order.objects.get(pk=order.pk)
+        order.status = Order.Status.CANCELLED
+        order.save()
+        self.assertEqual(self.stock(self.products[0]), (10, 0))
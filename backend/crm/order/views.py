@@ -1,30 +1,102 @@
 # order/views.py
 
-from rest_framework import generics, permissions
-from django.db.models import Q
-from rest_framework.pagination import PageNumberPagination
-from .models import Order
-from .serializers import OrderSerializer
+from rest_framework import generics, permissions, serializers
+from django.db.models import Exists, OuterRef, Q
+from collections import defaultdict
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from marketplace.models import Marketplace
+from .models import Order, OrderItem, OrderLine
+from .serializers import OrderListReadSerializer
+from api.fastpath import FastPathUnsupported, ValuesPlan
+from api.pagination import CappedCountPaginator, CursorOptInPagination
+from api.renderers import FastJSONRenderer
+from rest_framework.renderers import BrowsableAPIRenderer
 
-class StandardResultsSetPagination(PageNumberPagination):
+class StandardResultsSetPagination(CursorOptInPagination):
     page_size = 25
     page_size_query_param = 'page_size'
     max_page_size = 100
+    # COUNT(*) по всей таблице заказов на каждой странице слишком дорог
+    django_paginator_class = CappedCountPaginator
+    # created_at_marketplace может быть пустым - курсор по нему не построить
+    cursor_ordering = ('-id',)
 
 class OrderListView(generics.ListAPIView):
-    serializer_class = OrderSerializer
+    """
+    Список заказов.
+
+    Страница заказов читается через values(), позиции - одним запросом
+    из витрины OrderLine, без построения моделей товаров и маркетплейсов.
+    Название маркетплейса берётся из строк витрины, а не join-ом.
+    """
+    serializer_class = OrderListReadSerializer
     pagination_class = StandardResultsSetPagination
     permission_classes = [permissions.AllowAny]
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+
+    ORDER_FIELDS = (
+        'id', 'number', 'posting_number', 'total_amount', 'status',
+        'marketplace_id', 'created_at_marketplace',
+    )
+    LINE_FIELDS = ('order_id', 'item_id', 'article', 'name', 'quantity', 'price', 'image', 'marketplace_name')
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+
+        page = self.paginate_queryset(queryset)
+        orders = list(page if page is not None else queryset)
+        self.attach_lines(orders)
+
+        serializer = self.get_serializer()
+        try:
+            data = ValuesPlan(serializer).represent_many(orders)
+        except FastPathUnsupported:
+            data = self.get_serializer(orders, many=True).data
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+    def attach_lines(self, orders):
+        """Добавляет к словарям заказов их строки из витрины"""
+        lines = defaultdict(list)
+        if orders:
+            for line in OrderLine.objects.filter(
+                order_id__in=[order['id'] for order in orders]
+            ).order_by('item_id').values(*self.LINE_FIELDS):
+                lines[line['order_id']].append(line)
+        for order in orders:
+            order['lines'] = lines[order['id']]
+            if order['lines']:
+                order['marketplace_name'] = order['lines'][0]['marketplace_name']
+
+        # Заказы без позиций - название из справочника маркетплейсов
+        missing = {order['marketplace_id'] for order in orders if 'marketplace_name' not in order}
+        if missing:
+            names = dict(Marketplace.objects.filter(id__in=missing).values_list('id', 'name'))
+            for order in orders:
+                order.setdefault('marketplace_name', names.get(order['marketplace_id'], ''))
 
     def get_queryset(self):
-        queryset = Order.objects.select_related('marketplace').prefetch_related('items__product__product')
+        queryset = Order.objects.all()
         
         search = self.request.query_params.get('search')
         if search:
+            # EXISTS вместо join + distinct: номер ищется по триграммным
+            # индексам заказа, артикул - по триграммному индексу товара
+            article_match = OrderItem.objects.filter(
+                order_id=OuterRef('pk'),
+                product__product__article__icontains=search
+            )
             queryset = queryset.filter(
                 Q(number__icontains=search) |
-                Q(items__product__product__article__icontains=search)
-            ).distinct()
+                Q(posting_number__icontains=search) |
+                Exists(article_match)
+            )
+
+        marketplace = self.get_param('marketplace', serializers.IntegerField())
+        if marketplace is not None:
+            queryset = queryset.filter(marketplace_id=marketplace)
         
         date_from = self.request.query_params.get('date_from')
         if date_from:
@@ -34,12 +106,22 @@ class OrderListView(generics.ListAPIView):
         if date_to:
             queryset = queryset.filter(created_at_marketplace__lte=date_to)
             
-        amount_from = self.request.query_params.get('amount_from')
-        if amount_from:
+        amount_from = self.get_param('amount_from', serializers.DecimalField(max_digits=None, decimal_places=None))
+        if amount_from is not None:
             queryset = queryset.filter(total_amount__gte=amount_from)
             
-        amount_to = self.request.query_params.get('amount_to')
-        if amount_to:
+        amount_to = self.get_param('amount_to', serializers.DecimalField(max_digits=None, decimal_places=None))
+        if amount_to is not None:
             queryset = queryset.filter(total_amount__lte=amount_to)
 
-        return queryset.order_by('-created_at_marketplace')
\ No newline at end of file
+        return queryset.order_by('-created_at_marketplace', '-id').values(*self.ORDER_FIELDS)
+
+    def get_param(self, name, field):
+        """Значение фильтра, приведённое полем сериализатора; неверное значение - ошибка 400"""
+        value = self.request.query_params.get(name)
+        if not value:
+            return None
+        try:
+            return field.to_internal_value(value)
+        except ValidationError as e:
+            raise ValidationError({name: e.detail})
@@ -0,0 +1,165 @@
+from django.contrib import admin
+from django.utils import timezone
+from .dead_letters import DeadLetterService
+from .models import Backfill, BackfillChunk, DeadLetterOrder, ParserLease, ParserRun, WebhookEvent
+
+
+@admin.register(ParserRun)
+class ParserRunAdmin(admin.ModelAdmin):
+    list_display = [
+        'marketplace', 'status', 'started_at', 'duration_display', 'fetch_display', 'persist_display',
+        'orders_processed', 'orders_failed', 'rows_per_second_display', 'api_requests', 'api_retries',
+        'api_errors', 'api_p95_display'
+    ]
+    list_filter = ['status', 'marketplace']
+    list_select_related = ['marketplace']
+    date_hierarchy = 'started_at'
+    search_fields = ['error']
+
+    def get_readonly_fields(self, request, obj=None):
+        return [field.name for field in self.model._meta.fields]
+
+    def _seconds(self, value):
+        return f"{value:.2f} с"
+
+    def duration_display(self, obj):
+        return self._seconds(obj.duration)
+    duration_display.short_description = 'Длительность'
+    duration_display.admin_order_field = 'duration'
+
+    def fetch_display(self, obj):
+        return self._seconds(obj.fetch_seconds)
+    fetch_display.short_description = 'Получение'
+    fetch_display.admin_order_field = 'fetch_seconds'
+
+    def persist_display(self, obj):
+        return self._seconds(obj.persist_seconds)
+    persist_display.short_description = 'Сохранение'
+    persist_display.admin_order_field = 'persist_seconds'
+
+    def rows_per_second_display(self, obj):
+        return f"{obj.rows_per_second:.1f}"
+    rows_per_second_display.short_description = 'Заказов/с'
+    rows_per_second_display.admin_order_field = 'rows_per_second'
+
+    def api_p95_display(self, obj):
+        p95 = (obj.api_latency or {}).get('p95')
+        return f"{p95 * 1000:.0f} мс" if p95 else '-'
+    api_p95_display.short_description = 'API p95'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(DeadLetterOrder)
+class DeadLetterOrderAdmin(admin.ModelAdmin):
+    list_display = [
+        'external_id', 'marketplace', 'reason', 'short_error', 'attempts',
+        'created_at', 'last_attempt_at', 'resolved_at'
+    ]
+    list_filter = ['reason', 'marketplace', ('resolved_at', admin.EmptyFieldListFilter)]
+    list_select_related = ['marketplace']
+    search_fields = ['external_id', 'error']
+    date_hierarchy = 'created_at'
+    actions = ['replay_selected']
+
+    def get_readonly_fields(self, request, obj=None):
+        return [field.name for field in self.model._meta.fields]
+
+    def short_error(self, obj):
+        return obj.error[:100]
+    short_error.short_description = 'Ошибка'
+
+    @admin.action(description='Повторно обработать выбранные заказы')
+    def replay_selected(self, request, queryset):
+        totals = DeadLetterService.replay(queryset)
+        self.message_user(
+            request,
+            f"Повторено {totals['replayed']} заказов: обработано {totals['resolved']}, "
+            f"снова с ошибкой {totals['failed']}, оставлено в очереди {totals['skipped']}"
+        )
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(WebhookEvent)
+class WebhookEventAdmin(admin.ModelAdmin):
+    list_display = ['event_type', 'marketplace', 'status', 'attempts', 'received_at', 'processed_at']
+    list_filter = ['status', 'marketplace', 'event_type']
+    list_select_related = ['marketplace']
+    search_fields = ['event_id', 'error']
+    date_hierarchy = 'received_at'
+    actions = ['requeue_selected']
+
+    def get_readonly_fields(self, request, obj=None):
+        return [field.name for field in self.model._meta.fields]
+
+    @admin.action(description='Вернуть выбранные события в очередь')
+    def requeue_selected(self, request, queryset):
+        updated = queryset.exclude(status=WebhookEvent.Status.PROCESSING).update(
+            status=WebhookEvent.Status.PENDING, attempts=0, available_at=timezone.now()
+        )
+        self.message_user(request, f"В очередь возвращено {updated} событий")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ParserLease)
+class ParserLeaseAdmin(admin.ModelAdmin):
+    list_display = ['marketplace', 'holder', 'acquired_at', 'renewed_at', 'expires_at']
+    list_select_related = ['marketplace']
+    actions = ['release_selected']
+
+    def get_readonly_fields(self, request, obj=None):
+        return [field.name for field in self.model._meta.fields]
+
+    @admin.action(description='Освободить выбранные аренды')
+    def release_selected(self, request, queryset):
+        released = queryset.update(holder='', expires_at=None)
+        self.message_user(request, f"Освобождено {released} аренд")
+
+    def has_add_permission(self, request):
+        return False
+
+
+class BackfillChunkInline(admin.TabularInline):
+    model = BackfillChunk
+    fields = ['date_from', 'date_to', 'status', 'attempts', 'orders_fetched', 'orders_processed', 'orders_failed',
+              'run', 'error', 'finished_at']
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Backfill)
+class BackfillAdmin(admin.ModelAdmin):
+    list_display = ['marketplace', 'date_from', 'date_to', 'chunk_hours', 'status', 'progress_display',
+                    'orders_processed', 'orders_failed', 'started_at', 'finished_at']
+    list_filter = ['status', 'marketplace']
+    list_select_related = ['marketplace']
+    inlines = [BackfillChunkInline]
+
+    def get_readonly_fields(self, request, obj=None):
+        return [field.name for field in self.model._meta.fields]
+
+    def progress_display(self, obj):
+        done = obj.chunks.filter(status=BackfillChunk.Status.DONE).count()
+        return f"{done}/{obj.chunks.count()}"
+    progress_display.short_description = 'Отрезков выгружено'
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+
+class ParsersConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'parsers'
+    verbose_name = 'Парсеры'
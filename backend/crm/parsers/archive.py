@@ -0,0 +1,188 @@
+# parsers/archive.py
+"""
+Архив сырых ответов API маркетплейсов.
+
+Каждая полученная парсером страница заказов сохраняется на диск как
+NDJSON со сжатием gzip, по каталогам маркетплейса и даты:
+
+    PARSER_ARCHIVE_DIR/<код>_<id>/<ГГГГ-ММ-ДД>/<ЧЧММСС>-<запуск>-<страница>.ndjson.gz
+
+Имена файлов сортируются в порядке получения, поэтому архив можно
+прогнать через нормализацию заново (команда reprocess) без обращения к API.
+
+Архив хранится PARSER_ARCHIVE_RETENTION_DAYS дней: при первой записи за
+новый день каталоги более старых дней этого маркетплейса удаляются
+(вручную - reprocess --prune-before).
+"""
+import gzip
+import json
+import logging
+import os
+import shutil
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+SUFFIX = '.ndjson.gz'
+# Быстрое сжатие: архив пишется на каждом запуске парсера
+COMPRESS_LEVEL = 5
+# Заказов в файле
+PAGE_SIZE = 1000
+
+
+def archive_enabled() -> bool:
+    return getattr(settings, 'PARSER_ARCHIVE_ENABLED', True)
+
+
+def archive_root() -> Path:
+    return Path(settings.PARSER_ARCHIVE_DIR)
+
+
+def archive_retention_days() -> int:
+    return getattr(settings, 'PARSER_ARCHIVE_RETENTION_DAYS', 14)
+
+
+class RawArchive:
+    """Архив ответов API одного маркетплейса"""
+
+    def __init__(self, marketplace, root: Optional[Path] = None):
+        self.marketplace = marketplace
+        self.root = Path(root) if root else archive_root()
+
+    @property
+    def directory(self) -> Path:
+        return self.root / f"{self.marketplace.code}_{self.marketplace.pk}"
+
+    def write(self, raw_orders: List[Dict[str, Any]], run_id=None, page_size: int = PAGE_SIZE,
+              first_page: int = 0) -> List[Path]:
+        """
+        Сохраняет полученные заказы страницами по page_size; возвращает созданные файлы.
+
+        first_page - номер первой страницы, когда ответ пишется частями по мере получения.
+        """
+        if not raw_orders:
+            return []
+        now = timezone.localtime()
+        directory = self.directory / now.date().isoformat()
+        new_day = not directory.is_dir()
+        directory.mkdir(parents=True, exist_ok=True)
+        if new_day:
+            self.prune_expired()
+
+        stamp = f"{now:%H%M%S}-{run_id or 0}"
+        paths = []
+        for page, start in enumerate(range(0, len(raw_orders), page_size), start=first_page):
+            path = directory / f"{stamp}-{page:04d}{SUFFIX}"
+            # Пишем во временный файл: reprocess не должен видеть недописанные страницы
+            tmp_path = path.with_name(path.name + '.tmp')
+            with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=COMPRESS_LEVEL) as f:
+                for raw_order in raw_orders[start:start + page_size]:
+                    f.write(json.dumps(raw_order, ensure_ascii=False, default=str))
+                    f.write('\n')
+            os.replace(tmp_path, path)
+            paths.append(path)
+        return paths
+
+    def files(self, date_from: Optional[date] = None, date_to: Optional[date] = None) -> List[Path]:
+        """Файлы архива за период (включительно) в порядке получения"""
+        if not self.directory.is_dir():
+            return []
+        paths = []
+        for day_dir in sorted(self.directory.iterdir()):
+            try:
+                day = date.fromisoformat(day_dir.name)
+            except ValueError:
+                continue
+            if (date_from and day < date_from) or (date_to and day > date_to):
+                continue
+            paths.extend(sorted(day_dir.glob(f'*{SUFFIX}')))
+        return paths
+
+    def prune(self, before: date) -> int:
+        """Удаляет каталоги дней раньше before; возвращает число удалённых файлов"""
+        if not self.directory.is_dir():
+            return 0
+        removed = 0
+        for day_dir in self.directory.iterdir():
+            try:
+                day = date.fromisoformat(day_dir.name)
+            except ValueError:
+                continue
+            if day < before:
+                removed += sum(1 for path in day_dir.iterdir() if path.is_file())
+                shutil.rmtree(day_dir, ignore_errors=True)
+        if removed:
+            logger.info(f"Архив {self.marketplace.name}: удалено {removed} файлов до {before}")
+        return removed
+
+    def prune_expired(self) -> int:
+        """Удаляет дни старше PARSER_ARCHIVE_RETENTION_DAYS"""
+        retention_days = archive_retention_days()
+        if retention_days <= 0:
+            return 0
+        return self.prune(timezone.localdate() - timedelta(days=retention_days))
+
+    @staticmethod
+    def read(path: Path) -> Iterator[Dict[str, Any]]:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def iter_orders(self, date_from: Optional[date] = None, date_to: Optional[date] = None) -> Iterator[Dict[str, Any]]:
+        for path in self.files(date_from, date_to):
+            yield from self.read(path)
+
+
+def archived_marketplace_ids(root: Optional[Path] = None) -> List[int]:
+    """ID маркетплейсов, для которых в архиве есть каталоги"""
+    root = Path(root) if root else archive_root()
+    if not root.is_dir():
+        return []
+    ids = []
+    for directory in root.iterdir():
+        _, _, marketplace_id = directory.name.rpartition('_')
+        if directory.is_dir() and marketplace_id.isdigit():
+            ids.append(int(marketplace_id))
+    return sorted(ids)
+
+
+def latest_versions(parser, paths: List[Path]) -> Iterator[Dict[str, Any]]:
+    """
+    Заказы из файлов архива, по одной (последней полученной) версии каждого.
+
+    Окна выгрузки парсеров пересекаются, и один заказ лежит в архиве много
+    раз. Повтор всех версий подряд гонял бы статусы и резервы туда-обратно,
+    поэтому первым проходом определяется последняя версия каждого заказа, а
+    вторым - отдаются только они. Заказы, которые не удаётся нормализовать,
+    отдаются все: их ошибки попадут в очередь необработанных.
+    """
+    latest: Dict[str, tuple] = {}
+    unkeyed: List[tuple] = []
+    for file_index, path in enumerate(paths):
+        for line_index, raw_order in enumerate(RawArchive.read(path)):
+            try:
+                external_id = parser.normalize_order_data(raw_order).get('external_id')
+            except Exception:
+                external_id = None
+            if external_id:
+                latest[str(external_id)] = (file_index, line_index)
+            else:
+                unkeyed.append((file_index, line_index))
+
+    wanted: Dict[int, set] = {}
+    for file_index, line_index in [*latest.values(), *unkeyed]:
+        wanted.setdefault(file_index, set()).add(line_index)
+    del latest, unkeyed
+
+    for file_index, path in enumerate(paths):
+        lines = wanted.get(file_index)
+        if not lines:
+            continue
+        for line_index, raw_order in enumerate(RawArchive.read(path)):
+            if line_index in lines:
+                yield raw_order
@@ -0,0 +1,143 @@
+# parsers/backfill.py
+"""
+Выгрузка истории заказов за произвольный период.
+
+Период делится на отрезки длиной BACKFILL_CHUNK_HOURS парсера - столько,
+сколько API отдаёт одним окном без потерь (WB - день, Ozon и Яндекс.Маркет -
+неделя постранично). Отрезки выгружаются через BaseParser.parse_window, не
+более concurrency одновременно, и каждый выгруженный отрезок фиксируется в
+BackfillChunk. Прерванная выгрузка продолжается с невыгруженных отрезков.
+
+На время выгрузки маркетплейс арендуется (parsers/locks.py), поэтому
+плановые запуски парсера этого маркетплейса пропускаются.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+from asgiref.sync import async_to_sync, sync_to_async
+from django.db.models import Sum
+from django.utils import timezone
+from .locks import MarketplaceLease
+from .manager import PARSER_CLASSES, create_parser
+from .models import Backfill, BackfillChunk, ParserRun
+from .sharding import plan_windows
+
+logger = logging.getLogger(__name__)
+
+# Сколько отрезков выгружается одновременно
+DEFAULT_CONCURRENCY = 4
+
+
+class BackfillService:
+    """Создание и выполнение выгрузок истории"""
+
+    @staticmethod
+    def create(marketplace, date_from: datetime, date_to: datetime, chunk_hours: Optional[int] = None) -> Backfill:
+        if chunk_hours is None:
+            parser_class = PARSER_CLASSES.get(marketplace.code)
+            if parser_class is None:
+                raise ValueError(f"Unknown marketplace code: {marketplace.code}")
+            chunk_hours = parser_class.BACKFILL_CHUNK_HOURS
+
+        backfill = Backfill.objects.create(
+            marketplace=marketplace, date_from=date_from, date_to=date_to, chunk_hours=chunk_hours
+        )
+        BackfillChunk.objects.bulk_create([
+            BackfillChunk(backfill=backfill, date_from=start, date_to=end)
+            for start, end in plan_windows(date_from, date_to, timedelta(hours=chunk_hours))
+        ])
+        return backfill
+
+    @staticmethod
+    def find_unfinished(marketplace, date_from: datetime, date_to: datetime) -> Optional[Backfill]:
+        """Незавершённая выгрузка того же периода - её продолжают вместо создания новой"""
+        return (
+            Backfill.objects
+            .filter(marketplace=marketplace, date_from=date_from, date_to=date_to)
+            .exclude(status=Backfill.Status.DONE)
+            .order_by('-created_at')
+            .first()
+        )
+
+    @staticmethod
+    def run(backfill: Backfill, concurrency: int = DEFAULT_CONCURRENCY, log=None) -> Backfill:
+        """
+        Выгружает все невыгруженные отрезки (новые и с ошибкой).
+
+        Бросает MarketplaceBusy, если маркетплейс выгружает другой узел.
+        """
+        log = log or (lambda message: None)
+        lease = MarketplaceLease(backfill.marketplace).acquire()
+        try:
+            backfill.status = Backfill.Status.RUNNING
+            backfill.started_at = timezone.now()
+            backfill.finished_at = None
+            backfill.save(update_fields=['status', 'started_at', 'finished_at'])
+
+            chunks = list(backfill.chunks.exclude(status=BackfillChunk.Status.DONE).order_by('date_from'))
+            log(f"{backfill.marketplace.name}: отрезков к выгрузке {len(chunks)} из {backfill.chunks.count()}")
+            async_to_sync(BackfillService._run_chunks)(backfill, chunks, lease.holder, concurrency, log)
+        finally:
+            lease.release()
+            BackfillService._finish(backfill)
+        return backfill
+
+    @staticmethod
+    async def _run_chunks(backfill: Backfill, chunks, lease_holder: str, concurrency: int, log):
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        # Лимит частоты API (у статистики WB - запрос в минуту) общий для всех отрезков
+        rate_limiters = {}
+
+        async def run_chunk(chunk: BackfillChunk):
+            async with semaphore:
+                # Парсер хранит состояние запуска - у каждого отрезка свой
+                parser = await sync_to_async(create_parser)(backfill.marketplace_id)
+                parser.lease_holder = lease_holder
+                parser.share_rate_limiters(rate_limiters)
+                error = ''
+                try:
+                    await parser.parse_window(chunk.date_from, chunk.date_to)
+                except Exception as e:
+                    error = str(e)
+                await sync_to_async(BackfillService._checkpoint)(chunk, parser.metrics.run, error)
+                log(f"{chunk}: {chunk.get_status_display()}, заказов {chunk.orders_processed}"
+                    + (f", {chunk.error}" if chunk.error else ''))
+
+        await asyncio.gather(*(run_chunk(chunk) for chunk in chunks))
+
+    @staticmethod
+    def _checkpoint(chunk: BackfillChunk, run: Optional[ParserRun], error: str = ''):
+        """Фиксирует итог отрезка; отрезок с ошибкой API будет выгружен повторно"""
+        if not error and run is not None:
+            if run.status == ParserRun.Status.FAILED:
+                error = run.error or 'Запуск парсера завершился ошибкой'
+            elif run.api_errors:
+                # Клиенты API при ошибке отдают неполный список - отрезок нельзя считать выгруженным
+                error = f"Ошибок API: {run.api_errors}"
+
+        chunk.attempts += 1
+        chunk.run = run
+        chunk.orders_fetched = run.orders_fetched if run else 0
+        chunk.orders_processed = run.orders_processed if run else 0
+        chunk.orders_failed = run.orders_failed if run else 0
+        chunk.error = error[:2000]
+        chunk.status = BackfillChunk.Status.FAILED if error else BackfillChunk.Status.DONE
+        chunk.finished_at = timezone.now()
+        chunk.save()
+
+    @staticmethod
+    def _finish(backfill: Backfill):
+        chunks = backfill.chunks.all()
+        totals = chunks.aggregate(processed=Sum('orders_processed'), failed=Sum('orders_failed'))
+        backfill.orders_processed = totals['processed'] or 0
+        backfill.orders_failed = totals['failed'] or 0
+        if not chunks.exclude(status=BackfillChunk.Status.DONE).exists():
+            backfill.status = Backfill.Status.DONE
+            backfill.finished_at = timezone.now()
+        elif chunks.filter(status=BackfillChunk.Status.PENDING).exists():
+            # Выгрузку прервали - продолжится со следующего запуска
+            backfill.status = Backfill.Status.PENDING
+        else:
+            backfill.status = Backfill.Status.FAILED
+        backfill.save(update_fields=['orders_processed', 'orders_failed', 'status', 'finished_at'])
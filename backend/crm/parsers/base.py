@@ -1,20 +1,70 @@
 import abc
+import asyncio
 import logging
-from typing import List, Dict, Any
+from datetime import datetime
+from decimal import Decimal
+from itertools import islice
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Set
+from django.db import transaction
 from django.utils import timezone
 from asgiref.sync import sync_to_async
 
 from order.models import Order, OrderItem
+from order.services import OrderLineService, OrderTransition, OrderTransitionService
 from marketplace.models import Marketplace, MarketplaceProduct
 from product.models import Product
 from marketplace.services import CredentialsService
+from marketplace.credentials import credential_provider
+from .archive import PAGE_SIZE as ARCHIVE_PAGE_SIZE, RawArchive, archive_enabled
+from .dead_letters import DeadLetterService
+from .locks import MarketplaceLease
+from .metrics import ParserRunRecorder
+from .models import DeadLetterOrder
 
 logger = logging.getLogger(__name__)
 
 
+def chunked(items: Iterable, size: int) -> Iterator[list]:
+    """Пачки по size элементов из списка или генератора"""
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+async def achunked(items, size: int) -> AsyncIterator[list]:
+    """Пачки по size элементов из списка, генератора или асинхронного потока"""
+    if not hasattr(items, '__aiter__'):
+        for batch in chunked(items, size):
+            yield batch
+        return
+    batch = []
+    try:
+        async for item in items:
+            batch.append(item)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    finally:
+        # Поток прерван (ошибка обработки) - закрываем его, а с ним и соединение с API
+        if hasattr(items, 'aclose'):
+            await items.aclose()
+
+
 class BaseParser(abc.ABC):
     """Абстрактный базовый класс для всех парсеров"""
 
+    # Сколько заказов сохраняется одной пачкой
+    BATCH_SIZE = 500
+    # Сколько заказов по уведомлениям запрашивается из API одновременно
+    WEBHOOK_FETCH_CONCURRENCY = 5
+    # Длина отрезка выгрузки истории (parsers/backfill.py), часов
+    BACKFILL_CHUNK_HOURS = 24 * 7
+    # Периоды истории выгружаются по очереди в одном процессе (parsers/sharding.py):
+    # ограничитель частоты API общий только внутри процесса
+    SERIAL_WINDOWS = False
+
     def __init__(self, marketplace_id: int = None, marketplace_code: str = None):
         if marketplace_id:
             self.marketplace = self._get_marketplace_by_id(marketplace_id)
@@ -27,6 +77,12 @@ class BaseParser(abc.ABC):
         
         self.credentials = self._load_credentials()
         self.processed_orders = 0
+        self.metrics = ParserRunRecorder(self.marketplace)
+        self._dead_letters: List[Dict[str, Any]] = []
+        # Аренда маркетплейса, под которой работает парсер (шард); None - своя аренда
+        self.lease_holder: Optional[str] = None
+        # Ключи заказов (webhook_order_key), которые не удалось получить по уведомлениям
+        self.webhook_fetch_failures: Set = set()
 
     def _get_marketplace_by_id(self, marketplace_id):
         try:
@@ -43,7 +99,8 @@ class BaseParser(abc.ABC):
             raise ValueError(f"Marketplace {marketplace_code} не найден")
 
     def _load_credentials(self) -> Dict[str, Any]:
-        return self.marketplace.get_api_credentials()
+        # Поля расшифровываются лениво и кэшируются по (id, updated_at)
+        return credential_provider.get_credentials(self.marketplace)
 
     def _get_marketplace_instance(self) -> Marketplace:
         """Получение экземпляра модели Marketplace"""
@@ -54,138 +111,543 @@ class BaseParser(abc.ABC):
 
     @abc.abstractmethod
     async def fetch_orders(self, **kwargs) -> List[Dict[str, Any]]:
-        """Получение заказов из API"""
+        """Получение заказов из API: список или асинхронный поток (обрабатывается по мере загрузки)"""
+        pass
+
+    def normalize_many(self, raw_orders: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Нормализация пачки заказов (в том же порядке).
+
+        Парсеры переопределяют её циклом без вызовов методов на каждый заказ;
+        если пачка падает, process_orders нормализует заказы по одному.
+        """
+        return [self.normalize_order_data(raw_order) for raw_order in raw_orders]
+
+    @abc.abstractmethod
+    async def fetch_window(self, date_from: datetime, date_to: datetime) -> List[Dict[str, Any]]:
+        """
+        Получение заказов, созданных в [date_from, date_to).
+
+        Может вернуть и заказы за соседние даты - parse_window отбрасывает их
+        по raw_created_at. Заказы периода должны вернуться все: на этом
+        держатся шардирование по периодам и выгрузка истории.
+        """
         pass
 
+    def raw_created_at(self, raw_order: Dict[str, Any]) -> Optional[datetime]:
+        """Дата создания заказа из ответа API (для разбиения по периодам)"""
+        return None
+
     @abc.abstractmethod
     def normalize_order_data(self, raw_order: Dict[str, Any]) -> Dict[str, Any]:
         """Нормализация данных заказа к единому формату"""
         pass
 
+    def _observe_api_requests(self, observer):
+        """Подключает наблюдатель запросов ко всем клиентам API парсера"""
+        api_client = getattr(self, 'api_client', None)
+        if api_client is None:
+            return
+        clients = getattr(api_client, 'clients', None)
+        for client in (clients.values() if clients else [api_client]):
+            client.request_observer = observer
+
+    def share_rate_limiters(self, limiters: Dict[Any, Any]):
+        """
+        Заменяет ограничители частоты клиентов API общими из limiters.
+
+        Лимиты маркетплейсов действуют на токен, а не на клиента: парсеры,
+        которые работают параллельно с одним кабинетом, должны делить их.
+        limiters заполняется ограничителями первого парсера.
+        """
+        api_client = getattr(self, 'api_client', None)
+        if api_client is None:
+            return
+        clients = getattr(api_client, 'clients', None) or {None: api_client}
+        for key, client in clients.items():
+            if client.rate_limiter is not None:
+                client.rate_limiter = limiters.setdefault(key, client.rate_limiter)
+
     async def parse_orders(self, **kwargs) -> int:
         """Основной метод парсинга заказов"""
-        try:
+        async def fetch():
             raw_orders = await self.fetch_orders(**kwargs)
+            if hasattr(raw_orders, '__aiter__'):
+                return self._archive_stream(raw_orders)
             logger.info(f"Fetched {len(raw_orders)} orders from {self.marketplace.name}")
+            await self._archive(raw_orders)
+            return raw_orders
+        return await self._run(fetch, params=kwargs, mark_sync=True)
+
+    async def parse_window(self, date_from: datetime, date_to: datetime) -> int:
+        """
+        Выгрузка заказов, созданных в [date_from, date_to).
+
+        API отдают заказы и за соседние даты (например, по дате изменения),
+        поэтому заказы вне периода отбрасываются: при параллельной выгрузке
+        соседних периодов каждый заказ сохраняется ровно одним из них.
+        """
+        async def fetch():
+            raw_orders = await self.fetch_window(date_from, date_to)
+            await self._archive(raw_orders)
+            owned = [raw_order for raw_order in raw_orders if self._in_window(raw_order, date_from, date_to)]
+            logger.info(
+                f"Fetched {len(raw_orders)} orders from {self.marketplace.name} "
+                f"for {date_from:%Y-%m-%d %H:%M}..{date_to:%Y-%m-%d %H:%M}, {len(owned)} in window"
+            )
+            return owned
+        params = {'date_from': date_from.isoformat(), 'date_to': date_to.isoformat()}
+        return await self._run(fetch, params=params, mark_sync=False)
+
+    def _in_window(self, raw_order: Dict[str, Any], date_from: datetime, date_to: datetime) -> bool:
+        try:
+            created_at = self.raw_created_at(raw_order)
+        except (TypeError, ValueError):
+            created_at = None
+        # Заказ без даты не отбрасываем: его ошибки попадут в очередь необработанных
+        return created_at is None or date_from <= created_at < date_to
+
+    async def replay_orders(self, raw_orders: Iterable[Dict[str, Any]], params: Dict[str, Any] = None) -> int:
+        """
+        Повторная обработка уже полученных ответов API без обращения к API.
+
+        raw_orders может быть генератором (например, чтение архива) - заказы
+        обрабатываются пачками по мере чтения. Запуск записывается в
+        ParserRun, но время последней синхронизации маркетплейса не меняется.
+        """
+        async def fetch():
+            return raw_orders
+        return await self._run(fetch, params=params or {'replay': True}, mark_sync=False)
 
-            for raw_order in raw_orders:
-                await self.process_single_order(raw_order)
+    async def process_webhook_events(self, payloads: List[Dict[str, Any]]) -> int:
+        """Обработка пачки уведомлений о заказах (см. parsers/webhooks.py)"""
+        self.webhook_fetch_failures = set()
 
-            # Обновляем время последней успешной синхронизации
-            self.marketplace.last_successful_sync = timezone.now()
-            await sync_to_async(self.marketplace.save)(update_fields=['last_successful_sync'])
+        async def fetch():
+            raw_orders = await self.fetch_webhook_orders(payloads)
+            await self._archive(raw_orders)
+            return raw_orders
+        return await self._run(fetch, params={'webhook': len(payloads)}, mark_sync=False)
+
+    def webhook_order_key(self, payload: Dict[str, Any]):
+        """Ключ, по которому заказ уведомления запрашивается из API; None - заказ целиком в уведомлении"""
+        return None
+
+    async def fetch_webhook_orders(self, payloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Заказы по уведомлениям в формате fetch_orders.
+
+        По умолчанию уведомление содержит заказ целиком (в поле order или само
+        по себе); маркетплейсы, которые присылают только номер, переопределяют
+        метод и запрашивают заказы через _fetch_each.
+        """
+        return [payload.get('order', payload) for payload in payloads]
+
+    async def _fetch_each(self, keys: Iterable, fetch_one) -> List[Dict[str, Any]]:
+        """
+        Запрашивает заказы по одному, не более WEBHOOK_FETCH_CONCURRENCY одновременно.
+
+        Заказ, который не удалось получить, пропускается и попадает в
+        webhook_fetch_failures: его уведомления остаются в очереди и
+        повторяются с задержкой (WebhookService.process).
+        """
+        semaphore = asyncio.Semaphore(self.WEBHOOK_FETCH_CONCURRENCY)
+
+        async def fetch(key):
+            async with semaphore:
+                try:
+                    return await fetch_one(key)
+                except Exception as e:
+                    logger.warning(f"Не удалось получить заказ {key} из {self.marketplace.name}: {str(e)}")
+                    self.metrics.record_failure(key, f"Ошибка получения по уведомлению: {str(e)}")
+                    self.webhook_fetch_failures.add(key)
+                    return None
+
+        results = await asyncio.gather(*(fetch(key) for key in dict.fromkeys(keys)))
+        return [raw_order for raw_order in results if raw_order]
+
+    async def _archive(self, raw_orders: List[Dict[str, Any]], first_page: int = 0):
+        """Сохраняет полученные заказы в архив сырых ответов; ошибка архива не прерывает парсинг"""
+        if not archive_enabled():
+            return
+        run = self.metrics.run
+        try:
+            await sync_to_async(RawArchive(self.marketplace).write)(
+                raw_orders, run_id=run.pk if run else None, first_page=first_page
+            )
+        except Exception as e:
+            logger.error(f"Не удалось сохранить архив ответов {self.marketplace.name}: {str(e)}")
+
+    async def _archive_stream(self, raw_orders: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[Dict[str, Any]]:
+        """Поток заказов с записью в архив страницами по мере получения"""
+        page, pages = [], 0
+        try:
+            async for raw_order in raw_orders:
+                page.append(raw_order)
+                yield raw_order
+                if len(page) >= ARCHIVE_PAGE_SIZE:
+                    await self._archive(page, first_page=pages)
+                    page, pages = [], pages + 1
+            if page:
+                await self._archive(page, first_page=pages)
+        finally:
+            await raw_orders.aclose()
+
+    async def _run(self, fetch, params: Dict[str, Any], mark_sync: bool) -> int:
+        """
+        Получение, нормализация и сохранение заказов с записью метрик запуска.
+
+        Маркетплейс на время запуска арендуется (parsers/locks.py); если его
+        обрабатывает другой узел, бросается MarketplaceBusy.
+        """
+        lease = await sync_to_async(self._acquire_lease)()
+        self.processed_orders = 0
+        self.metrics = ParserRunRecorder(self.marketplace, params=params)
+        self._observe_api_requests(self.metrics.observe_request)
+        error = None
+        batches = None
+        try:
+            await sync_to_async(self.metrics.start)()
+            with self.metrics.stage('fetch'):
+                raw_orders = await fetch()
+            await sync_to_async(lease.renew)()
+
+            # Поток заказов догружается между пачками - это время тоже относится к получению
+            batches = achunked(raw_orders, self.BATCH_SIZE)
+            while True:
+                with self.metrics.stage('fetch'):
+                    batch = await anext(batches, None)
+                if batch is None:
+                    break
+                self.metrics.orders_fetched += len(batch)
+                await self.process_orders(batch)
+                await sync_to_async(lease.renew)()
+
+            if mark_sync:
+                # Обновляем время последней успешной синхронизации
+                self.marketplace.last_successful_sync = timezone.now()
+                await sync_to_async(self.marketplace.save)(update_fields=['last_successful_sync'])
 
             logger.info(f"Successfully processed {self.processed_orders} orders from {self.marketplace.name}")
             return self.processed_orders
 
         except Exception as e:
-            error_msg = str(e)
-            if "401" in error_msg or "Unauthorized" in error_msg:
+            error = str(e)
+            if "401" in error or "Unauthorized" in error:
                 logger.error(f"⚠️ 401 Unauthorized for {self.marketplace.name}. Check API credentials!")
             else:
-                logger.error(f"Error parsing orders from {self.marketplace.name}: {error_msg}", exc_info=True)
+                logger.error(f"Error parsing orders from {self.marketplace.name}: {error}", exc_info=True)
             return 0
 
+        finally:
+            if batches is not None:
+                await batches.aclose()
+            self._observe_api_requests(None)
+            self.metrics.orders_processed = self.processed_orders
+            try:
+                await sync_to_async(self.metrics.finish)(error=error)
+            except Exception as e:
+                logger.error(f"Не удалось сохранить метрики запуска {self.marketplace.name}: {str(e)}")
+            await sync_to_async(lease.release)()
+
+    def _acquire_lease(self) -> MarketplaceLease:
+        if self.lease_holder:
+            return MarketplaceLease(self.marketplace, holder=self.lease_holder).adopt()
+        return MarketplaceLease(self.marketplace).acquire()
+
+    def _dead_letter(self, raw_order: Dict[str, Any], external_id, reason: str, error: str):
+        """Откладывает заказ в очередь необработанных (сохраняется в конце пачки)"""
+        self._dead_letters.append({
+            'external_id': external_id,
+            'reason': reason,
+            'error': error,
+            'raw_payload': raw_order,
+        })
+
+    async def _flush_dead_letters(self):
+        if not self._dead_letters:
+            return
+        entries, self._dead_letters = self._dead_letters, []
+        for entry in entries:
+            self.metrics.record_failure(entry['external_id'], entry['error'])
+        try:
+            await sync_to_async(DeadLetterService.record)(self.marketplace, entries, run=self.metrics.run)
+        except Exception as e:
+            logger.error(f"Не удалось сохранить {len(entries)} необработанных заказов {self.marketplace.name}: {str(e)}")
+
     async def process_single_order(self, raw_order: Dict[str, Any]):
         """Обработка одного заказа с сохранением в БД"""
-        try:
-            order_data = self.normalize_order_data(raw_order)
-            external_id = order_data.get('external_id')
-            if not external_id:
-                logger.warning("Пропущен заказ без external_id")
-                return
-
-            # Подготовка данных для Order
-            order_defaults = {
-                'number': order_data.get('number', ''),
-                'posting_number': order_data.get('posting_number', ''),
-                'status': order_data.get('status', 'new'),
-                'created_at_marketplace': order_data.get('created_at_marketplace'),
-                'total_amount': order_data.get('total_amount', 0),
-            }
-
-            # Сохранение Order
-            order, created = await sync_to_async(Order.objects.update_or_create)(
-                external_id=external_id,
-                marketplace=self.marketplace,
-                defaults=order_defaults
-            )
+        await self.process_orders([raw_order])
+
+    async def process_orders(self, raw_orders: List[Dict[str, Any]]):
+        """Нормализация и пакетное сохранение заказов"""
+        orders_data = []
+        with self.metrics.stage('normalize'):
+            try:
+                normalized = self.normalize_many(raw_orders)
+            except Exception:
+                # Ошибка в каком-то заказе: нормализуем по одному, чтобы отложить только его
+                normalized = [self._normalize_one(raw_order) for raw_order in raw_orders]
 
-            # Обработка товаров
-            items_data = order_data.get('items', [])
-            for item_data in items_data:
-                await self._process_order_item(order, item_data)
+            for raw_order, order_data in zip(raw_orders, normalized):
+                if order_data is None:
+                    continue
+                if not order_data.get('external_id'):
+                    logger.warning("Пропущен заказ без external_id")
+                    self._dead_letter(
+                        raw_order, None, DeadLetterOrder.Reason.MISSING_EXTERNAL_ID, 'Заказ без external_id'
+                    )
+                    continue
+                # Исходный ответ API нужен, чтобы отложить заказ при ошибке сохранения
+                order_data['raw'] = raw_order
+                orders_data.append(order_data)
 
-            self.processed_orders += 1
-            logger.debug(f"{'Создан' if created else 'Обновлён'} заказ: {order.number or external_id}")
+        if orders_data:
+            with self.metrics.stage('persist'):
+                await self._persist_batch(orders_data)
 
+        await self._flush_dead_letters()
+
+    def _normalize_one(self, raw_order: Dict[str, Any]):
+        """Нормализация одного заказа; при ошибке заказ откладывается и возвращается None"""
+        try:
+            return self.normalize_order_data(raw_order)
         except Exception as e:
-            logger.error(f"Ошибка обработки заказа {raw_order.get('id', 'unknown')}: {str(e)}", exc_info=True)
+            logger.error(f"Ошибка нормализации заказа {raw_order.get('id', 'unknown')}: {str(e)}", exc_info=True)
+            self._dead_letter(
+                raw_order, raw_order.get('id'),
+                DeadLetterOrder.Reason.NORMALIZE_ERROR, f"Ошибка нормализации: {str(e)}"
+            )
+            return None
 
-    async def _process_order_item(self, order: Order, item_data: Dict[str, Any]):
+    async def _persist_batch(self, orders_data: List[Dict[str, Any]]):
+        """Сохранение пачки; при ошибке заказы сохраняются по одному"""
+        pending_letters = len(self._dead_letters)
         try:
-            product_id = item_data.get('product_id')
-            offer_id = item_data.get('offer_id')  # ← твой артикул
-            if not product_id:
-                logger.warning(f"Пропущен товар без product_id в заказе {order.external_id}")
-                return
+            self.processed_orders += await sync_to_async(self.persist_orders)(orders_data)
+            return
+        except Exception as e:
+            # Транзакция пачки откатилась: ошибки по её позициям будут записаны заново
+            del self._dead_letters[pending_letters:]
+            logger.error(
+                f"Ошибка пакетного сохранения {len(orders_data)} заказов {self.marketplace.name}: {str(e)}. "
+                f"Сохраняем по одному",
+                exc_info=True
+            )
+
+        # Ошибка одного заказа не должна терять всю пачку
+        for order_data in orders_data:
+            pending_letters = len(self._dead_letters)
+            try:
+                self.processed_orders += await sync_to_async(self.persist_orders)([order_data])
+            except Exception as e:
+                logger.error(f"Ошибка обработки заказа {order_data.get('external_id')}: {str(e)}", exc_info=True)
+                del self._dead_letters[pending_letters:]
+                if order_data.get('raw') is not None:
+                    self._dead_letter(
+                        order_data['raw'], order_data.get('external_id'),
+                        DeadLetterOrder.Reason.PERSIST_ERROR, f"Ошибка сохранения: {str(e)}"
+                    )
+                else:
+                    self.metrics.record_failure(order_data.get('external_id'), f"Ошибка сохранения: {str(e)}")
+
+    def persist_orders(self, orders_data: List[Dict[str, Any]]) -> int:
+        """
+        Сохраняет пачку нормализованных заказов.
+
+        Заказы и позиции сохраняются upsert-ом (bulk_create с update_conflicts),
+        а изменения остатков считаются одним вызовом OrderTransitionService
+        по старым и новым статусам всей пачки.
+        """
+        # При повторе заказа внутри пачки побеждает последняя версия
+        by_external_id = {str(data['external_id']): data for data in orders_data}
 
-            # --- 1. Ищем Product по offer_id (артикулу) ---
-            def get_product_by_offer_id():
+        with transaction.atomic():
+            old_statuses = dict(
+                Order.objects.filter(
+                    marketplace=self.marketplace,
+                    external_id__in=by_external_id.keys()
+                ).values_list('external_id', 'status')
+            )
+
+            orders = Order.objects.bulk_create(
+                [
+                    Order(
+                        external_id=external_id,
+                        marketplace=self.marketplace,
+                        number=data.get('number') or '',
+                        posting_number=data.get('posting_number') or '',
+                        status=data.get('status', 'new'),
+                        created_at_marketplace=data.get('created_at_marketplace'),
+                        total_amount=data.get('total_amount', 0),
+                    )
+                    for external_id, data in by_external_id.items()
+                ],
+                update_conflicts=True,
+                unique_fields=['external_id', 'marketplace'],
+                update_fields=[
+                    'number', 'posting_number', 'status',
+                    'created_at_marketplace', 'total_amount', 'updated_at'
+                ],
+            )
+            if any(order.pk is None for order in orders):
+                order_ids = dict(
+                    Order.objects.filter(
+                        marketplace=self.marketplace,
+                        external_id__in=by_external_id.keys()
+                    ).values_list('external_id', 'id')
+                )
+                for order in orders:
+                    order.pk = order_ids[order.external_id]
+
+            self._persist_order_items(orders, by_external_id)
+
+            OrderTransitionService.apply([
+                OrderTransition(
+                    order_id=order.pk,
+                    old_status=old_statuses.get(order.external_id),
+                    new_status=order.status
+                )
+                for order in orders
+            ])
+
+        for order in orders:
+            logger.debug(
+                f"{'Обновлён' if order.external_id in old_statuses else 'Создан'} заказ: "
+                f"{order.number or order.external_id}"
+            )
+        return len(orders)
+
+    def _dead_letter_order(self, order: Order, by_external_id: Dict[str, Dict[str, Any]], reason: str, error: str):
+        """Откладывает сохранённый заказ, часть позиций которого не удалось привязать к каталогу"""
+        raw_order = by_external_id[order.external_id].get('raw')
+        if raw_order is not None:
+            self._dead_letter(raw_order, order.external_id, reason, error)
+
+    def _persist_order_items(self, orders: List[Order], by_external_id: Dict[str, Dict[str, Any]]):
+        """Пакетное сохранение позиций заказов с привязкой к каталогу"""
+        order_items = []
+        articles = set()
+        for order in orders:
+            for item_data in by_external_id[order.external_id].get('items', []):
+                product_id = item_data.get('product_id')
+                offer_id = item_data.get('offer_id')
+                if not product_id:
+                    logger.warning(f"Пропущен товар без product_id в заказе {order.external_id}")
+                    self._dead_letter_order(
+                        order, by_external_id, DeadLetterOrder.Reason.MISSING_PRODUCT_ID,
+                        'Позиция заказа без product_id'
+                    )
+                    continue
                 if offer_id:
-                    try:
-                        return Product.objects.get(article=offer_id)
-                    except Product.DoesNotExist:
-                        pass
-                # Если не найден по offer_id — ищем по product_id как резерв
-                try:
-                    return Product.objects.get(article=str(product_id))
-                except Product.DoesNotExist:
-                    return None
+                    articles.add(str(offer_id))
+                articles.add(str(product_id))
+                order_items.append((order, item_data))
 
-            product = await sync_to_async(get_product_by_offer_id)()
+        if not order_items:
+            return
+
+        # --- 1. Ищем товар по offer_id (артикулу), в резерве по product_id: сначала среди
+        # связей этого маркетплейса (выгружаются из каталога, marketplace/catalogue.py),
+        # затем по Product.article ---
+        product_ids_by_article = dict(
+            MarketplaceProduct.objects.filter(
+                marketplace=self.marketplace, external_sku__in=articles
+            ).values_list('external_sku', 'product_id')
+        )
+        unresolved_articles = articles - product_ids_by_article.keys()
+        if unresolved_articles:
+            product_ids_by_article.update(
+                Product.objects.filter(article__in=unresolved_articles).values_list('article', 'id')
+            )
 
-            if not product:
+        resolved = []
+        for order, item_data in order_items:
+            product_id = item_data.get('product_id')
+            offer_id = item_data.get('offer_id')
+            catalogue_product_id = (
+                (offer_id and product_ids_by_article.get(str(offer_id))) or
+                product_ids_by_article.get(str(product_id))
+            )
+            if not catalogue_product_id:
                 logger.warning(
                     f"Товар не найден в каталоге: product_id={product_id}, offer_id={offer_id}. "
                     f"Заказ {order.external_id} пропущен."
                 )
-                return  # ← не создаём, просто пропускаем
+                self._dead_letter_order(
+                    order, by_external_id, DeadLetterOrder.Reason.PRODUCT_NOT_FOUND,
+                    f"Товар не найден в каталоге: product_id={product_id}, offer_id={offer_id}"
+                )
+                continue
+            resolved.append((order, item_data, catalogue_product_id))
 
-            # --- 2. Получаем или создаём MarketplaceProduct ---
-            def get_or_create_marketplace_product():
-                mp_product, created = MarketplaceProduct.objects.get_or_create(
-                    product=product,
+        if not resolved:
+            return
+
+        # --- 2. Получаем или создаём MarketplaceProduct ---
+        catalogue_product_ids = {product_id for _, _, product_id in resolved}
+        marketplace_products = {
+            mp_product.product_id: mp_product
+            for mp_product in MarketplaceProduct.objects.filter(
+                marketplace=self.marketplace,
+                product_id__in=catalogue_product_ids
+            )
+        }
+
+        missing = {}
+        for _, item_data, product_id in resolved:
+            if product_id not in marketplace_products and product_id not in missing:
+                missing[product_id] = MarketplaceProduct(
+                    product_id=product_id,
                     marketplace=self.marketplace,
-                    defaults={
-                        'external_product_id': str(product_id),
-                        'external_sku': offer_id or '',
-                        'price': item_data.get('price', 0),
-                        'status': 'ACTIVE'
-                    }
+                    external_product_id=str(item_data.get('product_id')),
+                    external_sku=item_data.get('offer_id') or '',
+                    price=item_data.get('price', 0),
+                    status='ACTIVE'
                 )
-                if not created:
-                    # Обновляем цену
-                    new_price = item_data.get('price')
-                    if new_price is not None and new_price != mp_product.price:
-                        mp_product.price = new_price
-                        mp_product.save(update_fields=['price'])
-                return mp_product
-
-            marketplace_product = await sync_to_async(get_or_create_marketplace_product)()
-
-            # --- 3. Создаём OrderItem ---
-            def create_order_item():
-                OrderItem.objects.update_or_create(
-                    order=order,
-                    product=marketplace_product,
-                    defaults={
-                        'quantity': item_data.get('quantity', 1),
-                        'price': item_data.get('price', 0)
-                    }
+        if missing:
+            MarketplaceProduct.objects.bulk_create(missing.values(), ignore_conflicts=True)
+            marketplace_products.update({
+                mp_product.product_id: mp_product
+                for mp_product in MarketplaceProduct.objects.filter(
+                    marketplace=self.marketplace,
+                    product_id__in=missing.keys()
                 )
+            })
 
-            await sync_to_async(create_order_item)()
+        # Обновляем цену по последней позиции
+        changed_prices = {}
+        for _, item_data, product_id in resolved:
+            mp_product = marketplace_products[product_id]
+            new_price = item_data.get('price')
+            if product_id in missing or new_price is None:
+                continue
+            if Decimal(str(new_price)) != mp_product.price:
+                mp_product.price = new_price
+                changed_prices[product_id] = mp_product
+        if changed_prices:
+            MarketplaceProduct.objects.bulk_update(changed_prices.values(), ['price'])
 
-        except Exception as e:
-            logger.error(f"Ошибка обработки товара {product_id} в заказе {order.external_id}: {str(e)}", exc_info=True)
\ No newline at end of file
+        # --- 3. Создаём или обновляем OrderItem ---
+        items = {}
+        for order, item_data, product_id in resolved:
+            mp_product = marketplace_products[product_id]
+            items[(order.pk, mp_product.pk)] = OrderItem(
+                order=order,
+                product=mp_product,
+                quantity=item_data.get('quantity', 1),
+                price=item_data.get('price', 0)
+            )
+        OrderItem.objects.bulk_create(
+            items.values(),
+            update_conflicts=True,
+            unique_fields=['order', 'product'],
+            update_fields=['quantity', 'price'],
+        )
+        if any(item.pk is None for item in items.values()):
+            item_ids = OrderItem.objects.filter(
+                order_id__in={order_id for order_id, _ in items}
+            ).values_list('id', flat=True)
+        else:
+            item_ids = [item.pk for item in items.values()]
+        OrderLineService.sync_items(item_ids)
\ No newline at end of file
@@ -0,0 +1,137 @@
+# parsers/dead_letters.py
+import hashlib
+import json
+import logging
+from typing import Any, Dict, Iterable, List
+from asgiref.sync import async_to_sync
+from django.db.models import Count, F
+from django.utils import timezone
+from .models import DeadLetterOrder, ParserRun
+
+logger = logging.getLogger(__name__)
+
+
+def dead_letter_external_id(raw_payload: Dict[str, Any], external_id=None) -> str:
+    """Внешний ID заказа, а для заказов без него - отпечаток ответа API"""
+    if external_id:
+        return str(external_id)
+    digest = hashlib.sha1(json.dumps(raw_payload, sort_keys=True, default=str).encode()).hexdigest()
+    return f"sha1:{digest}"
+
+
+class DeadLetterService:
+    """Запись и повторная обработка заказов, которые не удалось сохранить"""
+
+    @staticmethod
+    def record(marketplace, entries: Iterable[Dict[str, Any]], run=None) -> int:
+        """
+        Сохраняет пачку ошибок одним запросом.
+
+        entries: словари с ключами external_id, reason, error, raw_payload.
+        Повторная ошибка по тому же заказу и причине обновляет запись и снова
+        делает её необработанной.
+        """
+        letters = {}
+        for entry in entries:
+            external_id = dead_letter_external_id(entry['raw_payload'], entry.get('external_id'))
+            letters[(external_id, entry['reason'])] = DeadLetterOrder(
+                marketplace=marketplace,
+                external_id=external_id,
+                reason=entry['reason'],
+                error=entry.get('error', '')[:2000],
+                raw_payload=entry['raw_payload'],
+                run=run,
+                resolved_at=None,
+            )
+        if not letters:
+            return 0
+
+        DeadLetterOrder.objects.bulk_create(
+            letters.values(),
+            update_conflicts=True,
+            unique_fields=['marketplace', 'external_id', 'reason'],
+            update_fields=['error', 'raw_payload', 'run', 'resolved_at', 'updated_at'],
+        )
+        return len(letters)
+
+    @staticmethod
+    def replay(queryset, batch_size: int = 500, log=None) -> Dict[str, int]:
+        """
+        Повторно обрабатывает необработанные заказы из queryset; счётчики - в заказах.
+
+        Заказы группируются по маркетплейсу и идут пачками через
+        BaseParser.replay_orders - тот же путь нормализации и сохранения, что и
+        при выгрузке, но без обращения к API. Записи пачки помечаются
+        обработанными только после запуска без статуса «ошибка», кроме тех,
+        что парсер снова записал в очередь в этом запуске. Если запуск упал
+        или маркетплейс занят другим узлом, записи остаются в очереди
+        (skipped).
+        """
+        from .locks import MarketplaceBusy
+        from .manager import create_parser
+
+        log = log or (lambda message: None)
+        totals = {'replayed': 0, 'resolved': 0, 'failed': 0, 'skipped': 0}
+        queryset = queryset.filter(resolved_at__isnull=True)
+
+        # order_by(): сортировка модели по updated_at попала бы в DISTINCT и размножила маркетплейсы
+        marketplace_ids = queryset.order_by().values_list('marketplace_id', flat=True).distinct()
+        for marketplace_id in list(marketplace_ids):
+            letters = queryset.filter(marketplace_id=marketplace_id).order_by('id')
+            parser = create_parser(marketplace_id)
+            last_id = 0
+            while True:
+                batch = list(letters.filter(id__gt=last_id)[:batch_size])
+                if not batch:
+                    break
+                last_id = batch[-1].pk
+                batch_ids = [letter.pk for letter in batch]
+
+                DeadLetterOrder.objects.filter(pk__in=batch_ids).update(
+                    attempts=F('attempts') + 1,
+                    last_attempt_at=timezone.now(),
+                )
+
+                # По одному заказу могло накопиться несколько причин - обрабатываем его один раз;
+                # записи без внешнего ID не склеиваются
+                payloads: Dict[str, Dict[str, Any]] = {}
+                for letter in batch:
+                    payloads.setdefault(letter.external_id or f"pk:{letter.pk}", letter.raw_payload)
+                try:
+                    async_to_sync(parser.replay_orders)(
+                        list(payloads.values()), params={'replay': 'dead_letters', 'orders': len(payloads)}
+                    )
+                except MarketplaceBusy as e:
+                    totals['skipped'] += letters.filter(id__gte=batch[0].pk).count()
+                    log(f"{parser.marketplace.name}: пропущено - {str(e)}")
+                    break
+
+                run = parser.metrics.run
+                if run is None or run.status == ParserRun.Status.FAILED:
+                    totals['skipped'] += len(payloads)
+                    log(f"{parser.marketplace.name}: запуск повтора завершился ошибкой, заказы остались в очереди")
+                    continue
+
+                # Записи, которые парсер снова записал в очередь, получили run этого запуска
+                DeadLetterOrder.objects.filter(pk__in=batch_ids).exclude(run=run).update(
+                    resolved_at=timezone.now()
+                )
+                failed = DeadLetterOrder.objects.filter(
+                    run=run, resolved_at__isnull=True
+                ).values('external_id').distinct().count()
+                totals['replayed'] += len(payloads)
+                totals['failed'] += failed
+                totals['resolved'] += len(payloads) - failed
+                log(f"{parser.marketplace.name}: повторено заказов {len(payloads)}, снова с ошибкой {failed}")
+
+        return totals
+
+
+def pending_summary() -> List[Dict[str, Any]]:
+    """Количество необработанных заказов по маркетплейсу и причине"""
+    return list(
+        DeadLetterOrder.objects.filter(resolved_at__isnull=True)
+        .values('marketplace__name', 'reason')
+        .annotate(count=Count('id'))
+        .order_by('marketplace__name', 'reason')
+    )
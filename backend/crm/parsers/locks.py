@@ -0,0 +1,134 @@
+# parsers/locks.py
+"""
+Один узел на маркетплейс.
+
+Перед выгрузкой или сохранением заказов парсер берёт аренду маркетплейса
+(ParserLease). Если её держит другой живой узел, запуск пропускается, и
+заказы не сохраняются дважды с двойным резервированием остатков.
+
+На PostgreSQL аренду сопровождает сессионный advisory lock: пока он
+удерживается, владелец жив. Если узел упал, соединение закрывается, lock
+освобождается, и аренду можно забрать сразу, не дожидаясь expires_at. На
+других СУБД (и при PARSER_ADVISORY_LOCKS=False, например за pgbouncer в
+режиме транзакций) работает только аренда с истечением.
+"""
+import logging
+import os
+import socket
+import uuid
+from datetime import timedelta
+from typing import Optional
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+from .models import ParserLease
+
+logger = logging.getLogger(__name__)
+
+# Пространство ключей advisory lock парсеров (первый аргумент pg_try_advisory_lock)
+ADVISORY_LOCK_CLASS = 0x5041
+
+
+class MarketplaceBusy(Exception):
+    """Маркетплейс сейчас обрабатывает другой узел"""
+
+
+def _use_advisory_locks() -> bool:
+    return connection.vendor == 'postgresql' and getattr(settings, 'PARSER_ADVISORY_LOCKS', True)
+
+
+def _lease_duration() -> timedelta:
+    return timedelta(seconds=getattr(settings, 'PARSER_LEASE_SECONDS', 900))
+
+
+class MarketplaceLease:
+    """Аренда маркетплейса текущим процессом; методы синхронные (вызываются через sync_to_async)"""
+
+    def __init__(self, marketplace, holder: Optional[str] = None):
+        self.marketplace = marketplace
+        self.holder = holder or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.locked = False
+        self.held = False
+        self.adopted = False
+
+    def _try_advisory_lock(self) -> bool:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_try_advisory_lock(%s, %s)', [ADVISORY_LOCK_CLASS, self.marketplace.pk])
+            return cursor.fetchone()[0]
+
+    def _advisory_unlock(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_unlock(%s, %s)', [ADVISORY_LOCK_CLASS, self.marketplace.pk])
+
+    def acquire(self) -> 'MarketplaceLease':
+        """Берёт аренду или бросает MarketplaceBusy"""
+        now = timezone.now()
+        if _use_advisory_locks():
+            if not self._try_advisory_lock():
+                raise MarketplaceBusy(self._busy_message())
+            self.locked = True
+            # Lock наш - прежний владелец аренды (если есть) уже не работает
+            available = Q()
+        else:
+            available = Q(expires_at__lt=now) | Q(holder='') | Q(expires_at__isnull=True)
+
+        ParserLease.objects.get_or_create(marketplace_id=self.marketplace.pk)
+        updated = ParserLease.objects.filter(available, marketplace_id=self.marketplace.pk).update(
+            holder=self.holder,
+            acquired_at=now,
+            renewed_at=now,
+            expires_at=now + _lease_duration(),
+        )
+        if not updated:
+            self.release()
+            raise MarketplaceBusy(self._busy_message())
+        self.held = True
+        return self
+
+    def adopt(self) -> 'MarketplaceLease':
+        """
+        Работа под чужой действующей арендой - процессы-шарды работают под
+        арендой родителя (см. parsers/sharding.py). Продлевать можно,
+        освобождает только владелец.
+        """
+        if not ParserLease.objects.filter(
+            marketplace_id=self.marketplace.pk, holder=self.holder, expires_at__gte=timezone.now()
+        ).exists():
+            raise MarketplaceBusy(f"Аренда {self.holder} маркетплейса {self.marketplace.name} не действует")
+        self.held = self.adopted = True
+        return self
+
+    def renew(self):
+        """Продлевает аренду; вызывается между пачками заказов"""
+        if not self.held:
+            return
+        now = timezone.now()
+        renewed = ParserLease.objects.filter(marketplace_id=self.marketplace.pk, holder=self.holder).update(
+            renewed_at=now, expires_at=now + _lease_duration()
+        )
+        if not renewed:
+            # Аренду забрали после истечения - продолжать нельзя
+            self.held = False
+            raise MarketplaceBusy(f"Аренда маркетплейса {self.marketplace.name} потеряна")
+
+    def release(self):
+        if self.adopted:
+            self.held = self.adopted = False
+            return
+        if self.held:
+            ParserLease.objects.filter(marketplace_id=self.marketplace.pk, holder=self.holder).update(
+                holder='', expires_at=None
+            )
+            self.held = False
+        if self.locked:
+            try:
+                self._advisory_unlock()
+            except Exception as e:
+                logger.warning(f"Не удалось снять advisory lock {self.marketplace.name}: {str(e)}")
+            self.locked = False
+
+    def _busy_message(self) -> str:
+        lease: Optional[ParserLease] = ParserLease.objects.filter(marketplace_id=self.marketplace.pk).first()
+        holder = lease.holder if lease and lease.holder else 'другой узел'
+        return f"Маркетплейс {self.marketplace.name} обрабатывает {holder}"
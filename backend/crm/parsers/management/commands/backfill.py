@@ -0,0 +1,96 @@
+from datetime import date, datetime, time, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from jobs.queue import enqueue
+from marketplace.models import Marketplace
+from parsers.backfill import DEFAULT_CONCURRENCY, BackfillService
+from parsers.locks import MarketplaceBusy
+from parsers.models import Backfill, BackfillChunk
+
+
+def _start_of_day(day: date) -> datetime:
+    return timezone.make_aware(datetime.combine(day, time()))
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгрузка истории заказов маркетплейса за период отрезками с фиксацией '
+        'выгруженных. Повторный запуск за тот же период продолжает прерванную выгрузку'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--marketplace-id', type=int, help='Маркетплейс')
+        parser.add_argument('--date-from', type=date.fromisoformat, help='Начало периода, ГГГГ-ММ-ДД')
+        parser.add_argument(
+            '--date-to', type=date.fromisoformat, help='Конец периода (не включая), ГГГГ-ММ-ДД; по умолчанию завтра'
+        )
+        parser.add_argument('--chunk-hours', type=int, help='Длина отрезка, ч (по умолчанию - по лимитам API)')
+        parser.add_argument(
+            '--concurrency', type=int, default=DEFAULT_CONCURRENCY, help='Сколько отрезков выгружать одновременно'
+        )
+        parser.add_argument('--resume', type=int, metavar='ID', help='Продолжить выгрузку с этим ID')
+        parser.add_argument('--list', action='store_true', help='Показать незавершённые выгрузки')
+        parser.add_argument('--enqueue', action='store_true', help='Поставить выгрузку в очередь run_worker')
+
+    def handle(self, *args, **options):
+        if options['list']:
+            self.list_unfinished()
+            return
+
+        backfill = self.get_backfill(options)
+        if options['enqueue']:
+            job = enqueue(
+                'parsers.run_backfill', {'backfill_id': backfill.pk, 'concurrency': options['concurrency']},
+                unique_key=f'parsers.run_backfill:{backfill.pk}'
+            )
+            self.stdout.write(self.style.SUCCESS(f"Выгрузка #{backfill.pk} поставлена в очередь, задача #{job.pk}"))
+            return
+
+        try:
+            BackfillService.run(backfill, options['concurrency'], log=self.stdout.write)
+        except MarketplaceBusy as e:
+            raise CommandError(str(e))
+
+        style = self.style.SUCCESS if backfill.status == Backfill.Status.DONE else self.style.WARNING
+        self.stdout.write(style(
+            f"Выгрузка #{backfill.pk}: {backfill.get_status_display()}, обработано {backfill.orders_processed} "
+            f"заказов, ошибок {backfill.orders_failed}"
+        ))
+
+    def get_backfill(self, options) -> Backfill:
+        if options['resume']:
+            try:
+                return Backfill.objects.select_related('marketplace').get(pk=options['resume'])
+            except Backfill.DoesNotExist:
+                raise CommandError(f"Выгрузка #{options['resume']} не найдена")
+
+        if not options['marketplace_id'] or not options['date_from']:
+            raise CommandError('Укажите --marketplace-id и --date-from или --resume')
+        try:
+            marketplace = Marketplace.objects.get(pk=options['marketplace_id'])
+        except Marketplace.DoesNotExist:
+            raise CommandError(f"Маркетплейс #{options['marketplace_id']} не найден")
+
+        date_from = _start_of_day(options['date_from'])
+        date_to = _start_of_day(options['date_to'] or timezone.localdate() + timedelta(days=1))
+        if date_from >= date_to:
+            raise CommandError('--date-from должна быть раньше --date-to')
+        if options['chunk_hours'] is not None and options['chunk_hours'] < 1:
+            raise CommandError('--chunk-hours должна быть положительной')
+
+        backfill = BackfillService.find_unfinished(marketplace, date_from, date_to)
+        if backfill is not None:
+            self.stdout.write(f"Продолжение выгрузки #{backfill.pk}")
+            return backfill
+        backfill = BackfillService.create(marketplace, date_from, date_to, options['chunk_hours'])
+        self.stdout.write(f"Создана выгрузка #{backfill.pk}: отрезков {backfill.chunks.count()}")
+        return backfill
+
+    def list_unfinished(self):
+        backfills = Backfill.objects.exclude(status=Backfill.Status.DONE).select_related('marketplace')
+        for backfill in backfills:
+            done = backfill.chunks.filter(status=BackfillChunk.Status.DONE).count()
+            self.stdout.write(
+                f"#{backfill.pk} {backfill.marketplace.name} {backfill}: {backfill.get_status_display()}, "
+                f"выгружено отрезков {done}/{backfill.chunks.count()}"
+            )
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+from jobs.queue import enqueue
+from marketplace.models import Marketplace
+from parsers.reports import load_reports
+
+
+class Command(BaseCommand):
+    help = (
+        'Загрузка отчётов WB о продажах и остатках в таблицы фактов '
+        '(wb_sales_fact, wb_stock_fact) для аналитики без запросов к WB'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--marketplace-id', type=int, help='Кабинет WB (по умолчанию все активные)')
+        parser.add_argument('--days-back', type=int, default=30, help='Продажи, изменённые за N дней')
+        parser.add_argument('--sales', action='store_true', help='Загрузить только продажи')
+        parser.add_argument('--stocks', action='store_true', help='Загрузить только снимок остатков')
+        parser.add_argument('--enqueue', action='store_true', help='Поставить загрузку в очередь run_worker')
+
+    def handle(self, *args, **options):
+        sales = options['sales'] or not options['stocks']
+        stocks = options['stocks'] or not options['sales']
+
+        marketplaces = Marketplace.objects.filter(code='wildberries')
+        if options['marketplace_id']:
+            marketplaces = marketplaces.filter(pk=options['marketplace_id'])
+            if not marketplaces.exists():
+                raise CommandError(f"Кабинет Wildberries #{options['marketplace_id']} не найден")
+        else:
+            marketplaces = marketplaces.filter(status=Marketplace.Status.ACTIVE)
+
+        for marketplace in marketplaces:
+            params = {
+                'marketplace_id': marketplace.pk, 'sales_days_back': options['days_back'],
+                'sales': sales, 'stocks': stocks,
+            }
+            if options['enqueue']:
+                job = enqueue('parsers.load_wb_reports', params, unique_key=f'parsers.load_wb_reports:{marketplace.pk}')
+                self.stdout.write(self.style.SUCCESS(f"{marketplace.name}: задача #{job.pk} поставлена в очередь"))
+                continue
+
+            try:
+                result = load_reports(**params)
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f"{marketplace.name}: {str(e)}"))
+                continue
+            self.stdout.write(self.style.SUCCESS(
+                f"{marketplace.name}: продаж {result.get('sales', 0)}, строк остатков {result.get('stocks', 0)}"
+            ))
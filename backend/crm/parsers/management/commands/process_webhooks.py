@@ -0,0 +1,35 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from parsers.webhooks import WebhookService
+
+
+class Command(BaseCommand):
+    help = 'Обработка очереди уведомлений маркетплейсов пачками'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help='Событий в одной пачке')
+        parser.add_argument(
+            '--interval', type=float, default=1.0, help='Пауза, если очередь пуста, сек'
+        )
+        parser.add_argument('--once', action='store_true', help='Обработать очередь и выйти')
+
+    def handle(self, *args, **options):
+        parsers = {}
+        try:
+            while True:
+                close_old_connections()
+                events = WebhookService.claim(options['batch_size'])
+                if not events:
+                    if options['once']:
+                        break
+                    time.sleep(options['interval'])
+                    continue
+
+                totals = WebhookService.process(events, parsers)
+                self.stdout.write(
+                    f"Событий {totals['events']}: заказов {totals['orders']}, с ошибкой {totals['failed']}, "
+                    f"отложено {totals['deferred']}"
+                )
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from parsers.dead_letters import DeadLetterService, pending_summary
+from parsers.models import DeadLetterOrder
+
+
+class Command(BaseCommand):
+    help = 'Повторная обработка заказов из очереди необработанных (без обращения к API)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--marketplace-id', type=str, help='Только заказы этого маркетплейса')
+        parser.add_argument(
+            '--reason',
+            choices=DeadLetterOrder.Reason.values,
+            action='append',
+            help='Только заказы с этой причиной (можно указать несколько раз)'
+        )
+        parser.add_argument('--limit', type=int, help='Сколько заказов повторить за запуск')
+        parser.add_argument('--batch-size', type=int, default=500, help='Заказов в одной пачке')
+        parser.add_argument('--dry-run', action='store_true', help='Только показать, что в очереди')
+
+    def handle(self, *args, **options):
+        queryset = DeadLetterOrder.objects.filter(resolved_at__isnull=True)
+        if options['marketplace_id']:
+            queryset = queryset.filter(marketplace_id=options['marketplace_id'])
+        if options['reason']:
+            queryset = queryset.filter(reason__in=options['reason'])
+        if options['limit']:
+            queryset = DeadLetterOrder.objects.filter(
+                pk__in=list(queryset.order_by('id').values_list('id', flat=True)[:options['limit']])
+            )
+
+        if options['dry_run']:
+            for row in pending_summary():
+                self.stdout.write(f"{row['marketplace__name']}: {row['reason']} - {row['count']}")
+            self.stdout.write(f"К повтору выбрано: {queryset.count()}")
+            return
+
+        totals = DeadLetterService.replay(
+            queryset, batch_size=options['batch_size'], log=self.stdout.write
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Повторено {totals['replayed']} заказов: обработано {totals['resolved']}, "
+            f"снова с ошибкой {totals['failed']}, оставлено в очереди {totals['skipped']}"
+        ))
@@ -0,0 +1,73 @@
+from datetime import date
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand, CommandError
+from marketplace.models import Marketplace
+from parsers.archive import RawArchive, archived_marketplace_ids, latest_versions
+from parsers.manager import create_parser
+
+
+class Command(BaseCommand):
+    help = (
+        'Повторная нормализация и сохранение заказов из архива сырых ответов API '
+        '(без обращения к API). Из каждого заказа берётся последняя версия за период'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--marketplace-id', type=int, help='Только этот маркетплейс')
+        parser.add_argument('--date-from', type=date.fromisoformat, help='Начало периода архива, ГГГГ-ММ-ДД')
+        parser.add_argument('--date-to', type=date.fromisoformat, help='Конец периода архива, ГГГГ-ММ-ДД')
+        parser.add_argument(
+            '--all-versions',
+            action='store_true',
+            help='Прогнать все версии заказов в порядке получения, а не только последние'
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Только показать файлы архива')
+        parser.add_argument(
+            '--prune-before',
+            type=date.fromisoformat,
+            help='Не обрабатывать, а удалить из архива дни раньше этой даты, ГГГГ-ММ-ДД'
+        )
+
+    def handle(self, *args, **options):
+        if options['marketplace_id']:
+            marketplace_ids = [options['marketplace_id']]
+        else:
+            marketplace_ids = archived_marketplace_ids()
+        if not marketplace_ids:
+            raise CommandError('Архив пуст')
+
+        if options['prune_before']:
+            removed = sum(
+                RawArchive(marketplace).prune(options['prune_before'])
+                for marketplace in Marketplace.objects.filter(pk__in=marketplace_ids)
+            )
+            self.stdout.write(self.style.SUCCESS(f"Удалено {removed} файлов архива"))
+            return
+
+        total = 0
+        for marketplace_id in marketplace_ids:
+            parser = create_parser(marketplace_id)
+            archive = RawArchive(parser.marketplace)
+            paths = archive.files(options['date_from'], options['date_to'])
+            self.stdout.write(f"{parser.marketplace.name}: файлов архива {len(paths)}")
+            if options['dry_run'] or not paths:
+                continue
+
+            if options['all_versions']:
+                raw_orders = (raw_order for path in paths for raw_order in archive.read(path))
+            else:
+                raw_orders = latest_versions(parser, paths)
+            processed = async_to_sync(parser.replay_orders)(raw_orders, params={
+                'replay': 'archive',
+                'date_from': options['date_from'],
+                'date_to': options['date_to'],
+                'files': len(paths),
+            })
+            run = parser.metrics.run
+            self.stdout.write(
+                f"{parser.marketplace.name}: обработано {processed} заказов, "
+                f"ошибок {run.orders_failed if run else 0}"
+            )
+            total += processed
+
+        self.stdout.write(self.style.SUCCESS(f"Обработано {total} заказов"))
@@ -1,14 +1,35 @@
 import asyncio
 import logging
+from datetime import timedelta
 from typing import Dict, Any, Optional
 from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+from jobs.queue import enqueue
 from marketplace.models import Marketplace
+from .locks import MarketplaceBusy
 from .ozon_parser import OzonParser
 from .wb_parser import WildberriesParser
 from .yandex_parser import YandexParser
 
 logger = logging.getLogger(__name__)
 
+PARSER_CLASSES = {
+    'ozon': OzonParser,
+    'wildberries': WildberriesParser,
+    'yandex_market': YandexParser,
+}
+
+
+def create_parser(marketplace_id):
+    """Синхронное создание парсера по ID маркетплейса (для команд и сервисов)"""
+    mp = Marketplace.objects.get(id=marketplace_id)
+    parser_class = PARSER_CLASSES.get(mp.code)
+    if parser_class is None:
+        raise ValueError(f"Unknown marketplace code: {mp.code}")
+    return parser_class(marketplace_id=mp.id)
+
+
 class ParserManager:
     """Менеджер для управления парсерами"""
     
@@ -18,20 +39,34 @@ class ParserManager:
     async def _create_parser(self, mp: Marketplace) -> Optional[Any]:
         """Создание парсера"""
         try:
-            if mp.code == 'ozon':
-                parser = await sync_to_async(OzonParser)(marketplace_id=mp.id)
-            elif mp.code == 'wildberries':
-                parser = await sync_to_async(WildberriesParser)(marketplace_id=mp.id)
-            elif mp.code == 'yandex_market':
-                parser = await sync_to_async(YandexParser)(marketplace_id=mp.id)
-            else:
+            parser_class = PARSER_CLASSES.get(mp.code)
+            if parser_class is None:
                 logger.error(f"Unknown marketplace code: {mp.code}")
                 return None
-            return parser
+            return await sync_to_async(parser_class)(marketplace_id=mp.id)
         except Exception as e:
             logger.error(f"Error creating parser for {mp.name}: {str(e)}")
             return None
 
+    def _is_polling_due(self, mp: Marketplace) -> bool:
+        """Маркетплейсы с вебхуками опрашиваются только для сверки, раз в WEBHOOK_RECONCILE_MINUTES"""
+        if not mp.is_webhook_enabled or mp.last_successful_sync is None:
+            return True
+        reconcile = timedelta(minutes=getattr(settings, 'WEBHOOK_RECONCILE_MINUTES', 360))
+        return timezone.now() - mp.last_successful_sync >= reconcile
+
+    def _run_summary(self, parser) -> dict:
+        """Итоги последнего запуска парсера из ParserRun"""
+        run = parser.metrics.run
+        if run is None:
+            return {}
+        return {
+            'run_id': run.pk,
+            'status': run.status,
+            'duration': run.duration,
+            'failed': run.orders_failed,
+        }
+
     async def get_parser(self, marketplace_id: str) -> Optional[Any]:
         """Получение парсера по ID маркетплейса"""
         if marketplace_id in self._parsers:
@@ -51,8 +86,8 @@ class ParserManager:
             logger.error(f"Error loading parser for ID {marketplace_id}: {str(e)}")
             return None
 
-    async def run_all_parsers(self) -> dict:
-        """Запуск всех активных парсеров"""
+    async def run_all_parsers(self, only_due: bool = False) -> dict:
+        """Запуск всех активных парсеров; only_due - пропустить маркетплейсы, получающие вебхуки"""
         results = {}
         
         marketplaces = await sync_to_async(
@@ -60,6 +95,8 @@ class ParserManager:
         )()
         
         for mp in marketplaces:
+            if only_due and not self._is_polling_due(mp):
+                continue
             parser = await self.get_parser(str(mp.id))
             if parser is None:
                 continue
@@ -70,9 +107,19 @@ class ParserManager:
                     'success': True,
                     'processed': processed,
                     'name': mp.name,
-                    'code': mp.code
+                    'code': mp.code,
+                    **self._run_summary(parser)
                 }
                 logger.info(f"Parser {mp.name} processed {processed} orders")
+            except MarketplaceBusy as e:
+                logger.info(f"Parser {mp.name} skipped: {str(e)}")
+                results[str(mp.id)] = {
+                    'success': False,
+                    'skipped': True,
+                    'error': str(e),
+                    'name': mp.name,
+                    'code': mp.code
+                }
             except Exception as e:
                 logger.error(f"Parser {mp.name} error: {str(e)}")
                 results[str(mp.id)] = {
@@ -84,6 +131,22 @@ class ParserManager:
                 
         return results
 
+    def enqueue_all_parsers(self, only_due: bool = False) -> list:
+        """
+        Ставит выгрузку всех активных маркетплейсов в очередь задач (jobs).
+
+        На маркетплейс в очереди одна ожидающая задача, поэтому планировщики
+        на нескольких узлах не дублируют работу.
+        """
+        jobs = []
+        for mp in Marketplace.objects.filter(status=Marketplace.Status.ACTIVE):
+            if only_due and not self._is_polling_due(mp):
+                continue
+            jobs.append(enqueue(
+                'parsers.run_parser', {'marketplace_id': mp.pk}, unique_key=f'parsers.run_parser:{mp.pk}'
+            ))
+        return jobs
+
     async def run_parsers_concurrently(self) -> dict:
         """Параллельный запуск всех парсеров"""
         marketplaces = await sync_to_async(
@@ -121,7 +184,16 @@ class ParserManager:
             processed = await parser.parse_orders()
             return {
                 'success': True,
-                'processed': processed
+                'processed': processed,
+                **self._run_summary(parser)
+            }
+        except MarketplaceBusy as e:
+            logger.info(f"Parser {marketplace_id} skipped: {str(e)}")
+            return {
+                'success': False,
+                'skipped': True,
+                'error': str(e),
+                'processed': 0
             }
         except Exception as e:
             logger.error(f"Parser {marketplace_id} error: {str(e)}")
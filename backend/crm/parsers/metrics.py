@@ -0,0 +1,189 @@
+# parsers/metrics.py
+"""
+Метрики запусков парсеров.
+
+ParserRunRecorder собирает замеры одного запуска (этапы, запросы к API,
+ошибки по заказам) и по окончании сохраняет их в ParserRun, пишет
+структурированную строку в журнал и обновляет метрики Prometheus.
+"""
+import json
+import logging
+import math
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+from django.utils import timezone
+from monitoring.metrics import registry
+from .models import ParserRun
+
+logger = logging.getLogger(__name__)
+
+# Сколько заказов с ошибками хранить в ParserRun.failed_orders
+MAX_FAILED_ORDERS = 200
+
+API_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+parser_runs = registry.counter(
+    'crm_parser_runs_total', 'Запуски парсеров по маркетплейсу и статусу', ('marketplace', 'status')
+)
+parser_stage_duration = registry.histogram(
+    'crm_parser_stage_duration_seconds', 'Длительность этапов запуска парсера', ('marketplace', 'stage'),
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+)
+parser_orders = registry.counter(
+    'crm_parser_orders_total', 'Заказы, прошедшие через парсер', ('marketplace', 'result')
+)
+parser_api_duration = registry.histogram(
+    'crm_parser_api_request_duration_seconds', 'Время запросов к API маркетплейса', ('marketplace',),
+    buckets=API_LATENCY_BUCKETS
+)
+parser_api_requests = registry.counter(
+    'crm_parser_api_requests_total', 'Запросы к API маркетплейса по результату', ('marketplace', 'result')
+)
+
+
+def _percentile(ordered: List[float], percent: float) -> float:
+    if not ordered:
+        return 0.0
+    rank = math.ceil(percent / 100 * len(ordered))
+    return ordered[max(0, min(len(ordered), rank) - 1)]
+
+
+class ParserRunRecorder:
+    """Замеры одного запуска парсера"""
+
+    STAGES = ('fetch', 'normalize', 'persist')
+
+    def __init__(self, marketplace, params: Optional[Dict[str, Any]] = None):
+        self.marketplace = marketplace
+        self.params = params or {}
+        self.stages = dict.fromkeys(self.STAGES, 0.0)
+        self.api_latencies: List[float] = []
+        self.api_requests = 0
+        self.api_retries = 0
+        self.api_errors = 0
+        self.orders_fetched = 0
+        self.orders_processed = 0
+        self.failed_orders: List[Dict[str, str]] = []
+        self.orders_failed = 0
+        self.run: Optional[ParserRun] = None
+        self._started = time.perf_counter()
+        self._started_at = timezone.now()
+
+    def _new_run(self) -> ParserRun:
+        return ParserRun(
+            marketplace=self.marketplace,
+            params=json.loads(json.dumps(self.params, default=str)),
+            started_at=self._started_at,
+        )
+
+    def start(self) -> ParserRun:
+        """Создаёт запись запуска со статусом «выполняется»"""
+        self._started = time.perf_counter()
+        self._started_at = timezone.now()
+        self.run = self._new_run()
+        self.run.save()
+        return self.run
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] += time.perf_counter() - started
+
+    def observe_request(self, method: str, endpoint: str, duration: float, status: Optional[int],
+                        retry: bool = False, error: Optional[str] = None):
+        """Вызывается клиентом API после каждой попытки запроса"""
+        self.api_requests += 1
+        self.api_latencies.append(duration)
+        code = self.marketplace.code
+        parser_api_duration.observe(duration, marketplace=code)
+        if retry:
+            self.api_retries += 1
+            result = 'retry'
+        elif error or (status is not None and status >= 400):
+            self.api_errors += 1
+            result = 'error'
+        else:
+            result = 'ok'
+        parser_api_requests.inc(marketplace=code, result=result)
+
+    def record_failure(self, external_id, reason: str):
+        self.orders_failed += 1
+        if len(self.failed_orders) < MAX_FAILED_ORDERS:
+            self.failed_orders.append({'external_id': str(external_id or ''), 'reason': reason[:500]})
+
+    def api_latency_summary(self) -> Dict[str, Any]:
+        ordered = sorted(self.api_latencies)
+        counts = [sum(1 for value in ordered if value <= bound) for bound in API_LATENCY_BUCKETS]
+        return {
+            'buckets': list(API_LATENCY_BUCKETS),
+            'counts': counts,
+            'count': len(ordered),
+            'p50': round(_percentile(ordered, 50), 4),
+            'p95': round(_percentile(ordered, 95), 4),
+            'max': round(ordered[-1], 4) if ordered else 0.0,
+        }
+
+    def finish(self, error: Optional[str] = None) -> ParserRun:
+        """Сохраняет итоги запуска"""
+        duration = time.perf_counter() - self._started
+        if error:
+            status = ParserRun.Status.FAILED
+        elif self.orders_failed or self.api_errors:
+            status = ParserRun.Status.PARTIAL
+        else:
+            status = ParserRun.Status.SUCCESS
+
+        run = self.run or self._new_run()
+        run.status = status
+        run.finished_at = timezone.now()
+        run.duration = duration
+        run.fetch_seconds = self.stages['fetch']
+        run.normalize_seconds = self.stages['normalize']
+        run.persist_seconds = self.stages['persist']
+        run.api_requests = self.api_requests
+        run.api_retries = self.api_retries
+        run.api_errors = self.api_errors
+        run.api_latency = self.api_latency_summary()
+        run.orders_fetched = self.orders_fetched
+        run.orders_processed = self.orders_processed
+        run.orders_failed = self.orders_failed
+        run.rows_per_second = self.orders_processed / duration if duration else 0
+        run.failed_orders = self.failed_orders
+        run.error = error or ''
+        run.save()
+
+        self.emit(run)
+        return run
+
+    def emit(self, run: ParserRun):
+        code = self.marketplace.code
+        parser_runs.inc(marketplace=code, status=run.status)
+        for stage, seconds in self.stages.items():
+            parser_stage_duration.observe(seconds, marketplace=code, stage=stage)
+        parser_orders.inc(run.orders_processed, marketplace=code, result='processed')
+        parser_orders.inc(run.orders_failed, marketplace=code, result='failed')
+
+        logger.info(
+            "parser_run %s",
+            json.dumps({
+                'run_id': run.pk,
+                'marketplace': code,
+                'status': run.status,
+                'duration': round(run.duration, 3),
+                'fetch': round(run.fetch_seconds, 3),
+                'normalize': round(run.normalize_seconds, 3),
+                'persist': round(run.persist_seconds, 3),
+                'orders_fetched': run.orders_fetched,
+                'orders_processed': run.orders_processed,
+                'orders_failed': run.orders_failed,
+                'rows_per_second': round(run.rows_per_second, 1),
+                'api_requests': run.api_requests,
+                'api_retries': run.api_retries,
+                'api_errors': run.api_errors,
+                'api_p95': run.api_latency.get('p95'),
+            }, ensure_ascii=False)
+        )
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('marketplace', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ParserRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('running', 'Выполняется'), ('success', 'Успешно'), ('partial', 'С ошибками'), ('failed', 'Ошибка')], default='running', max_length=10, verbose_name='Статус')),
+                ('params', models.JSONField(blank=True, default=dict, verbose_name='Параметры запуска')),
+                ('started_at', models.DateTimeField(verbose_name='Начало')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Окончание')),
+                ('duration', models.FloatField(default=0, verbose_name='Длительность, сек')),
+                ('fetch_seconds', models.FloatField(default=0, verbose_name='Получение из API, сек')),
+                ('normalize_seconds', models.FloatField(default=0, verbose_name='Нормализация, сек')),
+                ('persist_seconds', models.FloatField(default=0, verbose_name='Сохранение, сек')),
+                ('api_requests', models.PositiveIntegerField(default=0, verbose_name='Запросов к API')),
+                ('api_retries', models.PositiveIntegerField(default=0, verbose_name='Повторов запросов')),
+                ('api_errors', models.PositiveIntegerField(default=0, verbose_name='Ошибок API')),
+                ('api_latency', models.JSONField(blank=True, default=dict, verbose_name='Задержка API')),
+                ('orders_fetched', models.PositiveIntegerField(default=0, verbose_name='Получено заказов')),
+                ('orders_processed', models.PositiveIntegerField(default=0, verbose_name='Обработано заказов')),
+                ('orders_failed', models.PositiveIntegerField(default=0, verbose_name='Заказов с ошибками')),
+                ('rows_per_second', models.FloatField(default=0, verbose_name='Заказов в секунду')),
+                ('failed_orders', models.JSONField(blank=True, default=list, verbose_name='Заказы с ошибками')),
+                ('error', models.TextField(blank=True, verbose_name='Ошибка')),
+                ('marketplace', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='parser_runs', to='marketplace.marketplace', verbose_name='Маркетплейс')),
+            ],
+            options={
+                'verbose_name': 'Запуск парсера',
+                'verbose_name_plural': 'Запуски парсеров',
+                'ordering': ['-started_at'],
+                'indexes': [models.Index(fields=['marketplace', '-started_at'], name='parsers_par_marketp_167b43_idx'), models.Index(fields=['status', '-started_at'], name='parsers_par_status_8142a4_idx')],
+            },
+        ),
+    ]
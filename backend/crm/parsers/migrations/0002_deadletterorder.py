@@ -0,0 +1,39 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0001_initial'),
+        ('parsers', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeadLetterOrder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('external_id', models.CharField(max_length=255, verbose_name='Внешний ID заказа')),
+                ('reason', models.CharField(choices=[('normalize_error', 'Ошибка нормализации'), ('missing_external_id', 'Нет внешнего ID'), ('product_not_found', 'Товар не найден в каталоге'), ('missing_product_id', 'Позиция без ID товара'), ('persist_error', 'Ошибка сохранения')], max_length=30, verbose_name='Причина')),
+                ('error', models.TextField(blank=True, verbose_name='Описание ошибки')),
+                ('raw_payload', models.JSONField(verbose_name='Ответ API')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Повторов')),
+                ('last_attempt_at', models.DateTimeField(blank=True, null=True, verbose_name='Последний повтор')),
+                ('resolved_at', models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='Обработан')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата обновления')),
+                ('marketplace', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dead_letter_orders', to='marketplace.marketplace', verbose_name='Маркетплейс')),
+                ('run', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='dead_letters', to='parsers.parserrun', verbose_name='Запуск парсера')),
+            ],
+            options={
+                'verbose_name': 'Необработанный заказ',
+                'verbose_name_plural': 'Необработанные заказы',
+                'ordering': ['-updated_at'],
+                'indexes': [models.Index(fields=['marketplace', 'reason', 'resolved_at'], name='parsers_dea_marketp_b637fc_idx')],
+                'constraints': [models.UniqueConstraint(fields=('marketplace', 'external_id', 'reason'), name='dead_letter_order_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:47
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0001_initial'),
+        ('parsers', '0002_deadletterorder'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WebhookEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_id', models.CharField(max_length=255, verbose_name='ID события')),
+                ('event_type', models.CharField(blank=True, max_length=100, verbose_name='Тип события')),
+                ('payload', models.JSONField(verbose_name='Тело уведомления')),
+                ('status', models.CharField(choices=[('pending', 'Ожидает'), ('processing', 'Обрабатывается'), ('done', 'Обработано'), ('failed', 'Ошибка')], default='pending', max_length=20, verbose_name='Статус')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Попыток')),
+                ('error', models.TextField(blank=True, verbose_name='Ошибка')),
+                ('received_at', models.DateTimeField(auto_now_add=True, verbose_name='Получено')),
+                ('available_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Доступно для обработки с')),
+                ('processed_at', models.DateTimeField(blank=True, null=True, verbose_name='Обработано')),
+                ('marketplace', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='webhook_events', to='marketplace.marketplace', verbose_name='Маркетплейс')),
+                ('run', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='webhook_events', to='parsers.parserrun', verbose_name='Запуск парсера')),
+            ],
+            options={
+                'verbose_name': 'Вебхук маркетплейса',
+                'verbose_name_plural': 'Вебхуки маркетплейсов',
+                'ordering': ['-received_at'],
+                'indexes': [models.Index(fields=['status', 'available_at'], name='parsers_web_status_3f00da_idx')],
+                'constraints': [models.UniqueConstraint(fields=('marketplace', 'event_id'), name='webhook_event_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0001_initial'),
+        ('parsers', '0003_webhookevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ParserLease',
+            fields=[
+                ('marketplace', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='parser_lease', serialize=False, to='marketplace.marketplace', verbose_name='Маркетплейс')),
+                ('holder', models.CharField(blank=True, max_length=255, verbose_name='Узел')),
+                ('acquired_at', models.DateTimeField(blank=True, null=True, verbose_name='Получена')),
+                ('renewed_at', models.DateTimeField(blank=True, null=True, verbose_name='Продлена')),
+                ('expires_at', models.DateTimeField(blank=True, null=True, verbose_name='Истекает')),
+            ],
+            options={
+                'verbose_name': 'Аренда маркетплейса',
+                'verbose_name_plural': 'Аренды маркетплейсов',
+            },
+        ),
+    ]
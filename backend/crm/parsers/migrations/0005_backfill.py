@@ -0,0 +1,59 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0001_initial'),
+        ('parsers', '0004_parserlease'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Backfill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date_from', models.DateTimeField(verbose_name='Начало периода')),
+                ('date_to', models.DateTimeField(verbose_name='Конец периода')),
+                ('chunk_hours', models.PositiveIntegerField(verbose_name='Длина отрезка, ч')),
+                ('status', models.CharField(choices=[('pending', 'Ожидает'), ('running', 'Выполняется'), ('done', 'Завершена'), ('failed', 'С ошибками')], default='pending', max_length=10, verbose_name='Статус')),
+                ('orders_processed', models.PositiveIntegerField(default=0, verbose_name='Обработано заказов')),
+                ('orders_failed', models.PositiveIntegerField(default=0, verbose_name='Заказов с ошибками')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создана')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Последний запуск')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Завершена')),
+                ('marketplace', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='backfills', to='marketplace.marketplace', verbose_name='Маркетплейс')),
+            ],
+            options={
+                'verbose_name': 'Выгрузка истории',
+                'verbose_name_plural': 'Выгрузки истории',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BackfillChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date_from', models.DateTimeField(verbose_name='Начало')),
+                ('date_to', models.DateTimeField(verbose_name='Конец')),
+                ('status', models.CharField(choices=[('pending', 'Ожидает'), ('done', 'Выгружен'), ('failed', 'Ошибка')], default='pending', max_length=10, verbose_name='Статус')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Попыток')),
+                ('orders_fetched', models.PositiveIntegerField(default=0, verbose_name='Получено заказов')),
+                ('orders_processed', models.PositiveIntegerField(default=0, verbose_name='Обработано заказов')),
+                ('orders_failed', models.PositiveIntegerField(default=0, verbose_name='Заказов с ошибками')),
+                ('error', models.TextField(blank=True, verbose_name='Ошибка')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Выгружен')),
+                ('backfill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='parsers.backfill', verbose_name='Выгрузка')),
+                ('run', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='backfill_chunks', to='parsers.parserrun', verbose_name='Запуск парсера')),
+            ],
+            options={
+                'verbose_name': 'Отрезок выгрузки истории',
+                'verbose_name_plural': 'Отрезки выгрузки истории',
+                'ordering': ['backfill', 'date_from'],
+                'constraints': [models.UniqueConstraint(fields=('backfill', 'date_from'), name='backfill_chunk_unique')],
+            },
+        ),
+    ]
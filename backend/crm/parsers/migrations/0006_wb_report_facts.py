@@ -0,0 +1,140 @@
+# Generated by Django 5.2.8 on 2026-10-19 14:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# На PostgreSQL таблицы фактов секционируются по месяцам (секции создаёт
+# parsers/reports.py); первичный и уникальный ключи секционированной
+# таблицы обязаны включать ключ секционирования
+POSTGRES_DDL = [
+    """
+    CREATE TABLE wb_sales_fact (
+        id bigserial NOT NULL,
+        marketplace_id bigint NOT NULL REFERENCES marketplaces (id) DEFERRABLE INITIALLY DEFERRED,
+        sale_id varchar(50) NOT NULL,
+        srid varchar(100) NOT NULL,
+        sale_date timestamp with time zone NOT NULL,
+        last_change_date timestamp with time zone NULL,
+        nm_id bigint NULL,
+        supplier_article varchar(100) NOT NULL,
+        barcode varchar(70) NOT NULL,
+        warehouse_name varchar(255) NOT NULL,
+        region_name varchar(255) NOT NULL,
+        total_price numeric(12, 2) NOT NULL,
+        price_with_disc numeric(12, 2) NOT NULL,
+        finished_price numeric(12, 2) NOT NULL,
+        for_pay numeric(12, 2) NOT NULL,
+        is_return boolean NOT NULL,
+        PRIMARY KEY (id, sale_date),
+        CONSTRAINT wb_sales_fact_unique UNIQUE (marketplace_id, sale_id, sale_date)
+    ) PARTITION BY RANGE (sale_date)
+    """,
+    "CREATE INDEX wb_sales_fact_nm_idx ON wb_sales_fact (marketplace_id, nm_id, sale_date)",
+    """
+    CREATE TABLE wb_stock_fact (
+        id bigserial NOT NULL,
+        marketplace_id bigint NOT NULL REFERENCES marketplaces (id) DEFERRABLE INITIALLY DEFERRED,
+        snapshot_date date NOT NULL,
+        last_change_date timestamp with time zone NULL,
+        nm_id bigint NULL,
+        supplier_article varchar(100) NOT NULL,
+        barcode varchar(70) NOT NULL,
+        warehouse_name varchar(255) NOT NULL,
+        quantity integer NOT NULL,
+        in_way_to_client integer NOT NULL,
+        in_way_from_client integer NOT NULL,
+        quantity_full integer NOT NULL,
+        price numeric(12, 2) NOT NULL,
+        discount integer NOT NULL,
+        PRIMARY KEY (id, snapshot_date),
+        CONSTRAINT wb_stock_fact_unique UNIQUE (marketplace_id, snapshot_date, barcode, warehouse_name)
+    ) PARTITION BY RANGE (snapshot_date)
+    """,
+    "CREATE INDEX wb_stock_fact_nm_idx ON wb_stock_fact (marketplace_id, nm_id, snapshot_date)",
+]
+
+FACT_MODELS = ['WBSaleFact', 'WBStockFact']
+
+
+def create_fact_tables(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for statement in POSTGRES_DDL:
+            schema_editor.execute(statement)
+        return
+    for model_name in FACT_MODELS:
+        schema_editor.create_model(apps.get_model('parsers', model_name))
+
+
+def drop_fact_tables(apps, schema_editor):
+    for model_name in FACT_MODELS:
+        schema_editor.delete_model(apps.get_model('parsers', model_name))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0002_marketplaceproduct_external_sku_index'),
+        ('parsers', '0005_backfill'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='WBSaleFact',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('sale_id', models.CharField(max_length=50, verbose_name='ID продажи')),
+                        ('srid', models.CharField(blank=True, max_length=100, verbose_name='ID заказа')),
+                        ('sale_date', models.DateTimeField(verbose_name='Дата продажи')),
+                        ('last_change_date', models.DateTimeField(blank=True, null=True, verbose_name='Дата изменения')),
+                        ('nm_id', models.BigIntegerField(blank=True, null=True, verbose_name='Артикул WB')),
+                        ('supplier_article', models.CharField(blank=True, max_length=100, verbose_name='Артикул продавца')),
+                        ('barcode', models.CharField(blank=True, max_length=70, verbose_name='Баркод')),
+                        ('warehouse_name', models.CharField(blank=True, max_length=255, verbose_name='Склад')),
+                        ('region_name', models.CharField(blank=True, max_length=255, verbose_name='Регион')),
+                        ('total_price', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Цена до скидок')),
+                        ('price_with_disc', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Цена со скидкой продавца')),
+                        ('finished_price', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Цена для покупателя')),
+                        ('for_pay', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='К перечислению продавцу')),
+                        ('is_return', models.BooleanField(default=False, verbose_name='Возврат')),
+                        ('marketplace', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='marketplace.marketplace', verbose_name='Маркетплейс')),
+                    ],
+                    options={
+                        'verbose_name': 'Продажа WB',
+                        'verbose_name_plural': 'Продажи WB',
+                        'db_table': 'wb_sales_fact',
+                        'indexes': [models.Index(fields=['marketplace', 'nm_id', 'sale_date'], name='wb_sales_fact_nm_idx')],
+                        'constraints': [models.UniqueConstraint(fields=('marketplace', 'sale_id', 'sale_date'), name='wb_sales_fact_unique')],
+                    },
+                ),
+                migrations.CreateModel(
+                    name='WBStockFact',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('snapshot_date', models.DateField(verbose_name='Дата снимка')),
+                        ('last_change_date', models.DateTimeField(blank=True, null=True, verbose_name='Дата изменения')),
+                        ('nm_id', models.BigIntegerField(blank=True, null=True, verbose_name='Артикул WB')),
+                        ('supplier_article', models.CharField(blank=True, max_length=100, verbose_name='Артикул продавца')),
+                        ('barcode', models.CharField(blank=True, max_length=70, verbose_name='Баркод')),
+                        ('warehouse_name', models.CharField(blank=True, max_length=255, verbose_name='Склад')),
+                        ('quantity', models.IntegerField(default=0, verbose_name='Доступно к продаже')),
+                        ('in_way_to_client', models.IntegerField(default=0, verbose_name='В пути к клиенту')),
+                        ('in_way_from_client', models.IntegerField(default=0, verbose_name='В пути от клиента')),
+                        ('quantity_full', models.IntegerField(default=0, verbose_name='Полный остаток')),
+                        ('price', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Цена')),
+                        ('discount', models.IntegerField(default=0, verbose_name='Скидка, %')),
+                        ('marketplace', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='marketplace.marketplace', verbose_name='Маркетплейс')),
+                    ],
+                    options={
+                        'verbose_name': 'Остаток WB',
+                        'verbose_name_plural': 'Остатки WB',
+                        'db_table': 'wb_stock_fact',
+                        'indexes': [models.Index(fields=['marketplace', 'nm_id', 'snapshot_date'], name='wb_stock_fact_nm_idx')],
+                        'constraints': [models.UniqueConstraint(fields=('marketplace', 'snapshot_date', 'barcode', 'warehouse_name'), name='wb_stock_fact_unique')],
+                    },
+                ),
+            ],
+        ),
+        migrations.RunPython(create_fact_tables, drop_fact_tables),
+    ]
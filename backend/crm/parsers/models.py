@@ -0,0 +1,385 @@
+from django.db import models
+from django.utils import timezone
+
+
+class ParserRun(models.Model):
+    """
+    Один запуск парсера маркетплейса.
+
+    Хранит длительность этапов (получение, нормализация, сохранение),
+    статистику запросов к API и заказы, которые не удалось обработать, -
+    по истории запусков видно, когда маркетплейс начинает отвечать медленнее.
+    """
+
+    class Status(models.TextChoices):
+        RUNNING = 'running', 'Выполняется'
+        SUCCESS = 'success', 'Успешно'
+        PARTIAL = 'partial', 'С ошибками'
+        FAILED = 'failed', 'Ошибка'
+
+    marketplace = models.ForeignKey(
+        'marketplace.Marketplace',
+        on_delete=models.CASCADE,
+        related_name='parser_runs',
+        verbose_name='Маркетплейс'
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=Status.choices,
+        default=Status.RUNNING,
+        verbose_name='Статус'
+    )
+    params = models.JSONField(default=dict, blank=True, verbose_name='Параметры запуска')
+
+    started_at = models.DateTimeField(verbose_name='Начало')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='Окончание')
+    duration = models.FloatField(default=0, verbose_name='Длительность, сек')
+    fetch_seconds = models.FloatField(default=0, verbose_name='Получение из API, сек')
+    normalize_seconds = models.FloatField(default=0, verbose_name='Нормализация, сек')
+    persist_seconds = models.FloatField(default=0, verbose_name='Сохранение, сек')
+
+    api_requests = models.PositiveIntegerField(default=0, verbose_name='Запросов к API')
+    api_retries = models.PositiveIntegerField(default=0, verbose_name='Повторов запросов')
+    api_errors = models.PositiveIntegerField(default=0, verbose_name='Ошибок API')
+    api_latency = models.JSONField(default=dict, blank=True, verbose_name='Задержка API')
+
+    orders_fetched = models.PositiveIntegerField(default=0, verbose_name='Получено заказов')
+    orders_processed = models.PositiveIntegerField(default=0, verbose_name='Обработано заказов')
+    orders_failed = models.PositiveIntegerField(default=0, verbose_name='Заказов с ошибками')
+    rows_per_second = models.FloatField(default=0, verbose_name='Заказов в секунду')
+
+    failed_orders = models.JSONField(default=list, blank=True, verbose_name='Заказы с ошибками')
+    error = models.TextField(blank=True, verbose_name='Ошибка')
+
+    class Meta:
+        verbose_name = 'Запуск парсера'
+        verbose_name_plural = 'Запуски парсеров'
+        ordering = ['-started_at']
+        indexes = [
+            models.Index(fields=['marketplace', '-started_at']),
+            models.Index(fields=['status', '-started_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.marketplace_id}: {self.get_status_display()} {self.started_at:%d.%m.%Y %H:%M}"
+
+
+class DeadLetterOrder(models.Model):
+    """
+    Заказ маркетплейса, который не удалось обработать.
+
+    Хранит исходный ответ API и причину. После исправления каталога или
+    нормализатора replay_dead_letters повторно прогоняет только эти заказы
+    через обычный путь нормализации и сохранения, без выгрузки всего окна.
+    На (маркетплейс, заказ, причину) приходится одна запись: повторная ошибка
+    обновляет её, успешный повтор проставляет resolved_at.
+    """
+
+    class Reason(models.TextChoices):
+        NORMALIZE_ERROR = 'normalize_error', 'Ошибка нормализации'
+        MISSING_EXTERNAL_ID = 'missing_external_id', 'Нет внешнего ID'
+        PRODUCT_NOT_FOUND = 'product_not_found', 'Товар не найден в каталоге'
+        MISSING_PRODUCT_ID = 'missing_product_id', 'Позиция без ID товара'
+        PERSIST_ERROR = 'persist_error', 'Ошибка сохранения'
+
+    marketplace = models.ForeignKey(
+        'marketplace.Marketplace',
+        on_delete=models.CASCADE,
+        related_name='dead_letter_orders',
+        verbose_name='Маркетплейс'
+    )
+    external_id = models.CharField(max_length=255, verbose_name='Внешний ID заказа')
+    reason = models.CharField(max_length=30, choices=Reason.choices, verbose_name='Причина')
+    error = models.TextField(blank=True, verbose_name='Описание ошибки')
+    raw_payload = models.JSONField(verbose_name='Ответ API')
+    run = models.ForeignKey(
+        ParserRun,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='dead_letters',
+        verbose_name='Запуск парсера'
+    )
+
+    attempts = models.PositiveIntegerField(default=0, verbose_name='Повторов')
+    last_attempt_at = models.DateTimeField(null=True, blank=True, verbose_name='Последний повтор')
+    resolved_at = models.DateTimeField(null=True, blank=True, db_index=True, verbose_name='Обработан')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Дата обновления')
+
+    class Meta:
+        verbose_name = 'Необработанный заказ'
+        verbose_name_plural = 'Необработанные заказы'
+        ordering = ['-updated_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['marketplace', 'external_id', 'reason'],
+                name='dead_letter_order_unique'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['marketplace', 'reason', 'resolved_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.external_id}: {self.get_reason_display()}"
+
+
+class WebhookEvent(models.Model):
+    """
+    Входящее уведомление маркетплейса о заказе.
+
+    Приёмник вебхуков только проверяет подпись и сохраняет событие, а
+    process_webhooks забирает необработанные события пачками и прогоняет
+    их через нормализацию и сохранение парсера.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Ожидает'
+        PROCESSING = 'processing', 'Обрабатывается'
+        DONE = 'done', 'Обработано'
+        FAILED = 'failed', 'Ошибка'
+
+    marketplace = models.ForeignKey(
+        'marketplace.Marketplace',
+        on_delete=models.CASCADE,
+        related_name='webhook_events',
+        verbose_name='Маркетплейс'
+    )
+    event_id = models.CharField(max_length=255, verbose_name='ID события')
+    event_type = models.CharField(max_length=100, blank=True, verbose_name='Тип события')
+    payload = models.JSONField(verbose_name='Тело уведомления')
+    status = models.CharField(
+        max_length=20, choices=Status.choices, default=Status.PENDING, verbose_name='Статус'
+    )
+    attempts = models.PositiveIntegerField(default=0, verbose_name='Попыток')
+    error = models.TextField(blank=True, verbose_name='Ошибка')
+    run = models.ForeignKey(
+        ParserRun,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='webhook_events',
+        verbose_name='Запуск парсера'
+    )
+
+    received_at = models.DateTimeField(auto_now_add=True, verbose_name='Получено')
+    available_at = models.DateTimeField(default=timezone.now, verbose_name='Доступно для обработки с')
+    processed_at = models.DateTimeField(null=True, blank=True, verbose_name='Обработано')
+
+    class Meta:
+        verbose_name = 'Вебхук маркетплейса'
+        verbose_name_plural = 'Вебхуки маркетплейсов'
+        ordering = ['-received_at']
+        constraints = [
+            models.UniqueConstraint(fields=['marketplace', 'event_id'], name='webhook_event_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'available_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.marketplace_id}: {self.event_type or self.event_id}"
+
+
+class ParserLease(models.Model):
+    """
+    Аренда маркетплейса узлом, который сейчас его выгружает.
+
+    Одна запись на маркетплейс. Узел продлевает аренду, пока работает; по
+    истечении expires_at её может забрать другой узел. На PostgreSQL
+    аренда дополнительно защищена advisory lock (см. parsers/locks.py).
+    """
+    marketplace = models.OneToOneField(
+        'marketplace.Marketplace',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='parser_lease',
+        verbose_name='Маркетплейс'
+    )
+    holder = models.CharField(max_length=255, blank=True, verbose_name='Узел')
+    acquired_at = models.DateTimeField(null=True, blank=True, verbose_name='Получена')
+    renewed_at = models.DateTimeField(null=True, blank=True, verbose_name='Продлена')
+    expires_at = models.DateTimeField(null=True, blank=True, verbose_name='Истекает')
+
+    class Meta:
+        verbose_name = 'Аренда маркетплейса'
+        verbose_name_plural = 'Аренды маркетплейсов'
+
+    def __str__(self):
+        return f"{self.marketplace_id}: {self.holder or 'свободен'}"
+
+
+class Backfill(models.Model):
+    """
+    Выгрузка истории заказов маркетплейса за период.
+
+    Период делится на отрезки (BackfillChunk) по размеру, который API
+    отдаёт без потерь; каждый выгруженный отрезок фиксируется, и прерванная
+    выгрузка продолжается с невыгруженных отрезков (команда backfill).
+    """
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Ожидает'
+        RUNNING = 'running', 'Выполняется'
+        DONE = 'done', 'Завершена'
+        FAILED = 'failed', 'С ошибками'
+
+    marketplace = models.ForeignKey(
+        'marketplace.Marketplace',
+        on_delete=models.CASCADE,
+        related_name='backfills',
+        verbose_name='Маркетплейс'
+    )
+    date_from = models.DateTimeField(verbose_name='Начало периода')
+    date_to = models.DateTimeField(verbose_name='Конец периода')
+    chunk_hours = models.PositiveIntegerField(verbose_name='Длина отрезка, ч')
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.PENDING, verbose_name='Статус'
+    )
+    orders_processed = models.PositiveIntegerField(default=0, verbose_name='Обработано заказов')
+    orders_failed = models.PositiveIntegerField(default=0, verbose_name='Заказов с ошибками')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Создана')
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name='Последний запуск')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='Завершена')
+
+    class Meta:
+        verbose_name = 'Выгрузка истории'
+        verbose_name_plural = 'Выгрузки истории'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.marketplace_id}: {self.date_from:%Y-%m-%d}..{self.date_to:%Y-%m-%d}"
+
+
+class BackfillChunk(models.Model):
+    """Отрезок выгрузки истории [date_from, date_to) - единица повтора при продолжении"""
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Ожидает'
+        DONE = 'done', 'Выгружен'
+        FAILED = 'failed', 'Ошибка'
+
+    backfill = models.ForeignKey(
+        Backfill,
+        on_delete=models.CASCADE,
+        related_name='chunks',
+        verbose_name='Выгрузка'
+    )
+    date_from = models.DateTimeField(verbose_name='Начало')
+    date_to = models.DateTimeField(verbose_name='Конец')
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.PENDING, verbose_name='Статус'
+    )
+    attempts = models.PositiveIntegerField(default=0, verbose_name='Попыток')
+    orders_fetched = models.PositiveIntegerField(default=0, verbose_name='Получено заказов')
+    orders_processed = models.PositiveIntegerField(default=0, verbose_name='Обработано заказов')
+    orders_failed = models.PositiveIntegerField(default=0, verbose_name='Заказов с ошибками')
+    run = models.ForeignKey(
+        ParserRun,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='backfill_chunks',
+        verbose_name='Запуск парсера'
+    )
+    error = models.TextField(blank=True, verbose_name='Ошибка')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='Выгружен')
+
+    class Meta:
+        verbose_name = 'Отрезок выгрузки истории'
+        verbose_name_plural = 'Отрезки выгрузки истории'
+        ordering = ['backfill', 'date_from']
+        constraints = [
+            models.UniqueConstraint(fields=['backfill', 'date_from'], name='backfill_chunk_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.date_from:%Y-%m-%d %H:%M}..{self.date_to:%Y-%m-%d %H:%M}"
+
+
+class WBSaleFact(models.Model):
+    """
+    Продажа или возврат из отчёта о продажах WB (Statistics API).
+
+    На PostgreSQL таблица секционирована по месяцам sale_date (секции
+    создаёт загрузка, parsers/reports.py) - запросы за период читают только
+    свои секции, а многолетняя история не замедляет свежие выборки.
+    """
+    marketplace = models.ForeignKey(
+        'marketplace.Marketplace',
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Маркетплейс'
+    )
+    sale_id = models.CharField(max_length=50, verbose_name='ID продажи')  # S... - продажа, R... - возврат
+    srid = models.CharField(max_length=100, blank=True, verbose_name='ID заказа')
+    sale_date = models.DateTimeField(verbose_name='Дата продажи')
+    last_change_date = models.DateTimeField(null=True, blank=True, verbose_name='Дата изменения')
+    nm_id = models.BigIntegerField(null=True, blank=True, verbose_name='Артикул WB')
+    supplier_article = models.CharField(max_length=100, blank=True, verbose_name='Артикул продавца')
+    barcode = models.CharField(max_length=70, blank=True, verbose_name='Баркод')
+    warehouse_name = models.CharField(max_length=255, blank=True, verbose_name='Склад')
+    region_name = models.CharField(max_length=255, blank=True, verbose_name='Регион')
+    total_price = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name='Цена до скидок')
+    price_with_disc = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name='Цена со скидкой продавца')
+    finished_price = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name='Цена для покупателя')
+    for_pay = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name='К перечислению продавцу')
+    is_return = models.BooleanField(default=False, verbose_name='Возврат')
+
+    class Meta:
+        verbose_name = 'Продажа WB'
+        verbose_name_plural = 'Продажи WB'
+        db_table = 'wb_sales_fact'
+        constraints = [
+            models.UniqueConstraint(fields=['marketplace', 'sale_id', 'sale_date'], name='wb_sales_fact_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['marketplace', 'nm_id', 'sale_date'], name='wb_sales_fact_nm_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.sale_id} {self.sale_date:%Y-%m-%d}"
+
+
+class WBStockFact(models.Model):
+    """
+    Остаток товара на складе WB на дату (снимок отчёта об остатках).
+
+    Одна строка на дату, баркод и склад; на PostgreSQL таблица
+    секционирована по месяцам snapshot_date, как WBSaleFact.
+    """
+    marketplace = models.ForeignKey(
+        'marketplace.Marketplace',
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Маркетплейс'
+    )
+    snapshot_date = models.DateField(verbose_name='Дата снимка')
+    last_change_date = models.DateTimeField(null=True, blank=True, verbose_name='Дата изменения')
+    nm_id = models.BigIntegerField(null=True, blank=True, verbose_name='Артикул WB')
+    supplier_article = models.CharField(max_length=100, blank=True, verbose_name='Артикул продавца')
+    barcode = models.CharField(max_length=70, blank=True, verbose_name='Баркод')
+    warehouse_name = models.CharField(max_length=255, blank=True, verbose_name='Склад')
+    quantity = models.IntegerField(default=0, verbose_name='Доступно к продаже')
+    in_way_to_client = models.IntegerField(default=0, verbose_name='В пути к клиенту')
+    in_way_from_client = models.IntegerField(default=0, verbose_name='В пути от клиента')
+    quantity_full = models.IntegerField(default=0, verbose_name='Полный остаток')
+    price = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name='Цена')
+    discount = models.IntegerField(default=0, verbose_name='Скидка, %')
+
+    class Meta:
+        verbose_name = 'Остаток WB'
+        verbose_name_plural = 'Остатки WB'
+        db_table = 'wb_stock_fact'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['marketplace', 'snapshot_date', 'barcode', 'warehouse_name'], name='wb_stock_fact_unique'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['marketplace', 'nm_id', 'snapshot_date'], name='wb_stock_fact_nm_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.barcode} {self.warehouse_name} {self.snapshot_date:%Y-%m-%d}"
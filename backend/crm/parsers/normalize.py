@@ -0,0 +1,85 @@
+# parsers/normalize.py
+"""
+Справочники и разбор дат для нормализации заказов.
+
+Нормализация вызывается на каждый заказ каждой выгрузки, поэтому всё, что
+не зависит от заказа, собрано здесь один раз при загрузке модуля:
+соответствие статусов маркетплейсов внутренним, часовые пояса и разбор
+дат фиксированного формата без strptime.
+"""
+import datetime
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+UTC = datetime.timezone.utc
+# Яндекс.Маркет отдаёт время заказов по Москве
+MOSCOW_TZ = ZoneInfo('Europe/Moscow')
+
+DEFAULT_STATUS = 'new'
+
+WB_STATUSES = {
+    'new': 'new',                   # Новый
+    'approve': 'processing',        # Принят
+    'confirm': 'processing',        # Подтвержден
+    'complete': 'delivered',        # Выполнен
+    'cancel': 'cancelled',          # Отменен
+    'clientArbitrage': 'cancelled', # Спор с клиентом
+    'delivering': 'shipped',        # Доставляется
+}
+
+OZON_STATUSES = {
+    'awaiting_registration': 'new',
+    'acceptance_in_progress': 'processing',
+    'awaiting_approve': 'processing',
+    'awaiting_packaging': 'processing',
+    'awaiting_deliver': 'shipped',
+    'delivering': 'shipped',
+    'delivered': 'delivered',
+    'cancelled': 'cancelled',
+}
+
+YANDEX_STATUSES = {
+    'PLACING': 'new',
+    'PROCESSING': 'processing',
+    'DELIVERY': 'shipped',
+    'PICKUP': 'shipped',
+    'DELIVERED': 'delivered',
+    'CANCELLED': 'cancelled',
+    'UNPAID': 'new',
+}
+
+
+def parse_iso_datetime(value: str) -> Optional[datetime.datetime]:
+    """
+    Дата ISO 8601 (WB, Ozon); без часового пояса - UTC.
+
+    Бросает ValueError, если строка не в формате ISO.
+    """
+    if not value:
+        return None
+    if value[-1] == 'Z':
+        value = value[:-1] + '+00:00'
+    parsed = datetime.datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=UTC)
+    return parsed
+
+
+def parse_moscow_datetime(value: str) -> Optional[datetime.datetime]:
+    """
+    Дата Яндекс.Маркета 'ДД-ММ-ГГГГ ЧЧ:ММ:СС' по Москве - в UTC.
+
+    Формат фиксированный, поэтому поля берутся срезами строки: это в
+    несколько раз быстрее strptime. Бросает ValueError на строке другого
+    формата.
+    """
+    if not value:
+        return None
+    if len(value) != 19 or value[2] != '-' or value[5] != '-' or value[10] != ' ' or value[13] != ':' or value[16] != ':':
+        raise ValueError(f"time data {value!r} does not match format '%d-%m-%Y %H:%M:%S'")
+    local = datetime.datetime(
+        int(value[6:10]), int(value[3:5]), int(value[0:2]),
+        int(value[11:13]), int(value[14:16]), int(value[17:19]),
+        tzinfo=MOSCOW_TZ,
+    )
+    return local.astimezone(UTC)
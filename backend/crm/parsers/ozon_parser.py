@@ -1,6 +1,7 @@
 from .base import BaseParser
 from api.ozon_api import OzonAPIClient
-from typing import List, Dict, Any
+from .normalize import DEFAULT_STATUS, OZON_STATUSES, parse_iso_datetime
+from typing import Iterable, List, Dict, Any
 import datetime
 
 class OzonParser(BaseParser):
@@ -10,7 +11,8 @@ class OzonParser(BaseParser):
         super().__init__(marketplace_id=marketplace_id, marketplace_code=marketplace_code)
         self.api_client = OzonAPIClient(
             client_id=self.credentials['client_id'],
-            api_key=self.credentials['api_key']
+            api_key=self.credentials['api_key'],
+            base_url=self.credentials.get('api_base_url')
         )
     
     async def fetch_orders(self, hours_back: int = 720) -> List[Dict[str, Any]]:
@@ -20,32 +22,51 @@ class OzonParser(BaseParser):
         async with self.api_client:
             return await self.api_client.get_orders(since=since)
     
+    async def fetch_window(self, date_from: datetime.datetime, date_to: datetime.datetime) -> List[Dict[str, Any]]:
+        async with self.api_client:
+            return await self.api_client.get_orders(since=date_from, to=date_to)
+    
+    def raw_created_at(self, raw_order: Dict[str, Any]) -> datetime.datetime:
+        return parse_iso_datetime(raw_order.get('in_process_at'))
+    
+    async def fetch_webhook_orders(self, payloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Push-уведомления Ozon содержат только номер отправления - запрашиваем его целиком"""
+        async with self.api_client:
+            return await self._fetch_each(
+                filter(None, map(self.webhook_order_key, payloads)),
+                self.api_client.get_posting
+            )
+    
+    def webhook_order_key(self, payload: Dict[str, Any]):
+        return payload.get('posting_number')
+    
     def normalize_order_data(self, raw_order: Dict[str, Any]) -> Dict[str, Any]:
         """Нормализация данных Ozon к единому формату"""
-        total = sum(float(p.get('price', 0)) * p.get('quantity', 1) for p in raw_order.get('products', []))
-        return {
-            'external_id': raw_order.get('order_id'),
-            'number': raw_order.get('order_number'),
-            'posting_number': raw_order.get('posting_number'),
-            'status': self.map_status(raw_order.get('status')),
-            'created_at_marketplace': raw_order.get('in_process_at'),
-            'total_amount': total,
-            'items': self.normalize_items(raw_order.get('products', []))
-        }
+        return self.normalize_many((raw_order,))[0]
+    
+    def normalize_many(self, raw_orders: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Нормализация пачки заказов; справочники и функции берутся в локальные переменные один раз"""
+        statuses = OZON_STATUSES
+        normalize_items = self.normalize_items
+        normalized = []
+        append = normalized.append
+        for raw_order in raw_orders:
+            get = raw_order.get
+            products = get('products', [])
+            append({
+                'external_id': get('order_id'),
+                'number': get('order_number'),
+                'posting_number': get('posting_number'),
+                'status': statuses.get(get('status'), DEFAULT_STATUS),
+                'created_at_marketplace': get('in_process_at'),
+                'total_amount': sum(float(p.get('price', 0)) * p.get('quantity', 1) for p in products),
+                'items': normalize_items(products),
+            })
+        return normalized
     
     def map_status(self, ozon_status: str) -> str:
         """Маппинг статусов Ozon на внутренние"""
-        status_map = {
-            'awaiting_registration': 'new',
-            'acceptance_in_progress': 'processing',
-            'awaiting_approve': 'processing',
-            'awaiting_packaging': 'processing',
-            'awaiting_deliver': 'shipped',
-            'delivering': 'shipped',
-            'delivered': 'delivered',
-            'cancelled': 'cancelled'
-        }
-        return status_map.get(ozon_status, 'new')
+        return OZON_STATUSES.get(ozon_status, DEFAULT_STATUS)
     
     def normalize_items(self, raw_items: List[Dict]) -> List[Dict]:
         """Нормализация товаров"""
@@ -54,4 +75,4 @@ class OzonParser(BaseParser):
             'offer_id': item.get('offer_id'),
             'quantity': item.get('quantity', 1),
             'price': item.get('price', '0')
-        } for item in raw_items]
\ No newline at end of file
+        } for item in raw_items]
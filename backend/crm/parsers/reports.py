@@ -0,0 +1,241 @@
+# parsers/reports.py
+"""
+Загрузка отчётов WB о продажах и остатках в таблицы фактов.
+
+Отчёт читается потоком (WildberriesParser.stream_sales_report /
+stream_stocks_report) и пишется пачками по BATCH_SIZE строк: на
+PostgreSQL пачка загружается COPY во временную таблицу и переносится в
+таблицу фактов одним INSERT ... ON CONFLICT DO UPDATE, на других СУБД -
+bulk_create с обновлением при конфликте. Повторная загрузка того же
+периода обновляет строки, а не дублирует их.
+
+Таблицы фактов на PostgreSQL секционированы по месяцам
+(parsers/migrations/0006_wb_report_facts.py); секции для месяцев пачки
+создаются перед загрузкой.
+"""
+import io
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+from asgiref.sync import async_to_sync, sync_to_async
+from django.db import DatabaseError, connection, models, transaction
+from django.utils import timezone
+from .base import achunked
+from .manager import create_parser
+from .models import WBSaleFact, WBStockFact
+from .normalize import UTC
+
+logger = logging.getLogger(__name__)
+
+# Отчёт об остатках с этой даты отдаёт все текущие остатки
+WB_STOCKS_EPOCH = datetime(2019, 6, 20)
+
+
+@dataclass(frozen=True)
+class FactTable:
+    model: Any
+    columns: Tuple[str, ...]
+    unique: Tuple[str, ...]
+    # Колонка секционирования (по месяцам)
+    partition_column: str
+
+    @property
+    def name(self) -> str:
+        return self.model._meta.db_table
+
+
+SALES = FactTable(
+    WBSaleFact,
+    columns=(
+        'marketplace_id', 'sale_id', 'srid', 'sale_date', 'last_change_date', 'nm_id', 'supplier_article',
+        'barcode', 'warehouse_name', 'region_name', 'total_price', 'price_with_disc', 'finished_price',
+        'for_pay', 'is_return',
+    ),
+    unique=('marketplace_id', 'sale_id', 'sale_date'),
+    partition_column='sale_date',
+)
+
+STOCKS = FactTable(
+    WBStockFact,
+    columns=(
+        'marketplace_id', 'snapshot_date', 'last_change_date', 'nm_id', 'supplier_article', 'barcode',
+        'warehouse_name', 'quantity', 'in_way_to_client', 'in_way_from_client', 'quantity_full', 'price',
+        'discount',
+    ),
+    unique=('marketplace_id', 'snapshot_date', 'barcode', 'warehouse_name'),
+    partition_column='snapshot_date',
+)
+
+# Секции, созданные этим процессом (или уже существовавшие)
+_known_partitions: Set[Tuple[str, date]] = set()
+
+
+def _month_start(value) -> date:
+    if isinstance(value, datetime):
+        value = value.astimezone(UTC).date()
+    return value.replace(day=1)
+
+
+def _next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def _partition_bound(table: FactTable, month: date) -> str:
+    if isinstance(table.model._meta.get_field(table.partition_column), models.DateTimeField):
+        return f"{month:%Y-%m-%d} 00:00:00+00:00"
+    return f"{month:%Y-%m-%d}"
+
+
+def ensure_partitions(table: FactTable, months: Set[date]):
+    """Создаёт месячные секции таблицы фактов (PostgreSQL)"""
+    for month in sorted(months):
+        if (table.name, month) in _known_partitions:
+            continue
+        partition = f"{table.name}_{month:%Y%m}"
+        try:
+            # Секцию может одновременно создавать другой процесс - ошибка не должна откатить пачку
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(
+                    f"CREATE TABLE IF NOT EXISTS {partition} PARTITION OF {table.name} "
+                    f"FOR VALUES FROM ('{_partition_bound(table, month)}') "
+                    f"TO ('{_partition_bound(table, _next_month(month))}')"
+                )
+        except DatabaseError as e:
+            logger.info(f"Секция {partition} не создана: {str(e)}")
+            continue
+        transaction.on_commit(lambda key=(table.name, month): _known_partitions.add(key))
+
+
+def _copy_value(value) -> str:
+    """Значение в текстовом формате COPY"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return (
+        str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+    )
+
+
+def _copy(cursor, sql: str, data: str):
+    if hasattr(cursor.cursor, 'copy_expert'):
+        # psycopg2
+        cursor.copy_expert(sql, io.StringIO(data))
+    else:
+        # psycopg 3
+        with cursor.copy(sql) as copy:
+            copy.write(data)
+
+
+def _copy_upsert(table: FactTable, rows: List[Sequence]):
+    partition_index = table.columns.index(table.partition_column)
+    columns = ', '.join(table.columns)
+    unique = ', '.join(table.unique)
+    updates = ', '.join(f"{column} = EXCLUDED.{column}" for column in table.columns if column not in table.unique)
+    data = ''.join('\t'.join(map(_copy_value, row)) + '\n' for row in rows)
+
+    with transaction.atomic():
+        ensure_partitions(table, {_month_start(row[partition_index]) for row in rows})
+        with connection.cursor() as cursor:
+            # IF NOT EXISTS и TRUNCATE: внутри внешней транзакции таблица живёт до её конца
+            cursor.execute(
+                f"CREATE TEMP TABLE IF NOT EXISTS {table.name}_staging ON COMMIT DROP AS "
+                f"SELECT {columns} FROM {table.name} WITH NO DATA"
+            )
+            cursor.execute(f"TRUNCATE {table.name}_staging")
+            _copy(cursor, f"COPY {table.name}_staging ({columns}) FROM STDIN", data)
+            cursor.execute(
+                f"INSERT INTO {table.name} ({columns}) SELECT {columns} FROM {table.name}_staging "
+                f"ON CONFLICT ({unique}) DO UPDATE SET {updates}"
+            )
+
+
+def _bulk_upsert(table: FactTable, rows: List[Sequence]):
+    table.model.objects.bulk_create(
+        [table.model(**dict(zip(table.columns, row))) for row in rows],
+        update_conflicts=True,
+        unique_fields=list(table.unique),
+        update_fields=[column for column in table.columns if column not in table.unique],
+        batch_size=1000,
+    )
+
+
+def write_facts(table: FactTable, rows: List[Sequence]) -> int:
+    """Записывает строки в таблицу фактов; повторы ключа в пачке схлопываются (остаётся последняя)"""
+    key_indexes = [table.columns.index(column) for column in table.unique]
+    rows = list({tuple(row[index] for index in key_indexes): row for row in rows}.values())
+    if not rows:
+        return 0
+    if connection.vendor == 'postgresql':
+        _copy_upsert(table, rows)
+    else:
+        _bulk_upsert(table, rows)
+    return len(rows)
+
+
+class WildberriesReportLoader:
+    """Загрузка отчётов о продажах и остатках одного кабинета WB"""
+
+    BATCH_SIZE = 10_000
+
+    def __init__(self, marketplace_id):
+        self.parser = create_parser(marketplace_id)
+        if self.parser.marketplace.code != 'wildberries':
+            raise ValueError(f"Отчёты загружаются только для Wildberries, а не {self.parser.marketplace.code}")
+        self.marketplace_id = self.parser.marketplace.pk
+
+    def load_sales(self, date_from: datetime) -> int:
+        """Продажи и возвраты, изменённые с date_from; возвращает число записанных строк"""
+        return async_to_sync(self._load)(self.parser.stream_sales_report(date_from), SALES, self._sale_row)
+
+    def load_stocks(self, snapshot_date: Optional[date] = None) -> int:
+        """Снимок всех текущих остатков на дату snapshot_date (по умолчанию сегодня)"""
+        snapshot_date = snapshot_date or timezone.localdate()
+        return async_to_sync(self._load)(
+            self.parser.stream_stocks_report(WB_STOCKS_EPOCH), STOCKS,
+            lambda raw: self._stock_row(raw, snapshot_date)
+        )
+
+    async def _load(self, raw_rows, table: FactTable, convert) -> int:
+        written = 0
+        async for batch in achunked(raw_rows, self.BATCH_SIZE):
+            rows = [row for row in map(convert, batch) if row is not None]
+            written += await sync_to_async(write_facts)(table, rows)
+        logger.info(f"Отчёт WB {table.name}: записано строк {written}")
+        return written
+
+    def _sale_row(self, raw: Dict[str, Any]) -> Optional[tuple]:
+        sale_id = raw.get('saleID')
+        sale_date = self.parser.parse_wb_date(raw.get('date'))
+        if not sale_id or sale_date is None:
+            return None
+        return (
+            self.marketplace_id, sale_id, raw.get('srid') or '', sale_date,
+            self.parser.parse_wb_date(raw.get('lastChangeDate')), raw.get('nmId'),
+            raw.get('supplierArticle') or '', raw.get('barcode') or '', raw.get('warehouseName') or '',
+            raw.get('regionName') or '', raw.get('totalPrice') or 0, raw.get('priceWithDisc') or 0,
+            raw.get('finishedPrice') or 0, raw.get('forPay') or 0, sale_id.startswith('R'),
+        )
+
+    def _stock_row(self, raw: Dict[str, Any], snapshot_date: date) -> tuple:
+        return (
+            self.marketplace_id, snapshot_date, self.parser.parse_wb_date(raw.get('lastChangeDate')),
+            raw.get('nmId'), raw.get('supplierArticle') or '', raw.get('barcode') or '',
+            raw.get('warehouseName') or '', raw.get('quantity') or 0, raw.get('inWayToClient') or 0,
+            raw.get('inWayFromClient') or 0, raw.get('quantityFull') or 0, raw.get('Price') or 0,
+            raw.get('Discount') or 0,
+        )
+
+
+def load_reports(marketplace_id, sales_days_back: int = 30, sales: bool = True, stocks: bool = True) -> Dict[str, int]:
+    """Загрузка отчётов кабинета WB: продажи за sales_days_back дней и снимок остатков"""
+    loader = WildberriesReportLoader(marketplace_id)
+    result = {}
+    if sales:
+        result['sales'] = loader.load_sales(timezone.now() - timedelta(days=sales_days_back))
+    if stocks:
+        result['stocks'] = loader.load_stocks()
+    return result
@@ -3,6 +3,8 @@ import logging
 from datetime import datetime
 import schedule
 import time
+from asgiref.sync import sync_to_async
+from jobs.queue import jobs_enabled
 from .manager import ParserManager
 
 logger = logging.getLogger(__name__)
@@ -20,7 +22,13 @@ class ParserScheduler:
         logger.info(f"Starting parsing job at {datetime.now()}")
         
         try:
-            results = await self.manager.run_all_parsers()
+            if jobs_enabled():
+                # Выгрузку выполняют воркеры run_worker
+                jobs = await sync_to_async(self.manager.enqueue_all_parsers)(only_due=True)
+                logger.info(f"Parsing job enqueued {len(jobs)} parser jobs")
+                return {}
+
+            results = await self.manager.run_all_parsers(only_due=True)
             total_processed = sum(
                 result['processed'] for result in results.values() 
                 if result.get('success')
@@ -0,0 +1,18 @@
+from rest_framework import serializers
+from .models import ParserRun
+
+
+class ParserRunSerializer(serializers.ModelSerializer):
+    marketplace_code = serializers.CharField(source='marketplace.code', read_only=True)
+    marketplace_name = serializers.CharField(source='marketplace.name', read_only=True)
+
+    class Meta:
+        model = ParserRun
+        fields = [
+            'id', 'marketplace', 'marketplace_code', 'marketplace_name', 'status', 'params',
+            'started_at', 'finished_at', 'duration', 'fetch_seconds', 'normalize_seconds', 'persist_seconds',
+            'api_requests', 'api_retries', 'api_errors', 'api_latency',
+            'orders_fetched', 'orders_processed', 'orders_failed', 'rows_per_second',
+            'failed_orders', 'error',
+        ]
+        read_only_fields = fields
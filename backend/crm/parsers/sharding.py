@@ -0,0 +1,236 @@
+# parsers/sharding.py
+"""
+Параллельная выгрузка заказов в нескольких процессах (start_parser --processes).
+
+Работа делится на шарды: маркетплейс или маркетплейс и период
+[date_from, date_to) для выгрузки истории. Шарды выполняются пулом
+процессов, у каждого процесса своё соединение с БД. Итоги шардов
+сводятся по маркетплейсам.
+
+Аренду маркетплейса (parsers/locks.py) берёт родительский процесс на всё
+время выгрузки, шарды работают под ней (MarketplaceLease.adopt), поэтому
+шарды одного маркетплейса не мешают друг другу, а другой узел его не
+возьмёт. Периоды не пересекаются: BaseParser.parse_window сохраняет только
+заказы, созданные в своём периоде.
+
+Периоды маркетплейсов с SERIAL_WINDOWS (Wildberries: статистика - запрос в
+минуту на кабинет) не раздаются разным процессам: все они выполняются
+одной задачей пула по очереди, с общими ограничителями частоты API.
+Ограничитель живёт в памяти процесса, и N процессов отправили бы N
+запросов сразу.
+"""
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Модели импортируются внутри функций: процессы пула (spawn) загружают этот
+# модуль до django.setup() в _init_worker
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Shard:
+    marketplace_id: int
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+
+    def __str__(self):
+        if self.date_from is None:
+            return f"#{self.marketplace_id}"
+        return f"#{self.marketplace_id} {self.date_from:%Y-%m-%d %H:%M}..{self.date_to:%Y-%m-%d %H:%M}"
+
+
+def plan_windows(date_from: datetime, date_to: datetime, window: timedelta) -> List[Tuple[datetime, datetime]]:
+    """Разбивает [date_from, date_to) на периоды не длиннее window"""
+    if window <= timedelta(0):
+        raise ValueError("Длина периода должна быть положительной")
+    windows = []
+    start = date_from
+    while start < date_to:
+        end = min(start + window, date_to)
+        windows.append((start, end))
+        start = end
+    return windows
+
+
+def plan_shards(marketplace_ids: Iterable[int], date_from: Optional[datetime] = None,
+                date_to: Optional[datetime] = None, window: Optional[timedelta] = None) -> List[Shard]:
+    """
+    Шарды выгрузки: без периода - по одному на маркетплейс (обычное окно
+    парсера), с периодом - по одному на маркетплейс и каждый его отрезок.
+    """
+    if date_from is None:
+        return [Shard(marketplace_id) for marketplace_id in marketplace_ids]
+    windows = plan_windows(date_from, date_to, window or (date_to - date_from))
+    # Сначала первые периоды всех маркетплейсов: процессы делят нагрузку между разными API
+    return [
+        Shard(marketplace_id, start, end)
+        for start, end in windows
+        for marketplace_id in marketplace_ids
+    ]
+
+
+def _init_worker():
+    import django
+    django.setup()
+
+
+def run_shard(shard: Shard, lease_holder: str, rate_limiters: Optional[Dict[Any, Any]] = None) -> Dict[str, Any]:
+    """Выполняет шард в процессе пула; rate_limiters - общие ограничители частоты (share_rate_limiters)"""
+    from asgiref.sync import async_to_sync
+    from django.db import close_old_connections
+    from .manager import create_parser
+    from .models import ParserRun
+
+    close_old_connections()
+    result: Dict[str, Any] = {'marketplace_id': shard.marketplace_id, 'shard': str(shard)}
+    try:
+        parser = create_parser(shard.marketplace_id)
+        parser.lease_holder = lease_holder
+        if rate_limiters is not None:
+            parser.share_rate_limiters(rate_limiters)
+        if shard.date_from is None:
+            processed = async_to_sync(parser.parse_orders)()
+        else:
+            processed = async_to_sync(parser.parse_window)(shard.date_from, shard.date_to)
+        run = parser.metrics.run
+        result.update({
+            'success': run is None or run.status != ParserRun.Status.FAILED,
+            'processed': processed,
+            'run_id': run.pk if run else None,
+            'failed': run.orders_failed if run else 0,
+            'error': run.error if run else '',
+        })
+    except Exception as e:
+        logger.error(f"Shard {shard} error: {str(e)}")
+        result.update({'success': False, 'processed': 0, 'failed': 0, 'error': str(e)})
+    finally:
+        close_old_connections()
+    return result
+
+
+def run_shards(shards: List[Shard], lease_holder: str) -> List[Dict[str, Any]]:
+    """Выполняет шарды одного маркетплейса по очереди в процессе пула, с общими ограничителями частоты"""
+    rate_limiters: Dict[Any, Any] = {}
+    return [run_shard(shard, lease_holder, rate_limiters) for shard in shards]
+
+
+def _serial_marketplace_ids(marketplace_ids: Iterable[int]) -> set:
+    """Маркетплейсы, периоды которых выгружаются по очереди (BaseParser.SERIAL_WINDOWS)"""
+    from marketplace.models import Marketplace
+    from .manager import PARSER_CLASSES
+
+    return {
+        marketplace_id
+        for marketplace_id, code in Marketplace.objects.filter(
+            pk__in=list(marketplace_ids)
+        ).values_list('pk', 'code')
+        if getattr(PARSER_CLASSES.get(code), 'SERIAL_WINDOWS', False)
+    }
+
+
+def group_shards(shards: List[Shard], serial_marketplace_ids: Iterable[int]) -> List[List[Shard]]:
+    """
+    Задачи пула: шард выгрузки периода маркетплейса из serial_marketplace_ids
+    попадает в общую задачу этого маркетплейса, остальные - по одному.
+    """
+    serial_marketplace_ids = set(serial_marketplace_ids)
+    groups: List[List[Shard]] = []
+    serial_groups: Dict[int, List[Shard]] = {}
+    for shard in shards:
+        if shard.date_from is None or shard.marketplace_id not in serial_marketplace_ids:
+            groups.append([shard])
+            continue
+        group = serial_groups.get(shard.marketplace_id)
+        if group is None:
+            group = serial_groups[shard.marketplace_id] = []
+            groups.append(group)
+        group.append(shard)
+    return groups
+
+
+def _acquire_leases(marketplace_ids: Iterable[int], results: Dict[str, Dict[str, Any]]) -> Dict[int, Any]:
+    from marketplace.models import Marketplace
+    from .locks import MarketplaceBusy, MarketplaceLease
+
+    leases = {}
+    for marketplace in Marketplace.objects.filter(pk__in=list(marketplace_ids)):
+        results[str(marketplace.pk)] = {
+            'success': False, 'name': marketplace.name, 'code': marketplace.code,
+            'processed': 0, 'failed': 0, 'shards': 0, 'shards_failed': 0, 'run_ids': [], 'errors': [],
+        }
+        try:
+            leases[marketplace.pk] = MarketplaceLease(marketplace).acquire()
+        except MarketplaceBusy as e:
+            logger.info(f"Parser {marketplace.name} skipped: {str(e)}")
+            results[str(marketplace.pk)].update({'skipped': True, 'error': str(e)})
+    return leases
+
+
+def run_sharded(shards: List[Shard], processes: int, log=None) -> Dict[str, Dict[str, Any]]:
+    """
+    Выполняет шарды пулом из processes процессов.
+
+    Возвращает итоги по маркетплейсам (в формате ParserManager.run_all_parsers
+    плюс shards, shards_failed, run_ids, errors). Маркетплейсы, занятые
+    другим узлом, пропускаются целиком.
+    """
+    log = log or (lambda message: None)
+    results: Dict[str, Dict[str, Any]] = {}
+    started = time.perf_counter()
+    leases = _acquire_leases({shard.marketplace_id for shard in shards}, results)
+    try:
+        runnable = [shard for shard in shards if shard.marketplace_id in leases]
+        if not runnable:
+            return results
+        # spawn: процессы не наследуют соединения с БД и потоки родителя
+        groups = group_shards(runnable, _serial_marketplace_ids(leases))
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=processes, mp_context=context, initializer=_init_worker) as pool:
+            futures = {
+                pool.submit(run_shards, group, leases[group[0].marketplace_id].holder): group
+                for group in groups
+            }
+            for future in as_completed(futures):
+                group = futures[future]
+                try:
+                    shard_results = future.result()
+                except Exception as e:
+                    # Процесс пула упал целиком (например, нехватка памяти)
+                    shard_results = [
+                        {'success': False, 'processed': 0, 'failed': 0, 'error': str(e)}
+                        for _ in group
+                    ]
+                for shard, shard_result in zip(group, shard_results):
+                    _merge(results[str(shard.marketplace_id)], shard_result)
+                    log(f"{shard}: {'ok' if shard_result['success'] else 'error'}, "
+                        f"{shard_result['processed']} заказов")
+                # Долгая выгрузка: продлеваем аренду и между шардами
+                leases[group[0].marketplace_id].renew()
+    finally:
+        for lease in leases.values():
+            lease.release()
+
+    duration = time.perf_counter() - started
+    for result in results.values():
+        if not result.get('skipped'):
+            result['duration'] = duration
+            result['success'] = result['shards_failed'] == 0
+            result['status'] = 'success' if result['success'] else 'failed'
+    return results
+
+
+def _merge(total: Dict[str, Any], shard_result: Dict[str, Any]):
+    total['shards'] += 1
+    total['processed'] += shard_result['processed']
+    total['failed'] += shard_result['failed']
+    if shard_result.get('run_id'):
+        total['run_ids'].append(shard_result['run_id'])
+    if not shard_result['success']:
+        total['shards_failed'] += 1
+        total['errors'].append(shard_result['error'])
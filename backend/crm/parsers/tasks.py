@@ -0,0 +1,54 @@
+from asgiref.sync import async_to_sync
+from jobs.models import Job
+from jobs.queue import JobError, task
+from .backfill import DEFAULT_CONCURRENCY, BackfillService
+from .locks import MarketplaceBusy
+from .manager import create_parser
+from .models import Backfill, ParserRun
+from .reports import load_reports
+from .webhooks import WebhookService
+
+
+@task('parsers.run_parser', queue='parsers', timeout=3600)
+def run_parser(marketplace_id, **params):
+    """Выгрузка заказов одного маркетплейса"""
+    parser = create_parser(marketplace_id)
+    try:
+        processed = async_to_sync(parser.parse_orders)(**params)
+    except MarketplaceBusy as e:
+        # Маркетплейс уже выгружает другой узел - повторять незачем
+        return {'skipped': str(e)}
+    run = parser.metrics.run
+    if run is not None and run.status == ParserRun.Status.FAILED:
+        raise JobError(run.error or 'Запуск парсера завершился ошибкой')
+    return {'processed': processed, 'run_id': run.pk if run else None}
+
+
+@task('parsers.process_webhooks', queue='parsers', priority=Job.Priority.HIGH, max_attempts=1)
+def process_webhooks(batch_size=200):
+    """Разбор очереди вебхуков до конца (ставится приёмником, см. parsers/views.py)"""
+    totals = {'events': 0, 'orders': 0, 'failed': 0, 'deferred': 0}
+    parsers = {}
+    while events := WebhookService.claim(batch_size):
+        for key, value in WebhookService.process(events, parsers).items():
+            totals[key] += value
+    return totals
+
+
+@task('parsers.run_backfill', queue='parsers', timeout=24 * 3600)
+def run_backfill(backfill_id, concurrency=DEFAULT_CONCURRENCY):
+    """Выгрузка истории (см. parsers/backfill.py); повтор продолжает с невыгруженных отрезков"""
+    backfill = Backfill.objects.select_related('marketplace').get(pk=backfill_id)
+    try:
+        BackfillService.run(backfill, concurrency)
+    except MarketplaceBusy as e:
+        return {'skipped': str(e)}
+    if backfill.status != Backfill.Status.DONE:
+        raise JobError(f"Выгрузка истории #{backfill.pk}: {backfill.get_status_display()}")
+    return {'processed': backfill.orders_processed, 'failed': backfill.orders_failed}
+
+
+@task('parsers.load_wb_reports', queue='parsers', timeout=3600)
+def load_wb_reports(marketplace_id, sales_days_back=30, sales=True, stocks=True):
+    """Загрузка отчётов WB о продажах и остатках в таблицы фактов (см. parsers/reports.py)"""
+    return load_reports(marketplace_id, sales_days_back=sales_days_back, sales=sales, stocks=stocks)
@@ -0,0 +1,11 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import ParserRunViewSet, webhook_receiver
+
+router = DefaultRouter()
+router.register(r'parser-runs', ParserRunViewSet, basename='parser-run')
+
+urlpatterns = [
+    path('', include(router.urls)),
+    path('webhooks/<int:marketplace_id>/', webhook_receiver, name='marketplace-webhook'),
+]
@@ -0,0 +1,152 @@
+import json
+import logging
+from datetime import timedelta
+from django.db.models import Avg, Count, Max, Q, Sum
+from django.db.models.functions import TruncDay, TruncHour, TruncWeek
+from django.http import HttpResponseBadRequest, HttpResponseForbidden, HttpResponseNotFound, JsonResponse
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from api.pagination import CursorOptInPagination
+from jobs.queue import enqueue, jobs_enabled
+from marketplace.credentials import credential_provider
+from marketplace.models import Marketplace
+from users.permissions import IsManager
+from .models import ParserRun
+from .serializers import ParserRunSerializer
+from .webhooks import WebhookService, get_adapter
+
+logger = logging.getLogger(__name__)
+
+TREND_BUCKETS = {
+    'hour': TruncHour,
+    'day': TruncDay,
+    'week': TruncWeek,
+}
+
+
+class ParserRunPagination(CursorOptInPagination):
+    page_size = 50
+    cursor_ordering = ('-started_at', 'id')
+
+
+class ParserRunViewSet(viewsets.ReadOnlyModelViewSet):
+    """История запусков парсеров и тренды по маркетплейсам"""
+    queryset = ParserRun.objects.select_related('marketplace')
+    serializer_class = ParserRunSerializer
+    permission_classes = [IsManager]
+    pagination_class = ParserRunPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+
+        marketplace = self.request.query_params.get('marketplace')
+        if marketplace:
+            queryset = queryset.filter(marketplace_id=marketplace)
+
+        run_status = self.request.query_params.get('status')
+        if run_status:
+            queryset = queryset.filter(status=run_status)
+
+        date_from = self.request.query_params.get('date_from')
+        if date_from:
+            queryset = queryset.filter(started_at__gte=date_from)
+
+        date_to = self.request.query_params.get('date_to')
+        if date_to:
+            queryset = queryset.filter(started_at__lte=date_to)
+
+        return queryset
+
+    @action(detail=False, methods=['get'])
+    def trends(self, request):
+        """
+        Агрегаты запусков по периодам: ?days=30&bucket=day|hour|week&marketplace=<id>
+
+        Рост avg_fetch при неизменном числе заказов - признак того, что API
+        маркетплейса стал отвечать медленнее; рост avg_persist - что медленнее
+        стала наша сторона.
+        """
+        bucket = request.query_params.get('bucket', 'day')
+        if bucket not in TREND_BUCKETS:
+            return Response({'error': f"bucket: одно из {', '.join(TREND_BUCKETS)}"}, status=400)
+        try:
+            days = max(1, int(request.query_params.get('days', 30)))
+        except ValueError:
+            return Response({'error': 'days должно быть числом'}, status=400)
+
+        since = timezone.now() - timedelta(days=days)
+        queryset = ParserRun.objects.filter(started_at__gte=since).exclude(status=ParserRun.Status.RUNNING)
+        marketplace = request.query_params.get('marketplace')
+        if marketplace:
+            queryset = queryset.filter(marketplace_id=marketplace)
+
+        rows = (
+            queryset
+            .annotate(period=TREND_BUCKETS[bucket]('started_at'))
+            .values('period', 'marketplace_id', 'marketplace__code')
+            .annotate(
+                runs=Count('id'),
+                failed_runs=Count('id', filter=Q(status=ParserRun.Status.FAILED)),
+                avg_duration=Avg('duration'),
+                max_duration=Max('duration'),
+                avg_fetch=Avg('fetch_seconds'),
+                avg_normalize=Avg('normalize_seconds'),
+                avg_persist=Avg('persist_seconds'),
+                avg_rows_per_second=Avg('rows_per_second'),
+                orders_processed=Sum('orders_processed'),
+                orders_failed=Sum('orders_failed'),
+                api_requests=Sum('api_requests'),
+                api_retries=Sum('api_retries'),
+                api_errors=Sum('api_errors'),
+            )
+            .order_by('period', 'marketplace__code')
+        )
+
+        results = []
+        for row in rows:
+            row['marketplace'] = row.pop('marketplace_id')
+            row['marketplace_code'] = row.pop('marketplace__code')
+            for key, value in row.items():
+                if isinstance(value, float):
+                    row[key] = round(value, 3)
+            results.append(row)
+
+        return Response({'bucket': bucket, 'since': since, 'results': results})
+
+
+@csrf_exempt
+@require_POST
+def webhook_receiver(request, marketplace_id):
+    """
+    Приёмник уведомлений маркетплейса.
+
+    Только проверяет подпись и ставит события в очередь - обработка идёт в
+    process_webhooks, поэтому ответ занимает миллисекунды.
+    """
+    marketplace = Marketplace.objects.filter(pk=marketplace_id, is_webhook_enabled=True).first()
+    if marketplace is None:
+        return HttpResponseNotFound()
+
+    adapter = get_adapter(marketplace.code)
+    secret = credential_provider.get_credentials(marketplace).get('webhook_secret', '')
+    if not adapter.verify(request, secret):
+        logger.warning(f"Вебхук {marketplace.name}: неверная подпись")
+        return HttpResponseForbidden()
+
+    try:
+        body = json.loads(request.body)
+    except ValueError:
+        return HttpResponseBadRequest()
+
+    ping = adapter.ping_response(body)
+    if ping is not None:
+        return JsonResponse(ping)
+
+    if WebhookService.enqueue(marketplace, adapter.events(body, request.body)) and jobs_enabled():
+        # Одна ожидающая задача разбирает всю очередь вебхуков
+        enqueue('parsers.process_webhooks', unique_key='parsers.process_webhooks')
+    return JsonResponse(adapter.acknowledge())
@@ -2,16 +2,21 @@
 from .base import BaseParser
 from api.wb_api import WildberriesAPIClient, WBEnvironment
 from api.wb_config import WBApiCategory
-from typing import List, Dict, Any
+from .normalize import DEFAULT_STATUS, WB_STATUSES, parse_iso_datetime
+from typing import AsyncIterator, Iterable, List, Dict, Any
 import datetime
 import logging
-import datetime
 
 logger = logging.getLogger(__name__)
 
 class WildberriesParser(BaseParser):
     """Парсер для Wildberries с поддержкой всех API"""
     
+    # Статистика с flag=1 отдаёт заказы одного дня dateFrom
+    BACKFILL_CHUNK_HOURS = 24
+    # Статистика - запрос в минуту на кабинет: параллельные процессы получали бы 429
+    SERIAL_WINDOWS = True
+    
     def __init__(self, marketplace_id=None, marketplace_code: str = 'wildberries'):
         super().__init__(marketplace_id=marketplace_id, marketplace_code=marketplace_code)
         
@@ -21,83 +26,108 @@ class WildberriesParser(BaseParser):
             
         self.api_client = WildberriesAPIClient(
             api_key=self.credentials['api_key'],
-            environment=environment
+            environment=environment,
+            base_url=self.credentials.get('api_base_url')
         )
     
-    async def fetch_orders(self, days_back: int = 1, **kwargs) -> List[Dict[str, Any]]:
-        """Получение заказов за последние N дней"""
-        since = datetime.datetime.now() - datetime.timedelta(days=days_back)
-        
+    async def fetch_orders(self, days_back: int = 1, **kwargs) -> AsyncIterator[Dict[str, Any]]:
+        """Получение заказов за последние N дней - потоком, по мере загрузки ответа"""
+        since = self._day_start(days_ago=days_back)
+        return self._stream_orders(since)
+    
+    async def _stream_orders(self, since: datetime.datetime) -> AsyncIterator[Dict[str, Any]]:
+        async with self.api_client:
+            marketplace_client = self.api_client.get_client(WBApiCategory.STATISTICS)
+            async for order in marketplace_client.iter_orders(since):
+                yield order
+    
+    async def fetch_window(self, date_from: datetime.datetime, date_to: datetime.datetime) -> List[Dict[str, Any]]:
+        """Заказы за период - по запросу на каждый день (flag=1); лишние отбрасывает parse_window"""
+        orders = {}
         async with self.api_client:
             marketplace_client = self.api_client.get_client(WBApiCategory.STATISTICS)
-            orders = await marketplace_client.get_orders(date_start=since)            
-            return orders
+            day = date_from.replace(hour=0, minute=0, second=0, microsecond=0)
+            while day < date_to:
+                for raw_order in await marketplace_client.get_orders(date_start=day):
+                    orders.setdefault(raw_order.get('srid') or id(raw_order), raw_order)
+                day += datetime.timedelta(days=1)
+        return list(orders.values())
+    
+    def raw_created_at(self, raw_order: Dict[str, Any]) -> datetime.datetime:
+        return self.parse_wb_date(raw_order.get('date'))
     
     def normalize_order_data(self, raw_order: Dict[str, Any]) -> Dict[str, Any]:
         """Нормализация данных Wildberries к единому формату (1 заказ = 1 товар)"""
-        return {
-            'external_id': str(raw_order.get('srid', '')),
-            'number': str(raw_order.get('gNumber', '')),
-            'posting_number': raw_order.get('sticker', ''),
-            'status': self.map_status(raw_order.get('status')),
-            'created_at_marketplace': self.parse_wb_date(raw_order.get('date')),
-            'total_amount': raw_order.get('priceWithDisc', 0),
-            'items': [self.normalize_single_item(raw_order)],
-        }
+        return self.normalize_many((raw_order,))[0]
+    
+    def normalize_many(self, raw_orders: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Нормализация пачки заказов; справочники и функции берутся в локальные переменные один раз"""
+        statuses = WB_STATUSES
+        parse_date = self.parse_wb_date
+        normalized = []
+        append = normalized.append
+        for raw_order in raw_orders:
+            get = raw_order.get
+            price = get('priceWithDisc', 0)
+            append({
+                'external_id': str(get('srid', '')),
+                'number': str(get('gNumber', '')),
+                'posting_number': get('sticker', ''),
+                'status': statuses.get(get('status'), DEFAULT_STATUS),
+                'created_at_marketplace': parse_date(get('date')),
+                'total_amount': price,
+                'items': [{
+                    'product_id': get('nmId'),
+                    'offer_id': get('supplierArticle'),
+                    'quantity': get('quantity', 1),
+                    'price': price,
+                }],
+            })
+        return normalized
     
     def parse_wb_date(self, date_str: str) -> datetime.datetime:
         """Парсинг даты из WB формата (всегда UTC)"""
-        if not date_str:
-            return None
-        
         try:
-            if date_str.endswith('Z'):
-                date_str = date_str[:-1] + '+00:00'
-            
-            dt = datetime.datetime.fromisoformat(date_str)
-            
-            if dt.tzinfo is None:
-                dt = dt.replace(tzinfo=datetime.timezone.utc)
-            
-            return dt
-        except (ValueError, AttributeError) as e:
+            return parse_iso_datetime(date_str)
+        except (ValueError, TypeError, AttributeError) as e:
             logger.warning(f"Не удалось распарсить дату WB: {date_str} | Ошибка: {e}")
             return None
     
+    @staticmethod
+    def _day_start(days_ago: int) -> datetime.datetime:
+        """Начало дня days_ago дней назад: запросы отчётов за день имеют одни параметры и кэшируются"""
+        return datetime.datetime.combine(datetime.date.today(), datetime.time.min) - datetime.timedelta(days=days_ago)
+    
     def map_status(self, wb_status: str) -> str:
         """Маппинг статусов Wildberries на внутренние"""
-        status_map = {
-            'new': 'new',           # Новый
-            'approve': 'processing', # Принят
-            'confirm': 'processing', # Подтвержден
-            'complete': 'delivered', # Выполнен
-            'cancel': 'cancelled',   # Отменен
-            'clientArbitrage': 'cancelled', # Спор с клиентом
-            'delivering': 'shipped', # Доставляется
-        }
-        return status_map.get(wb_status, 'new')
-    
-    def normalize_single_item(self, raw_order: Dict[str, Any]) -> Dict[str, Any]:
-        """Нормализация одного товара из корня заказа WB"""
-        return {
-            'product_id': raw_order.get('nmId'),
-            'offer_id': raw_order.get('supplierArticle'),
-            'quantity': raw_order.get('quantity', 1),
-            'price': raw_order.get('priceWithDisc', 0),
-        }
+        return WB_STATUSES.get(wb_status, DEFAULT_STATUS)
     
     async def fetch_sales_report(self, days_back: int = 30) -> List[Dict[str, Any]]:
-        """Получение отчета о продажах"""
-        since = datetime.datetime.now() - datetime.timedelta(days=days_back)
+        """Получение отчета о продажах (одна страница; весь отчёт - stream_sales_report)"""
+        since = self._day_start(days_ago=days_back)
         
         async with self.api_client:
-            analytics_client = self.api_client.get_client(WBApiCategory.ANALYTICS)
-            return await analytics_client.get_sales_report(date_from=since)
+            statistics_client = self.api_client.get_client(WBApiCategory.STATISTICS)
+            return await statistics_client.get_sales_report(date_from=since)
     
     async def fetch_stocks_report(self) -> List[Dict[str, Any]]:
-        """Получение отчета об остатках"""
-        since = datetime.datetime.now() - datetime.timedelta(days=1)
+        """Получение отчета об остатках (одна страница; весь отчёт - stream_stocks_report)"""
+        since = self._day_start(days_ago=1)
         
         async with self.api_client:
-            analytics_client = self.api_client.get_client(WBApiCategory.ANALYTICS)
-            return await analytics_client.get_stocks_report(date_from=since)
\ No newline at end of file
+            statistics_client = self.api_client.get_client(WBApiCategory.STATISTICS)
+            return await statistics_client.get_stocks_report(date_from=since)
+    
+    async def stream_sales_report(self, date_from: datetime.datetime) -> AsyncIterator[Dict[str, Any]]:
+        """Продажи и возвраты, изменённые с date_from, - потоком по всем страницам отчёта"""
+        async with self.api_client:
+            statistics_client = self.api_client.get_client(WBApiCategory.STATISTICS)
+            async for sale in statistics_client.iter_sales(date_from):
+                yield sale
+    
+    async def stream_stocks_report(self, date_from: datetime.datetime) -> AsyncIterator[Dict[str, Any]]:
+        """Остатки, изменённые с date_from, - потоком по всем страницам отчёта"""
+        async with self.api_client:
+            statistics_client = self.api_client.get_client(WBApiCategory.STATISTICS)
+            async for stock in statistics_client.iter_stocks(date_from):
+                yield stock
\ No newline at end of file
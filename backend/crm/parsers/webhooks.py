@@ -0,0 +1,282 @@
+# parsers/webhooks.py
+"""
+Приём и обработка уведомлений маркетплейсов о заказах.
+
+Приёмник (parsers.views.webhook_receiver) проверяет подпись, сохраняет
+события в WebhookEvent и сразу отвечает - маркетплейсы ждут ответа
+считанные секунды. Команда process_webhooks забирает события пачками и
+передаёт их парсеру маркетплейса: тот получает заказы (из самого
+уведомления или отдельным запросом к API) и сохраняет их обычным путём.
+"""
+import hashlib
+import hmac
+import json
+import logging
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+from asgiref.sync import async_to_sync
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from .models import ParserRun, WebhookEvent
+
+logger = logging.getLogger(__name__)
+
+# После скольких неудачных попыток событие остаётся в статусе «ошибка»
+MAX_ATTEMPTS = 5
+RETRY_BACKOFF = timedelta(seconds=30)
+# Сколько обработчик держит событие; после этого его может забрать другой
+PROCESSING_TIMEOUT = timedelta(minutes=5)
+# Через сколько повторить события маркетплейса, занятого другим узлом (опрос, выгрузка истории)
+BUSY_RETRY_DELAY = timedelta(seconds=30)
+
+
+def _body_digest(body: bytes) -> str:
+    return 'sha1:' + hashlib.sha1(body).hexdigest()
+
+
+class WebhookAdapter:
+    """
+    Формат уведомлений маркетплейса.
+
+    Подпись проверяется по общему секрету webhook_secret из
+    extra_credentials маркетплейса: HMAC-SHA256 тела в заголовке
+    signature_header либо секрет в заголовке Authorization (Bearer) - для
+    маркетплейсов, которые не подписывают тело.
+    """
+
+    signature_header = 'X-Signature'
+
+    def verify(self, request, secret: str) -> bool:
+        if not secret:
+            return False
+        signature = request.headers.get(self.signature_header, '')
+        if signature:
+            expected = hmac.new(secret.encode(), request.body, hashlib.sha256).hexdigest()
+            return hmac.compare_digest(signature.lower().removeprefix('sha256='), expected)
+        authorization = request.headers.get('Authorization', '')
+        token = authorization[len('Bearer '):] if authorization.startswith('Bearer ') else ''
+        return bool(token) and hmac.compare_digest(token, secret)
+
+    def ping_response(self, body: Any) -> Optional[Dict[str, Any]]:
+        """Ответ на проверочное уведомление или None, если это не проверка"""
+        return None
+
+    def events(self, body: Any, raw_body: bytes) -> List[Dict[str, Any]]:
+        """
+        События заказов из тела уведомления: словари с event_id, event_type, payload.
+
+        По умолчанию тело - один заказ, список заказов или {"events": [...]}.
+        """
+        if isinstance(body, dict) and isinstance(body.get('events'), list):
+            items = body['events']
+        elif isinstance(body, list):
+            items = body
+        else:
+            items = [body]
+        return [
+            {
+                'event_id': str(item.get('id') or _body_digest(json.dumps(item, sort_keys=True).encode())),
+                'event_type': str(item.get('type', '')),
+                'payload': item,
+            }
+            for item in items if isinstance(item, dict)
+        ]
+
+    def acknowledge(self) -> Dict[str, Any]:
+        return {'result': True}
+
+
+def _service_info() -> Dict[str, Any]:
+    return {
+        'version': '1.0',
+        'name': 'ecom-pulse',
+        'time': timezone.now().strftime('%Y-%m-%dT%H:%M:%SZ'),
+    }
+
+
+class OzonWebhookAdapter(WebhookAdapter):
+    """Push-уведомления Ozon: одно событие на запрос, тип в message_type"""
+
+    def ping_response(self, body):
+        if isinstance(body, dict) and body.get('message_type') == 'TYPE_PING':
+            return _service_info()
+        return None
+
+    def events(self, body, raw_body):
+        # Уведомления о товарах, остатках и чатах парсер заказов не обрабатывает
+        if not isinstance(body, dict) or not body.get('posting_number'):
+            return []
+        return [{
+            'event_id': _body_digest(raw_body),
+            'event_type': body.get('message_type', ''),
+            'payload': body,
+        }]
+
+
+class YandexWebhookAdapter(WebhookAdapter):
+    """API-уведомления Яндекс.Маркета: тип в notificationType, заказ в orderId"""
+
+    def ping_response(self, body):
+        if isinstance(body, dict) and body.get('notificationType') == 'PING':
+            return _service_info()
+        return None
+
+    def events(self, body, raw_body):
+        if not isinstance(body, dict) or not body.get('orderId'):
+            return []
+        return [{
+            'event_id': _body_digest(raw_body),
+            'event_type': body.get('notificationType', ''),
+            'payload': body,
+        }]
+
+    def acknowledge(self):
+        return _service_info()
+
+
+WEBHOOK_ADAPTERS = {
+    'ozon': OzonWebhookAdapter(),
+    'yandex_market': YandexWebhookAdapter(),
+}
+DEFAULT_ADAPTER = WebhookAdapter()
+
+
+def get_adapter(marketplace_code: str) -> WebhookAdapter:
+    return WEBHOOK_ADAPTERS.get(marketplace_code, DEFAULT_ADAPTER)
+
+
+class WebhookService:
+    """Очередь входящих уведомлений"""
+
+    @staticmethod
+    def enqueue(marketplace, events: List[Dict[str, Any]]) -> int:
+        """Сохраняет события одним запросом; повторная доставка того же события игнорируется"""
+        if not events:
+            return 0
+        WebhookEvent.objects.bulk_create(
+            [
+                WebhookEvent(
+                    marketplace=marketplace,
+                    event_id=event['event_id'][:255],
+                    event_type=event['event_type'][:100],
+                    payload=event['payload'],
+                )
+                for event in events
+            ],
+            ignore_conflicts=True,
+        )
+        return len(events)
+
+    @staticmethod
+    def claim(batch_size: int) -> List[WebhookEvent]:
+        """
+        Забирает пачку событий для обработки.
+
+        SELECT ... FOR UPDATE SKIP LOCKED позволяет запускать несколько
+        обработчиков. Забранное событие получает статус «обрабатывается» и
+        available_at = сейчас + PROCESSING_TIMEOUT: если обработчик упадёт,
+        событие снова станет доступно.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            events = list(
+                WebhookEvent.objects
+                .select_for_update(skip_locked=True)
+                .filter(
+                    Q(status=WebhookEvent.Status.PENDING) | Q(status=WebhookEvent.Status.PROCESSING),
+                    available_at__lte=now,
+                )
+                .order_by('id')[:batch_size]
+            )
+            if events:
+                WebhookEvent.objects.filter(pk__in=[event.pk for event in events]).update(
+                    status=WebhookEvent.Status.PROCESSING,
+                    attempts=F('attempts') + 1,
+                    available_at=now + PROCESSING_TIMEOUT,
+                )
+        return events
+
+    @staticmethod
+    def process(events: List[WebhookEvent], parsers: Dict[int, Any]) -> Dict[str, int]:
+        """
+        Обрабатывает забранные события, по одному запуску парсера на маркетплейс.
+
+        parsers - кэш парсеров по ID маркетплейса между пачками. Если
+        маркетплейс занят другим узлом (MarketplaceBusy), события
+        откладываются на BUSY_RETRY_DELAY без траты попытки: опрос или
+        выгрузка истории может держать аренду часами.
+        """
+        from .locks import MarketplaceBusy
+        from .manager import create_parser
+
+        totals = {'events': len(events), 'orders': 0, 'failed': 0, 'deferred': 0}
+        by_marketplace: Dict[int, List[WebhookEvent]] = {}
+        for event in events:
+            by_marketplace.setdefault(event.marketplace_id, []).append(event)
+
+        for marketplace_id, marketplace_events in by_marketplace.items():
+            ids = [event.pk for event in marketplace_events]
+            try:
+                parser = parsers.get(marketplace_id)
+                if parser is None:
+                    parser = parsers[marketplace_id] = create_parser(marketplace_id)
+                totals['orders'] += async_to_sync(parser.process_webhook_events)(
+                    [event.payload for event in marketplace_events]
+                )
+                run = parser.metrics.run
+                if run is not None and run.status == ParserRun.Status.FAILED:
+                    raise RuntimeError(run.error or 'Запуск парсера завершился ошибкой')
+            except MarketplaceBusy as e:
+                logger.info(f"Вебхуки маркетплейса {marketplace_id} отложены: {str(e)}")
+                totals['deferred'] += len(ids)
+                WebhookService._defer(ids, str(e))
+                continue
+            except Exception as e:
+                logger.error(f"Ошибка обработки вебхуков маркетплейса {marketplace_id}: {str(e)}")
+                totals['failed'] += len(ids)
+                WebhookService._fail(marketplace_events, str(e))
+                continue
+
+            # Заказы, которые не удалось получить из API, повторяем - плановый опрос придёт нескоро
+            unfetched = [
+                event for event in marketplace_events
+                if parser.webhook_fetch_failures and
+                parser.webhook_order_key(event.payload) in parser.webhook_fetch_failures
+            ]
+            if unfetched:
+                totals['failed'] += len(unfetched)
+                WebhookService._fail(unfetched, 'Не удалось получить заказ из API')
+                unfetched_ids = {event.pk for event in unfetched}
+                ids = [pk for pk in ids if pk not in unfetched_ids]
+
+            WebhookEvent.objects.filter(pk__in=ids).update(
+                status=WebhookEvent.Status.DONE,
+                processed_at=timezone.now(),
+                run=run,
+                error='',
+            )
+        return totals
+
+    @staticmethod
+    def _defer(ids: List[int], reason: str):
+        """Возвращает события в очередь, не засчитывая попытку claim"""
+        WebhookEvent.objects.filter(pk__in=ids).update(
+            status=WebhookEvent.Status.PENDING,
+            attempts=F('attempts') - 1,
+            available_at=timezone.now() + BUSY_RETRY_DELAY,
+            error=reason[:2000],
+        )
+
+    @staticmethod
+    def _fail(events: List[WebhookEvent], error: str):
+        now = timezone.now()
+        for event in events:
+            # attempts в объекте - значение до claim
+            attempts = event.attempts + 1
+            if attempts >= MAX_ATTEMPTS:
+                status, available_at = WebhookEvent.Status.FAILED, now
+            else:
+                status, available_at = WebhookEvent.Status.PENDING, now + RETRY_BACKOFF * 2 ** (attempts - 1)
+            event.status, event.available_at, event.error = status, available_at, error[:2000]
+        WebhookEvent.objects.bulk_update(events, ['status', 'available_at', 'error'])
@@ -2,7 +2,8 @@
 
 from .base import BaseParser
 from api.yandex_market_api import YandexMarketAPIClient
-from typing import List, Dict, Any
+from .normalize import DEFAULT_STATUS, YANDEX_STATUSES, parse_moscow_datetime
+from typing import Iterable, List, Dict, Any
 import datetime
 import logging
 
@@ -15,7 +16,8 @@ class YandexParser(BaseParser):
         super().__init__(marketplace_id=marketplace_id, marketplace_code=marketplace_code)
         self.api_client = YandexMarketAPIClient(
             oauth_token=self.credentials['api_key'],
-            campaign_id=self.credentials['campaign_id']
+            campaign_id=self.credentials['campaign_id'],
+            base_url=self.credentials.get('api_base_url')
         )
     
     async def fetch_orders(self, days_back: int = 1, **kwargs) -> List[Dict[str, Any]]:
@@ -24,51 +26,63 @@ class YandexParser(BaseParser):
         async with self.api_client:
             return await self.api_client.get_orders(from_date=since)
     
+    async def fetch_window(self, date_from: datetime.datetime, date_to: datetime.datetime) -> List[Dict[str, Any]]:
+        async with self.api_client:
+            return await self.api_client.get_orders(from_date=date_from, to_date=date_to)
+    
+    def raw_created_at(self, raw_order: Dict[str, Any]) -> datetime.datetime:
+        return self.parse_ya_date(raw_order.get('creationDate'))
+    
+    async def fetch_webhook_orders(self, payloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Уведомления Яндекс.Маркета содержат только orderId - запрашиваем заказ целиком"""
+        async with self.api_client:
+            return await self._fetch_each(
+                filter(None, map(self.webhook_order_key, payloads)),
+                self.api_client.get_order
+            )
+    
+    def webhook_order_key(self, payload: Dict[str, Any]):
+        return payload.get('orderId')
+    
     def normalize_order_data(self, raw_order: Dict[str, Any]) -> Dict[str, Any]:
         """Нормализация данных Яндекс.Маркета к единому формату"""
-        try:
-            total_amount = float(raw_order.get('buyerTotal', 0))
-        except (TypeError, ValueError):
-            total_amount = 0.0
-
-        return {
-            'external_id': str(raw_order.get('id')),
-            'number': raw_order.get('externalOrderId', ''),
-            'posting_number': '',
-            'status': self.map_status(raw_order.get('status')),
-            'created_at_marketplace': self.parse_ya_date(raw_order.get('creationDate')),
-            'total_amount': total_amount,
-            'items': self.normalize_items(raw_order.get('items', [])),
-        }
+        return self.normalize_many((raw_order,))[0]
+    
+    def normalize_many(self, raw_orders: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Нормализация пачки заказов; справочники и функции берутся в локальные переменные один раз"""
+        statuses = YANDEX_STATUSES
+        parse_date = self.parse_ya_date
+        normalize_items = self.normalize_items
+        normalized = []
+        append = normalized.append
+        for raw_order in raw_orders:
+            get = raw_order.get
+            try:
+                total_amount = float(get('buyerTotal', 0))
+            except (TypeError, ValueError):
+                total_amount = 0.0
+            append({
+                'external_id': str(get('id')),
+                'number': get('externalOrderId', ''),
+                'posting_number': '',
+                'status': statuses.get(get('status'), DEFAULT_STATUS),
+                'created_at_marketplace': parse_date(get('creationDate')),
+                'total_amount': total_amount,
+                'items': normalize_items(get('items', [])),
+            })
+        return normalized
     
     def parse_ya_date(self, date_str: str) -> datetime.datetime:
-        """Парсинг даты из Яндекс формата: 'ДД-ММ-ГГГГ ЧЧ:ММ:СС'"""
-        if not date_str:
-            return None
-        
+        """Парсинг даты из Яндекс формата: 'ДД-ММ-ГГГГ ЧЧ:ММ:СС' (Москва) в UTC"""
         try:
-            dt = datetime.datetime.strptime(date_str, "%d-%m-%Y %H:%M:%S")
-            from django.utils import timezone
-            import pytz
-            msk = pytz.timezone('Europe/Moscow')
-            dt = msk.localize(dt)
-            return dt.astimezone(pytz.utc)
-        except (ValueError, AttributeError) as e:
+            return parse_moscow_datetime(date_str)
+        except (ValueError, TypeError) as e:
             logger.warning(f"Не удалось распарсить дату Яндекса: {date_str} | Ошибка: {e}")
             return None
     
     def map_status(self, ya_status: str) -> str:
         """Маппинг статусов Яндекс.Маркета на внутренние"""
-        status_map = {
-            'PLACING': 'new',
-            'PROCESSING': 'processing',
-            'DELIVERY': 'shipped',
-            'PICKUP': 'shipped',
-            'DELIVERED': 'delivered',
-            'CANCELLED': 'cancelled',
-            'UNPAID': 'new',
-        }
-        return status_map.get(ya_status, 'new')
+        return YANDEX_STATUSES.get(ya_status, DEFAULT_STATUS)
     
     def normalize_items(self, raw_items: List[Dict]) -> List[Dict]:
         """Нормализация товаров"""
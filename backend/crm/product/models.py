@@ -1,5 +1,8 @@
 import os
 from django.db import models
+from django.db.models.functions import Upper
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector
 from django.core.validators import MinValueValidator
 from django.utils.text import slugify
 from category.models import Category
@@ -90,6 +93,13 @@ class Product(models.Model):
         verbose_name = 'Продукт'
         verbose_name_plural = 'Продукты'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', 'id']),
+            # Триграммные индексы покрывают icontains (UPPER(...) LIKE UPPER('%...%'))
+            GinIndex(OpClass(Upper('article'), name='gin_trgm_ops'), name='product_article_trgm_idx'),
+            GinIndex(OpClass(Upper('name'), name='gin_trgm_ops'), name='product_name_trgm_idx'),
+            GinIndex(SearchVector('name', config='russian'), name='product_name_fts_idx'),
+        ]
 
     name = models.CharField(
         max_length=70,
@@ -0,0 +1,59 @@
+# product/services.py
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramSimilarity
+from django.db.models import Case, FloatField, Q, Value, When
+from django.db.models.functions import Greatest
+from .models import Product
+
+
+class ProductSearchService:
+    """Поиск товаров по артикулу и названию для автодополнения"""
+
+    MIN_QUERY_LENGTH = 2
+    DEFAULT_LIMIT = 10
+    MAX_LIMIT = 50
+
+    SEARCH_FIELDS = ('id', 'article', 'name', 'main_img', 'is_active')
+
+    @staticmethod
+    def search(query: str, limit: int = DEFAULT_LIMIT):
+        """
+        Возвращает товары, отсортированные по релевантности.
+
+        Отбор идёт по триграммным индексам (article/name icontains) и
+        полнотекстовому индексу по названию, поэтому ранжирование считается
+        только для уже найденных строк.
+        """
+        query = (query or '').strip()
+        if len(query) < ProductSearchService.MIN_QUERY_LENGTH:
+            return Product.objects.none()
+
+        limit = max(1, min(limit, ProductSearchService.MAX_LIMIT))
+
+        vector = SearchVector('name', config='russian')
+        search_query = SearchQuery(query, config='russian', search_type='websearch')
+
+        # Точное совпадение и совпадение по префиксу артикула важнее похожести
+        article_bonus = Case(
+            When(article__iexact=query, then=Value(2.0)),
+            When(article__istartswith=query, then=Value(1.0)),
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+
+        return (
+            Product.objects
+            .annotate(name_vector=vector)
+            .filter(
+                Q(article__icontains=query) |
+                Q(name__icontains=query) |
+                Q(name_vector=search_query)
+            )
+            .annotate(
+                rank=article_bonus + Greatest(
+                    TrigramSimilarity('article', query),
+                    TrigramSimilarity('name', query),
+                ) + SearchRank(vector, search_query)
+            )
+            .order_by('-rank', 'id')
+            .values(*ProductSearchService.SEARCH_FIELDS, 'rank')[:limit]
+        )
@@ -6,23 +6,28 @@ from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.authentication import SessionAuthentication, BasicAuthentication
 from .models import Product, Category, ProductImage, Country, ProductDirection
 from .serializers import ProductListSerializer, ProductDetailSerializer, CategorySerializer, ProductImageSerializer
+from .services import ProductSearchService
 from django.shortcuts import get_object_or_404
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from marketplace.models import Marketplace, MarketplaceProduct
 from marketplace.serializers import MarketplaceSerializer, MarketplaceProductSerializer
-from rest_framework.pagination import PageNumberPagination
 from rest_framework import status
 from rest_framework_simplejwt.authentication import JWTAuthentication
 
 
 from users.permissions import IsManager, IsWarehouseManager, IsOrderPicker
+from api.pagination import CursorOptInPagination
+from api.fastpath import FastPathListMixin
+from api.renderers import FastJSONRenderer
+from rest_framework.renderers import BrowsableAPIRenderer
 
 
-class StandardResultsSetPagination(PageNumberPagination):
+class StandardResultsSetPagination(CursorOptInPagination):
     page_size = 25
     page_size_query_param = 'page_size'
     max_page_size = 100
+    cursor_ordering = ('-created_at', 'id')
 
 class FilterOptionsView(APIView):
     permission_classes = [permissions.AllowAny]
@@ -81,9 +86,10 @@ class ProductFilter(django_filters.FilterSet):
             'created_at': ['gte', 'lte'],
         }
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(FastPathListMixin, viewsets.ModelViewSet):
     """ViewSet для товаров"""
     pagination_class = StandardResultsSetPagination
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
     queryset = Product.objects.all().select_related(
         'category', 'country', 'direction'
     ).prefetch_related(
@@ -161,6 +167,32 @@ class ProductViewSet(viewsets.ModelViewSet):
             marketplace_product.delete()
             return Response(status=status.HTTP_204_NO_CONTENT)
     
+    @action(detail=False, methods=['get'], url_path='search')
+    def search(self, request):
+        """Быстрый поиск товаров для автодополнения: ?q=...&limit=..."""
+        try:
+            limit = int(request.query_params.get('limit', ProductSearchService.DEFAULT_LIMIT))
+        except (TypeError, ValueError):
+            limit = ProductSearchService.DEFAULT_LIMIT
+
+        products = ProductSearchService.search(request.query_params.get('q', ''), limit)
+        storage = Product._meta.get_field('main_img').storage
+
+        return Response([
+            {
+                'id': product['id'],
+                'article': product['article'],
+                'name': product['name'],
+                'main_img': (
+                    request.build_absolute_uri(storage.url(product['main_img']))
+                    if product['main_img'] else None
+                ),
+                'is_active': product['is_active'],
+                'rank': round(product['rank'], 4),
+            }
+            for product in products
+        ])
+
     @action(detail=True, methods=['get'], url_path="marketplace-products-list")
     def marketplace_products(self, request, pk=None):
         """Получить все маркетплейсы для данного продукта"""
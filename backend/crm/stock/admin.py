@@ -1,16 +1,15 @@
 from django.contrib import admin
-from .models import ProductStock
+from .models import ProductStock, StockReservation, StockShortage
 
 @admin.register(ProductStock)
 class ProductStockAdmin(admin.ModelAdmin):
     list_display = [
-        'product', 'available_quantity', 'reserved_wb', 
-        'reserved_ozon', 'reserved_yandex', 'get_actual_available', 
-        'is_low_stock', 'updated_at'
+        'product', 'available_quantity', 'reserved_quantity',
+        'get_actual_available', 'is_low_stock', 'updated_at'
     ]
     list_filter = ['updated_at', 'product__category']
     search_fields = ['product__article', 'product__name']
-    readonly_fields = ['get_total_reserved', 'get_actual_available', 'updated_at', 'created_at']
+    readonly_fields = ['reserved_quantity', 'get_actual_available', 'updated_at', 'created_at']
     
     def get_actual_available(self, obj):
         return obj.get_actual_available()
@@ -19,4 +18,35 @@ class ProductStockAdmin(admin.ModelAdmin):
     def is_low_stock(self, obj):
         return obj.is_low_stock()
     is_low_stock.boolean = True
-    is_low_stock.short_description = 'Низкий остаток'
\ No newline at end of file
+    is_low_stock.short_description = 'Низкий остаток'
+
+@admin.register(StockReservation)
+class StockReservationAdmin(admin.ModelAdmin):
+    list_display = ['order', 'product', 'marketplace', 'kind', 'quantity', 'created_at']
+    list_filter = ['kind', 'marketplace']
+    search_fields = ['product__article', 'order__number', 'order__external_id']
+    list_select_related = ['order', 'product', 'marketplace']
+    raw_id_fields = ['order', 'product']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+@admin.register(StockShortage)
+class StockShortageAdmin(admin.ModelAdmin):
+    list_display = ['order', 'product', 'marketplace', 'required', 'available', 'updated_at', 'resolved_at']
+    list_filter = [('resolved_at', admin.EmptyFieldListFilter), 'marketplace']
+    search_fields = ['product__article', 'order__number', 'order__external_id']
+    list_select_related = ['order', 'product', 'marketplace']
+    raw_id_fields = ['order', 'product']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -7,4 +7,3 @@ class StockConfig(AppConfig):
     
     def ready(self):
         import stock.signals
-        import stock.signals_stock
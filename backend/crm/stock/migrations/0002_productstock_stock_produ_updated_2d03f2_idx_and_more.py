@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0002_product_product_pro_created_2194cd_idx'),
+        ('stock', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='productstock',
+            index=models.Index(fields=['-updated_at', 'id'], name='stock_produ_updated_2d03f2_idx'),
+        ),
+    ]
@@ -0,0 +1,90 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def build_ledger_from_open_orders(apps, schema_editor):
+    """
+    Переносит резервы из колонок reserved_* в журнал.
+
+    Колонки хранили только суммы без привязки к заказам, поэтому журнал
+    строится заново по открытым FBS заказам (new / processing), а агрегат
+    reserved_quantity пересчитывается из журнала.
+    """
+    OrderItem = apps.get_model('order', 'OrderItem')
+    ProductStock = apps.get_model('stock', 'ProductStock')
+    StockReservation = apps.get_model('stock', 'StockReservation')
+
+    entries = {}
+    items = OrderItem.objects.filter(
+        order__order_type='FBS',
+        order__status__in=['new', 'processing'],
+    ).values_list('order_id', 'order__marketplace_id', 'product__product_id', 'quantity')
+    for order_id, marketplace_id, product_id, quantity in items.iterator():
+        key = (order_id, product_id)
+        if key in entries:
+            entries[key].quantity += quantity
+            continue
+        entries[key] = StockReservation(
+            order_id=order_id,
+            marketplace_id=marketplace_id,
+            product_id=product_id,
+            kind='reserve',
+            quantity=quantity,
+        )
+    StockReservation.objects.bulk_create(entries.values(), batch_size=1000)
+
+    totals = StockReservation.objects.values('product_id').annotate(total=Sum('quantity'))
+    for row in totals.iterator():
+        ProductStock.objects.filter(product_id=row['product_id']).update(reserved_quantity=row['total'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0001_initial'),
+        ('order', '0003_alter_order_status'),
+        ('product', '0003_product_search_indexes'),
+        ('stock', '0002_productstock_stock_produ_updated_2d03f2_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('reserve', 'Резерв'), ('release', 'Снятие резерва (отгрузка)'), ('cancel', 'Отмена резерва')], max_length=10, verbose_name='Операция')),
+                ('quantity', models.IntegerField(verbose_name='Изменение резерва')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('marketplace', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_reservations', to='marketplace.marketplace', verbose_name='Маркетплейс')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_reservations', to='order.order', verbose_name='Заказ')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='product.product', verbose_name='Товар')),
+            ],
+            options={
+                'verbose_name': 'Запись журнала резервов',
+                'verbose_name_plural': 'Журнал резервов',
+                'ordering': ['-created_at'],
+                'constraints': [models.UniqueConstraint(fields=('product', 'marketplace', 'order', 'kind'), name='stock_reservation_unique_entry')],
+            },
+        ),
+        migrations.AddField(
+            model_name='productstock',
+            name='reserved_quantity',
+            field=models.PositiveIntegerField(default=0, help_text='Сумма по журналу резервов, поддерживается ReservationLedgerService', verbose_name='В резерве'),
+        ),
+        migrations.RunPython(build_ledger_from_open_orders, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='productstock',
+            name='reserved_ozon',
+        ),
+        migrations.RemoveField(
+            model_name='productstock',
+            name='reserved_wb',
+        ),
+        migrations.RemoveField(
+            model_name='productstock',
+            name='reserved_yandex',
+        ),
+    ]
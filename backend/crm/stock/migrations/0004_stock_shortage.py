@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-19 14:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0002_marketplaceproduct_external_sku_index'),
+        ('order', '0005_order_line_read_model'),
+        ('product', '0003_product_search_indexes'),
+        ('stock', '0003_stock_reservation_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockShortage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('required', models.PositiveIntegerField(verbose_name='Требуется')),
+                ('available', models.PositiveIntegerField(verbose_name='Было доступно')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата обновления')),
+                ('resolved_at', models.DateTimeField(blank=True, null=True, verbose_name='Резерв применён')),
+                ('marketplace', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_shortages', to='marketplace.marketplace', verbose_name='Маркетплейс')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_shortages', to='order.order', verbose_name='Заказ')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_shortages', to='product.product', verbose_name='Товар')),
+            ],
+            options={
+                'verbose_name': 'Нехватка остатка',
+                'verbose_name_plural': 'Нехватка остатков',
+                'ordering': ['-updated_at'],
+                'constraints': [models.UniqueConstraint(fields=('order', 'product'), name='stock_shortage_unique_order_product')],
+            },
+        ),
+    ]
@@ -1,6 +1,37 @@
 from django.db import models
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from product.models import Product
 
+LOW_STOCK_THRESHOLD = 10
+
+# Поля резерва в ответах API (для совместимости) -> код маркетплейса
+RESERVE_FIELDS_BY_MARKETPLACE_CODE = {
+    'reserved_wb': 'wildberries',
+    'reserved_ozon': 'ozon',
+    'reserved_yandex': 'yandex_market',
+}
+
+class ProductStockQuerySet(models.QuerySet):
+    """QuerySet для ProductStock с часто используемыми фильтрами"""
+
+    def low_stock(self, threshold=LOW_STOCK_THRESHOLD):
+        """Остатки, у которых фактически доступно не больше threshold"""
+        return self.filter(
+            available_quantity__lte=F('reserved_quantity') + threshold
+        )
+
+    def with_marketplace_reserves(self):
+        """Добавляет резерв по каждому маркетплейсу из журнала (reserved_wb и т.д.)"""
+        annotations = {}
+        for field_name, marketplace_code in RESERVE_FIELDS_BY_MARKETPLACE_CODE.items():
+            reserved = StockReservation.objects.filter(
+                product_id=OuterRef('product_id'),
+                marketplace__code=marketplace_code
+            ).values('product_id').annotate(total=Sum('quantity')).values('total')
+            annotations[field_name] = Coalesce(Subquery(reserved), Value(0))
+        return self.annotate(**annotations)
+
 class ProductStock(models.Model):
     """Модель для остатков товаров"""
     
@@ -17,19 +48,10 @@ class ProductStock(models.Model):
         default=0
     )
     
-    reserved_wb = models.PositiveIntegerField(
-        verbose_name='В резерве WB',
-        default=0
-    )
-    
-    reserved_ozon = models.PositiveIntegerField(
-        verbose_name='В резерве OZON', 
-        default=0
-    )
-    
-    reserved_yandex = models.PositiveIntegerField(
-        verbose_name='В резерве Яндекс.Маркет',
-        default=0
+    reserved_quantity = models.PositiveIntegerField(
+        verbose_name='В резерве',
+        default=0,
+        help_text='Сумма по журналу резервов, поддерживается ReservationLedgerService'
     )
     
     updated_at = models.DateTimeField(
@@ -42,22 +64,162 @@ class ProductStock(models.Model):
         auto_now_add=True
     )
 
+    objects = ProductStockQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Остаток товара'
         verbose_name_plural = 'Остатки товаров'
         ordering = ['-updated_at']
+        indexes = [
+            models.Index(fields=['-updated_at', 'id']),
+        ]
     
     def __str__(self):
         return f"Остатки {self.product.article}"
     
     def get_total_reserved(self):
         """Общее количество в резерве"""
-        return self.reserved_wb + self.reserved_ozon + self.reserved_yandex
-    
+        return self.reserved_quantity
+
     def get_actual_available(self):
         """Фактически доступный остаток (доступный - резерв)"""
         return max(0, self.available_quantity - self.get_total_reserved())
     
-    def is_low_stock(self, threshold=10):
+    def is_low_stock(self, threshold=LOW_STOCK_THRESHOLD):
         """Проверка на низкий остаток"""
-        return self.get_actual_available() <= threshold
\ No newline at end of file
+        return self.get_actual_available() <= threshold
+
+
+class StockReservation(models.Model):
+    """
+    Журнал резервов (только добавление записей).
+
+    На одну пару (заказ, товар) приходится не больше одной записи каждого
+    вида, поэтому повторная обработка того же заказа ничего не меняет.
+    Резерв пишется с положительным количеством, снятие и отмена с
+    отрицательным. Сумма по товару хранится в ProductStock.reserved_quantity.
+    """
+
+    class Kind(models.TextChoices):
+        RESERVE = 'reserve', 'Резерв'
+        RELEASE = 'release', 'Снятие резерва (отгрузка)'
+        CANCEL = 'cancel', 'Отмена резерва'
+
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='reservations',
+        verbose_name='Товар'
+    )
+
+    marketplace = models.ForeignKey(
+        'marketplace.Marketplace',
+        on_delete=models.CASCADE,
+        related_name='stock_reservations',
+        verbose_name='Маркетплейс'
+    )
+
+    order = models.ForeignKey(
+        'order.Order',
+        on_delete=models.CASCADE,
+        related_name='stock_reservations',
+        verbose_name='Заказ'
+    )
+
+    kind = models.CharField(
+        verbose_name='Операция',
+        max_length=10,
+        choices=Kind.choices
+    )
+
+    quantity = models.IntegerField(
+        verbose_name='Изменение резерва'
+    )
+
+    created_at = models.DateTimeField(
+        verbose_name='Дата создания',
+        auto_now_add=True
+    )
+
+    class Meta:
+        verbose_name = 'Запись журнала резервов'
+        verbose_name_plural = 'Журнал резервов'
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['product', 'marketplace', 'order', 'kind'],
+                name='stock_reservation_unique_entry'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.quantity} шт. {self.product_id} по заказу {self.order_id}"
+
+
+class StockShortage(models.Model):
+    """
+    Резерв, который не удалось поставить: товара меньше, чем в заказе.
+
+    Запись создаётся ReservationLedgerService вместо резерва и закрывается
+    (resolved_at), когда резерв по той же паре (заказ, товар) всё же
+    применён - например, при следующей смене статуса заказа.
+    """
+
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='stock_shortages',
+        verbose_name='Товар'
+    )
+
+    marketplace = models.ForeignKey(
+        'marketplace.Marketplace',
+        on_delete=models.CASCADE,
+        related_name='stock_shortages',
+        verbose_name='Маркетплейс'
+    )
+
+    order = models.ForeignKey(
+        'order.Order',
+        on_delete=models.CASCADE,
+        related_name='stock_shortages',
+        verbose_name='Заказ'
+    )
+
+    required = models.PositiveIntegerField(
+        verbose_name='Требуется'
+    )
+
+    available = models.PositiveIntegerField(
+        verbose_name='Было доступно'
+    )
+
+    created_at = models.DateTimeField(
+        verbose_name='Дата создания',
+        auto_now_add=True
+    )
+
+    updated_at = models.DateTimeField(
+        verbose_name='Дата обновления',
+        auto_now=True
+    )
+
+    resolved_at = models.DateTimeField(
+        verbose_name='Резерв применён',
+        null=True,
+        blank=True
+    )
+
+    class Meta:
+        verbose_name = 'Нехватка остатка'
+        verbose_name_plural = 'Нехватка остатков'
+        ordering = ['-updated_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['order', 'product'],
+                name='stock_shortage_unique_order_product'
+            ),
+        ]
+
+    def __str__(self):
+        return f"Нехватка {self.product_id} по заказу {self.order_id}: {self.available} из {self.required}"
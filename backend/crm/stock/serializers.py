@@ -5,7 +5,10 @@ from product.serializers import ProductListSerializer
 class ProductStockSerializer(serializers.ModelSerializer):
     """Сериализатор для остатков товара"""
     product_info = ProductListSerializer(source='product', read_only=True)
-    total_reserved = serializers.ReadOnlyField()
+    total_reserved = serializers.IntegerField(source='reserved_quantity', read_only=True)
+    reserved_wb = serializers.IntegerField(read_only=True, default=0)
+    reserved_ozon = serializers.IntegerField(read_only=True, default=0)
+    reserved_yandex = serializers.IntegerField(read_only=True, default=0)
     actual_available = serializers.ReadOnlyField()
     is_low_stock = serializers.ReadOnlyField()
     
@@ -13,11 +16,12 @@ class ProductStockSerializer(serializers.ModelSerializer):
         model = ProductStock
         fields = [
             'id', 'product', 'product_info',
-            'available_quantity', 'reserved_wb', 'reserved_ozon', 'reserved_yandex',
+            'available_quantity', 'reserved_quantity',
+            'reserved_wb', 'reserved_ozon', 'reserved_yandex',
             'total_reserved', 'actual_available', 'is_low_stock',
             'updated_at', 'created_at'
         ]
-        read_only_fields = ['product', 'updated_at', 'created_at']
+        read_only_fields = ['product', 'reserved_quantity', 'updated_at', 'created_at']
 
 class BulkStockUpdateSerializer(serializers.Serializer):
     """Сериализатор для массового обновления остатков через файл"""
@@ -33,6 +37,4 @@ class StockUpdateSerializer(serializers.ModelSerializer):
     """Сериализатор для обновления остатков конкретного товара"""
     class Meta:
         model = ProductStock
-        fields = [
-            'available_quantity', 'reserved_wb', 'reserved_ozon', 'reserved_yandex'
-        ]
\ No newline at end of file
+        fields = ['available_quantity']
\ No newline at end of file
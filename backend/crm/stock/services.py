@@ -0,0 +1,269 @@
+# stock/services.py
+import logging
+from collections import defaultdict
+from typing import Iterable, List, Set
+from django.db import transaction
+from django.utils import timezone
+from product.models import Product
+from .models import ProductStock, StockReservation, StockShortage
+
+logger = logging.getLogger(__name__)
+
+
+class ReservationLedgerService:
+    """Применение записей журнала резервов к остаткам"""
+
+    @staticmethod
+    def apply(entries: Iterable[StockReservation]) -> Set[int]:
+        """
+        Идемпотентно применяет записи журнала и пересчитывает агрегаты.
+
+        Записи передаются несохранёнными: product_id, marketplace_id,
+        order_id, kind и quantity (для резерва). Для снятия и отмены
+        количество берётся из исходного резерва. Уже применённые записи и
+        снятие без резерва пропускаются. Резерв, на который не хватает
+        доступного остатка, не ставится и записывается в StockShortage (запись
+        закрывается, когда резерв по заказу всё же применён); пачка при этом
+        не прерывается. Возвращает id товаров, у которых изменились остатки.
+        """
+        entries = list(entries)
+        if not entries:
+            return set()
+
+        product_ids = {entry.product_id for entry in entries}
+        order_ids = {entry.order_id for entry in entries}
+
+        with transaction.atomic():
+            stocks = ReservationLedgerService._lock_stocks(product_ids)
+
+            # Текущее состояние журнала по затронутым парам (заказ, товар)
+            applied_kinds = defaultdict(set)
+            reserved = {}
+            for order_id, product_id, kind, quantity in StockReservation.objects.filter(
+                order_id__in=order_ids,
+                product_id__in=product_ids
+            ).values_list('order_id', 'product_id', 'kind', 'quantity'):
+                applied_kinds[(order_id, product_id)].add(kind)
+                if kind == StockReservation.Kind.RESERVE:
+                    reserved[(order_id, product_id)] = quantity
+
+            open_shortages = dict(
+                ((order_id, product_id), pk)
+                for order_id, product_id, pk in StockShortage.objects.filter(
+                    order_id__in=order_ids,
+                    resolved_at__isnull=True
+                ).values_list('order_id', 'product_id', 'pk')
+            )
+
+            accepted: List[StockReservation] = []
+            shortages = {}
+            changed = set()
+
+            for entry in entries:
+                key = (entry.order_id, entry.product_id)
+                kinds = applied_kinds[key]
+                stock = stocks[entry.product_id]
+
+                if entry.kind == StockReservation.Kind.RESERVE:
+                    if StockReservation.Kind.RESERVE in kinds:
+                        continue
+                    if stock.available_quantity < entry.quantity:
+                        logger.warning(
+                            f"Недостаточно товара {entry.product_id} для заказа {entry.order_id}. "
+                            f"Доступно: {stock.available_quantity}, требуется: {entry.quantity}"
+                        )
+                        shortages[key] = StockShortage(
+                            product_id=entry.product_id,
+                            marketplace_id=entry.marketplace_id,
+                            order_id=entry.order_id,
+                            required=entry.quantity,
+                            available=stock.available_quantity,
+                            resolved_at=None,
+                        )
+                        continue
+                    stock.available_quantity -= entry.quantity
+                    stock.reserved_quantity += entry.quantity
+                    reserved[key] = entry.quantity
+                else:
+                    if (StockReservation.Kind.RESERVE not in kinds or
+                            StockReservation.Kind.RELEASE in kinds or
+                            StockReservation.Kind.CANCEL in kinds):
+                        continue
+                    quantity = reserved[key]
+                    entry.quantity = -quantity
+                    stock.reserved_quantity = max(0, stock.reserved_quantity - quantity)
+                    if entry.kind == StockReservation.Kind.CANCEL:
+                        stock.available_quantity += quantity
+
+                kinds.add(entry.kind)
+                accepted.append(entry)
+                changed.add(entry.product_id)
+
+            if shortages:
+                StockShortage.objects.bulk_create(
+                    shortages.values(),
+                    update_conflicts=True,
+                    unique_fields=['order', 'product'],
+                    update_fields=['required', 'available', 'resolved_at', 'updated_at'],
+                )
+
+            if not accepted:
+                return set()
+
+            StockReservation.objects.bulk_create(accepted)
+
+            resolved = [
+                open_shortages[(entry.order_id, entry.product_id)]
+                for entry in accepted
+                if entry.kind == StockReservation.Kind.RESERVE and (entry.order_id, entry.product_id) in open_shortages
+            ]
+            if resolved:
+                StockShortage.objects.filter(pk__in=resolved).update(resolved_at=timezone.now())
+
+            now = timezone.now()
+            changed_stocks = [stocks[product_id] for product_id in changed]
+            for stock in changed_stocks:
+                stock.updated_at = now
+            ProductStock.objects.bulk_update(
+                changed_stocks,
+                ['available_quantity', 'reserved_quantity', 'updated_at']
+            )
+
+        return changed
+
+    @staticmethod
+    def _lock_stocks(product_ids):
+        """
+        Блокирует строки остатков, создавая недостающие.
+
+        Строки блокируются по возрастанию product_id: сортировка модели по
+        updated_at меняется при каждой записи, и параллельные транзакции
+        (шарды, вебхуки) брали бы блокировки в разном порядке - взаимоблокировка.
+        """
+        stocks = {
+            stock.product_id: stock
+            for stock in ProductStock.objects.select_for_update(of=('self',)).select_related(
+                'product'
+            ).filter(product_id__in=product_ids).order_by('product_id')
+        }
+        missing = product_ids - stocks.keys()
+        if missing:
+            ProductStock.objects.bulk_create(
+                [ProductStock(product_id=product_id) for product_id in sorted(missing)],
+                ignore_conflicts=True
+            )
+            stocks.update({
+                stock.product_id: stock
+                for stock in ProductStock.objects.select_for_update(of=('self',)).select_related(
+                    'product'
+                ).filter(product_id__in=missing).order_by('product_id')
+            })
+        return stocks
+
+
+class StockImportService:
+    """Загрузка остатков из файла (строки с article и available_quantity)"""
+
+    @staticmethod
+    def to_json_rows(rows: List[dict]) -> List[dict]:
+        """Строки DataFrame без numpy-типов и NaN - для передачи в фоновую задачу (jsonb не принимает NaN)"""
+        return [
+            {key: StockImportService._json_value(value) for key, value in row.items()}
+            for row in rows
+        ]
+
+    @staticmethod
+    def _json_value(value):
+        if hasattr(value, 'item'):
+            value = value.item()
+        # NaN и NaT не равны сами себе: пустая ячейка числовой колонки
+        if value != value:
+            return None
+        return value
+
+    @staticmethod
+    def import_rows(df_data: List[dict]) -> dict:
+        """Обновляет остатки по строкам файла; номера строк в ошибках - как в файле (с заголовком)"""
+        results = {
+            'success': 0,
+            'errors': [],
+            'updated': []
+        }
+
+        with transaction.atomic():
+            for index, row in enumerate(df_data, start=2):
+                try:
+                    article = str(row['article']).strip() if row['article'] else None
+                    if not article:
+                        results['errors'].append(f"Строка {index}: пустой артикул")
+                        continue
+
+                    try:
+                        stock = ProductStock.objects.select_related('product').get(
+                            product__article=article
+                        )
+
+                    except ProductStock.DoesNotExist:
+                        error_msg = f"Товар с артикулом '{article}' не найден в остатках"
+                        results['errors'].append(f"Строка {index}: {error_msg}")
+
+                        product_exists = Product.objects.filter(article=article).exists()
+                        if product_exists:
+                            try:
+                                product = Product.objects.get(article=article)
+                                stock = ProductStock.objects.create(
+                                    product=product,
+                                    available_quantity=0
+                                )
+                            except Exception as e:
+                                pass
+                        continue
+
+                    available_quantity = row['available_quantity']
+                    if available_quantity is None:
+                        results['errors'].append(f"Строка {index}, артикул {article}: пустое значение количества")
+                        continue
+
+                    try:
+                        if isinstance(available_quantity, (int, float)):
+                            quantity = int(available_quantity)
+                        elif isinstance(available_quantity, str):
+                            cleaned_value = available_quantity.strip().replace(' ', '')
+                            if not cleaned_value:
+                                results['errors'].append(f"Строка {index}, артикул {article}: пустое значение количества")
+                                continue
+                            quantity = int(float(cleaned_value))
+                        else:
+                            results['errors'].append(f"Строка {index}, артикул {article}: неверный формат количества")
+                            continue
+
+                        if quantity < 0:
+                            results['errors'].append(f"Строка {index}, артикул {article}: количество не может быть отрицательным")
+                            continue
+
+                        old_quantity = stock.available_quantity
+                        stock.available_quantity = quantity
+                        stock.save()
+
+                        stock.refresh_from_db()
+
+                        if stock.available_quantity == quantity:
+                            results['success'] += 1
+                            results['updated'].append({
+                                'article': article,
+                                'available_quantity': quantity,
+                                'previous_quantity': old_quantity,
+                                'product_name': stock.product.name
+                            })
+                        else:
+                            error_msg = f"Не удалось обновить остаток"
+                            results['errors'].append(f"Строка {index}: {error_msg}")
+
+                    except (ValueError, TypeError) as e:
+                        results['errors'].append(f"Строка {index}, артикул {article}: неверное значение количества '{available_quantity}'")
+
+                except Exception as e:
+                    error_msg = f"Строка {index}, артикул {article}: {str(e)}"
+                    results['errors'].append(error_msg)
+
+        return results
@@ -14,4 +14,4 @@ def create_product_stock(sender, instance, created, **kwargs):
 def sync_stock_to_marketplaces(sender, instance, **kwargs):
     """Автоматическая синхронизация остатков с маркетплейсами при изменении"""
     if not kwargs.get('created', False): 
-        MarketplaceStockService.sync_stock_to_marketplaces(instance)
\ No newline at end of file
+        MarketplaceStockService.sync_changed_stock(instance)
\ No newline at end of file
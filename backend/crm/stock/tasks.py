@@ -0,0 +1,13 @@
+from jobs.queue import task
+from .services import StockImportService
+
+
+@task('stock.import_rows', queue='imports', max_attempts=1, timeout=3600)
+def import_rows(rows):
+    """Загрузка остатков из большого файла (см. ProductStockViewSet.bulk_update)"""
+    results = StockImportService.import_rows(rows)
+    return {
+        'success': results['success'],
+        'errors': results['errors'],
+        'updated': len(results['updated']),
+    }
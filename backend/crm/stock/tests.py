@@ -1,3 +1,127 @@
 from django.test import TestCase
+from marketplace.models import Marketplace
+from order.models import Order
+from product.models import Country, Product, ProductDirection
+from .models import ProductStock, StockReservation, StockShortage
+from .services import ReservationLedgerService
 
-# Create your tests here.
+
+class ReservationLedgerServiceTests(TestCase):
+    """Применение журнала резервов: идемпотентность и учёт нехватки"""
+
+    @classmethod
+    def setUpTestData(cls):
+        country = Country.objects.create(code='TST', name='Тест')
+        direction = ProductDirection.objects.create(code='test', name='Тест')
+        # ProductStock создаётся сигналом при создании товара
+        cls.product = Product.objects.create(
+            article='LEDGER-1', name='Товар', country=country, direction=direction
+        )
+        ProductStock.objects.filter(product=cls.product).update(available_quantity=10)
+        cls.marketplace = Marketplace.objects.create(code='ozon', name='OZON')
+        cls.order = Order.objects.create(
+            external_id='ledger-1', number='1', posting_number='1', marketplace=cls.marketplace
+        )
+
+    def entry(self, kind, quantity=3, order=None):
+        return StockReservation(
+            product_id=self.product.pk,
+            marketplace_id=self.marketplace.pk,
+            order_id=(order or self.order).pk,
+            kind=kind,
+            quantity=quantity,
+        )
+
+    def assertStock(self, available, reserved):
+        stock = ProductStock.objects.get(product=self.product)
+        self.assertEqual((stock.available_quantity, stock.reserved_quantity), (available, reserved))
+
+    def test_reserve(self):
+        changed = ReservationLedgerService.apply([self.entry(StockReservation.Kind.RESERVE)])
+        self.assertEqual(changed, {self.product.pk})
+        self.assertStock(available=7, reserved=3)
+
+    def test_reserve_applied_twice_counts_once(self):
+        ReservationLedgerService.apply([self.entry(StockReservation.Kind.RESERVE)])
+        changed = ReservationLedgerService.apply([self.entry(StockReservation.Kind.RESERVE)])
+        self.assertEqual(changed, set())
+        self.assertStock(available=7, reserved=3)
+        self.assertEqual(StockReservation.objects.filter(order=self.order).count(), 1)
+
+    def test_reserve_duplicated_in_one_batch_counts_once(self):
+        ReservationLedgerService.apply([
+            self.entry(StockReservation.Kind.RESERVE), self.entry(StockReservation.Kind.RESERVE)
+        ])
+        self.assertStock(available=7, reserved=3)
+
+    def test_cancel_returns_stock(self):
+        ReservationLedgerService.apply([self.entry(StockReservation.Kind.RESERVE)])
+        ReservationLedgerService.apply([self.entry(StockReservation.Kind.CANCEL)])
+        self.assertStock(available=10, reserved=0)
+        cancel = StockReservation.objects.get(order=self.order, kind=StockReservation.Kind.CANCEL)
+        self.assertEqual(cancel.quantity, -3)
+
+    def test_release_keeps_stock_shipped(self):
+        ReservationLedgerService.apply([self.entry(StockReservation.Kind.RESERVE)])
+        ReservationLedgerService.apply([self.entry(StockReservation.Kind.RELEASE)])
+        self.assertStock(available=7, reserved=0)
+
+    def test_release_or_cancel_after_release_is_skipped(self):
+        ReservationLedgerService.apply([self.entry(StockReservation.Kind.RESERVE)])
+        ReservationLedgerService.apply([self.entry(StockReservation.Kind.RELEASE)])
+        changed = ReservationLedgerService.apply([
+            self.entry(StockReservation.Kind.RELEASE), self.entry(StockReservation.Kind.CANCEL)
+        ])
+        self.assertEqual(changed, set())
+        self.assertStock(available=7, reserved=0)
+
+    def test_release_without_reserve_is_skipped(self):
+        changed = ReservationLedgerService.apply([
+            self.entry(StockReservation.Kind.RELEASE), self.entry(StockReservation.Kind.CANCEL)
+        ])
+        self.assertEqual(changed, set())
+        self.assertStock(available=10, reserved=0)
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_shortage_recorded_instead_of_reserve(self):
+        changed = ReservationLedgerService.apply([self.entry(StockReservation.Kind.RESERVE, quantity=15)])
+        self.assertEqual(changed, set())
+        self.assertStock(available=10, reserved=0)
+        shortage = StockShortage.objects.get(order=self.order, product=self.product)
+        self.assertEqual((shortage.required, shortage.available), (15, 10))
+        self.assertIsNone(shortage.resolved_at)
+
+    def test_repeated_shortage_updates_one_record(self):
+        ReservationLedgerService.apply([self.entry(StockReservation.Kind.RESERVE, quantity=15)])
+        ProductStock.objects.filter(product=self.product).update(available_quantity=12)
+        ReservationLedgerService.apply([self.entry(StockReservation.Kind.RESERVE, quantity=15)])
+        shortage = StockShortage.objects.get(order=self.order, product=self.product)
+        self.assertEqual(shortage.available, 12)
+
+    def test_shortage_resolved_once_stock_arrives(self):
+        ReservationLedgerService.apply([self.entry(StockReservation.Kind.RESERVE, quantity=15)])
+        ProductStock.objects.filter(product=self.product).update(available_quantity=20)
+        changed = ReservationLedgerService.apply([self.entry(StockReservation.Kind.RESERVE, quantity=15)])
+        self.assertEqual(changed, {self.product.pk})
+        self.assertStock(available=5, reserved=15)
+        shortage = StockShortage.objects.get(order=self.order, product=self.product)
+        self.assertIsNotNone(shortage.resolved_at)
+
+    def test_shortage_does_not_stop_batch(self):
+        other_order = Order.objects.create(
+            external_id='ledger-2', number='2', posting_number='2', marketplace=self.marketplace
+        )
+        ReservationLedgerService.apply([
+            self.entry(StockReservation.Kind.RESERVE, quantity=15),
+            self.entry(StockReservation.Kind.RESERVE, quantity=4, order=other_order),
+        ])
+        self.assertStock(available=6, reserved=4)
+        self.assertTrue(StockShortage.objects.filter(order=self.order).exists())
+        self.assertFalse(StockShortage.objects.filter(order=other_order).exists())
+
+    def test_missing_stock_row_is_created(self):
+        ProductStock.objects.filter(product=self.product).delete()
+        changed = ReservationLedgerService.apply([self.entry(StockReservation.Kind.RESERVE, quantity=1)])
+        self.assertEqual(changed, set())
+        self.assertStock(available=0, reserved=0)
+        self.assertTrue(StockShortage.objects.filter(order=self.order).exists())
@@ -2,34 +2,49 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db import transaction
 import pandas as pd
+from django.conf import settings
 from django.http import HttpResponse
-from product.models import Product
-from stock.models import ProductStock
+from jobs.queue import enqueue, jobs_enabled
+from stock.models import ProductStock, LOW_STOCK_THRESHOLD
 from .models import ProductStock
+from .services import StockImportService
 from .serializers import (
     ProductStockSerializer, 
     StockUpdateSerializer,
     BulkStockUpdateSerializer
 )
 from users.permissions import IsWarehouseManager, IsManager
-from rest_framework.pagination import PageNumberPagination
+from api.pagination import CursorOptInPagination
+from api.fastpath import FastPathListMixin
+from api.renderers import FastJSONRenderer
+from rest_framework.renderers import BrowsableAPIRenderer
 
-class ProductStockPagination(PageNumberPagination):
+class ProductStockPagination(CursorOptInPagination):
     page_size = 50
     page_size_query_param = 'page_size'
     max_page_size = 100
+    # updated_at меняется при каждом резерве - курсор только по неизменяемому id
+    cursor_ordering = ('id',)
 
-class ProductStockViewSet(viewsets.ModelViewSet):
+class ProductStockViewSet(FastPathListMixin, viewsets.ModelViewSet):
     """ViewSet для управления остатками товаров"""
     queryset = ProductStock.objects.all().select_related('product')
     serializer_class = ProductStockSerializer
     permission_classes = [IsWarehouseManager | IsManager]
     pagination_class = ProductStockPagination
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+
+    # is_low_stock - метод модели, в быстром пути считается по колонкам
+    fast_path_computed = {
+        'is_low_stock': (
+            ('available_quantity', 'reserved_quantity'),
+            lambda row: max(0, row['available_quantity'] - row['reserved_quantity']) <= LOW_STOCK_THRESHOLD
+        ),
+    }
     
     def get_queryset(self):
-        queryset = super().get_queryset()
+        queryset = super().get_queryset().with_marketplace_reserves()
         
         article = self.request.query_params.get('article')
         if article:
@@ -37,7 +52,7 @@ class ProductStockViewSet(viewsets.ModelViewSet):
         
         low_stock = self.request.query_params.get('low_stock')
         if low_stock == 'true':
-            queryset = [stock for stock in queryset if stock.is_low_stock()]
+            queryset = queryset.low_stock()
         
         return queryset
     
@@ -109,12 +124,6 @@ class ProductStockViewSet(viewsets.ModelViewSet):
         
         uploaded_file = request.FILES['file']
         
-        results = {
-            'success': 0,
-            'errors': [],
-            'updated': []
-        }
-        
         try:
             if uploaded_file.name.endswith('.csv'):
                 file_content = uploaded_file.read().decode('utf-8')
@@ -171,84 +180,15 @@ class ProductStockViewSet(viewsets.ModelViewSet):
                 if df[col].dtype == 'object':
                     df[col] = df[col].apply(lambda x: x.strip() if isinstance(x, str) else x)
             
-            df_data = df.to_dict('records')
+            # Пустые ячейки числовых колонок остаются NaN - приводим к None для обоих путей
+            df_data = StockImportService.to_json_rows(df.to_dict('records'))
             
-            with transaction.atomic():
-                for index, row in enumerate(df_data, start=2):
-                    try:
-                        article = str(row['article']).strip() if row['article'] else None
-                        if not article:
-                            results['errors'].append(f"Строка {index}: пустой артикул")
-                            continue
+            if jobs_enabled() and len(df_data) > settings.STOCK_IMPORT_ASYNC_ROWS:
+                # Большие файлы обрабатываются воркером очереди, ответ - ID задачи
+                job = enqueue('stock.import_rows', {'rows': df_data})
+                return Response({'job_id': job.pk, 'rows': len(df_data)}, status=status.HTTP_202_ACCEPTED)
 
-                        try:
-                            stock = ProductStock.objects.select_related('product').get(
-                                product__article=article
-                            )
-  
-                        except ProductStock.DoesNotExist:
-                            error_msg = f"Товар с артикулом '{article}' не найден в остатках"
-                            results['errors'].append(f"Строка {index}: {error_msg}")
-
-                            product_exists = Product.objects.filter(article=article).exists()
-                            if product_exists:
-                                try:
-                                    product = Product.objects.get(article=article)
-                                    stock = ProductStock.objects.create(
-                                        product=product,
-                                        available_quantity=0
-                                    )
-                                except Exception as e:
-                                    pass
-                            continue
-                        
-                        available_quantity = row['available_quantity']
-                        if available_quantity is None:
-                            results['errors'].append(f"Строка {index}, артикул {article}: пустое значение количества")
-                            continue
-                        
-                        try:
-                            if isinstance(available_quantity, (int, float)):
-                                quantity = int(available_quantity)
-                            elif isinstance(available_quantity, str):
-                                cleaned_value = available_quantity.strip().replace(' ', '')
-                                if not cleaned_value:
-                                    results['errors'].append(f"Строка {index}, артикул {article}: пустое значение количества")
-                                    continue
-                                quantity = int(float(cleaned_value))
-                            else:
-                                results['errors'].append(f"Строка {index}, артикул {article}: неверный формат количества")
-                                continue
-                            
-                            if quantity < 0:
-                                results['errors'].append(f"Строка {index}, артикул {article}: количество не может быть отрицательным")
-                                continue
-    
-                            old_quantity = stock.available_quantity
-                            stock.available_quantity = quantity
-                            stock.save()
-                            
-                            stock.refresh_from_db()
-                            
-                            if stock.available_quantity == quantity:
-                                results['success'] += 1
-                                results['updated'].append({
-                                    'article': article,
-                                    'available_quantity': quantity,
-                                    'previous_quantity': old_quantity,
-                                    'product_name': stock.product.name
-                                })
-                            else:
-                                error_msg = f"Не удалось обновить остаток"
-                                results['errors'].append(f"Строка {index}: {error_msg}")
-                            
-                        except (ValueError, TypeError) as e:
-                            results['errors'].append(f"Строка {index}, артикул {article}: неверное значение количества '{available_quantity}'")
-                        
-                    except Exception as e:
-                        error_msg = f"Строка {index}, артикул {article}: {str(e)}"
-                        results['errors'].append(error_msg)
-                 
+            results = StockImportService.import_rows(df_data)
             return Response(results)
             
         except Exception as e:
@@ -274,6 +214,6 @@ class ProductStockViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def low_stock(self, request):
         """Получить товары с низким остатком"""
-        low_stock_items = [stock for stock in self.get_queryset() if stock.is_low_stock()]
+        low_stock_items = self.get_queryset().low_stock()
         serializer = self.get_serializer(low_stock_items, many=True)
         return Response(serializer.data)
\ No newline at end of file
@@ -6,7 +6,7 @@ from django.contrib.auth import authenticate
 from .models import CustomUser
 
 class UserSerializer(serializers.ModelSerializer):
-    avatar_url = serializers.SerializerMethodField()
+    avatar_url = serializers.ImageField(source='avatar', read_only=True)
 
     class Meta:
         model = CustomUser
@@ -15,14 +15,6 @@ class UserSerializer(serializers.ModelSerializer):
                  'employment_date', 'avatar', 'avatar_url')
         read_only_fields = ('id',)
 
-    def get_avatar_url(self, obj):
-        if obj.avatar and hasattr(obj.avatar, 'url'):
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.avatar.url)
-            return obj.avatar.url
-        return None
-
 class UserLoginSerializer(serializers.Serializer):
     email = serializers.EmailField()
     password = serializers.CharField()
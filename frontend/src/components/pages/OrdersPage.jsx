@@ -53,6 +53,8 @@ const OrdersPage = () => {
       setPagination({
         currentPage: page,
         total: response.data.count,
+        // count ограничен сервером (CappedCountPaginator): точное число заказов больше
+        countCapped: Boolean(response.data.count_capped),
         next: response.data.next,
         previous: response.data.previous
       });
@@ -205,7 +207,8 @@ const OrdersPage = () => {
     </button>
     
     <span className="text-white">
-      Страница {pagination.currentPage} из {Math.ceil(pagination.total / 25)}
+      Страница {pagination.currentPage} из {Math.ceil(pagination.total / 25)}{pagination.countCapped ? '+' : ''}
+      {pagination.countCapped && ` (заказов больше ${pagination.total}, уточните фильтры)`}
     </span>
     
     <button